@@ -0,0 +1,293 @@
+"""
+Envoi groupé des emails transactionnels (vérification, réinitialisation du
+mot de passe, bienvenue).
+
+Les tâches ne rendent ni n'envoient rien elles-mêmes : ``enqueue_email``
+place une description du message (type, utilisateur, jeton) dans une file,
+et ``authentication.tasks.flush_email_queue`` la vide par lots sur une seule
+connexion SMTP (``get_connection()`` + ``send_messages``).
+
+- ``redis`` : liste Redis partagée ; une vidange est programmée quelques
+  secondes après le premier message mis en file (``EMAIL_QUEUE_DELAY``),
+  le temps d'accumuler un lot ;
+- ``direct`` : pas de file partagée, le message part aussitôt, dans le
+  processus appelant (développement).
+
+Chaque gabarit n'est compilé qu'une fois par processus. Il est rendu une fois
+par « forme » de contexte (quelles variables du destinataire sont vides) avec
+des marqueurs à la place des valeurs propres au destinataire ; la version
+texte est dérivée de ce rendu une seule fois. Pour chaque message, il ne
+reste qu'à substituer les marqueurs. Les variables du destinataire
+(``RECIPIENT_FIELDS``) doivent donc être affichées telles quelles dans les
+gabarits, sans filtre qui les transforme, et les valeurs variables dans le
+temps (l'année) sont passées dans le contexte du site, qui fait partie de la
+clé du cache, plutôt que calculées par le gabarit.
+
+Dans un lot, les messages partent un par un sur la même connexion : si le
+serveur SMTP échoue en cours de lot, seuls les messages non envoyés sont
+remis en file, et aucun destinataire ne reçoit deux fois le même email.
+"""
+
+import logging
+import re
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+
+from helpers.redis_list import RedisListQueue
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "authentication:email-queue"
+# Clé de cache présente tant qu'une vidange est programmée
+FLUSH_KEY = "authentication:email-flush-scheduled"
+
+# Type d'email -> (gabarit, sujet)
+EMAIL_KINDS = {
+    "verification": (
+        "authentication/emails/verification_email.html",
+        "Vérifiez votre compte - {site_name}",
+    ),
+    "password_reset": (
+        "authentication/emails/password_reset_email.html",
+        "Réinitialisation de mot de passe - {site_name}",
+    ),
+    "welcome": (
+        "authentication/emails/welcome_email.html",
+        "Bienvenue sur {site_name}!",
+    ),
+}
+# Variables propres à chaque destinataire, substituées après le rendu
+RECIPIENT_FIELDS = ("first_name", "username", "token")
+MARKER = re.compile(r"@@(first_name|username|token)@@")
+
+
+def _marker(field):
+    return f"@@{field}@@"
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    """Gabarit compilé, une fois par processus"""
+    return get_template(name)
+
+
+def _site_context():
+    site_url = settings.SITE_URL.rstrip("/")
+    return {
+        "site_name": settings.SITE_NAME,
+        "site_url": site_url,
+        "login_url": f"{site_url}/login",
+        "year": timezone.localdate().year,
+    }
+
+
+@lru_cache(maxsize=256)
+def _skeleton(kind, shape, site):
+    """
+    Rendu HTML et texte d'un type d'email pour une forme de contexte, avec
+    des marqueurs à la place des variables du destinataire.
+    """
+    present = dict(shape)
+    values = {
+        field: _marker(field) if present[field] else "" for field in RECIPIENT_FIELDS
+    }
+    context = dict(site)
+    context.update(
+        user={"first_name": values["first_name"], "username": values["username"]},
+        token=values["token"],
+        verification_token=values["token"],
+        reset_token=values["token"],
+    )
+    html = _template(EMAIL_KINDS[kind][0]).render(context)
+    return html, strip_tags(html)
+
+
+def render_email(kind, values):
+    """
+    Sujet, texte et HTML d'un email pour les valeurs d'un destinataire.
+
+    Returns:
+        tuple: ``(sujet, texte, html)``
+    """
+    site = _site_context()
+    shape = tuple((field, bool(values.get(field))) for field in RECIPIENT_FIELDS)
+    html, text = _skeleton(kind, shape, tuple(site.items()))
+    # Une seule passe : une valeur contenant un marqueur n'est pas réinterprétée
+    html = MARKER.sub(lambda m: escape(values[m[1]]), html)
+    text = MARKER.sub(lambda m: str(values[m[1]]), text)
+    subject = EMAIL_KINDS[kind][1].format(site_name=site["site_name"])
+    return subject, text, html
+
+
+class PartialSendError(Exception):
+    """
+    Envoi d'un lot interrompu par une erreur SMTP ; ``unsent`` liste les
+    descriptions des messages non envoyés, à partir de celui en échec
+    """
+
+    def __init__(self, sent, unsent, error):
+        super().__init__(f"{len(unsent)} emails non envoyés: {error}")
+        self.sent = sent
+        self.unsent = unsent
+
+
+def build_messages(specs):
+    """
+    Messages prêts à l'envoi pour des descriptions ``{"kind", "user_id",
+    "token"}``, les utilisateurs étant chargés en une requête. Les
+    utilisateurs disparus et les types inconnus sont ignorés.
+
+    Returns:
+        list: Couples ``(description, EmailMultiAlternatives)``
+    """
+    from django.contrib.auth import get_user_model
+
+    users = (
+        get_user_model()
+        .objects.only("pk", "email", "first_name", "username")
+        .in_bulk({spec["user_id"] for spec in specs})
+    )
+    messages = []
+    for spec in specs:
+        user = users.get(spec["user_id"])
+        if user is None or not user.email or spec["kind"] not in EMAIL_KINDS:
+            logger.warning(
+                f"Email {spec['kind']} ignoré: utilisateur {spec['user_id']} absent"
+            )
+            continue
+        subject, text, html = render_email(
+            spec["kind"],
+            {
+                "first_name": user.first_name,
+                "username": user.username,
+                "token": spec.get("token", ""),
+            },
+        )
+        message = EmailMultiAlternatives(
+            subject, text, settings.DEFAULT_FROM_EMAIL, [user.email]
+        )
+        message.attach_alternative(html, "text/html")
+        messages.append((spec, message))
+    return messages
+
+
+def _send_each(messages, connection):
+    sent = 0
+    for index, (_, message) in enumerate(messages):
+        try:
+            sent += connection.send_messages([message]) or 0
+        except Exception as e:
+            raise PartialSendError(
+                sent, [spec for spec, _ in messages[index:]], e
+            ) from e
+    return sent
+
+
+def send_batch(specs, connection=None):
+    """
+    Envoie un lot, message par message, sur la connexion donnée (ou sur une
+    nouvelle connexion).
+
+    Returns:
+        int: Nombre d'emails envoyés
+
+    Raises:
+        PartialSendError: si un envoi échoue en cours de lot
+    """
+    messages = build_messages(specs)
+    if not messages:
+        return 0
+    if connection is None:
+        with get_connection() as connection:
+            return _send_each(messages, connection)
+    return _send_each(messages, connection)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """File configurée par ``EMAIL_QUEUE`` (``None`` en mode direct)"""
+    global _queue
+    if settings.EMAIL_QUEUE != "redis":
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = RedisListQueue(settings.EMAIL_QUEUE_REDIS_URL, REDIS_KEY)
+    return _queue
+
+
+def schedule_flush():
+    """Programme une vidange de la file, au plus une par ``EMAIL_QUEUE_DELAY``"""
+    from django.core.cache import cache
+
+    from .tasks import flush_email_queue
+
+    delay = settings.EMAIL_QUEUE_DELAY
+    if cache.add(FLUSH_KEY, "1", timeout=delay):
+        try:
+            flush_email_queue.apply_async(countdown=delay)
+        except Exception as e:
+            # Les messages restent en file : la prochaine mise en file
+            # reprogrammera la vidange (pas de nouvelle tentative, qui les
+            # remettrait en file une seconde fois)
+            cache.delete(FLUSH_KEY)
+            logger.error(f"Vidange de la file d'emails non programmée: {e}")
+
+
+def enqueue_emails(kind, user_ids, token=""):
+    """
+    Met en file un email de type ``kind`` par utilisateur.
+
+    Returns:
+        int: Nombre d'emails mis en file (ou envoyés, en mode direct)
+    """
+    if kind not in EMAIL_KINDS:
+        raise ValueError(f"Type d'email inconnu: {kind}")
+    specs = [{"kind": kind, "user_id": user_id, "token": token} for user_id in user_ids]
+    if not specs:
+        return 0
+    queue = get_queue()
+    if queue is None:
+        return send_batch(specs)
+    queue.push(specs)
+    schedule_flush()
+    return len(specs)
+
+
+def enqueue_email(kind, user_id, token=""):
+    """Met en file un email de type ``kind`` pour un utilisateur"""
+    return enqueue_emails(kind, [user_id], token)
+
+
+def drain(queue, batch_size, connection):
+    """
+    Vide la file par lots de ``batch_size`` sur une même connexion. En cas
+    d'échec, les messages du lot non encore envoyés sont remis en tête de
+    file avant de propager l'erreur.
+
+    Returns:
+        int: Nombre d'emails envoyés
+    """
+    sent = 0
+    while True:
+        specs = queue.pop(batch_size)
+        if not specs:
+            return sent
+        try:
+            sent += send_batch(specs, connection)
+        except PartialSendError as e:
+            queue.requeue(e.unsent)
+            raise
+        except Exception:
+            # Échec avant tout envoi (base de données, gabarit...)
+            queue.requeue(specs)
+            raise
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_remove_social_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
+from helpers.image_variants import variant_urls
 
 
 class User(AbstractUser):
@@ -16,6 +17,8 @@ class User(AbstractUser):
     username = models.CharField(_("username"), max_length=150, unique=True)
     # La photo avatar reste dans le modèle User pour un accès facile dans l'UI
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    # Variantes WebP/JPEG redimensionnées de l'avatar (helpers.image_variants)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     # Email is the primary identifier for authentication
     USERNAME_FIELD = "email"
@@ -25,3 +28,15 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    @property
+    def avatar_urls(self):
+        """Retourne les URL de l'avatar, en préférant les variantes redimensionnées"""
+        if not self.avatar:
+            return {"original": "", "avatar": "", "thumbnail": ""}
+        variants = variant_urls(self.image_variants, ("avatar", "thumbnail"))
+        return {
+            "original": self.avatar.url,
+            "avatar": variants.get("avatar", self.avatar.url),
+            "thumbnail": variants.get("thumbnail", self.avatar.url),
+        }
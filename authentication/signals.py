@@ -2,6 +2,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
 from content.models import UserProfile
+from helpers.image_variants import schedule_image_variants
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -24,3 +25,11 @@ def save_user_profile(sender, instance, **kwargs):
     else:
         # Si le profil n'existe pas pour une raison quelconque, le créer
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def generate_avatar_variants(sender, instance, **kwargs):
+    """
+    Planifie la génération des variantes redimensionnées du nouvel avatar
+    """
+    schedule_image_variants(instance)
@@ -6,202 +6,171 @@ comme l'envoi d'emails de confirmation, de réinitialisation de mot de passe, et
 """
 
 from celery import shared_task
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.core.mail import get_connection
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.utils.html import strip_tags
 import logging
 
+from .mailer import (
+    FLUSH_KEY,
+    PartialSendError,
+    drain,
+    enqueue_email,
+    get_queue,
+    schedule_flush,
+    send_batch,
+)
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+def _enqueue(task, kind, user_id, token=""):
+    """Met un email en file, en réessayant si la file est indisponible"""
+    try:
+        enqueue_email(kind, user_id, token)
+    except Exception as exc:
+        logger.error(f"Erreur lors de la mise en file de l'email {kind}: {exc}")
+        # Retry avec backoff exponentiel
+        if task.request.retries < task.max_retries:
+            raise task.retry(countdown=60 * (2**task.request.retries), exc=exc)
+        return {
+            "status": "error",
+            "message": f"Échec après {task.max_retries} tentatives: {str(exc)}",
+        }
+
+    logger.info(f"Email {kind} mis en file pour l'utilisateur {user_id}")
+    return {
+        "status": "success",
+        "message": f"Email {kind} mis en file",
+        "user_id": user_id,
+    }
+
+
 @shared_task(bind=True, max_retries=3)
 def send_verification_email(self, user_id, verification_token):
     """
-    Envoie un email de vérification de compte
+    Envoie un email de vérification de compte (via la file d'envoi groupé)
 
     Args:
         user_id (int): ID de l'utilisateur
         verification_token (str): Token de vérification
 
     Returns:
-        dict: Résultat de l'envoi
+        dict: Résultat de la mise en file
     """
-    try:
-        user = User.objects.get(id=user_id)
-
-        # Préparer le contexte pour le template
-        context = {
-            "user": user,
-            "verification_token": verification_token,
-            "site_name": "Modern Blog Platform",
-            "domain": (
-                settings.ALLOWED_HOSTS[0]
-                if settings.ALLOWED_HOSTS
-                else "localhost:8000"
-            ),
-        }
+    return _enqueue(self, "verification", user_id, verification_token)
 
-        # Générer le contenu HTML et texte
-        html_message = render_to_string(
-            "authentication/emails/verification_email.html", context
-        )
-        plain_message = strip_tags(html_message)
-
-        # Envoyer l'email
-        send_mail(
-            subject="Vérifiez votre compte - Modern Blog Platform",
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-
-        logger.info(f"Email de vérification envoyé avec succès à {user.email}")
-        return {
-            "status": "success",
-            "message": f"Email de vérification envoyé à {user.email}",
-            "user_id": user_id,
-        }
 
-    except User.DoesNotExist:
-        logger.error(f"Utilisateur avec l'ID {user_id} n'existe pas")
-        return {
-            "status": "error",
-            "message": f"Utilisateur avec l'ID {user_id} n'existe pas",
-        }
+@shared_task(bind=True, max_retries=3)
+def send_password_reset_email(self, user_id, reset_token):
+    """
+    Envoie un email de réinitialisation de mot de passe (via la file d'envoi
+    groupé)
 
-    except Exception as exc:
-        logger.error(f"Erreur lors de l'envoi de l'email de vérification: {exc}")
-        # Retry avec backoff exponentiel
-        if self.request.retries < self.max_retries:
-            raise self.retry(countdown=60 * (2**self.request.retries), exc=exc)
+    Args:
+        user_id (int): ID de l'utilisateur
+        reset_token (str): Token de réinitialisation
 
-        return {
-            "status": "error",
-            "message": f"Échec de l'envoi après {self.max_retries} tentatives: {str(exc)}",
-        }
+    Returns:
+        dict: Résultat de la mise en file
+    """
+    return _enqueue(self, "password_reset", user_id, reset_token)
 
 
 @shared_task(bind=True, max_retries=3)
-def send_password_reset_email(self, user_id, reset_token):
+def send_welcome_email(self, user_id):
     """
-    Envoie un email de réinitialisation de mot de passe
+    Envoie un email de bienvenue après inscription (via la file d'envoi
+    groupé)
 
     Args:
         user_id (int): ID de l'utilisateur
-        reset_token (str): Token de réinitialisation
 
     Returns:
-        dict: Résultat de l'envoi
+        dict: Résultat de la mise en file
     """
-    try:
-        user = User.objects.get(id=user_id)
-
-        context = {
-            "user": user,
-            "reset_token": reset_token,
-            "site_name": "Modern Blog Platform",
-            "domain": (
-                settings.ALLOWED_HOSTS[0]
-                if settings.ALLOWED_HOSTS
-                else "localhost:8000"
-            ),
-        }
+    return _enqueue(self, "welcome", user_id)
 
-        html_message = render_to_string(
-            "authentication/emails/password_reset_email.html", context
-        )
-        plain_message = strip_tags(html_message)
-
-        send_mail(
-            subject="Réinitialisation de mot de passe - Modern Blog Platform",
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-
-        logger.info(f"Email de réinitialisation envoyé avec succès à {user.email}")
-        return {
-            "status": "success",
-            "message": f"Email de réinitialisation envoyé à {user.email}",
-            "user_id": user_id,
-        }
 
-    except User.DoesNotExist:
-        logger.error(f"Utilisateur avec l'ID {user_id} n'existe pas")
-        return {
-            "status": "error",
-            "message": f"Utilisateur avec l'ID {user_id} n'existe pas",
-        }
+@shared_task(bind=True, max_retries=5, acks_late=True)
+def flush_email_queue(self):
+    """
+    Vide la file d'emails par lots de ``EMAIL_BATCH_SIZE``, sur une seule
+    connexion SMTP. En cas d'échec, le lot en cours est remis en file et la
+    tâche réessaie plus tard.
 
+    Returns:
+        dict: Nombre d'emails envoyés
+    """
+    queue = get_queue()
+    if queue is None:
+        return {"status": "skipped", "reason": "direct"}
+    try:
+        with get_connection() as connection:
+            sent = drain(queue, settings.EMAIL_BATCH_SIZE, connection)
     except Exception as exc:
-        logger.error(f"Erreur lors de l'envoi de l'email de réinitialisation: {exc}")
+        logger.error(f"Erreur lors de l'envoi des emails en file: {exc}")
         if self.request.retries < self.max_retries:
-            raise self.retry(countdown=60 * (2**self.request.retries), exc=exc)
+            raise self.retry(countdown=30 * (2**self.request.retries), exc=exc)
+        return {"status": "error", "message": str(exc)}
 
-        return {
-            "status": "error",
-            "message": f"Échec de l'envoi après {self.max_retries} tentatives: {str(exc)}",
-        }
+    # Un message mis en file pendant la vidange, alors qu'elle était encore
+    # marquée programmée, doit déclencher la suivante
+    cache.delete(FLUSH_KEY)
+    if queue.size():
+        schedule_flush()
 
+    if sent:
+        logger.info(f"{sent} emails envoyés depuis la file")
+    return {"status": "success", "sent": sent}
 
-@shared_task(bind=True)
-def send_welcome_email(self, user_id):
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def send_bulk_email(self, kind, user_ids):
     """
-    Envoie un email de bienvenue après inscription
+    Campagne d'emails (rattrapage des emails de bienvenue, par exemple) :
+    envoi direct par lots de ``EMAIL_BATCH_SIZE`` sur une seule connexion,
+    sans passer par la file. Une nouvelle tentative reprend au premier
+    message non envoyé.
 
     Args:
-        user_id (int): ID de l'utilisateur
+        kind (str): Type d'email (``authentication.mailer.EMAIL_KINDS``)
+        user_ids (list): IDs des destinataires
 
     Returns:
-        dict: Résultat de l'envoi
+        dict: Nombre d'emails envoyés
     """
+    batch_size = settings.EMAIL_BATCH_SIZE
+    sent = done = 0
+    remaining = user_ids
     try:
-        user = User.objects.get(id=user_id)
-
-        context = {
-            "user": user,
-            "site_name": "Modern Blog Platform",
-            "login_url": f"{settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost:8000'}/login",
-        }
-
-        html_message = render_to_string(
-            "authentication/emails/welcome_email.html", context
-        )
-        plain_message = strip_tags(html_message)
-
-        send_mail(
-            subject="Bienvenue sur Modern Blog Platform!",
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-
-        logger.info(f"Email de bienvenue envoyé avec succès à {user.email}")
-        return {
-            "status": "success",
-            "message": f"Email de bienvenue envoyé à {user.email}",
-            "user_id": user_id,
-        }
-
-    except User.DoesNotExist:
-        logger.error(f"Utilisateur avec l'ID {user_id} n'existe pas")
-        return {
-            "status": "error",
-            "message": f"Utilisateur avec l'ID {user_id} n'existe pas",
-        }
-
+        with get_connection() as connection:
+            for done in range(0, len(user_ids), batch_size):
+                batch = user_ids[done : done + batch_size]
+                remaining = user_ids[done:]
+                sent += send_batch(
+                    [{"kind": kind, "user_id": pk} for pk in batch], connection
+                )
     except Exception as exc:
-        logger.error(f"Erreur lors de l'envoi de l'email de bienvenue: {exc}")
-        return {"status": "error", "message": f"Erreur lors de l'envoi: {str(exc)}"}
+        logger.error(f"Erreur lors de la campagne d'emails {kind}: {exc}")
+        if isinstance(exc, PartialSendError):
+            sent += exc.sent
+            remaining = [spec["user_id"] for spec in exc.unsent] + user_ids[
+                done + batch_size :
+            ]
+        if self.request.retries < self.max_retries:
+            raise self.retry(
+                countdown=60 * (2**self.request.retries),
+                exc=exc,
+                args=(),
+                kwargs={"kind": kind, "user_ids": remaining},
+            )
+        return {"status": "error", "sent": sent, "message": str(exc)}
+
+    logger.info(f"Campagne d'emails {kind}: {sent} emails envoyés")
+    return {"status": "success", "sent": sent}
 
 
 @shared_task
@@ -0,0 +1,212 @@
+# authentication/tests/test_mailer.py
+from datetime import date
+from unittest.mock import patch
+
+from celery.exceptions import Retry
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+from authentication import mailer
+from authentication.mailer import (
+    PartialSendError,
+    drain,
+    enqueue_email,
+    render_email,
+)
+from authentication.tasks import (
+    flush_email_queue,
+    send_bulk_email,
+    send_welcome_email,
+)
+
+User = get_user_model()
+
+
+class ListQueue:
+    """In-memory stand-in for the Redis queue"""
+
+    def __init__(self):
+        self.items = []
+
+    def push(self, specs):
+        self.items.extend(specs)
+
+    def pop(self, count):
+        batch, self.items = self.items[:count], self.items[count:]
+        return batch
+
+    def size(self):
+        return len(self.items)
+
+    def requeue(self, specs):
+        self.items[:0] = specs
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_QUEUE="direct",
+    EMAIL_BATCH_SIZE=100,
+    SITE_NAME="Modern Blog Platform",
+    SITE_URL="https://blog.example.com",
+)
+class MailerTestCase(TestCase):
+    """Test the batched authentication email dispatcher"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="reader",
+            email="reader@example.com",
+            password="password",
+            first_name="Ana <Bea>",
+        )
+
+    def test_template_rendered_once_per_shape(self):
+        """Test that recipients only fill markers in a cached rendering"""
+        mailer._skeleton.cache_clear()
+
+        with patch.object(mailer, "_template", wraps=mailer._template) as template:
+            for token in ("abc", "def", "ghi"):
+                subject, text, html = render_email(
+                    "verification",
+                    {"first_name": "Ana <Bea>", "username": "ana", "token": token},
+                )
+            render_email(
+                "verification", {"first_name": "", "username": "bob", "token": "x"}
+            )
+
+        self.assertEqual(template.call_count, 2)
+        self.assertEqual(subject, "Vérifiez votre compte - Modern Blog Platform")
+        self.assertIn("Bonjour Ana &lt;Bea&gt;,", html)
+        self.assertIn("https://blog.example.com/verify-email/ghi", html)
+        self.assertIn("Bonjour Ana <Bea>,", text)
+        self.assertNotIn("@@", text)
+
+    def test_year_is_not_frozen_in_the_cache(self):
+        """Test that a new year renders a new skeleton"""
+        values = {"first_name": "", "username": "bob", "token": "x"}
+        with patch.object(mailer.timezone, "localdate", return_value=date(2030, 1, 1)):
+            html = render_email("welcome", values)[2]
+        self.assertIn("&copy; 2030", html)
+
+        with patch.object(mailer.timezone, "localdate", return_value=date(2031, 1, 1)):
+            html = render_email("welcome", values)[2]
+        self.assertIn("&copy; 2031", html)
+
+    def test_task_sends_directly_without_queue(self):
+        """Test that the direct mode sends the message right away"""
+        result = send_welcome_email(self.user.id)
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, "Bienvenue sur Modern Blog Platform!")
+        self.assertEqual(message.to, ["reader@example.com"])
+        self.assertIn("Ana <Bea>", message.body)
+        self.assertEqual(message.alternatives[0][1], "text/html")
+
+    def test_missing_user_is_skipped(self):
+        """Test that a deleted user does not break the batch"""
+        enqueue_email("welcome", 99999)
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_bulk_campaign_uses_one_connection(self):
+        """Test that a campaign sends every batch over a single connection"""
+        User.objects.bulk_create(
+            [
+                User(username=f"user{i}", email=f"user{i}@example.com")
+                for i in range(249)
+            ]
+        )
+        ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+        batches = []
+        build_messages = mailer.build_messages
+
+        def counting(specs):
+            batches.append(len(specs))
+            return build_messages(specs)
+
+        with patch(
+            "authentication.tasks.get_connection", wraps=get_connection
+        ) as connections, patch.object(mailer, "build_messages", counting):
+            result = send_bulk_email("welcome", ids)
+
+        self.assertEqual(result, {"status": "success", "sent": 250})
+        self.assertEqual(len(mail.outbox), 250)
+        self.assertEqual(connections.call_count, 1)
+        self.assertEqual(batches, [100, 100, 50])
+
+    @override_settings(EMAIL_QUEUE="redis")
+    def test_queue_is_drained_in_batches(self):
+        """Test that queued messages go out when the queue is flushed"""
+        queue = ListQueue()
+        with patch.object(mailer, "get_queue", return_value=queue), patch(
+            "authentication.tasks.get_queue", return_value=queue
+        ), patch.object(mailer, "schedule_flush") as schedule_flush:
+            enqueue_email("password_reset", self.user.id, "reset-token")
+            enqueue_email("welcome", self.user.id)
+            self.assertEqual(len(mail.outbox), 0)
+            self.assertEqual(schedule_flush.call_count, 2)
+
+            result = flush_email_queue()
+
+        self.assertEqual(result, {"status": "success", "sent": 2})
+        self.assertEqual(queue.items, [])
+        self.assertIn("reset-token", mail.outbox[0].body)
+
+    def test_only_unsent_messages_are_requeued(self):
+        """Test that an SMTP failure mid-batch requeues only what was not sent"""
+        queue = ListQueue()
+        queue.push(
+            [
+                {"kind": "password_reset", "user_id": self.user.id, "token": "a"},
+                {"kind": "password_reset", "user_id": self.user.id, "token": "b"},
+                {"kind": "password_reset", "user_id": self.user.id, "token": "c"},
+            ]
+        )
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def failing_second(backend, messages):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise OSError("down")
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, "send_messages", failing_second):
+            with self.assertRaises(PartialSendError) as error:
+                drain(queue, 10, get_connection())
+
+        self.assertEqual(error.exception.sent, 1)
+        self.assertEqual([spec["token"] for spec in queue.items], ["b", "c"])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("/password/reset/a", mail.outbox[0].alternatives[0][0])
+
+    def test_bulk_retry_resumes_after_last_sent_message(self):
+        """Test that a campaign retry does not resend delivered messages"""
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password"
+        )
+        third = User.objects.create_user(
+            username="third", email="third@example.com", password="password"
+        )
+        send_messages = EmailBackend.send_messages
+
+        def failing_second(backend, messages):
+            if messages[0].to == ["other@example.com"]:
+                raise OSError("down")
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, "send_messages", failing_second), patch.object(
+            send_bulk_email, "retry", side_effect=Retry()
+        ) as retry:
+            with self.assertRaises(Retry):
+                send_bulk_email("welcome", [self.user.id, other.id, third.id])
+
+        self.assertEqual(retry.call_args.kwargs["kwargs"]["user_ids"], [other.id, third.id])
+        self.assertEqual([m.to for m in mail.outbox], [["reader@example.com"]])
@@ -1,12 +1,30 @@
 # content/admin.py
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django import forms
 from django_ckeditor_5.widgets import CKEditor5Widget
-from .models import Category, Tag, UserProfile, Post, Comment, Podcast, Video
-from helpers._cloudinary.audio_service import CloudinaryAudioService
+from .models import (
+    Category,
+    Tag,
+    UserProfile,
+    Post,
+    Comment,
+    Podcast,
+    Video,
+    ProcessingState,
+    CloudinaryDeletion,
+    DailyRollup,
+)
+from helpers.image_variants import schedule_image_variants
+from .tasks import (
+    queue_cloudinary_deletions,
+    schedule_podcast_media_upload,
+    schedule_post_image_upload,
+    schedule_publication,
+    schedule_transcript_indexing,
+)
 
 
 # Formulaires personnalisés avec CKEditor5
@@ -85,6 +103,7 @@ class PodcastAdminForm(forms.ModelForm):
             "episode",
             "is_published",
             "transcript",
+            "transcript_file",
         ]
         widgets = {
             "transcript": CKEditor5Widget(
@@ -159,6 +178,7 @@ class PostAdmin(admin.ModelAdmin):
     filter_horizontal = ("categories", "tags")
     readonly_fields = (
         "cloudinary_public_id",
+        "processing_state",
         "display_image_preview",
         "display_cloudinary_images",
     )
@@ -219,14 +239,13 @@ class PostAdmin(admin.ModelAdmin):
     display_cloudinary_images.short_description = "Images Cloudinary"
 
     def save_model(self, request, obj, form, change):
-        """Sauvegarde le modèle"""
+        """Sauvegarde le modèle (l'upload Cloudinary est planifié par le signal post_save)"""
         super().save_model(request, obj, form, change)
 
-        # Vérifier si une nouvelle image a été fournie et qu'elle n'est pas déjà sur Cloudinary
-        if obj.featured_image and not obj.cloudinary_public_id:
-            from helpers._cloudinary.image_service import CloudinaryImageService
-
-            CloudinaryImageService.upload_post_image_to_cloudinary(obj)
+        if obj.processing_state == ProcessingState.PENDING:
+            self.message_user(
+                request, "L'image est en cours d'envoi vers Cloudinary en arrière-plan."
+            )
 
 
 @admin.register(Comment)
@@ -249,12 +268,14 @@ class PodcastAdmin(admin.ModelAdmin):
         "published_at",
         "is_featured",
         "is_processed",
+        "processing_state",
         "display_audio_player",
         "display_cover_image",
     )
     list_filter = (
         "is_featured",
         "is_processed",
+        "processing_state",
         "season",
         "categories",
     )
@@ -266,6 +287,7 @@ class PodcastAdmin(admin.ModelAdmin):
         "cloudinary_url",
         "cloudinary_public_id",
         "cover_image_cloudinary_public_id",
+        "processing_state",
         "display_audio_player",
         "display_cloudinary_cover_images",
     )
@@ -279,11 +301,12 @@ class PodcastAdmin(admin.ModelAdmin):
         ("Publication", {"fields": ("is_published", "is_featured", "published_at")}),
         ("Métadonnées", {"fields": ("season", "episode", "duration", "plays_count")}),
         ("Relations", {"fields": ("host", "guests", "categories")}),
-        ("Transcript", {"fields": ("transcript",)}),
+        ("Transcript", {"fields": ("transcript", "transcript_file")}),
         (
             "Cloudinary (lecture seule)",
             {
                 "fields": (
+                    "processing_state",
                     "cloudinary_url",
                     "cloudinary_public_id",
                     "cover_image_cloudinary_public_id",
@@ -360,19 +383,14 @@ class PodcastAdmin(admin.ModelAdmin):
     )
 
     def save_model(self, request, obj, form, change):
-        """Sauvegarde le modèle et déclenche l'upload vers Cloudinary si un nouveau fichier est détecté"""
-        # Sauvegarder d'abord pour obtenir un ID
+        """Sauvegarde le modèle (l'upload Cloudinary est planifié par le signal post_save)"""
         super().save_model(request, obj, form, change)
 
-        # Vérifier si un nouveau fichier audio a été fourni et qu'il n'est pas déjà sur Cloudinary
-        if obj.audio_file and not obj.cloudinary_url:
-            CloudinaryAudioService.upload_podcast_to_cloudinary(obj)
-
-        # Vérifier si une nouvelle image de couverture a été fournie et qu'elle n'est pas déjà sur Cloudinary
-        if obj.cover_image and not obj.cover_image_cloudinary_public_id:
-            from helpers._cloudinary.image_service import CloudinaryImageService
-
-            CloudinaryImageService.upload_podcast_cover_image_to_cloudinary(obj)
+        if obj.processing_state == ProcessingState.PENDING:
+            self.message_user(
+                request,
+                "Les médias sont en cours d'envoi vers Cloudinary en arrière-plan.",
+            )
 
 
 @admin.register(Video)
@@ -384,31 +402,64 @@ class VideoAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
 
 
-# Signal pour déclencher l'upload Cloudinary lors de la sauvegarde d'un podcast (en dehors de l'admin)
+@admin.register(CloudinaryDeletion)
+class CloudinaryDeletionAdmin(admin.ModelAdmin):
+    list_display = ("public_id", "resource_type", "attempts", "created_at")
+    list_filter = ("resource_type",)
+    search_fields = ("public_id", "last_error")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("date", "content_type", "metric", "value", "total")
+    list_filter = ("content_type", "metric")
+    date_hierarchy = "date"
+    readonly_fields = ("updated_at",)
+
+
+# Signal pour planifier l'upload Cloudinary lors de la sauvegarde d'un podcast (en dehors de l'admin)
 @receiver(post_save, sender=Podcast)
 def upload_podcast_to_cloudinary(sender, instance, created, **kwargs):
-    """Déclenche l'upload du fichier audio vers Cloudinary après la sauvegarde du podcast"""
-    # Vérifier si un fichier audio est présent et qu'il n'a pas encore été traité
-    if instance.audio_file and not instance.cloudinary_url:
-        CloudinaryAudioService.upload_podcast_to_cloudinary(instance)
+    """Planifie l'upload asynchrone (Celery) des nouveaux fichiers du podcast"""
+    schedule_podcast_media_upload(instance)
 
-    # Vérifier si une image de couverture est présente et qu'elle n'a pas encore été traitée
-    if instance.cover_image and not instance.cover_image_cloudinary_public_id:
-        from helpers._cloudinary.image_service import CloudinaryImageService
 
-        CloudinaryImageService.upload_podcast_cover_image_to_cloudinary(instance)
+# Signal pour découper la transcription en segments horodatés recherchables
+@receiver(post_save, sender=Podcast)
+def index_podcast_transcript_segments(sender, instance, created, **kwargs):
+    """Planifie le découpage (Celery) de la transcription modifiée"""
+    schedule_transcript_indexing(instance)
 
 
-# Signal pour déclencher l'upload des images des posts vers Cloudinary
+# Signal pour planifier l'upload des images des posts vers Cloudinary
 @receiver(post_save, sender=Post)
 def upload_post_image_to_cloudinary(sender, instance, created, **kwargs):
-    """Déclenche l'upload de l'image vers Cloudinary après la sauvegarde du post"""
-    # Vérifier si une image est présente et qu'elle n'a pas encore été traitée
-    if instance.featured_image and not instance.cloudinary_public_id:
-        from helpers._cloudinary.image_service import CloudinaryImageService
-
-        if CloudinaryImageService.upload_post_image_to_cloudinary(instance):
-            # Si l'upload a réussi, on supprime le fichier local
-            instance.featured_image.delete(
-                save=False
-            )  # Ne pas déclencher un autre save
+    """Planifie l'upload asynchrone (Celery) de la nouvelle image du post"""
+    schedule_post_image_upload(instance)
+
+
+# Signal pour générer les variantes locales des miniatures vidéo
+@receiver(post_save, sender=Video)
+def generate_video_thumbnail_variants(sender, instance, created, **kwargs):
+    """Planifie la génération des variantes WebP/JPEG de la miniature"""
+    schedule_image_variants(instance)
+
+
+# Signal pour publier à l'heure dite les contenus programmés
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Podcast)
+@receiver(post_save, sender=Video)
+def schedule_content_publication(sender, instance, created, **kwargs):
+    """Planifie une tâche ETA de publication si le contenu est programmé"""
+    schedule_publication(instance)
+
+
+# Signal pour supprimer les ressources Cloudinary en arrière-plan. Déclenché
+# aussi par les suppressions en masse (queryset, admin, CASCADE depuis un
+# utilisateur) qui n'appellent pas Model.delete()
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Podcast)
+def queue_cloudinary_resource_deletion(sender, instance, **kwargs):
+    """Met en file la suppression des ressources Cloudinary de l'objet"""
+    queue_cloudinary_deletions(instance)
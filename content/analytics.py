@@ -0,0 +1,220 @@
+"""
+Agrégats statistiques quotidiens (``DailyRollup``).
+
+Chaque table source est lue en une seule requête par lot de jours : toutes
+les métriques de tous les jours du lot sont calculées par agrégation
+conditionnelle (``Count(filter=Q(...))``). Les compteurs cumulés des contenus
+(``views_count``, ``likes_count``, ``plays_count``) sont relevés pour le jour
+courant ; la valeur du jour est l'écart avec le relevé précédent.
+
+Les rapports ne lisent que les agrégats : leur coût dépend du nombre de
+jours, pas du volume de contenus.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+# Type de contenu -> (modèle, {métrique: (champ date, condition)},
+#                      {métrique: compteur cumulé})
+ROLLUP_SOURCES = {
+    "post": (
+        "content.Post",
+        {
+            "new": ("created_at", Q()),
+            "published": ("published_at", Q(is_published=True)),
+        },
+        {"views": "views_count", "likes": "likes_count"},
+    ),
+    "podcast": (
+        "content.Podcast",
+        {
+            "new": ("created_at", Q()),
+            "published": ("published_at", Q(is_published=True)),
+        },
+        {"plays": "plays_count"},
+    ),
+    "video": (
+        "content.Video",
+        {
+            "new": ("created_at", Q()),
+            "published": ("published_at", Q(is_published=True)),
+        },
+        {"views": "views_count", "likes": "likes_count"},
+    ),
+}
+# Métriques rattachées à un type de contenu mais lues dans une autre table
+EXTRA_SOURCES = (
+    ("post", "content.Comment", {"comments": ("created_at", Q())}),
+    (
+        "user",
+        settings.AUTH_USER_MODEL,
+        {"registrations": ("date_joined", Q())},
+    ),
+)
+# Jours calculés par requête (nombre d'agrégats = jours x métriques)
+DAYS_PER_QUERY = 31
+# Fenêtres des rapports périodiques, en jours (jour courant inclus)
+REPORT_PERIODS = {"week": 7, "month": 30}
+
+
+def day_bounds(day):
+    """Début et fin (exclue) d'un jour dans le fuseau du site"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _daily_counts(queryset, metrics, days, window=True):
+    """
+    Prépare les agrégats conditionnels qui comptent, en une requête, chaque
+    métrique de ``metrics`` pour chaque jour.
+
+    Returns:
+        tuple: ``({"<métrique>_<AAAAMMJJ>": Count}, queryset à agréger)``
+    """
+    aggregates = {}
+    for day in days:
+        start, end = day_bounds(day)
+        for metric, (field, condition) in metrics.items():
+            aggregates[f"{metric}_{day:%Y%m%d}"] = Count(
+                "pk",
+                filter=Q(**{f"{field}__gte": start, f"{field}__lt": end}) & condition,
+            )
+    if window:
+        # Limite le parcours aux lignes datées dans la fenêtre
+        first, last = day_bounds(days[0])[0], day_bounds(days[-1])[1]
+        scope = Q()
+        for field in {field for field, _ in metrics.values()}:
+            scope |= Q(**{f"{field}__gte": first, f"{field}__lt": last})
+        queryset = queryset.filter(scope)
+    return aggregates, queryset
+
+
+def _previous_totals(today):
+    """Dernier relevé de chaque compteur cumulé antérieur à ``today``"""
+    from .models import DailyRollup
+
+    totals = {}
+    rows = (
+        DailyRollup.objects.filter(date__lt=today, total__isnull=False)
+        .order_by("content_type", "metric", "-date")
+        .values_list("content_type", "metric", "total")
+    )
+    for content_type, metric, total in rows.iterator():
+        totals.setdefault((content_type, metric), total)
+    return totals
+
+
+def compute_rollups(days):
+    """
+    Calcule les agrégats des jours donnés.
+
+    Returns:
+        list: ``DailyRollup`` non enregistrés
+    """
+    from .models import DailyRollup
+
+    days = sorted(set(days))
+    today = timezone.localdate()
+    sources = [
+        (content_type, label, metrics, counters)
+        for content_type, (label, metrics, counters) in ROLLUP_SOURCES.items()
+    ] + [
+        (content_type, label, metrics, {})
+        for content_type, label, metrics in EXTRA_SOURCES
+    ]
+
+    rollups = []
+    previous = _previous_totals(today) if today in days else {}
+    for offset in range(0, len(days), DAYS_PER_QUERY):
+        chunk = days[offset : offset + DAYS_PER_QUERY]
+        snapshot = today in chunk
+        for content_type, label, metrics, counters in sources:
+            queryset = apps.get_model(label).objects.all()
+            # Les compteurs cumulés portent sur toute la table : pas de fenêtre
+            with_counters = snapshot and bool(counters)
+            aggregates, queryset = _daily_counts(
+                queryset, metrics, chunk, window=not with_counters
+            )
+            if with_counters:
+                for metric, field in counters.items():
+                    aggregates[f"{metric}_total"] = Sum(field)
+            result = queryset.aggregate(**aggregates)
+
+            for day in chunk:
+                for metric in metrics:
+                    rollups.append(
+                        DailyRollup(
+                            date=day,
+                            content_type=content_type,
+                            metric=metric,
+                            value=result[f"{metric}_{day:%Y%m%d}"],
+                        )
+                    )
+            if with_counters:
+                for metric in counters:
+                    total = result[f"{metric}_total"] or 0
+                    # Premier relevé : l'historique n'est pas imputé au jour
+                    before = previous.get((content_type, metric), total)
+                    rollups.append(
+                        DailyRollup(
+                            date=today,
+                            content_type=content_type,
+                            metric=metric,
+                            value=max(0, total - before),
+                            total=total,
+                        )
+                    )
+    return rollups
+
+
+def update_rollups(days):
+    """Recalcule et enregistre (upsert) les agrégats des jours donnés"""
+    from .models import DailyRollup
+
+    rollups = compute_rollups(days)
+    DailyRollup.objects.bulk_create(
+        rollups,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["date", "content_type", "metric"],
+        update_fields=["value", "total", "updated_at"],
+    )
+    return len(rollups)
+
+
+def rollup_report(start, end):
+    """
+    Rapport agrégé entre ``start`` et ``end`` (inclus), lu dans les agrégats.
+
+    Returns:
+        dict: Totaux par type de contenu et série quotidienne
+    """
+    from .models import DailyRollup
+
+    rows = DailyRollup.objects.filter(date__range=(start, end))
+    totals = {}
+    for row in rows.values("content_type", "metric").annotate(value=Sum("value")):
+        totals.setdefault(row["content_type"], {})[row["metric"]] = row["value"]
+
+    daily = {}
+    for day, content_type, metric, value in rows.order_by("date").values_list(
+        "date", "content_type", "metric", "value"
+    ):
+        entry = daily.setdefault(day, {"date": day.isoformat()})
+        entry.setdefault(content_type, {})[metric] = value
+
+    return {
+        "period": {"start": start.isoformat(), "end": end.isoformat()},
+        "totals": totals,
+        "daily": list(daily.values()),
+    }
+
+
+def period_report(period, end=None):
+    """Rapport hebdomadaire (``week``) ou mensuel (``month``) jusqu'à ``end``"""
+    end = end or timezone.localdate()
+    return rollup_report(end - timedelta(days=REPORT_PERIODS[period] - 1), end)
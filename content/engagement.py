@@ -0,0 +1,324 @@
+"""
+Collecte des événements d'audience (vues, écoutes, j'aime).
+
+``record_event`` n'écrit jamais en base pendant la requête : l'événement est
+placé dans un tampon, puis inséré par lots par une tâche Celery. Les
+événements envoyés par les clients ne sont retenus que pour un contenu publié
+(``published_targets``).
+
+- ``redis`` : liste Redis partagée par tous les processus, vidée toutes les
+  quelques secondes par ``content.tasks.flush_engagement_events`` ;
+- ``memory`` : tampon propre au processus, confié à la tâche
+  ``content.tasks.ingest_engagement_events`` dès qu'il est plein ou trop
+  ancien. Les événements en attente sont perdus si le processus s'arrête ;
+  à réserver au développement.
+
+À l'insertion, les compteurs cumulés (``views_count``...) sont incrémentés en
+une requête par modèle et par incrément. Sous PostgreSQL, la table des
+événements est partitionnée par mois ; ``compact_events`` agrège chaque jour
+dans ``EngagementRollup`` et les mois au-delà de la rétention sont supprimés
+(``DROP`` de la partition, ``DELETE`` sur les autres moteurs).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from helpers.redis_list import RedisListQueue
+
+from .analytics import day_bounds
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "content:engagement-events"
+PARTITION_NAME = re.compile(r"^content_engagementevent_y(\d{4})m(\d{2})$")
+
+# Compteur cumulé de chaque (cible, type d'événement)
+COUNTER_FIELDS = {
+    (1, 1): ("content.Post", "views_count"),
+    (1, 3): ("content.Post", "likes_count"),
+    (2, 2): ("content.Podcast", "plays_count"),
+    (3, 1): ("content.Video", "views_count"),
+    (3, 3): ("content.Video", "likes_count"),
+}
+
+# Modèle de chaque cible
+TARGET_MODELS = {
+    1: "content.Post",
+    2: "content.Podcast",
+    3: "content.Video",
+}
+
+
+class MemoryBuffer:
+    """Tampon d'événements du processus courant"""
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._events = []
+        self._since = None
+        self._lock = threading.Lock()
+
+    def push(self, event):
+        with self._lock:
+            if not self._events:
+                self._since = time.monotonic()
+            self._events.append(event)
+            if (
+                len(self._events) < self.max_size
+                and time.monotonic() - self._since < self.max_age
+            ):
+                return
+            batch, self._events = self._events, []
+        self.hand_off(batch)
+
+    def hand_off(self, batch):
+        from .tasks import ingest_engagement_events
+
+        try:
+            ingest_engagement_events.delay(batch)
+        except Exception as e:
+            # Le broker est indisponible : la requête ne doit pas échouer
+            logger.error(f"Événements d'audience perdus ({len(batch)}): {e}")
+
+
+class RedisBuffer(RedisListQueue):
+    """Liste Redis partagée ; une mise en tampon ne fait jamais échouer la requête"""
+
+    def __init__(self, url):
+        super().__init__(url, REDIS_KEY)
+
+    def push(self, event):
+        try:
+            super().push([event])
+        except Exception as e:
+            logger.error(f"Événement d'audience perdu: {e}")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Tampon configuré par ``ENGAGEMENT_BUFFER``, créé à la demande"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                if settings.ENGAGEMENT_BUFFER == "redis":
+                    _buffer = RedisBuffer(settings.ENGAGEMENT_REDIS_URL)
+                else:
+                    _buffer = MemoryBuffer(
+                        settings.ENGAGEMENT_MEMORY_BUFFER_SIZE,
+                        settings.ENGAGEMENT_MEMORY_BUFFER_AGE,
+                    )
+    return _buffer
+
+
+def record_event(target, object_id, kind):
+    """
+    Enregistre un événement d'audience, sans accès à la base.
+
+    Args:
+        target (int): ``EngagementEvent.Target``
+        object_id (int): Clé primaire du contenu
+        kind (int): ``EngagementEvent.Kind``
+    """
+    get_buffer().push([time.time(), int(target), int(object_id), int(kind)])
+
+
+def published_targets(pairs):
+    """
+    Sous-ensemble des couples ``(cible, id)`` désignant un contenu publié
+    existant, en une requête par type de contenu.
+
+    Returns:
+        set: Couples ``(cible, id)`` retenus
+    """
+    from django.apps import apps
+
+    ids = defaultdict(set)
+    for target, object_id in pairs:
+        if target in TARGET_MODELS:
+            ids[target].add(object_id)
+    found = set()
+    for target, object_ids in ids.items():
+        published = (
+            apps.get_model(TARGET_MODELS[target])
+            .objects.filter(pk__in=object_ids, is_published=True)
+            .values_list("pk", flat=True)
+        )
+        found.update((target, pk) for pk in published)
+    return found
+
+
+def insert_events(events):
+    """
+    Insère un lot d'événements ``[timestamp, cible, id, type]`` et incrémente
+    les compteurs cumulés, dans une même transaction.
+
+    Returns:
+        int: Nombre d'événements insérés
+    """
+    from django.apps import apps
+
+    from .models import EngagementEvent
+
+    valid_targets = set(EngagementEvent.Target.values)
+    valid_kinds = set(EngagementEvent.Kind.values)
+    rows = [
+        EngagementEvent(
+            occurred_at=datetime.fromtimestamp(ts, tz=dt_timezone.utc),
+            target=target,
+            object_id=object_id,
+            kind=kind,
+        )
+        for ts, target, object_id, kind in events
+        if target in valid_targets and kind in valid_kinds and object_id > 0
+    ]
+    increments = Counter((e.target, e.kind, e.object_id) for e in rows)
+
+    # Regroupe les contenus ayant le même incrément : une requête par groupe
+    updates = defaultdict(list)
+    for (target, kind, object_id), amount in increments.items():
+        if (target, kind) in COUNTER_FIELDS:
+            updates[(target, kind, amount)].append(object_id)
+
+    with transaction.atomic():
+        EngagementEvent.objects.bulk_create(rows, batch_size=1000)
+        for (target, kind, amount), ids in updates.items():
+            label, field = COUNTER_FIELDS[(target, kind)]
+            apps.get_model(label).objects.filter(pk__in=ids).update(
+                **{field: F(field) + amount}
+            )
+    return len(rows)
+
+
+def _month_start(day, offset=0):
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def ensure_partitions(months_ahead=2):
+    """Crée les partitions du mois courant et des suivants (PostgreSQL)"""
+    if connection.vendor != "postgresql":
+        return []
+    created = []
+    today = timezone.localdate()
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start = _month_start(today, offset)
+            end = _month_start(today, offset + 1)
+            name = f"content_engagementevent_y{start.year}m{start.month:02d}"
+            # Bornes à minuit dans le fuseau du site, comme les jours agrégés
+            lower, upper = day_bounds(start)[0], day_bounds(end)[0]
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name}"
+                f" PARTITION OF content_engagementevent"
+                f" FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            created.append(name)
+    return created
+
+
+def _partitions():
+    """Partitions mensuelles existantes : ``[(nom, premier jour du mois)]``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i"
+            " JOIN pg_class c ON c.oid = i.inhrelid"
+            " JOIN pg_class p ON p.oid = i.inhparent"
+            " WHERE p.relname = 'content_engagementevent'"
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def compact_day(day):
+    """
+    Agrège les événements d'un jour dans ``EngagementRollup`` (upsert,
+    idempotent).
+
+    Returns:
+        int: Nombre de lignes d'agrégat écrites
+    """
+    from .models import EngagementEvent, EngagementRollup
+
+    start, end = day_bounds(day)
+    counts = (
+        EngagementEvent.objects.filter(occurred_at__gte=start, occurred_at__lt=end)
+        .order_by()
+        .values("target", "object_id", "kind")
+        .annotate(count=Count("id"))
+    )
+    rollups = [EngagementRollup(date=day, **row) for row in counts.iterator()]
+    EngagementRollup.objects.bulk_create(
+        rollups,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["target", "object_id", "kind", "date"],
+        update_fields=["count"],
+    )
+    return len(rollups)
+
+
+def compact_events(days=2, retention_months=None):
+    """
+    Agrège les derniers jours complets puis supprime les mois d'événements
+    bruts au-delà de la rétention, après les avoir agrégés une dernière fois.
+
+    Returns:
+        dict: Jours agrégés et mois supprimés
+    """
+    from .models import EngagementEvent
+
+    if retention_months is None:
+        retention_months = settings.ENGAGEMENT_EVENT_RETENTION_MONTHS
+    today = timezone.localdate()
+    compacted = [today - timedelta(days=i) for i in range(1, days + 1)]
+    for day in compacted:
+        compact_day(day)
+
+    cutoff = _month_start(today, -retention_months)
+    dropped = []
+    if connection.vendor == "postgresql":
+        for name, month in _partitions():
+            if month >= cutoff:
+                continue
+            day = month
+            while day < _month_start(month, 1):
+                compact_day(day)
+                day += timedelta(days=1)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {name}")
+            dropped.append(month.isoformat())
+
+    # Autres moteurs, et reliquats de la partition par défaut
+    expired = EngagementEvent.objects.filter(occurred_at__lt=day_bounds(cutoff)[0])
+    oldest = expired.order_by("occurred_at").values_list("occurred_at", flat=True)
+    oldest = oldest.first()
+    if oldest is not None:
+        day = timezone.localtime(oldest).date()
+        while day < cutoff:
+            compact_day(day)
+            day += timedelta(days=1)
+        expired.delete()
+        dropped.append(f"<{cutoff.isoformat()}")
+    return {
+        "compacted": [day.isoformat() for day in compacted],
+        "dropped": dropped,
+    }
@@ -0,0 +1,283 @@
+"""
+Django management command to benchmark every router endpoint in-process
+
+Each list and detail route registered on the content and authentication
+routers is requested with the Django test client. Latency percentiles,
+SQL query counts and peak allocated memory (tracemalloc) are recorded per
+endpoint and compared with a stored JSON baseline.
+
+Run it against a seeded database (see ``manage.py seed_benchmark``):
+    python manage.py bench_api --update-baseline
+    python manage.py bench_api --threshold 0.2
+"""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def get_routers():
+    from authentication.urls import router as auth_router
+    from content.urls import router as content_router
+
+    return [content_router, auth_router]
+
+
+class Command(BaseCommand):
+    help = "Benchmark API endpoints and fail when a run regresses against the baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=30,
+            help="Timed requests per endpoint (default: 30)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Untimed warm-up requests per endpoint (default: 3)",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(Path(settings.BASE_DIR) / "benchmarks" / "api_baseline.json"),
+            help="Baseline JSON file (default: benchmarks/api_baseline.json)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Also write this run's results to the given JSON file",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store this run as the new baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative regression of p95 latency and memory (default: 0.25)",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=2.0,
+            help="Ignore latency regressions smaller than this many ms (default: 2.0)",
+        )
+        parser.add_argument(
+            "--as-user",
+            help="Email of a user to authenticate as (anonymous by default)",
+        )
+        parser.add_argument(
+            "--only",
+            help="Comma-separated endpoint names to run (e.g. post-list,post-detail)",
+        )
+
+    def handle(self, *args, **options):
+        # Errors are recorded as statuses instead of aborting the whole run
+        self.client = Client(raise_request_exception=False)
+        if options["as_user"]:
+            user = get_user_model().objects.filter(email=options["as_user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['as_user']}")
+            self.client.force_login(user)
+
+        only = set(filter(None, (options["only"] or "").split(",")))
+        endpoints = [
+            endpoint
+            for endpoint in self.discover_endpoints()
+            if not only or endpoint[0] in only
+        ]
+        if not endpoints:
+            raise CommandError("No endpoint to benchmark")
+
+        results = {}
+        for name, url in endpoints:
+            results[name] = self.bench_endpoint(
+                url, options["iterations"], options["warmup"]
+            )
+            r = results[name]
+            self.stdout.write(
+                f"{name:<24} {r['status']} p50={r['p50_ms']:.2f}ms "
+                f"p95={r['p95_ms']:.2f}ms p99={r['p99_ms']:.2f}ms "
+                f"queries={r['queries']} peak={r['peak_kib']:.1f}KiB"
+            )
+
+        run = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "iterations": options["iterations"],
+                "python": platform.python_version(),
+                "database": connection.vendor,
+            },
+            "endpoints": results,
+        }
+
+        if options["output"]:
+            self.write_json(options["output"], run)
+
+        baseline_path = options["baseline"]
+        if options["update_baseline"] or not os.path.exists(baseline_path):
+            self.write_json(baseline_path, run)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)
+        regressions = self.compare(
+            baseline.get("endpoints", {}),
+            results,
+            options["threshold"],
+            options["min_delta_ms"],
+        )
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f"{len(regressions)} regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS("No regression against the baseline"))
+
+    def discover_endpoints(self):
+        """Yield ``(name, url)`` for each list and detail route of the routers"""
+        for router in get_routers():
+            for prefix, viewset, basename in router.registry:
+                list_url = None
+                try:
+                    list_url = reverse(f"{basename}-list")
+                except NoReverseMatch:
+                    pass
+
+                lookup_value = None
+                if list_url and hasattr(viewset, "list"):
+                    yield f"{basename}-list", list_url
+                    lookup_value = self.lookup_from_list(list_url, viewset)
+                if lookup_value is None:
+                    lookup_value = self.lookup_from_queryset(viewset)
+
+                if lookup_value is not None and hasattr(viewset, "retrieve"):
+                    lookup_field = getattr(viewset, "lookup_field", "pk")
+                    lookup_kwarg = getattr(viewset, "lookup_url_kwarg", None) or lookup_field
+                    try:
+                        yield f"{basename}-detail", reverse(
+                            f"{basename}-detail", kwargs={lookup_kwarg: lookup_value}
+                        )
+                    except NoReverseMatch:
+                        continue
+
+    def lookup_from_list(self, list_url, viewset):
+        response = self.client.get(list_url)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        items = data.get("results", []) if isinstance(data, dict) else data
+        if not items:
+            return None
+        lookup_field = getattr(viewset, "lookup_field", "pk")
+        item = items[0]
+        return item.get(lookup_field, item.get("id"))
+
+    def lookup_from_queryset(self, viewset):
+        queryset = getattr(viewset, "queryset", None)
+        if queryset is None:
+            return None
+        obj = queryset.order_by("pk").first()
+        if obj is None:
+            return None
+        return getattr(obj, getattr(viewset, "lookup_field", "pk"))
+
+    def bench_endpoint(self, url, iterations, warmup):
+        for _ in range(warmup):
+            self.client.get(url)
+
+        timings = []
+        status = None
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = self.client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            status = response.status_code
+
+        # Queries and memory are measured in separate passes so that neither
+        # instrumentation skews the timings. An execute wrapper is used rather
+        # than CaptureQueriesContext, whose log is reset by request_started.
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            self.client.get(url)
+
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            self.client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            "url": url,
+            "status": status,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "queries": len(queries),
+            "peak_kib": round(peak / 1024, 1),
+        }
+
+    def compare(self, baseline, results, threshold, min_delta_ms):
+        """Return a human readable line for each regressed metric"""
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if current["status"] != previous["status"]:
+                regressions.append(
+                    f"{name}: status {previous['status']} -> {current['status']}"
+                )
+            if current["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{name}: queries {previous['queries']} -> {current['queries']}"
+                )
+            for metric in ("p95_ms", "p99_ms"):
+                delta = current[metric] - previous[metric]
+                if delta > min_delta_ms and current[metric] > previous[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{name}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f}"
+                    )
+            if current["peak_kib"] > previous["peak_kib"] * (1 + threshold):
+                regressions.append(
+                    f"{name}: peak memory {previous['peak_kib']:.1f}KiB -> "
+                    f"{current['peak_kib']:.1f}KiB"
+                )
+        return regressions
+
+    def write_json(self, path, data):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
@@ -0,0 +1,87 @@
+"""
+Django management command to reconcile Cloudinary assets with the database
+
+Lists every asset under posts/, podcast_covers/ and podcasts/ through the
+Admin API and prints a JSON Lines diff: "orphan" assets that no row
+references and "missing" rows whose asset no longer exists. Memory use is
+bounded by one listing page plus 8 bytes per referenced asset.
+
+    python manage.py reconcile_cloudinary --output reconcile.jsonl
+    python manage.py reconcile_cloudinary --folder podcasts/ --enqueue-cleanup
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.tasks import enqueue_cloudinary_deletions
+from helpers._cloudinary import cloudinary_enabled
+from helpers._cloudinary.reconcile import (
+    LISTING_PAGE_SIZE,
+    RECONCILE_SOURCES,
+    reconcile_media,
+    write_reconciliation_report,
+)
+
+
+class Command(BaseCommand):
+    help = "Diff Cloudinary assets against the public_ids stored in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--folder",
+            action="append",
+            choices=sorted(RECONCILE_SOURCES),
+            help="Folder to reconcile, may be repeated (default: all)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the diff to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=LISTING_PAGE_SIZE,
+            help=f"Admin API page size (default: {LISTING_PAGE_SIZE})",
+        )
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="Never clean up orphans younger than this (default: 24)",
+        )
+        parser.add_argument(
+            "--enqueue-cleanup",
+            action="store_true",
+            help="Queue orphaned assets for batched deletion",
+        )
+
+    def handle(self, *args, **options):
+        if not cloudinary_enabled():
+            raise CommandError("Cloudinary credentials are not configured")
+        if not 1 <= options["page_size"] <= LISTING_PAGE_SIZE:
+            raise CommandError(f"--page-size must be between 1 and {LISTING_PAGE_SIZE}")
+
+        sources = {
+            folder: RECONCILE_SOURCES[folder]
+            for folder in options["folder"] or RECONCILE_SOURCES
+        }
+        entries = reconcile_media(
+            sources,
+            page_size=options["page_size"],
+            min_age=timedelta(hours=options["min_age_hours"]),
+        )
+        cleanup = enqueue_cloudinary_deletions if options["enqueue_cleanup"] else None
+
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                summary = write_reconciliation_report(entries, stream, cleanup)
+        else:
+            summary = write_reconciliation_report(entries, self.stdout, cleanup)
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"{summary['orphan']} orphaned ({summary['recent']} recent), "
+                f"{summary['missing']} missing, {summary['queued']} queued for deletion"
+            )
+        )
@@ -0,0 +1,401 @@
+"""
+Génère un jeu de données synthétique et réaliste pour les tests de charge.
+
+Toutes les insertions passent par ``bulk_create`` (par lots), y compris les
+tables de liaison ManyToMany, ce qui permet de charger un million de lignes
+en quelques minutes. La génération est déterministe pour une graine donnée.
+
+Exemple :
+    python manage.py seed_benchmark --users 5000 --posts 100000 --seed 42
+"""
+
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from authentication.models import User
+from content.models import Category, Comment, Podcast, Post, Tag, UserProfile, Video
+
+# Préfixes permettant d'identifier (et de supprimer) les données de benchmark
+USERNAME_PREFIX = "bench_"
+SLUG_PREFIX = "bench-"
+
+WORDS = (
+    "django api cache query index latency throughput python celery redis "
+    "postgres cloudinary podcast video article design pattern service model "
+    "serializer view router queue worker deploy docker nginx scaling memory "
+    "profile benchmark request response stream upload image audio search "
+    "token auth security frontend backend react component state async task "
+    "migration schema table transaction lock replica shard partition event "
+    "metric dashboard alert trace log storage bucket network protocol socket"
+).split()
+
+PODCAST_FORMATS = ("interview", "roundtable", "deep-dive", "news", "q-and-a")
+
+
+def zipf_cum_weights(n, s):
+    """Poids cumulés d'une loi de Zipf d'exposant ``s`` sur ``n`` rangs"""
+    return list(itertools.accumulate(1.0 / (rank**s) for rank in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données de benchmark réaliste (bulk_create, déterministe)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--podcasts", type=int, default=1000)
+        parser.add_argument("--videos", type=int, default=1000)
+        parser.add_argument(
+            "--comments",
+            type=int,
+            default=50000,
+            help="Nombre total de commentaires (répartis en longue traîne)",
+        )
+        parser.add_argument("--categories", type=int, default=30)
+        parser.add_argument("--tags", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--zipf-s",
+            type=float,
+            default=1.1,
+            help="Exposant de Zipf pour la popularité des tags et des posts (défaut: 1.1)",
+        )
+        parser.add_argument(
+            "--body-kb",
+            type=float,
+            default=6.0,
+            help="Taille médiane du contenu HTML des posts en Ko (défaut: 6)",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Supprime d'abord les données de benchmark existantes",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["categories"] < 1 or options["tags"] < 1:
+            raise CommandError("--users, --categories et --tags doivent être >= 1")
+
+        self.rng = random.Random(options["seed"])
+        self.seed = options["seed"]
+        self.batch_size = options["batch_size"]
+        self.zipf_s = options["zipf_s"]
+        self.body_kb = options["body_kb"]
+        self.now = timezone.now()
+        self.total_rows = 0
+        started = time.perf_counter()
+
+        if options["clear"]:
+            self.clear()
+
+        category_ids = self.seed_categories(options["categories"])
+        tag_ids, tag_names = self.seed_tags(options["tags"])
+        user_ids = self.seed_users(options["users"])
+        post_ids = self.seed_posts(options["posts"], user_ids, category_ids, tag_ids)
+        self.seed_comments(options["comments"], post_ids, user_ids)
+        self.seed_podcasts(options["podcasts"], user_ids, category_ids, tag_names)
+        self.seed_videos(options["videos"], user_ids, category_ids)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{self.total_rows} lignes insérées en {elapsed:.1f}s "
+                f"({self.total_rows / max(elapsed, 1e-6):.0f} lignes/s)"
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Utilitaires
+    # ------------------------------------------------------------------
+
+    def bulk_insert(self, model, objects, label=None, **kwargs):
+        """Insère un itérable d'objets par lots et retourne les objets créés"""
+        created = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                created.extend(model.objects.bulk_create(batch, **kwargs))
+                batch = []
+        if batch:
+            created.extend(model.objects.bulk_create(batch, **kwargs))
+        self.total_rows += len(created)
+        if label:
+            self.stdout.write(f"  {label}: {len(created)}")
+        return created
+
+    def slug(self, model, i, title):
+        """
+        Slug unique (préfixe, graine et rang) suivi du titre, tronqué à la
+        longueur du champ ``slug`` du modèle
+        """
+        max_length = model._meta.get_field("slug").max_length
+        slug = f"{SLUG_PREFIX}{self.seed}-{i}-{slugify(title)}"[:max_length]
+        return slug.rstrip("-")
+
+    def sentence(self, min_words, max_words):
+        words = self.rng.choices(WORDS, k=self.rng.randint(min_words, max_words))
+        return " ".join(words).capitalize()
+
+    def html_body(self):
+        """Contenu HTML de taille log-normale (médiane ``--body-kb``)"""
+        target = int(self.rng.lognormvariate(0, 0.6) * self.body_kb * 1024)
+        parts = []
+        size = 0
+        while size < target:
+            if self.rng.random() < 0.15:
+                block = f"<h2>{self.sentence(3, 7)}</h2>"
+            elif self.rng.random() < 0.1:
+                items = "".join(
+                    f"<li>{self.sentence(4, 10)}</li>" for _ in range(self.rng.randint(3, 6))
+                )
+                block = f"<ul>{items}</ul>"
+            else:
+                block = f"<p>{'. '.join(self.sentence(8, 20) for _ in range(self.rng.randint(3, 6)))}.</p>"
+            parts.append(block)
+            size += len(block)
+        return "".join(parts)
+
+    def published_at(self):
+        return self.now - timedelta(seconds=self.rng.randint(0, 2 * 365 * 86400))
+
+    def long_tail(self, median):
+        return int(self.rng.lognormvariate(0, 1.5) * median)
+
+    def clear(self):
+        self.stdout.write(self.style.WARNING("Suppression des données de benchmark..."))
+        with transaction.atomic():
+            for model in (Comment, Post, Podcast, Video):
+                if model is Comment:
+                    model.objects.filter(post__slug__startswith=SLUG_PREFIX).delete()
+                else:
+                    model.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+            Category.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+            Tag.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    # ------------------------------------------------------------------
+    # Générateurs par modèle
+    # ------------------------------------------------------------------
+
+    @transaction.atomic
+    def seed_categories(self, count):
+        categories = (
+            Category(
+                name=f"{self.sentence(1, 2)} {i}",
+                slug=f"{SLUG_PREFIX}{self.seed}-category-{i}",
+                description=self.sentence(8, 16),
+            )
+            for i in range(count)
+        )
+        return [c.pk for c in self.bulk_insert(Category, categories, "Catégories")]
+
+    @transaction.atomic
+    def seed_tags(self, count):
+        tags = (
+            Tag(
+                name=f"{self.rng.choice(WORDS)}-{i}",
+                slug=f"{SLUG_PREFIX}{self.seed}-tag-{i}",
+            )
+            for i in range(count)
+        )
+        created = self.bulk_insert(Tag, tags, "Tags")
+        return [t.pk for t in created], [t.name for t in created]
+
+    @transaction.atomic
+    def seed_users(self, count):
+        # Un seul hachage : make_password est volontairement lent
+        password = make_password("benchmark")
+        users = (
+            User(
+                username=f"{USERNAME_PREFIX}{self.seed}_{i}",
+                email=f"{USERNAME_PREFIX}{self.seed}_{i}@example.com",
+                first_name=self.rng.choice(WORDS).capitalize(),
+                last_name=self.rng.choice(WORDS).capitalize(),
+                password=password,
+                date_joined=self.published_at(),
+            )
+            for i in range(count)
+        )
+        user_ids = [u.pk for u in self.bulk_insert(User, users, "Utilisateurs")]
+
+        # bulk_create ne déclenche pas le signal post_save qui crée le profil
+        profiles = (
+            UserProfile(
+                user_id=user_id,
+                bio=self.sentence(10, 30),
+                role="author" if self.rng.random() < 0.1 else "reader",
+            )
+            for user_id in user_ids
+        )
+        self.bulk_insert(UserProfile, profiles, "Profils")
+        return user_ids
+
+    def pick_zipf(self, population, cum_weights, k):
+        """Tire ``k`` éléments distincts (au plus) selon une loi de Zipf"""
+        return set(self.rng.choices(population, cum_weights=cum_weights, k=k))
+
+    def seed_posts(self, count, user_ids, category_ids, tag_ids):
+        tag_weights = zipf_cum_weights(len(tag_ids), self.zipf_s)
+        category_weights = zipf_cum_weights(len(category_ids), self.zipf_s)
+        # Une minorité d'auteurs écrit la majorité des posts
+        authors = self.rng.sample(user_ids, max(1, len(user_ids) // 10))
+        post_ids = []
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            posts = []
+            for i in range(start, start + size):
+                title = self.sentence(4, 10)
+                content = self.html_body()
+                posts.append(
+                    Post(
+                        title=title,
+                        slug=self.slug(Post, i, title),
+                        content=content,
+                        excerpt=self.sentence(15, 30),
+                        meta_title=title[:60],
+                        published_at=self.published_at(),
+                        author_id=self.rng.choice(authors),
+                        likes_count=self.long_tail(5),
+                        views_count=self.long_tail(200),
+                        reading_time=max(1, len(content) // 1500),
+                        is_featured=self.rng.random() < 0.03,
+                        is_published=self.rng.random() < 0.9,
+                    )
+                )
+            with transaction.atomic():
+                created = Post.objects.bulk_create(posts)
+                ids = [p.pk for p in created]
+                post_categories = (
+                    Post.categories.through(post_id=post_id, category_id=category_id)
+                    for post_id in ids
+                    for category_id in self.pick_zipf(
+                        category_ids, category_weights, self.rng.randint(1, 2)
+                    )
+                )
+                post_tags = (
+                    Post.tags.through(post_id=post_id, tag_id=tag_id)
+                    for post_id in ids
+                    for tag_id in self.pick_zipf(tag_ids, tag_weights, self.rng.randint(1, 6))
+                )
+                self.bulk_insert(Post.categories.through, post_categories)
+                self.bulk_insert(Post.tags.through, post_tags)
+            self.total_rows += len(ids)
+            post_ids.extend(ids)
+            self.stdout.write(f"  Posts: {len(post_ids)}/{count}")
+        return post_ids
+
+    def seed_comments(self, count, post_ids, user_ids):
+        if not post_ids or count <= 0:
+            return
+        # Longue traîne : la popularité des posts suit une loi de Zipf
+        shuffled = post_ids[:]
+        self.rng.shuffle(shuffled)
+        weights = zipf_cum_weights(len(shuffled), self.zipf_s)
+
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            targets = self.rng.choices(shuffled, cum_weights=weights, k=size)
+            comments = [
+                Comment(
+                    post_id=post_id,
+                    author_id=self.rng.choice(user_ids),
+                    content=f"<p>{self.sentence(5, 40)}</p>",
+                )
+                for post_id in targets
+            ]
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+            created += size
+            self.total_rows += size
+            self.stdout.write(f"  Commentaires: {created}/{count}")
+
+    @transaction.atomic
+    def seed_podcasts(self, count, user_ids, category_ids, tag_names):
+        if count <= 0:
+            return
+        tag_weights = zipf_cum_weights(len(tag_names), self.zipf_s)
+        hosts = self.rng.sample(user_ids, max(1, len(user_ids) // 50))
+
+        def podcasts():
+            for i in range(count):
+                title = f"{self.sentence(3, 8)} ({self.rng.choice(PODCAST_FORMATS)})"
+                tags = self.pick_zipf(tag_names, tag_weights, self.rng.randint(1, 5))
+                yield Podcast(
+                    title=title,
+                    slug=self.slug(Podcast, i, title),
+                    description=self.sentence(30, 80),
+                    duration=int(self.rng.lognormvariate(7.8, 0.5)),
+                    published_at=self.published_at(),
+                    host_id=self.rng.choice(hosts),
+                    tags=", ".join(sorted(tags)),
+                    plays_count=self.long_tail(300),
+                    is_featured=self.rng.random() < 0.05,
+                    season=1 + i // 50,
+                    episode=1 + i % 50,
+                    is_processed=True,
+                    is_published=self.rng.random() < 0.9,
+                    transcript=self.html_body(),
+                )
+
+        ids = [p.pk for p in self.bulk_insert(Podcast, podcasts(), "Podcasts")]
+        self.bulk_insert(
+            Podcast.categories.through,
+            (
+                Podcast.categories.through(podcast_id=podcast_id, category_id=category_id)
+                for podcast_id in ids
+                for category_id in self.rng.sample(category_ids, 1)
+            ),
+        )
+        self.bulk_insert(
+            Podcast.guests.through,
+            (
+                Podcast.guests.through(podcast_id=podcast_id, user_id=user_id)
+                for podcast_id in ids
+                for user_id in set(self.rng.sample(user_ids, min(len(user_ids), self.rng.randint(0, 3))))
+            ),
+        )
+
+    @transaction.atomic
+    def seed_videos(self, count, user_ids, category_ids):
+        if count <= 0:
+            return
+        presenters = self.rng.sample(user_ids, max(1, len(user_ids) // 50))
+
+        def videos():
+            for i in range(count):
+                title = self.sentence(3, 9)
+                yield Video(
+                    title=title,
+                    slug=self.slug(Video, i, title),
+                    description=f"<p>{self.sentence(20, 60)}</p>",
+                    video_url=f"https://www.youtube.com/watch?v=bench{self.seed}{i}",
+                    duration=int(self.rng.lognormvariate(6.5, 0.7)),
+                    published_at=self.published_at(),
+                    views_count=self.long_tail(500),
+                    likes_count=self.long_tail(20),
+                    is_featured=self.rng.random() < 0.05,
+                    is_published=self.rng.random() < 0.9,
+                    presenter_id=self.rng.choice(presenters),
+                )
+
+        ids = [v.pk for v in self.bulk_insert(Video, videos(), "Vidéos")]
+        self.bulk_insert(
+            Video.categories.through,
+            (
+                Video.categories.through(video_id=video_id, category_id=category_id)
+                for video_id in ids
+                for category_id in self.rng.sample(category_ids, 1)
+            ),
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_alter_podcast_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_upload_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='cover_upload_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='processing_state',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('ready', 'Prêt'), ('failed', 'Échec')], default='ready', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_upload_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='processing_state',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('ready', 'Prêt'), ('failed', 'Échec')], default='ready', max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 02:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('content', '0012_media_processing_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PodcastUploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Taille totale annoncée en octets')),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Réception en cours'), ('finalizing', 'Envoi vers Cloudinary'), ('complete', 'Terminé'), ('failed', 'Échec')], default='uploading', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='podcast_upload_sessions', to=settings.AUTH_USER_MODEL)),
+                ('podcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='content.podcast')),
+            ],
+        ),
+    ]
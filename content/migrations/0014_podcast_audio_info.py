@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:01
+
+from django.db import migrations, models
+import helpers.audio
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_podcastuploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_bitrate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_format',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_sample_rate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='podcast',
+            name='audio_file',
+            field=models.FileField(blank=True, help_text='Formats acceptés : MP3, WAV, M4A, OGG, WEBM', null=True, upload_to='temp_podcasts/', validators=[helpers.audio.validate_audio_file]),
+        ),
+    ]
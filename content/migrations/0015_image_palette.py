@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_podcast_audio_info'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='palette',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='palette_source',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='palette',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='palette_source',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
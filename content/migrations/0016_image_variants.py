@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_image_palette'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='blurhash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='blurhash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
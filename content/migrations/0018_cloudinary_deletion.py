@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_blurhash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CloudinaryDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.CharField(max_length=255)),
+                ('resource_type', models.CharField(default='image', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cloudinarydeletion',
+            constraint=models.UniqueConstraint(fields=('public_id', 'resource_type'), name='unique_cloudinary_deletion'),
+        ),
+    ]
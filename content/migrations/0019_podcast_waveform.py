@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0018_cloudinary_deletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='waveform',
+            field=models.FileField(blank=True, editable=False, upload_to='podcast_waveforms/'),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='waveform_source',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
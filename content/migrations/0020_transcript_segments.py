@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:22
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0019_podcast_waveform'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='transcript_file',
+            field=models.FileField(blank=True, help_text='Formats acceptés : SRT, VTT', null=True, upload_to='podcast_transcripts/', validators=[django.core.validators.FileExtensionValidator(['srt', 'vtt'])]),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='transcript_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('start', models.FloatField(blank=True, null=True)),
+                ('end', models.FloatField(blank=True, null=True)),
+                ('speaker', models.CharField(blank=True, default='', max_length=100)),
+                ('text', models.TextField()),
+                ('podcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_segments', to='content.podcast')),
+            ],
+            options={
+                'ordering': ['podcast', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transcriptsegment',
+            constraint=models.UniqueConstraint(fields=('podcast', 'position'), name='unique_transcript_position'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""
+Index plein texte des segments de transcription, selon le moteur :
+
+- PostgreSQL : index GIN sur ``to_tsvector('simple', text)`` (même
+  expression que ``TranscriptSegmentQuerySet.search``) ;
+- SQLite : table FTS5 à contenu externe, synchronisée par triggers.
+
+Les autres moteurs n'ont pas d'index (recherche ``icontains``).
+
+Attention : sous SQLite, une migration qui reconstruit la table
+``content_transcriptsegment`` (AlterField, par exemple) supprime ses triggers ;
+elle doit les recréer.
+"""
+
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX content_transcriptsegment_text_fts"
+    " ON content_transcriptsegment USING gin (to_tsvector('simple', text))",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS content_transcriptsegment_text_fts",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE content_transcriptsegment_fts USING fts5("
+    " text, content='content_transcriptsegment', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER content_transcriptsegment_fts_insert"
+    " AFTER INSERT ON content_transcriptsegment BEGIN"
+    " INSERT INTO content_transcriptsegment_fts(rowid, text)"
+    " VALUES (new.id, new.text); END",
+    "CREATE TRIGGER content_transcriptsegment_fts_delete"
+    " AFTER DELETE ON content_transcriptsegment BEGIN"
+    " INSERT INTO content_transcriptsegment_fts(content_transcriptsegment_fts,"
+    " rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER content_transcriptsegment_fts_update"
+    " AFTER UPDATE ON content_transcriptsegment BEGIN"
+    " INSERT INTO content_transcriptsegment_fts(content_transcriptsegment_fts,"
+    " rowid, text) VALUES ('delete', old.id, old.text);"
+    " INSERT INTO content_transcriptsegment_fts(rowid, text)"
+    " VALUES (new.id, new.text); END",
+    # Indexe les lignes déjà présentes
+    "INSERT INTO content_transcriptsegment_fts(content_transcriptsegment_fts)"
+    " VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS content_transcriptsegment_fts_insert",
+    "DROP TRIGGER IF EXISTS content_transcriptsegment_fts_delete",
+    "DROP TRIGGER IF EXISTS content_transcriptsegment_fts_update",
+    "DROP TABLE IF EXISTS content_transcriptsegment_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0020_transcript_segments"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(
+                {"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD}
+            ),
+            run_for_vendor(
+                {"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD}
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0021_transcript_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(condition=models.Q(('is_published', False)), fields=['published_at'], name='podcast_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', False)), fields=['published_at'], name='post_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(condition=models.Q(('is_published', False)), fields=['published_at'], name='video_scheduled_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_created_at(apps, schema_editor):
+    # Les contenus existants n'ont pas de date de création : la date de
+    # publication en est la meilleure approximation
+    for name in ("Post", "Podcast", "Video"):
+        model = apps.get_model("content", name)
+        model.objects.filter(published_at__isnull=False).update(
+            created_at=models.F("published_at")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0022_scheduled_publication_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('content_type', models.CharField(max_length=20)),
+                ('metric', models.CharField(choices=[('new', 'Nouveaux contenus'), ('published', 'Publications'), ('views', 'Vues'), ('plays', 'Écoutes'), ('likes', "J'aime"), ('comments', 'Commentaires'), ('registrations', 'Inscriptions')], max_length=20)),
+                ('value', models.BigIntegerField(default=0)),
+                ('total', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['date', 'content_type', 'metric'],
+            },
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'content_type', 'metric'), name='unique_daily_rollup'),
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+    ]
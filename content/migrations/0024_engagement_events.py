@@ -0,0 +1,74 @@
+# Generated by Django 4.2.11 on 2026-10-19 03:32
+
+from django.db import migrations, models
+
+# PostgreSQL : la table créée par Django est remplacée par une table
+# partitionnée par mois (partitions créées par content.engagement) ; la clé
+# primaire inclut la clé de partition, et un index BRIN suffit pour une
+# table en ajout seul. La partition par défaut reçoit les événements hors
+# des mois déjà créés.
+POSTGRESQL_PARTITIONING = [
+    "DROP TABLE content_engagementevent",
+    "CREATE TABLE content_engagementevent ("
+    " id bigserial NOT NULL,"
+    " occurred_at timestamp with time zone NOT NULL,"
+    " target smallint NOT NULL CHECK (target >= 0),"
+    " object_id integer NOT NULL CHECK (object_id >= 0),"
+    " kind smallint NOT NULL CHECK (kind >= 0),"
+    " PRIMARY KEY (id, occurred_at)"
+    ") PARTITION BY RANGE (occurred_at)",
+    "CREATE TABLE content_engagementevent_default"
+    " PARTITION OF content_engagementevent DEFAULT",
+    "CREATE INDEX engagement_occurred_idx"
+    " ON content_engagementevent USING brin (occurred_at)",
+]
+
+
+def partition_events(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRESQL_PARTITIONING:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0023_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField()),
+                ('target', models.PositiveSmallIntegerField(choices=[(1, 'Post'), (2, 'Podcast'), (3, 'Vidéo')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Vue'), (2, 'Écoute'), (3, "J'aime")])),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EngagementRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('target', models.PositiveSmallIntegerField(choices=[(1, 'Post'), (2, 'Podcast'), (3, 'Vidéo')])),
+                ('object_id', models.PositiveIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Vue'), (2, 'Écoute'), (3, "J'aime")])),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='engagementrollup',
+            constraint=models.UniqueConstraint(fields=('target', 'object_id', 'kind', 'date'), name='unique_engagement_rollup'),
+        ),
+        migrations.AddIndex(
+            model_name='engagementevent',
+            index=models.Index(fields=['occurred_at'], name='engagement_occurred_idx'),
+        ),
+        # Le retour arrière de CreateModel supprime la table partitionnée
+        migrations.RunPython(partition_events, migrations.RunPython.noop),
+    ]
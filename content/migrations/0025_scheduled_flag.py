@@ -0,0 +1,64 @@
+# Generated by Django 4.2.11 on 2026-10-19 04:09
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_scheduled(apps, schema_editor):
+    # Seuls les contenus dont la date de publication est à venir sont
+    # programmés ; une date passée ne distingue pas un contenu retiré
+    now = timezone.now()
+    for name in ("Post", "Podcast", "Video"):
+        apps.get_model("content", name).objects.filter(
+            is_published=False, published_at__gt=now
+        ).update(is_scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0024_engagement_events'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='podcast',
+            name='podcast_scheduled_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_scheduled_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='video',
+            name='video_scheduled_idx',
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='is_scheduled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_scheduled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='is_scheduled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_scheduled, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(condition=models.Q(('is_scheduled', True)), fields=['published_at'], name='podcast_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_scheduled', True)), fields=['published_at'], name='post_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(condition=models.Q(('is_scheduled', True)), fields=['published_at'], name='video_scheduled_idx'),
+        ),
+    ]
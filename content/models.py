@@ -1,15 +1,44 @@
 # content/models.py
-from django.db import models
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
 from django.conf import settings
+from django.core.validators import FileExtensionValidator
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
+from pathlib import Path
 from cloudinary.models import CloudinaryField
 from django_ckeditor_5.fields import CKEditor5Field
-import cloudinary
+from helpers.audio import InvalidAudioError, probe_audio, validate_audio_file
+from helpers.image_variants import variant_urls
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
+class ProcessingState(models.TextChoices):
+    """État du traitement asynchrone des médias (upload Cloudinary)"""
+
+    PENDING = "pending", "En attente"
+    PROCESSING = "processing", "En cours"
+    READY = "ready", "Prêt"
+    FAILED = "failed", "Échec"
+
+
+def update_schedule(instance):
+    """
+    Tient à jour ``is_scheduled`` : un contenu non publié dont la date de
+    publication est à venir est programmé. Un contenu retiré (décoché après
+    publication) garde sa date passée mais n'est pas programmé, et n'est donc
+    pas republié par ``helpers.tasks.publish_scheduled_content``.
+    """
+    if instance.is_published or instance.published_at is None:
+        instance.is_scheduled = False
+    elif instance.published_at > timezone.now():
+        instance.is_scheduled = True
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
@@ -112,6 +141,25 @@ class Post(models.Model):
     # Cloudinary public_id pour référence et suppression
     cloudinary_public_id = models.CharField(max_length=255, blank=True, default="")
 
+    # Suivi de l'upload asynchrone (voir content.tasks.upload_post_image)
+    processing_state = models.CharField(
+        max_length=20,
+        choices=ProcessingState.choices,
+        default=ProcessingState.READY,
+    )
+    # Clé d'idempotence du fichier featured_image en cours de traitement
+    image_upload_key = models.CharField(max_length=64, blank=True, default="")
+
+    # Variantes locales WebP/JPEG (sans Cloudinary), voir helpers.image_variants
+    image_variants = models.JSONField(default=dict, blank=True)
+
+    # Palette de couleurs dominantes de l'image (hex, par population décroissante)
+    # et public_id (ou fichier) pour lequel elle a été calculée
+    palette = models.JSONField(default=list, blank=True)
+    palette_source = models.CharField(max_length=255, blank=True, default="")
+    # Aperçu flou (BlurHash) affiché pendant le chargement de l'image
+    blurhash = models.CharField(max_length=64, blank=True, default="")
+
     # Version originale de l'image
     cloudinary_image = CloudinaryField(
         "post_featured_image",
@@ -150,6 +198,7 @@ class Post(models.Model):
     )
 
     published_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="posts"
@@ -161,6 +210,8 @@ class Post(models.Model):
     reading_time = models.PositiveIntegerField(default=0)  # en minutes
     is_featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=False)
+    # Programmé pour publication automatique (voir update_schedule)
+    is_scheduled = models.BooleanField(default=False, editable=False)
 
     # Champs SEO
     meta_title = models.CharField(
@@ -174,6 +225,17 @@ class Post(models.Model):
         help_text="Description SEO (160 caractères max pour un bon référencement)",
     )
 
+    class Meta:
+        indexes = [
+            # Index partiel des contenus programmés, balayés par
+            # helpers.tasks.publish_scheduled_content
+            models.Index(
+                fields=["published_at"],
+                condition=models.Q(is_scheduled=True),
+                name="post_scheduled_idx",
+            )
+        ]
+
     def __str__(self):
         return self.title
 
@@ -188,20 +250,13 @@ class Post(models.Model):
         if not self.meta_description and self.excerpt:
             self.meta_description = self.excerpt[:160]  # Limiter à 160 caractères
 
+        update_schedule(self)
         super().save(*args, **kwargs)
 
-    def delete(self, *args, **kwargs):
-        """Supprimer les images Cloudinary lors de la suppression du post"""
-        if self.cloudinary_public_id:
-            try:
-                cloudinary.uploader.destroy(
-                    self.cloudinary_public_id, resource_type="image"
-                )
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de la suppression de l'image Cloudinary: {str(e)}"
-                )
-        super().delete(*args, **kwargs)
+    @property
+    def accent_color(self):
+        """Couleur d'accent de la carte : couleur dominante de l'image"""
+        return self.palette[0] if self.palette else ""
 
     @property
     def image_urls(self):
@@ -213,10 +268,14 @@ class Post(models.Model):
             urls["original"] = self.cloudinary_image.url
         elif self.featured_image:
             urls["original"] = self.featured_image.url
+        # Sans Cloudinary, préférer les variantes locales redimensionnées
+        variants = variant_urls(self.image_variants, ("large", "thumbnail"))
 
         # URL de l'image large
         if hasattr(self, "cloudinary_image_large") and self.cloudinary_image_large:
             urls["large"] = self.cloudinary_image_large.url
+        elif "large" in variants:
+            urls["large"] = variants["large"]
         elif urls["original"]:
             urls["large"] = urls["original"]
 
@@ -226,6 +285,8 @@ class Post(models.Model):
             and self.cloudinary_image_thumbnail
         ):
             urls["thumbnail"] = self.cloudinary_image_thumbnail.url
+        elif "thumbnail" in variants:
+            urls["thumbnail"] = variants["thumbnail"]
         elif urls["original"]:
             urls["thumbnail"] = urls["original"]
 
@@ -263,6 +324,7 @@ class Podcast(models.Model):
         help_text="Formats acceptés : MP3, WAV, M4A, OGG, WEBM",
         null=True,
         blank=True,
+        validators=[validate_audio_file],
     )
 
     # URLs et identifiants Cloudinary
@@ -271,6 +333,17 @@ class Podcast(models.Model):
 
     duration = models.PositiveIntegerField(null=True, blank=True)  # en secondes
 
+    # Caractéristiques techniques lues dans les en-têtes du fichier audio
+    audio_format = models.CharField(max_length=10, blank=True, default="")
+    audio_bitrate = models.PositiveIntegerField(null=True, blank=True)  # en bit/s
+    audio_sample_rate = models.PositiveIntegerField(null=True, blank=True)  # en Hz
+    audio_channels = models.PositiveSmallIntegerField(null=True, blank=True)
+    audio_size = models.PositiveBigIntegerField(null=True, blank=True)  # en octets
+
+    # Pics min/max précalculés pour le lecteur, voir helpers.waveform
+    waveform = models.FileField(upload_to="podcast_waveforms/", blank=True, editable=False)
+    waveform_source = models.CharField(max_length=255, blank=True, default="")
+
     # Champ pour l'ancienne méthode d'upload (conservé pour compatibilité)
     cover_image = models.ImageField(upload_to="podcast_covers/", blank=True, null=True)
 
@@ -279,6 +352,15 @@ class Podcast(models.Model):
         max_length=255, blank=True, default=""
     )
 
+    # Variantes locales WebP/JPEG de la couverture (sans Cloudinary)
+    image_variants = models.JSONField(default=dict, blank=True)
+
+    # Palette de couleurs dominantes de la couverture et sa source
+    palette = models.JSONField(default=list, blank=True)
+    palette_source = models.CharField(max_length=255, blank=True, default="")
+    # Aperçu flou (BlurHash) affiché pendant le chargement de l'image
+    blurhash = models.CharField(max_length=64, blank=True, default="")
+
     # Version originale de l'image de couverture
     cloudinary_cover_image = CloudinaryField(
         "podcast_cover_image",
@@ -316,6 +398,7 @@ class Podcast(models.Model):
         ],
     )
     published_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     host = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -338,10 +421,42 @@ class Podcast(models.Model):
     season = models.PositiveIntegerField(default=1)
     episode = models.PositiveIntegerField(default=1)
     is_processed = models.BooleanField(default=False)
+    # Suivi de l'upload asynchrone (voir content.tasks.upload_podcast_media)
+    processing_state = models.CharField(
+        max_length=20,
+        choices=ProcessingState.choices,
+        default=ProcessingState.READY,
+    )
+    # Clés d'idempotence des fichiers audio et de couverture
+    audio_upload_key = models.CharField(max_length=64, blank=True, default="")
+    cover_upload_key = models.CharField(max_length=64, blank=True, default="")
     is_published = models.BooleanField(default=True)
+    # Programmé pour publication automatique (voir update_schedule)
+    is_scheduled = models.BooleanField(default=False, editable=False)
     transcript = CKEditor5Field(
         "Transcript", config_name="extends", blank=True, null=True
     )
+    # Sous-titres SRT/VTT, prioritaires sur le HTML pour le découpage horodaté
+    transcript_file = models.FileField(
+        upload_to="podcast_transcripts/",
+        blank=True,
+        null=True,
+        help_text="Formats acceptés : SRT, VTT",
+        validators=[FileExtensionValidator(["srt", "vtt"])],
+    )
+    # Empreinte de la transcription découpée en segments (voir TranscriptSegment)
+    transcript_key = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # Index partiel des contenus programmés, balayés par
+            # helpers.tasks.publish_scheduled_content
+            models.Index(
+                fields=["published_at"],
+                condition=models.Q(is_scheduled=True),
+                name="podcast_scheduled_idx",
+            )
+        ]
 
     def __str__(self):
         return self.title
@@ -349,32 +464,28 @@ class Podcast(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
-
-    def delete(self, *args, **kwargs):
-        """Supprimer le fichier audio et les images Cloudinary lors de la suppression du podcast"""
-        if self.cloudinary_public_id:
+        # Nouveau fichier audio : lire durée et caractéristiques dans ses en-têtes
+        if self.audio_file and not self.audio_file._committed:
             try:
-                cloudinary.uploader.destroy(
-                    self.cloudinary_public_id, resource_type="video"
-                )
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de la suppression du fichier audio Cloudinary: {str(e)}"
-                )
+                self.apply_audio_info(probe_audio(self.audio_file))
+            except InvalidAudioError:
+                pass
+        update_schedule(self)
+        super().save(*args, **kwargs)
 
-        # Supprimer également l'image de couverture si elle existe
-        if self.cover_image_cloudinary_public_id:
-            try:
-                cloudinary.uploader.destroy(
-                    self.cover_image_cloudinary_public_id, resource_type="image"
-                )
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de la suppression de l'image de couverture Cloudinary: {str(e)}"
-                )
+    def apply_audio_info(self, info):
+        """Renseigne la durée et les caractéristiques audio depuis un ``AudioInfo``"""
+        self.duration = round(info.duration)
+        self.audio_format = info.format
+        self.audio_bitrate = info.bitrate
+        self.audio_sample_rate = info.sample_rate
+        self.audio_channels = info.channels
+        self.audio_size = info.size
 
-        super().delete(*args, **kwargs)
+    @property
+    def accent_color(self):
+        """Couleur d'accent de la carte : couleur dominante de la couverture"""
+        return self.palette[0] if self.palette else ""
 
     @property
     def cover_image_urls(self):
@@ -394,20 +505,28 @@ class Podcast(models.Model):
                     else self.cloudinary_cover_image.url
                 ),
             }
-        # Sinon, utiliser l'image classique si disponible
+        # Sinon, utiliser l'image classique et ses variantes locales
         elif self.cover_image:
+            variants = variant_urls(self.image_variants, ("large", "thumbnail"))
             return {
                 "original": self.cover_image.url,
-                "large": self.cover_image.url,
-                "thumbnail": self.cover_image.url,
+                "large": variants.get("large", self.cover_image.url),
+                "thumbnail": variants.get("thumbnail", self.cover_image.url),
             }
         # Si aucune image n'est disponible
         return {"original": "", "large": "", "thumbnail": ""}
 
     @property
     def audio_url(self):
-        """Retourne l'URL du fichier audio"""
-        return self.cloudinary_url or (self.audio_file.url if self.audio_file else "")
+        """
+        Retourne l'URL du fichier audio : Cloudinary, sinon la vue locale qui
+        gère les requêtes Range (voir content.views.podcast_audio)
+        """
+        if self.cloudinary_url:
+            return self.cloudinary_url
+        if self.audio_file:
+            return reverse("podcast-audio", kwargs={"slug": self.slug})
+        return ""
 
     def get_tags_list(self):
         """Retourne la liste des tags sous forme de liste Python"""
@@ -420,6 +539,144 @@ class Podcast(models.Model):
         self.tags = ", ".join(tags_list) if tags_list else ""
 
 
+class PodcastUploadSession(models.Model):
+    """
+    Session d'upload audio reprenable (protocole inspiré de tus).
+
+    Les morceaux reçus sont ajoutés directement au fichier ``temp_path`` ;
+    ``offset`` indique le nombre d'octets déjà reçus, ce qui permet au client
+    de reprendre un upload interrompu là où il s'est arrêté.
+    """
+
+    class Status(models.TextChoices):
+        UPLOADING = "uploading", "Réception en cours"
+        FINALIZING = "finalizing", "Envoi vers Cloudinary"
+        COMPLETE = "complete", "Terminé"
+        FAILED = "failed", "Échec"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    podcast = models.ForeignKey(
+        Podcast, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="podcast_upload_sessions",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Taille totale annoncée en octets")
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.UPLOADING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def temp_path(self):
+        """Chemin du fichier partiel sur le disque local"""
+        return Path(settings.MEDIA_ROOT) / "temp_podcasts" / "uploads" / f"{self.id}.part"
+
+
+class TranscriptSegmentQuerySet(models.QuerySet):
+    def search(self, query):
+        """
+        Segments contenant tous les mots de ``query``, via l'index plein
+        texte du moteur : GIN sur ``to_tsvector('simple', text)`` pour
+        PostgreSQL, table FTS5 pour SQLite (voir la migration 0021). Les
+        autres moteurs retombent sur ``icontains``.
+        """
+        terms = query.split()
+        if not terms:
+            return self.none()
+        vendor = connections[self.db].vendor
+        if vendor == "postgresql":
+            return self.filter(
+                RawSQL(
+                    "to_tsvector('simple', \"content_transcriptsegment\".\"text\")"
+                    " @@ websearch_to_tsquery('simple', %s)",
+                    [query],
+                    output_field=models.BooleanField(),
+                )
+            )
+        if vendor == "sqlite":
+            match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            return self.filter(
+                RawSQL(
+                    "\"content_transcriptsegment\".\"id\" IN (SELECT rowid FROM"
+                    " content_transcriptsegment_fts WHERE"
+                    " content_transcriptsegment_fts MATCH %s)",
+                    [match],
+                    output_field=models.BooleanField(),
+                )
+            )
+        queryset = self
+        for term in terms:
+            queryset = queryset.filter(text__icontains=term)
+        return queryset
+
+
+class TranscriptSegment(models.Model):
+    """
+    Segment horodaté de la transcription d'un podcast, construit à partir
+    du fichier SRT/VTT ou du HTML de ``Podcast.transcript``. Permet au
+    lecteur de se positionner sur un passage trouvé par la recherche.
+    """
+
+    podcast = models.ForeignKey(
+        Podcast, on_delete=models.CASCADE, related_name="transcript_segments"
+    )
+    position = models.PositiveIntegerField()
+    start = models.FloatField(null=True, blank=True)  # en secondes
+    end = models.FloatField(null=True, blank=True)  # en secondes
+    speaker = models.CharField(max_length=100, blank=True, default="")
+    text = models.TextField()
+
+    objects = TranscriptSegmentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["podcast", "position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["podcast", "position"], name="unique_transcript_position"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.podcast_id} #{self.position}"
+
+
+class CloudinaryDeletion(models.Model):
+    """
+    File d'attente (outbox) des ressources Cloudinary à supprimer.
+
+    Alimentée par le signal ``post_delete`` des posts et podcasts, dans la
+    même transaction que la suppression, puis vidée par lots par la tâche
+    ``content.tasks.purge_cloudinary_deletions``.
+    """
+
+    public_id = models.CharField(max_length=255)
+    resource_type = models.CharField(max_length=10, default="image")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["public_id", "resource_type"],
+                name="unique_cloudinary_deletion",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.resource_type}:{self.public_id}"
+
+
 class Video(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
@@ -428,24 +685,145 @@ class Video(models.Model):
     )
     video_url = models.URLField()
     thumbnail = models.ImageField(upload_to="video_thumbnails/", blank=True, null=True)
+    # Variantes locales WebP/JPEG de la miniature, voir helpers.image_variants
+    image_variants = models.JSONField(default=dict, blank=True)
     duration = models.PositiveIntegerField(
         help_text="Durée en secondes", null=True, blank=True
     )
     published_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.PositiveIntegerField(default=0)
     likes_count = models.PositiveIntegerField(default=0)
     is_featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=False)
+    # Programmé pour publication automatique (voir update_schedule)
+    is_scheduled = models.BooleanField(default=False, editable=False)
     presenter = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="videos"
     )
     categories = models.ManyToManyField(Category, related_name="videos")
 
+    class Meta:
+        indexes = [
+            # Index partiel des contenus programmés, balayés par
+            # helpers.tasks.publish_scheduled_content
+            models.Index(
+                fields=["published_at"],
+                condition=models.Q(is_scheduled=True),
+                name="video_scheduled_idx",
+            )
+        ]
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_schedule(self)
         super().save(*args, **kwargs)
+
+    @property
+    def thumbnail_urls(self):
+        """Retourne les URL de la miniature et de ses variantes locales"""
+        if not self.thumbnail:
+            return {"original": "", "large": "", "thumbnail": ""}
+        variants = variant_urls(self.image_variants, ("large", "thumbnail"))
+        return {
+            "original": self.thumbnail.url,
+            "large": variants.get("large", self.thumbnail.url),
+            "thumbnail": variants.get("thumbnail", self.thumbnail.url),
+        }
+
+
+class DailyRollup(models.Model):
+    """
+    Agrégat quotidien d'une métrique pour un type de contenu, alimenté par
+    ``helpers.tasks.rollup_daily_stats``. Les rapports et ``/api/stats/``
+    lisent ces lignes plutôt que les tables de contenu.
+    """
+
+    class Metric(models.TextChoices):
+        NEW = "new", "Nouveaux contenus"
+        PUBLISHED = "published", "Publications"
+        VIEWS = "views", "Vues"
+        PLAYS = "plays", "Écoutes"
+        LIKES = "likes", "J'aime"
+        COMMENTS = "comments", "Commentaires"
+        REGISTRATIONS = "registrations", "Inscriptions"
+
+    date = models.DateField()
+    # post, podcast, video ou user (inscriptions)
+    content_type = models.CharField(max_length=20)
+    metric = models.CharField(max_length=20, choices=Metric.choices)
+    value = models.BigIntegerField(default=0)
+    # Compteur cumulé (views_count...) relevé ce jour-là ; la valeur du jour
+    # est l'écart avec le relevé précédent
+    total = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date", "content_type", "metric"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "content_type", "metric"], name="unique_daily_rollup"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.content_type}.{self.metric}={self.value}"
+
+
+class EngagementEvent(models.Model):
+    """
+    Événement d'audience brut (vue, écoute, j'aime), en ajout seul.
+
+    Jamais écrit pendant la requête : voir ``content.engagement``. Sous
+    PostgreSQL la table est partitionnée par mois sur ``occurred_at``
+    (migration 0024) ; les mois anciens sont compactés dans
+    ``EngagementRollup`` puis supprimés.
+    """
+
+    class Target(models.IntegerChoices):
+        POST = 1, "Post"
+        PODCAST = 2, "Podcast"
+        VIDEO = 3, "Vidéo"
+
+    class Kind(models.IntegerChoices):
+        VIEW = 1, "Vue"
+        PLAY = 2, "Écoute"
+        LIKE = 3, "J'aime"
+
+    occurred_at = models.DateTimeField()
+    target = models.PositiveSmallIntegerField(choices=Target.choices)
+    object_id = models.PositiveIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+
+    class Meta:
+        indexes = [models.Index(fields=["occurred_at"], name="engagement_occurred_idx")]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.get_target_display()} #{self.object_id}"
+
+
+class EngagementRollup(models.Model):
+    """Nombre d'événements d'audience par jour, contenu et type d'événement"""
+
+    date = models.DateField()
+    target = models.PositiveSmallIntegerField(choices=EngagementEvent.Target.choices)
+    object_id = models.PositiveIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=EngagementEvent.Kind.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["target", "object_id", "kind", "date"],
+                name="unique_engagement_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.target}#{self.object_id} {self.kind}={self.count}"
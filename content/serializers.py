@@ -1,8 +1,21 @@
 # content/serializers.py
 from rest_framework import serializers
 from authentication.models import User
+from django.conf import settings
+from django.urls import reverse
 from django.utils.text import slugify
-from .models import Category, Tag, UserProfile, Post, Comment, Podcast, Video
+from .models import (
+    Category,
+    Tag,
+    UserProfile,
+    Post,
+    Comment,
+    EngagementEvent,
+    Podcast,
+    PodcastUploadSession,
+    TranscriptSegment,
+    Video,
+)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -20,6 +33,7 @@ class UserSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "avatar",
+            "avatar_urls",
         ]
 
 
@@ -104,6 +118,9 @@ class PostListSerializer(serializers.ModelSerializer):
             "excerpt",
             "featured_image",
             "featured_image_urls",
+            "palette",
+            "accent_color",
+            "blurhash",
             "published_at",
             "author",
             "categories",
@@ -125,35 +142,8 @@ class PostListSerializer(serializers.ModelSerializer):
         return None
 
     def get_featured_image_urls(self, obj):
-        """Retourne les URLs des différentes versions d'image"""
-        # Vérifier si on a des images Cloudinary
-        if hasattr(obj, "cloudinary_image") and obj.cloudinary_image:
-            original_url = str(obj.cloudinary_image.url) if obj.cloudinary_image else ""
-            large_url = (
-                str(obj.cloudinary_image_large.url)
-                if obj.cloudinary_image_large
-                else original_url
-            )
-            thumbnail_url = (
-                str(obj.cloudinary_image_thumbnail.url)
-                if obj.cloudinary_image_thumbnail
-                else original_url
-            )
-
-            return {
-                "original": original_url,
-                "large": large_url,
-                "thumbnail": thumbnail_url,
-            }
-        elif obj.featured_image:
-            # Fallback pour les images classiques
-            image_url = obj.featured_image.url
-            return {
-                "original": image_url,
-                "large": image_url,
-                "thumbnail": image_url,
-            }
-        return {"original": "", "large": "", "thumbnail": ""}
+        """Retourne les URLs des différentes versions d'image (Cloudinary ou variantes locales)"""
+        return obj.image_urls
 
 
 class PostDetailSerializer(serializers.ModelSerializer):
@@ -174,6 +164,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
             "excerpt",
             "featured_image",
             "featured_image_urls",
+            "palette",
+            "accent_color",
             "published_at",
             "updated_at",
             "author",
@@ -198,35 +190,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_featured_image_urls(self, obj):
-        """Retourne les URLs des différentes versions d'image"""
-        # Vérifier si on a des images Cloudinary
-        if hasattr(obj, "cloudinary_image") and obj.cloudinary_image:
-            original_url = str(obj.cloudinary_image.url) if obj.cloudinary_image else ""
-            large_url = (
-                str(obj.cloudinary_image_large.url)
-                if obj.cloudinary_image_large
-                else original_url
-            )
-            thumbnail_url = (
-                str(obj.cloudinary_image_thumbnail.url)
-                if obj.cloudinary_image_thumbnail
-                else original_url
-            )
-
-            return {
-                "original": original_url,
-                "large": large_url,
-                "thumbnail": thumbnail_url,
-            }
-        elif obj.featured_image:
-            # Fallback pour les images classiques
-            image_url = obj.featured_image.url
-            return {
-                "original": image_url,
-                "large": image_url,
-                "thumbnail": image_url,
-            }
-        return {"original": "", "large": "", "thumbnail": ""}
+        """Retourne les URLs des différentes versions d'image (Cloudinary ou variantes locales)"""
+        return obj.image_urls
 
 
 class PodcastListSerializer(serializers.ModelSerializer):
@@ -245,6 +210,9 @@ class PodcastListSerializer(serializers.ModelSerializer):
             "description",
             "cover_image",
             "cover_image_urls",
+            "palette",
+            "accent_color",
+            "blurhash",
             "duration",
             "published_at",
             "host",
@@ -266,39 +234,8 @@ class PodcastListSerializer(serializers.ModelSerializer):
         return None
 
     def get_cover_image_urls(self, obj):
-        """Retourne les URLs des différentes versions d'image"""
-        # Vérifier si on a des images Cloudinary
-        if hasattr(obj, "cloudinary_cover_image") and obj.cloudinary_cover_image:
-            original_url = (
-                str(obj.cloudinary_cover_image.url)
-                if obj.cloudinary_cover_image
-                else ""
-            )
-            large_url = (
-                str(obj.cloudinary_cover_image_large.url)
-                if obj.cloudinary_cover_image_large
-                else original_url
-            )
-            thumbnail_url = (
-                str(obj.cloudinary_cover_image_thumbnail.url)
-                if obj.cloudinary_cover_image_thumbnail
-                else original_url
-            )
-
-            return {
-                "original": original_url,
-                "large": large_url,
-                "thumbnail": thumbnail_url,
-            }
-        elif obj.cover_image:
-            # Fallback pour les images classiques
-            image_url = obj.cover_image.url
-            return {
-                "original": image_url,
-                "large": image_url,
-                "thumbnail": image_url,
-            }
-        return {"original": "", "large": "", "thumbnail": ""}
+        """Retourne les URLs des différentes versions d'image (Cloudinary ou variantes locales)"""
+        return obj.cover_image_urls
 
     def get_tags_list(self, obj):
         """Retourne les tags sous forme de liste pour l'API"""
@@ -312,6 +249,7 @@ class PodcastDetailSerializer(serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
     cover_image_urls = serializers.SerializerMethodField()
     audio_url = serializers.SerializerMethodField()
+    waveform_url = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
 
     class Meta:
@@ -323,8 +261,16 @@ class PodcastDetailSerializer(serializers.ModelSerializer):
             "description",
             "cover_image",
             "cover_image_urls",
+            "palette",
+            "accent_color",
             "audio_url",
             "duration",
+            "audio_format",
+            "audio_bitrate",
+            "audio_sample_rate",
+            "audio_channels",
+            "audio_size",
+            "waveform_url",
             "published_at",
             "updated_at",
             "host",
@@ -337,6 +283,7 @@ class PodcastDetailSerializer(serializers.ModelSerializer):
             "season",
             "episode",
             "transcript",
+            "processing_state",
         ]
 
     def get_cover_image(self, obj):
@@ -348,46 +295,23 @@ class PodcastDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_cover_image_urls(self, obj):
-        """Retourne les URLs des différentes versions d'image"""
-        # Vérifier si on a des images Cloudinary
-        if hasattr(obj, "cloudinary_cover_image") and obj.cloudinary_cover_image:
-            original_url = (
-                str(obj.cloudinary_cover_image.url)
-                if obj.cloudinary_cover_image
-                else ""
-            )
-            large_url = (
-                str(obj.cloudinary_cover_image_large.url)
-                if obj.cloudinary_cover_image_large
-                else original_url
-            )
-            thumbnail_url = (
-                str(obj.cloudinary_cover_image_thumbnail.url)
-                if obj.cloudinary_cover_image_thumbnail
-                else original_url
-            )
-
-            return {
-                "original": original_url,
-                "large": large_url,
-                "thumbnail": thumbnail_url,
-            }
-        elif obj.cover_image:
-            # Fallback pour les images classiques
-            image_url = obj.cover_image.url
-            return {
-                "original": image_url,
-                "large": image_url,
-                "thumbnail": image_url,
-            }
-        return {"original": "", "large": "", "thumbnail": ""}
+        """Retourne les URLs des différentes versions d'image (Cloudinary ou variantes locales)"""
+        return obj.cover_image_urls
 
     def get_audio_url(self, obj):
-        if obj.cloudinary_url:
-            return obj.cloudinary_url
-        if obj.audio_file:
-            return obj.audio_file.url
-        return None
+        url = obj.audio_url
+        if not url:
+            return None
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_waveform_url(self, obj):
+        """URL de l'endpoint des pics de la forme d'onde, une fois calculés"""
+        if not obj.waveform:
+            return None
+        url = reverse("podcast-waveform", kwargs={"slug": obj.slug})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
     def get_tags_list(self, obj):
         """Retourne les tags sous forme de liste pour l'API"""
@@ -413,7 +337,12 @@ class PodcastUploadSerializer(serializers.ModelSerializer):
             "season",
             "episode",
             "is_published",
+            "slug",
+            "transcript",
+            "transcript_file",
+            "processing_state",
         ]
+        read_only_fields = ["slug", "processing_state"]
 
     def create(self, validated_data):
         tags_list = validated_data.pop("tags_list", [])
@@ -432,6 +361,94 @@ class PodcastUploadSerializer(serializers.ModelSerializer):
         return instance
 
 
+class PodcastUploadSessionSerializer(serializers.ModelSerializer):
+    podcast = serializers.SlugRelatedField(
+        slug_field="slug", queryset=Podcast.objects.all()
+    )
+
+    class Meta:
+        model = PodcastUploadSession
+        fields = [
+            "id",
+            "podcast",
+            "filename",
+            "size",
+            "offset",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "offset", "status", "created_at", "updated_at"]
+
+    def validate_podcast(self, value):
+        request = self.context.get("request")
+        if request and value.host_id != request.user.id:
+            raise serializers.ValidationError(
+                "Vous ne pouvez envoyer l'audio que de vos propres podcasts."
+            )
+        return value
+
+    def validate_size(self, value):
+        max_size = settings.PODCAST_UPLOAD_MAX_SIZE
+        if value <= 0:
+            raise serializers.ValidationError("La taille doit être positive.")
+        if value > max_size:
+            raise serializers.ValidationError(
+                f"La taille maximale autorisée est de {max_size} octets."
+            )
+        return value
+
+
+class TranscriptSegmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TranscriptSegment
+        fields = ["position", "start", "end", "speaker", "text"]
+
+
+class TranscriptSearchResultSerializer(TranscriptSegmentSerializer):
+    """Segment trouvé dans le catalogue, avec l'épisode auquel il appartient"""
+
+    podcast_slug = serializers.CharField(source="podcast.slug", read_only=True)
+    podcast_title = serializers.CharField(source="podcast.title", read_only=True)
+
+    class Meta(TranscriptSegmentSerializer.Meta):
+        fields = ["podcast_slug", "podcast_title"] + TranscriptSegmentSerializer.Meta.fields
+
+
+class EngagementEventSerializer(serializers.Serializer):
+    """Événement d'audience envoyé par le client (ex. ``navigator.sendBeacon``)"""
+
+    target = serializers.ChoiceField(
+        choices=[label.lower() for label in EngagementEvent.Target.names]
+    )
+    id = serializers.IntegerField(min_value=1)
+    kind = serializers.ChoiceField(
+        choices=[label.lower() for label in EngagementEvent.Kind.names]
+    )
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        return (
+            EngagementEvent.Target[value["target"].upper()],
+            value["id"],
+            EngagementEvent.Kind[value["kind"].upper()],
+        )
+
+
+class DirectUploadSignSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(
+        choices=["post_image", "podcast_cover", "podcast_audio"]
+    )
+    slug = serializers.SlugField()
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    public_id = serializers.CharField(max_length=255)
+    version = serializers.CharField(max_length=32)
+    signature = serializers.CharField(max_length=128)
+    secure_url = serializers.URLField(max_length=500, required=False, default="")
+
+
 class VideoListSerializer(serializers.ModelSerializer):
     presenter = UserSerializer(read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
@@ -445,6 +462,7 @@ class VideoListSerializer(serializers.ModelSerializer):
             "description",
             "video_url",
             "thumbnail",
+            "thumbnail_urls",
             "duration",
             "published_at",
             "presenter",
@@ -469,6 +487,7 @@ class VideoDetailSerializer(serializers.ModelSerializer):
             "description",
             "video_url",
             "thumbnail",
+            "thumbnail_urls",
             "duration",
             "published_at",
             "updated_at",
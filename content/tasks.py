@@ -1,4 +1,15 @@
+import hashlib
+import logging
+
 from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from helpers.tasks import generate_image_variants
+
+logger = logging.getLogger(__name__)
+
 
 @shared_task(
     name="content.tasks.test_celery_task",
@@ -13,11 +24,9 @@ def test_celery_task(self, name="Celery"):
     A simple task to test if Celery is working correctly.
     This task logs a message and returns a success message with timestamp.
     """
-    import logging
     from django.utils import timezone
     import time
-    
-    logger = logging.getLogger(__name__)
+
     logger.info(f"Test Celery task started at {timezone.now()}")
     
     try:
@@ -32,4 +41,1098 @@ def test_celery_task(self, name="Celery"):
         return result_msg
     except Exception as exc:
         logger.error(f"Task failed: {exc}")
-        self.retry(exc=exc)
\ No newline at end of file
+        self.retry(exc=exc)
+
+# ============================================================================
+# UPLOADS CLOUDINARY ASYNCHRONES
+# ============================================================================
+
+
+def compute_upload_key(field_file):
+    """
+    Clé d'idempotence d'un fichier uploadé : empreinte de son nom de stockage
+    (unique) et de sa taille. Deux sauvegardes du même fichier produisent la
+    même clé, un nouveau fichier produit une nouvelle clé.
+    """
+    if not field_file:
+        return ""
+    try:
+        size = field_file.size
+    except (OSError, ValueError):
+        size = 0
+    return hashlib.sha256(f"{field_file.name}:{size}".encode()).hexdigest()[:40]
+
+
+def acquire_upload_lock(name, owner=None):
+    """
+    Verrou de déduplication partagé entre workers (nécessite un cache partagé).
+
+    ``owner`` est l'identifiant de la tâche : un message redistribué après
+    l'arrêt brutal d'un worker (``acks_late``) porte le même identifiant et
+    reprend le verrou qu'il détenait, au lieu d'être ignoré jusqu'à son
+    expiration.
+    """
+    key = f"content:upload-lock:{name}"
+    value = owner or "1"
+    timeout = getattr(settings, "CONTENT_UPLOAD_LOCK_TIMEOUT", 3600)
+    if cache.add(key, value, timeout=timeout):
+        return True
+    if owner and cache.get(key) == owner:
+        cache.set(key, value, timeout=timeout)
+        return True
+    return False
+
+
+def release_upload_lock(name, owner=None):
+    key = f"content:upload-lock:{name}"
+    # Ne libère pas un verrou repris entre-temps par une autre tâche
+    if owner is None or cache.get(key) == owner:
+        cache.delete(key)
+
+
+def retry_countdown(retries):
+    """Backoff exponentiel plafonné : 30s, 60s, 120s, ... 15 min max"""
+    return min(30 * (2**retries), 900)
+
+
+def schedule_podcast_media_upload(podcast):
+    """
+    Planifie l'upload des nouveaux fichiers d'un podcast après le commit de
+    la transaction. Retourne True si un upload a été mis en file d'attente.
+    """
+    from helpers._cloudinary import cloudinary_enabled
+    from helpers.image_variants import schedule_image_variants
+    from .models import Podcast, ProcessingState
+
+    if not cloudinary_enabled():
+        # Sans Cloudinary, la couverture est servie via des variantes locales
+        # et la forme d'onde est calculée sur le fichier audio local
+        schedule_image_variants(podcast)
+        schedule_podcast_waveform(podcast)
+        return False
+
+    audio_key = cover_key = ""
+    retry_failed = podcast.processing_state == ProcessingState.FAILED
+    if podcast.audio_file and not podcast.cloudinary_url:
+        key = compute_upload_key(podcast.audio_file)
+        if key != podcast.audio_upload_key or retry_failed:
+            audio_key = key
+    if podcast.cover_image and not podcast.cover_image_cloudinary_public_id:
+        key = compute_upload_key(podcast.cover_image)
+        if key != podcast.cover_upload_key or retry_failed:
+            cover_key = key
+    if not audio_key and not cover_key:
+        return False
+
+    podcast.processing_state = ProcessingState.PENDING
+    podcast.audio_upload_key = audio_key or podcast.audio_upload_key
+    podcast.cover_upload_key = cover_key or podcast.cover_upload_key
+    # update() plutôt que save() pour ne pas redéclencher post_save
+    Podcast.objects.filter(pk=podcast.pk).update(
+        processing_state=podcast.processing_state,
+        audio_upload_key=podcast.audio_upload_key,
+        cover_upload_key=podcast.cover_upload_key,
+    )
+    transaction.on_commit(
+        lambda: upload_podcast_media.delay(podcast.pk, audio_key, cover_key)
+    )
+    return True
+
+
+def schedule_post_image_upload(post):
+    """Planifie l'upload de la nouvelle image d'un post après le commit"""
+    from helpers._cloudinary import cloudinary_enabled
+    from helpers.image_variants import schedule_image_variants
+    from .models import Post, ProcessingState
+
+    if not cloudinary_enabled():
+        # Sans Cloudinary, l'image est servie via des variantes locales
+        schedule_image_variants(post)
+        return False
+    if not post.featured_image or post.cloudinary_public_id:
+        return False
+    image_key = compute_upload_key(post.featured_image)
+    if (
+        image_key == post.image_upload_key
+        and post.processing_state != ProcessingState.FAILED
+    ):
+        return False
+
+    post.processing_state = ProcessingState.PENDING
+    post.image_upload_key = image_key
+    Post.objects.filter(pk=post.pk).update(
+        processing_state=post.processing_state, image_upload_key=image_key
+    )
+    transaction.on_commit(lambda: upload_post_image.delay(post.pk, image_key))
+    return True
+
+
+@shared_task(
+    name="content.tasks.upload_podcast_media",
+    bind=True,
+    max_retries=5,
+    acks_late=True,
+)
+def upload_podcast_media(self, podcast_id, audio_key="", cover_key=""):
+    """
+    Upload l'audio et/ou la couverture d'un podcast vers Cloudinary.
+
+    Idempotente : une clé qui ne correspond plus au fichier en base (fichier
+    remplacé entre-temps) ou déjà traitée est ignorée, et un verrou empêche
+    deux workers de traiter le même fichier en parallèle.
+    """
+    from helpers._cloudinary import CloudinaryAudioService, CloudinaryImageService
+    from .models import Podcast, ProcessingState
+
+    lock_name = f"podcast:{podcast_id}:{audio_key}:{cover_key}"
+    if not acquire_upload_lock(lock_name, self.request.id):
+        logger.info(f"Upload du podcast {podcast_id} déjà en cours, ignoré")
+        return {"status": "skipped", "reason": "locked", "podcast_id": podcast_id}
+
+    try:
+        podcast = Podcast.objects.filter(pk=podcast_id).first()
+        if podcast is None:
+            return {"status": "skipped", "reason": "deleted", "podcast_id": podcast_id}
+
+        upload_audio = (
+            audio_key
+            and podcast.audio_file
+            and podcast.audio_upload_key == audio_key
+            and not podcast.cloudinary_url
+        )
+        upload_cover = (
+            cover_key
+            and podcast.cover_image
+            and podcast.cover_upload_key == cover_key
+            and not podcast.cover_image_cloudinary_public_id
+        )
+        if not upload_audio and not upload_cover:
+            return {"status": "skipped", "reason": "up-to-date", "podcast_id": podcast_id}
+
+        Podcast.objects.filter(pk=podcast_id).update(
+            processing_state=ProcessingState.PROCESSING
+        )
+        if upload_audio:
+            CloudinaryAudioService.upload_podcast_to_cloudinary(
+                podcast, raise_errors=True
+            )
+        analysis = {}
+        if upload_cover:
+            analysis = analyze_local_image(podcast.cover_image)
+            CloudinaryImageService.upload_podcast_cover_image_to_cloudinary(
+                podcast, raise_errors=True
+            )
+            if analysis:
+                analysis["palette_source"] = podcast.cover_image_cloudinary_public_id
+        Podcast.objects.filter(pk=podcast_id).update(
+            processing_state=ProcessingState.READY, **analysis
+        )
+        if upload_audio:
+            compute_podcast_waveform.delay(podcast_id)
+        logger.info(f"Médias du podcast {podcast_id} uploadés vers Cloudinary")
+        return {"status": "success", "podcast_id": podcast_id}
+
+    except Exception as exc:
+        logger.error(f"Échec de l'upload du podcast {podcast_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            Podcast.objects.filter(pk=podcast_id).update(
+                processing_state=ProcessingState.PENDING
+            )
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        Podcast.objects.filter(pk=podcast_id).update(
+            processing_state=ProcessingState.FAILED
+        )
+        # Repli : la couverture locale reste servie en versions redimensionnées
+        if cover_key:
+            generate_image_variants.delay("content.podcast", [podcast_id])
+        return {"status": "error", "podcast_id": podcast_id, "message": str(exc)}
+
+    finally:
+        release_upload_lock(lock_name, self.request.id)
+
+
+@shared_task(
+    name="content.tasks.upload_post_image",
+    bind=True,
+    max_retries=5,
+    acks_late=True,
+)
+def upload_post_image(self, post_id, image_key):
+    """Upload l'image principale d'un post vers Cloudinary (idempotente)"""
+    from helpers._cloudinary import CloudinaryImageService
+    from .models import Post, ProcessingState
+
+    lock_name = f"post:{post_id}:{image_key}"
+    if not acquire_upload_lock(lock_name, self.request.id):
+        logger.info(f"Upload de l'image du post {post_id} déjà en cours, ignoré")
+        return {"status": "skipped", "reason": "locked", "post_id": post_id}
+
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is None:
+            return {"status": "skipped", "reason": "deleted", "post_id": post_id}
+        if (
+            not post.featured_image
+            or post.image_upload_key != image_key
+            or post.cloudinary_public_id
+        ):
+            return {"status": "skipped", "reason": "up-to-date", "post_id": post_id}
+
+        Post.objects.filter(pk=post_id).update(
+            processing_state=ProcessingState.PROCESSING
+        )
+        # Analyse faite sur le fichier local, avant sa suppression par l'upload
+        analysis = analyze_local_image(post.featured_image)
+        CloudinaryImageService.upload_post_image_to_cloudinary(post, raise_errors=True)
+        if analysis:
+            analysis["palette_source"] = post.cloudinary_public_id
+        Post.objects.filter(pk=post_id).update(
+            processing_state=ProcessingState.READY, **analysis
+        )
+        logger.info(f"Image du post {post_id} uploadée vers Cloudinary")
+        return {"status": "success", "post_id": post_id}
+
+    except Exception as exc:
+        logger.error(f"Échec de l'upload de l'image du post {post_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            Post.objects.filter(pk=post_id).update(
+                processing_state=ProcessingState.PENDING
+            )
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        Post.objects.filter(pk=post_id).update(processing_state=ProcessingState.FAILED)
+        # Repli : l'image locale reste servie en versions redimensionnées
+        generate_image_variants.delay("content.post", [post_id])
+        return {"status": "error", "post_id": post_id, "message": str(exc)}
+
+    finally:
+        release_upload_lock(lock_name, self.request.id)
+
+
+def attach_local_podcast_audio(session):
+    """
+    Range le fichier assemblé d'une session dans ``Podcast.audio_file`` et
+    supprime le fichier partiel : l'épisode reste servi par ``podcast_audio``
+    quand Cloudinary est désactivé ou indisponible. Retourne le nom stocké.
+    """
+    from django.core.files import File
+    from .models import Podcast
+
+    field = Podcast._meta.get_field("audio_file")
+    with open(session.temp_path, "rb") as fh:
+        name = field.storage.save(
+            field.generate_filename(session.podcast, session.filename), File(fh)
+        )
+    # update() plutôt que save() pour ne pas redéclencher post_save
+    Podcast.objects.filter(pk=session.podcast_id).update(audio_file=name)
+    session.temp_path.unlink(missing_ok=True)
+    return name
+
+
+@shared_task(
+    name="content.tasks.finalize_podcast_upload",
+    bind=True,
+    max_retries=5,
+    acks_late=True,
+)
+def finalize_podcast_upload(self, session_id):
+    """
+    Envoie le fichier assemblé d'une session d'upload reprenable vers
+    Cloudinary avec ``upload_large``, puis supprime le fichier partiel.
+
+    Sans Cloudinary, ou après le dernier échec, le fichier est rattaché au
+    podcast en local (voir ``attach_local_podcast_audio``).
+    """
+    from helpers._cloudinary import CloudinaryAudioService, cloudinary_enabled
+    from .models import Podcast, PodcastUploadSession, ProcessingState
+
+    lock_name = f"upload-session:{session_id}"
+    if not acquire_upload_lock(lock_name, self.request.id):
+        return {"status": "skipped", "reason": "locked", "session_id": session_id}
+
+    try:
+        session = (
+            PodcastUploadSession.objects.select_related("podcast")
+            .filter(pk=session_id)
+            .first()
+        )
+        if session is None or session.status != PodcastUploadSession.Status.FINALIZING:
+            return {"status": "skipped", "reason": "not-finalizing", "session_id": session_id}
+
+        podcast = session.podcast
+        Podcast.objects.filter(pk=podcast.pk).update(
+            processing_state=ProcessingState.PROCESSING
+        )
+        if cloudinary_enabled():
+            CloudinaryAudioService.upload_large_podcast_to_cloudinary(
+                podcast, session.temp_path, raise_errors=True
+            )
+            session.temp_path.unlink(missing_ok=True)
+            logger.info(f"Session d'upload {session_id} envoyée vers Cloudinary")
+        else:
+            attach_local_podcast_audio(session)
+            logger.info(f"Session d'upload {session_id} conservée en local")
+        Podcast.objects.filter(pk=podcast.pk).update(
+            processing_state=ProcessingState.READY
+        )
+        PodcastUploadSession.objects.filter(pk=session_id).update(
+            status=PodcastUploadSession.Status.COMPLETE
+        )
+        compute_podcast_waveform.delay(podcast.pk)
+        return {"status": "success", "session_id": session_id, "podcast_id": podcast.pk}
+
+    except Exception as exc:
+        logger.error(f"Échec de la finalisation de l'upload {session_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        session = (
+            PodcastUploadSession.objects.select_related("podcast")
+            .filter(pk=session_id)
+            .first()
+        )
+        if session is not None:
+            PodcastUploadSession.objects.filter(pk=session_id).update(
+                status=PodcastUploadSession.Status.FAILED
+            )
+            Podcast.objects.filter(pk=session.podcast_id).update(
+                processing_state=ProcessingState.FAILED
+            )
+            # Repli : l'épisode complet reste servi depuis le stockage local
+            if session.temp_path.exists():
+                try:
+                    attach_local_podcast_audio(session)
+                    compute_podcast_waveform.delay(session.podcast_id)
+                except Exception as e:
+                    logger.error(f"Repli local impossible pour l'upload {session_id}: {e}")
+        return {"status": "error", "session_id": session_id, "message": str(exc)}
+
+    finally:
+        release_upload_lock(lock_name, self.request.id)
+
+
+# ============================================================================
+# ANALYSE DES IMAGES (palette de couleurs, BlurHash)
+# ============================================================================
+
+# Modèle -> (champ fichier local, champ public_id Cloudinary)
+IMAGE_ANALYSIS_SOURCES = {
+    "content.post": ("featured_image", "cloudinary_public_id"),
+    "content.podcast": ("cover_image", "cover_image_cloudinary_public_id"),
+}
+
+
+def analyze_image(source):
+    """
+    Calcule les métadonnées dérivées d'une image (palette de couleurs,
+    BlurHash) à partir d'un chemin ou d'un fichier. Retourne les champs à
+    mettre à jour.
+    """
+    from helpers.images import encode_blurhash, extract_palette, load_image
+
+    image = load_image(source)
+    return {"palette": extract_palette(image), "blurhash": encode_blurhash(image)}
+
+
+def analyze_local_image(field_file):
+    """
+    Analyse un fichier encore présent sur le stockage local. Une erreur
+    d'analyse ne doit jamais faire échouer l'upload : retourne ``{}``.
+    """
+    if not field_file:
+        return {}
+    try:
+        with field_file.open("rb") as fh:
+            return analyze_image(fh)
+    except Exception as exc:
+        logger.warning(f"Analyse de l'image {field_file.name} impossible: {exc}")
+        return {}
+
+
+def image_source_key(instance):
+    """
+    Identifiant de l'image courante d'un post ou d'un podcast : son public_id
+    Cloudinary, sinon le nom du fichier local ("" si aucune image)
+    """
+    file_field, public_id_field = IMAGE_ANALYSIS_SOURCES[instance._meta.label_lower]
+    local_file = getattr(instance, file_field)
+    return getattr(instance, public_id_field) or (local_file.name if local_file else "")
+
+
+def read_image_source(instance):
+    """
+    Retourne les octets d'une version réduite de l'image : fichier local, ou
+    rendu 200 px téléchargé une seule fois depuis Cloudinary
+    """
+    import cloudinary
+    import requests
+
+    file_field, public_id_field = IMAGE_ANALYSIS_SOURCES[instance._meta.label_lower]
+    public_id = getattr(instance, public_id_field)
+    if public_id:
+        url = cloudinary.CloudinaryImage(public_id).build_url(
+            width=200, height=200, crop="limit", format="jpg", secure=True
+        )
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        return response.content
+    with getattr(instance, file_field).open("rb") as fh:
+        return fh.read()
+
+
+def schedule_image_analysis(model_label, object_id):
+    """Planifie l'analyse de l'image d'un post ou d'un podcast après le commit"""
+    transaction.on_commit(
+        lambda: analyze_content_image.delay(model_label.lower(), object_id)
+    )
+
+
+@shared_task(
+    name="content.tasks.analyze_content_image",
+    bind=True,
+    max_retries=3,
+    acks_late=True,
+)
+def analyze_content_image(self, model_label, object_id):
+    """
+    Calcule la palette et le BlurHash de l'image d'un post ou d'une
+    couverture de podcast.
+
+    Sert pour les images envoyées directement à Cloudinary : une petite
+    version de l'image est téléchargée une seule fois. Ignorée si l'analyse
+    correspond déjà au public_id courant.
+    """
+    import io
+
+    from django.apps import apps
+
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=object_id).first()
+    if instance is None:
+        return {"status": "skipped", "reason": "deleted"}
+
+    source_key = image_source_key(instance)
+    if not source_key or instance.palette_source == source_key:
+        return {"status": "skipped", "reason": "up-to-date"}
+
+    try:
+        analysis = analyze_image(io.BytesIO(read_image_source(instance)))
+    except Exception as exc:
+        logger.error(f"Échec de l'analyse de l'image {model_label}#{object_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        return {"status": "error", "message": str(exc)}
+
+    model.objects.filter(pk=object_id).update(palette_source=source_key, **analysis)
+    return {"status": "success", "palette": analysis["palette"]}
+
+
+# ============================================================================
+# FORME D'ONDE DES PODCASTS
+# ============================================================================
+
+
+def waveform_source_key(podcast):
+    """Identifiant de l'audio courant : public_id Cloudinary ou fichier local"""
+    if podcast.cloudinary_public_id:
+        return podcast.cloudinary_public_id
+    return podcast.audio_file.name if podcast.audio_file else ""
+
+
+def schedule_podcast_waveform(podcast):
+    """Planifie le calcul de la forme d'onde si l'audio a changé"""
+    key = waveform_source_key(podcast)
+    if not key or key == podcast.waveform_source:
+        return False
+    transaction.on_commit(lambda: compute_podcast_waveform.delay(podcast.pk))
+    return True
+
+
+@shared_task(
+    name="content.tasks.compute_podcast_waveform",
+    bind=True,
+    max_retries=3,
+    acks_late=True,
+)
+def compute_podcast_waveform(self, podcast_id):
+    """
+    Calcule les pics de la forme d'onde d'un podcast (voir helpers.waveform)
+    et les enregistre dans un petit fichier binaire servi au lecteur.
+
+    L'audio est lu sur le stockage local s'il y est encore ; sinon Cloudinary
+    fournit une version WAV mono 8 kHz, décodée sans ffmpeg.
+    """
+    import tempfile
+    from pathlib import Path
+
+    import cloudinary.utils
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    from helpers.downloader import download
+    from helpers.waveform import DECODE_SAMPLE_RATE, WaveformError, compute_waveform
+    from .models import Podcast
+
+    podcast = Podcast.objects.filter(pk=podcast_id).first()
+    if podcast is None:
+        return {"status": "skipped", "reason": "deleted", "podcast_id": podcast_id}
+    source_key = waveform_source_key(podcast)
+    if not source_key or source_key == podcast.waveform_source:
+        return {"status": "skipped", "reason": "up-to-date", "podcast_id": podcast_id}
+
+    ffmpeg = getattr(settings, "WAVEFORM_FFMPEG", "") or None
+    try:
+        if podcast.audio_file:
+            blob = compute_waveform(
+                podcast.audio_file.path, duration=podcast.duration, ffmpeg=ffmpeg
+            )
+        else:
+            url = cloudinary.utils.cloudinary_url(
+                podcast.cloudinary_public_id,
+                resource_type="video",
+                format="wav",
+                audio_frequency=DECODE_SAMPLE_RATE,
+                secure=True,
+            )[0]
+            with tempfile.TemporaryDirectory() as tmp:
+                path = download(url, Path(tmp) / "audio.wav")
+                blob = compute_waveform(path, duration=podcast.duration, ffmpeg=ffmpeg)
+    except WaveformError as exc:
+        logger.warning(f"Forme d'onde du podcast {podcast_id} impossible: {exc}")
+        return {"status": "error", "podcast_id": podcast_id, "message": str(exc)}
+    except Exception as exc:
+        logger.error(f"Échec du calcul de la forme d'onde du podcast {podcast_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        return {"status": "error", "podcast_id": podcast_id, "message": str(exc)}
+
+    digest = hashlib.sha256(blob).hexdigest()[:16]
+    name = default_storage.save(
+        f"podcast_waveforms/{podcast.slug}-{digest}.bin", ContentFile(blob)
+    )
+    previous = podcast.waveform.name
+    Podcast.objects.filter(pk=podcast_id).update(
+        waveform=name, waveform_source=source_key
+    )
+    if previous and previous != name:
+        default_storage.delete(previous)
+    return {"status": "success", "podcast_id": podcast_id, "size": len(blob)}
+
+
+# ============================================================================
+# SEGMENTS DE TRANSCRIPTION
+# ============================================================================
+
+
+def transcript_key(podcast):
+    """Empreinte de la transcription courante (fichier SRT/VTT et HTML)"""
+    if not podcast.transcript_file and not podcast.transcript:
+        return ""
+    source = f"{podcast.transcript_file.name or ''}\0{podcast.transcript or ''}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def schedule_transcript_indexing(podcast):
+    """Planifie le découpage de la transcription si elle a changé"""
+    from .models import Podcast
+
+    key = transcript_key(podcast)
+    if key == podcast.transcript_key:
+        return False
+    podcast.transcript_key = key
+    Podcast.objects.filter(pk=podcast.pk).update(transcript_key=key)
+    transaction.on_commit(lambda: index_podcast_transcript.delay(podcast.pk, key))
+    return True
+
+
+@shared_task(
+    name="content.tasks.index_podcast_transcript",
+    bind=True,
+    max_retries=3,
+    acks_late=True,
+)
+def index_podcast_transcript(self, podcast_id, key):
+    """
+    Découpe la transcription d'un podcast en segments horodatés indexés
+    pour la recherche. Le fichier SRT/VTT est prioritaire sur le HTML.
+    Ignorée si la transcription a changé depuis la planification.
+    """
+    from helpers.transcripts import parse_transcript
+    from .models import Podcast, TranscriptSegment
+
+    podcast = Podcast.objects.filter(pk=podcast_id).first()
+    if podcast is None or podcast.transcript_key != key:
+        return {"status": "skipped", "reason": "outdated", "podcast_id": podcast_id}
+
+    try:
+        if podcast.transcript_file:
+            with podcast.transcript_file.open("rb") as fh:
+                content = fh.read().decode("utf-8-sig", errors="replace")
+            segments = parse_transcript(content, podcast.transcript_file.name)
+        else:
+            segments = parse_transcript(podcast.transcript or "", "transcript.html")
+    except Exception as exc:
+        logger.error(f"Échec du découpage de la transcription {podcast_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        return {"status": "error", "podcast_id": podcast_id, "message": str(exc)}
+
+    with transaction.atomic():
+        TranscriptSegment.objects.filter(podcast_id=podcast_id).delete()
+        TranscriptSegment.objects.bulk_create(
+            [
+                TranscriptSegment(
+                    podcast_id=podcast_id,
+                    position=position,
+                    start=segment.start,
+                    end=segment.end,
+                    speaker=segment.speaker[:100],
+                    text=segment.text,
+                )
+                for position, segment in enumerate(segments)
+            ],
+            batch_size=500,
+        )
+    return {"status": "success", "podcast_id": podcast_id, "segments": len(segments)}
+
+
+# ============================================================================
+# SUPPRESSION DIFFÉRÉE DES RESSOURCES CLOUDINARY
+# ============================================================================
+
+# Modèle -> [(champ public_id, resource_type Cloudinary)]. Les variantes
+# large/thumbnail des couvertures de podcast sont des ressources distinctes
+CLOUDINARY_DELETION_FIELDS = {
+    "content.post": [
+        ("cloudinary_public_id", "image"),
+        ("cloudinary_image", "image"),
+        ("cloudinary_image_large", "image"),
+        ("cloudinary_image_thumbnail", "image"),
+    ],
+    "content.podcast": [
+        # Cloudinary range les fichiers audio dans le type 'video'
+        ("cloudinary_public_id", "video"),
+        ("cover_image_cloudinary_public_id", "image"),
+        ("cloudinary_cover_image", "image"),
+        ("cloudinary_cover_image_large", "image"),
+        ("cloudinary_cover_image_thumbnail", "image"),
+    ],
+}
+
+# Limite de l'API Admin pour delete_resources
+CLOUDINARY_DELETE_BATCH_SIZE = 100
+
+
+def enqueue_cloudinary_deletions(resources):
+    """
+    Ajoute des ``(public_id, resource_type)`` à la file de suppression et
+    planifie la purge après le commit. Retourne le nombre de ressources.
+    """
+    from .models import CloudinaryDeletion
+
+    rows = [
+        CloudinaryDeletion(public_id=public_id, resource_type=resource_type)
+        for public_id, resource_type in resources
+    ]
+    if not rows:
+        return 0
+    CloudinaryDeletion.objects.bulk_create(rows, ignore_conflicts=True)
+    transaction.on_commit(schedule_cloudinary_purge)
+    return len(rows)
+
+
+def queue_cloudinary_deletions(instance):
+    """
+    Ajoute les ressources Cloudinary d'un objet supprimé à la file de
+    suppression, dans la transaction courante : si la suppression est
+    annulée, rien n'est mis en file.
+
+    Les uploads directs stockent le même public_id dans plusieurs colonnes :
+    chaque ressource n'est mise en file qu'une fois.
+    """
+    resources = {}
+    for field, resource_type in CLOUDINARY_DELETION_FIELDS[instance._meta.label_lower]:
+        # Un CloudinaryField renvoie une CloudinaryResource, pas une chaîne
+        value = getattr(instance, field)
+        public_id = getattr(value, "public_id", value)
+        if public_id:
+            resources[(public_id, resource_type)] = None
+    return enqueue_cloudinary_deletions(resources)
+
+
+def schedule_cloudinary_purge():
+    """
+    Planifie une purge dans quelques secondes, une seule fois par fenêtre :
+    une suppression en masse produit un seul lot plutôt qu'une tâche par objet
+    """
+    delay = getattr(settings, "CLOUDINARY_DELETION_DELAY", 10)
+    if cache.add("content:cloudinary-purge-scheduled", "1", timeout=delay):
+        try:
+            purge_cloudinary_deletions.apply_async(countdown=delay)
+        except Exception as e:
+            # Appelée après le commit : la suppression est déjà faite, les
+            # lignes restent en file et la purge périodique les reprendra
+            cache.delete("content:cloudinary-purge-scheduled")
+            logger.error(f"Purge des ressources Cloudinary non programmée: {e}")
+
+
+@shared_task(
+    name="content.tasks.purge_cloudinary_deletions",
+    bind=True,
+    max_retries=5,
+    acks_late=True,
+)
+def purge_cloudinary_deletions(self, max_batches=50):
+    """
+    Vide la file de suppression par lots de 100 via ``delete_resources``.
+
+    Les ressources absentes de Cloudinary ("not_found") sont considérées
+    comme supprimées. Une erreur d'API relance la tâche avec un backoff ; une
+    ressource en échec après ``CLOUDINARY_DELETION_MAX_ATTEMPTS`` tentatives
+    reste dans la table pour inspection.
+    """
+    import cloudinary.api
+    from django.db.models import F
+
+    from helpers._cloudinary import cloudinary_enabled
+    from .models import CloudinaryDeletion
+
+    if not cloudinary_enabled():
+        return {"status": "skipped", "reason": "cloudinary-disabled"}
+    if not acquire_upload_lock("cloudinary-purge", self.request.id):
+        return {"status": "skipped", "reason": "already-running"}
+
+    max_attempts = getattr(settings, "CLOUDINARY_DELETION_MAX_ATTEMPTS", 5)
+    pending = CloudinaryDeletion.objects.filter(attempts__lt=max_attempts)
+    deleted = 0
+    # Les échecs de ce passage ne sont pas retentés avant le suivant
+    failed_pks = set()
+    try:
+        for _ in range(max_batches):
+            pending = pending.exclude(pk__in=failed_pks) if failed_pks else pending
+            first = pending.first()
+            if first is None:
+                break
+            batch = list(
+                pending.filter(resource_type=first.resource_type)[
+                    :CLOUDINARY_DELETE_BATCH_SIZE
+                ]
+            )
+            try:
+                response = cloudinary.api.delete_resources(
+                    [row.public_id for row in batch],
+                    resource_type=first.resource_type,
+                    type="upload",
+                    invalidate=True,
+                )
+            except Exception as exc:
+                CloudinaryDeletion.objects.filter(pk__in=[row.pk for row in batch]).update(
+                    attempts=F("attempts") + 1, last_error=str(exc)[:1000]
+                )
+                logger.error(f"Échec de la suppression Cloudinary par lot: {exc}")
+                if self.request.retries < self.max_retries:
+                    raise self.retry(
+                        countdown=retry_countdown(self.request.retries), exc=exc
+                    )
+                return {"status": "error", "message": str(exc)}
+
+            statuses = response.get("deleted", {})
+            done = {
+                row.pk
+                for row in batch
+                if statuses.get(row.public_id) in ("deleted", "not_found")
+            }
+            CloudinaryDeletion.objects.filter(pk__in=done).delete()
+            remaining = [row for row in batch if row.pk not in done]
+            for row in remaining:
+                row.attempts += 1
+                row.last_error = str(statuses.get(row.public_id, "missing"))
+            CloudinaryDeletion.objects.bulk_update(remaining, ["attempts", "last_error"])
+            deleted += len(done)
+            failed_pks.update(row.pk for row in remaining)
+    finally:
+        release_upload_lock("cloudinary-purge", self.request.id)
+
+    logger.info(
+        f"Purge Cloudinary : {deleted} supprimée(s), {len(failed_pks)} en échec"
+    )
+    return {"status": "success", "deleted": deleted, "failed": len(failed_pks)}
+
+
+@shared_task(
+    name="content.tasks.reconcile_cloudinary_media",
+    bind=True,
+    max_retries=2,
+    acks_late=True,
+)
+def reconcile_cloudinary_media(self, enqueue_cleanup=False, min_age_hours=24):
+    """
+    Rapproche les ressources Cloudinary des objets en base (voir
+    ``helpers._cloudinary.reconcile``). Le diff JSON Lines est enregistré
+    dans ``reports/cloudinary/`` sur le stockage par défaut ; les orphelins
+    peuvent être mis en file de suppression.
+    """
+    import tempfile
+    from datetime import timedelta
+
+    from django.core.files import File
+    from django.core.files.storage import default_storage
+    from django.utils import timezone
+
+    from helpers._cloudinary import cloudinary_enabled
+    from helpers._cloudinary.reconcile import (
+        reconcile_media,
+        write_reconciliation_report,
+    )
+
+    if not cloudinary_enabled():
+        return {"status": "skipped", "reason": "cloudinary-disabled"}
+
+    try:
+        with tempfile.TemporaryFile("w+") as report:
+            summary = write_reconciliation_report(
+                reconcile_media(min_age=timedelta(hours=min_age_hours)),
+                report,
+                cleanup=enqueue_cloudinary_deletions if enqueue_cleanup else None,
+            )
+            report.seek(0)
+            name = default_storage.save(
+                f"reports/cloudinary/reconcile-{timezone.now():%Y%m%d-%H%M%S}.jsonl",
+                File(report),
+            )
+    except Exception as exc:
+        logger.error(f"Échec du rapprochement Cloudinary: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        return {"status": "error", "message": str(exc)}
+
+    logger.info(f"Rapprochement Cloudinary terminé : {summary}")
+    return {"status": "success", "report": name, **summary}
+
+
+# ============================================================================
+# PUBLICATION PROGRAMMÉE ET NOTIFICATIONS
+# ============================================================================
+
+# Type de notification -> (modèle, relations à charger pour le gabarit)
+NOTIFICATION_CONTENT = {
+    "post": ("content.Post", ["author"]),
+    "podcast": ("content.Podcast", ["host"]),
+    "video": ("content.Video", ["presenter"]),
+}
+NOTIFICATION_SUBJECTS = {
+    "published": "New on {site_name}: {title}",
+    "featured": "Featured on {site_name}: {title}",
+}
+# Emails envoyés par connexion SMTP
+NOTIFICATION_BATCH_SIZE = 100
+
+
+def schedule_publication(instance):
+    """
+    Planifie une tâche ETA de publication pour un contenu programmé, afin
+    qu'il paraisse à l'heure sans attendre le prochain passage de beat.
+    Au-delà de ``SCHEDULED_PUBLISH_ETA_HORIZON`` (au-delà duquel le broker
+    pourrait redistribuer le message), seul beat s'en charge.
+    """
+    from django.utils import timezone
+
+    from helpers.tasks import publish_scheduled_content
+
+    published_at = instance.published_at
+    if not instance.is_scheduled or published_at is None:
+        return False
+    delay = (published_at - timezone.now()).total_seconds()
+    if delay <= 0 or delay > settings.SCHEDULED_PUBLISH_ETA_HORIZON:
+        return False
+    # Une seule tâche par contenu et par date de publication
+    name = (
+        f"content:publish:{instance._meta.label_lower}:{instance.pk}"
+        f":{published_at.timestamp()}"
+    )
+    if not cache.add(name, "1", timeout=int(delay) + 60):
+        return False
+    transaction.on_commit(
+        lambda: publish_scheduled_content.apply_async(eta=published_at)
+    )
+    return True
+
+
+@shared_task(
+    name="content.tasks.send_content_notification",
+    bind=True,
+    max_retries=3,
+    acks_late=True,
+)
+def send_content_notification(
+    self, content_type, content_id, notification_type="published", after_user_id=0
+):
+    """
+    Annonce un contenu publié ou mis en avant aux utilisateurs actifs.
+
+    Le gabarit ``emails/content_<type>_<notification>.html`` est rendu une
+    seule fois ; les emails partent par lots sur une même connexion. Une
+    nouvelle tentative reprend après le dernier lot envoyé.
+    """
+    from django.apps import apps
+    from django.contrib.auth import get_user_model
+    from django.core.mail import EmailMultiAlternatives, get_connection
+    from django.template.loader import render_to_string
+    from django.utils.html import strip_tags
+
+    if (
+        content_type not in NOTIFICATION_CONTENT
+        or notification_type not in NOTIFICATION_SUBJECTS
+    ):
+        return {
+            "status": "error",
+            "message": f"Notification inconnue: {content_type}/{notification_type}",
+        }
+
+    label, related = NOTIFICATION_CONTENT[content_type]
+    content = (
+        apps.get_model(label)
+        .objects.select_related(*related)
+        .filter(pk=content_id, is_published=True)
+        .first()
+    )
+    if content is None:
+        return {"status": "skipped", "reason": "unpublished", "content_id": content_id}
+
+    html_message = render_to_string(
+        f"emails/content_{content_type}_{notification_type}.html",
+        {
+            "content": content,
+            "content_type": content_type,
+            "site_name": settings.SITE_NAME,
+            "site_url": settings.SITE_URL.rstrip("/"),
+        },
+    )
+    plain_message = strip_tags(html_message)
+    subject = NOTIFICATION_SUBJECTS[notification_type].format(
+        site_name=settings.SITE_NAME, title=content.title
+    )
+    recipients = (
+        get_user_model()
+        .objects.filter(is_active=True)
+        .exclude(email="")
+        # Pas de notification à l'auteur du contenu
+        .exclude(pk=getattr(content, f"{related[0]}_id"))
+        .order_by("pk")
+        .values_list("pk", "email")
+    )
+
+    def messages(batch):
+        for _, email in batch:
+            message = EmailMultiAlternatives(
+                subject, plain_message, settings.DEFAULT_FROM_EMAIL, [email]
+            )
+            message.attach_alternative(html_message, "text/html")
+            yield message
+
+    sent = 0
+    try:
+        with get_connection() as connection:
+            while True:
+                batch = list(
+                    recipients.filter(pk__gt=after_user_id)[:NOTIFICATION_BATCH_SIZE]
+                )
+                if not batch:
+                    break
+                sent += connection.send_messages(list(messages(batch))) or 0
+                after_user_id = batch[-1][0]
+    except Exception as exc:
+        logger.error(f"Échec de la notification {content_type} {content_id}: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(
+                countdown=retry_countdown(self.request.retries),
+                exc=exc,
+                args=(),
+                kwargs={
+                    "content_type": content_type,
+                    "content_id": content_id,
+                    "notification_type": notification_type,
+                    "after_user_id": after_user_id,
+                },
+            )
+        return {"status": "error", "content_id": content_id, "message": str(exc)}
+
+    return {"status": "success", "content_id": content_id, "sent": sent}
+
+
+# ============================================================================
+# ÉVÉNEMENTS D'AUDIENCE
+# ============================================================================
+
+
+def ensure_event_partitions():
+    """Crée les partitions mensuelles à venir, au plus une fois par jour"""
+    from django.utils import timezone
+
+    from .engagement import ensure_partitions
+
+    if cache.add(f"content:engagement-partitions:{timezone.localdate()}", "1", 86400):
+        ensure_partitions()
+
+
+@shared_task(
+    name="content.tasks.ingest_engagement_events",
+    bind=True,
+    max_retries=3,
+    acks_late=True,
+)
+def ingest_engagement_events(self, events):
+    """Insère un lot d'événements d'audience remis par un tampon mémoire"""
+    from .engagement import insert_events
+
+    try:
+        ensure_event_partitions()
+        inserted = insert_events(events)
+    except Exception as exc:
+        logger.error(f"Échec de l'insertion de {len(events)} événements: {exc}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=retry_countdown(self.request.retries), exc=exc)
+        return {"status": "error", "message": str(exc)}
+    return {"status": "success", "inserted": inserted}
+
+
+@shared_task(name="content.tasks.flush_engagement_events", bind=True)
+def flush_engagement_events(self, max_batches=20):
+    """
+    Vide la liste Redis des événements d'audience par lots de
+    ``ENGAGEMENT_BATCH_SIZE``. Un lot dont l'insertion échoue est remis en
+    tête de liste pour le passage suivant.
+    """
+    from .engagement import get_buffer, insert_events
+
+    if settings.ENGAGEMENT_BUFFER != "redis":
+        return {"status": "skipped", "reason": "memory-buffer"}
+
+    buffer = get_buffer()
+    ensure_event_partitions()
+    inserted = 0
+    for _ in range(max_batches):
+        events = buffer.pop(settings.ENGAGEMENT_BATCH_SIZE)
+        if not events:
+            break
+        try:
+            inserted += insert_events(events)
+        except Exception as exc:
+            buffer.requeue(events)
+            logger.error(f"Échec de l'insertion des événements d'audience: {exc}")
+            return {"status": "error", "inserted": inserted, "message": str(exc)}
+        if len(events) < settings.ENGAGEMENT_BATCH_SIZE:
+            break
+    return {"status": "success", "inserted": inserted}
+
+
+@shared_task(name="content.tasks.compact_engagement_events", bind=True)
+def compact_engagement_events(self, days=2):
+    """
+    Agrège les événements des derniers jours par contenu et supprime les
+    mois d'événements bruts au-delà de ``ENGAGEMENT_EVENT_RETENTION_MONTHS``
+    """
+    from .engagement import compact_events
+
+    ensure_event_partitions()
+    result = compact_events(days=days)
+    logger.info(f"Événements d'audience compactés : {result}")
+    return {"status": "success", **result}
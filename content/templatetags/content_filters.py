@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def div(value, divisor):
+    """Division entière, ex. ``{{ duration|div:60 }}`` pour des minutes"""
+    try:
+        return int(float(value)) // int(divisor)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return ""
@@ -0,0 +1,122 @@
+# content/tests/test_analytics.py
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.models import User
+from content.analytics import compute_rollups, period_report, update_rollups
+from content.models import Comment, DailyRollup, Podcast, Post
+
+
+class DailyRollupTestCase(TestCase):
+    """Test daily rollups and the reports read from them"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        now = timezone.now()
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password"
+        )
+        User.objects.filter(pk=self.admin.pk).update(
+            date_joined=now - timedelta(days=40)
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="password"
+        )
+        Post.objects.bulk_create(
+            [
+                Post(
+                    title="Old",
+                    slug="old",
+                    author=self.admin,
+                    created_at=now - timedelta(days=1),
+                    published_at=now - timedelta(days=1),
+                    is_published=True,
+                    views_count=10,
+                ),
+                Post(title="New", slug="new", author=self.admin, views_count=5),
+            ]
+        )
+        Comment.objects.bulk_create(
+            [Comment(post=Post.objects.get(slug="old"), author=self.reader)]
+        )
+        Podcast.objects.bulk_create(
+            [Podcast(title="Ep", slug="ep", host=self.admin, plays_count=7)]
+        )
+
+    def values(self, day, content_type):
+        rows = DailyRollup.objects.filter(date=day, content_type=content_type)
+        return dict(rows.values_list("metric", "value"))
+
+    def test_one_query_per_source_table(self):
+        """Test that all metrics of all days come from one query per table"""
+        # Post, Podcast, Video, Comment, User + previous counter totals
+        with self.assertNumQueries(6):
+            rollups = compute_rollups([self.yesterday, self.today])
+
+        self.assertEqual(len(rollups), 2 * (2 + 2 + 2 + 1 + 1) + 5)
+
+    def test_counts_and_counter_deltas(self):
+        """Test day-bucketed counts and counter deltas between snapshots"""
+        DailyRollup.objects.bulk_create(
+            [
+                DailyRollup(
+                    date=self.yesterday,
+                    content_type="post",
+                    metric="views",
+                    value=3,
+                    total=12,
+                )
+            ]
+        )
+
+        update_rollups([self.yesterday, self.today])
+
+        self.assertEqual(
+            self.values(self.today, "post"),
+            {"new": 1, "published": 0, "views": 3, "likes": 0, "comments": 1},
+        )
+        self.assertEqual(self.values(self.yesterday, "post")["new"], 1)
+        self.assertEqual(self.values(self.yesterday, "post")["published"], 1)
+        # First snapshot of a counter: history is not attributed to today
+        self.assertEqual(self.values(self.today, "podcast")["plays"], 0)
+        self.assertEqual(self.values(self.today, "user"), {"registrations": 1})
+
+        # Re-running is an idempotent upsert
+        Post.objects.filter(slug="new").update(views_count=8)
+        update_rollups([self.today])
+        self.assertEqual(self.values(self.today, "post")["views"], 6)
+        self.assertEqual(DailyRollup.objects.filter(date=self.today).count(), 13)
+
+    def test_period_report(self):
+        """Test that reports sum the rollups of the period"""
+        update_rollups([self.yesterday, self.today])
+
+        report = period_report("week")
+
+        self.assertEqual(report["totals"]["post"]["new"], 2)
+        self.assertEqual(report["totals"]["post"]["published"], 1)
+        self.assertEqual(
+            [day["date"] for day in report["daily"]],
+            [self.yesterday.isoformat(), self.today.isoformat()],
+        )
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test the /api/stats/ endpoint permissions and parameters"""
+        update_rollups([self.today])
+
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get("/api/stats/").status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.client.get("/api/stats/?period=month")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["totals"]["user"]["registrations"], 1)
+
+        day = self.today.isoformat()
+        response = self.client.get(f"/api/stats/?start={day}&end={day}")
+        self.assertEqual(response.json()["period"], {"start": day, "end": day})
+        self.assertEqual(self.client.get("/api/stats/?period=year").status_code, 400)
+        self.assertEqual(self.client.get("/api/stats/?start=x").status_code, 400)
@@ -0,0 +1,101 @@
+# content/tests/test_bench_api.py
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from authentication.models import User
+from content.management.commands.bench_api import Command, percentile
+from content.models import Post
+
+
+def endpoint(status=200, queries=3, p95=10.0, p99=12.0, peak=100.0):
+    return {
+        "status": status,
+        "queries": queries,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "peak_kib": peak,
+    }
+
+
+class BenchApiHelpersTestCase(SimpleTestCase):
+    """Test the bench_api percentile and baseline comparison"""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on a sorted list"""
+        values = [float(i) for i in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_compare_flags_each_regressed_metric(self):
+        """Test that status, query, latency and memory regressions are reported"""
+        baseline = {"a": endpoint(), "b": endpoint()}
+        results = {
+            "a": endpoint(status=500, queries=4, p95=20.0, peak=200.0),
+            "b": endpoint(),
+            "new": endpoint(),
+        }
+
+        regressions = Command().compare(baseline, results, 0.25, 2.0)
+
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(all(line.startswith("a: ") for line in regressions))
+
+    def test_compare_ignores_noise(self):
+        """Test that small or sub-threshold latency changes pass"""
+        baseline = {"a": endpoint(p95=1.0, p99=1.0)}
+        # +200% but only 2 ms: under --min-delta-ms
+        small_delta = {"a": endpoint(p95=3.0, p99=2.5)}
+        within_threshold = {"a": endpoint(p95=1.2, p99=1.2, queries=2)}
+
+        self.assertEqual(Command().compare(baseline, small_delta, 0.25, 2.0), [])
+        self.assertEqual(Command().compare(baseline, within_threshold, 0.25, 2.0), [])
+
+
+class BenchApiCommandTestCase(TestCase):
+    """Test the bench_api regression gate end to end"""
+
+    def setUp(self):
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        Post.objects.create(
+            title="Post", slug="post", author=author, is_published=True
+        )
+        self.baseline = os.path.join(tempfile.mkdtemp(), "baseline.json")
+
+    def bench(self, *args):
+        call_command(
+            "bench_api",
+            "--only=post-list,post-detail",
+            "--iterations=2",
+            "--warmup=0",
+            f"--baseline={self.baseline}",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_baseline_then_gate(self):
+        """Test that a missing baseline is written and a regression fails the run"""
+        self.bench()
+        with open(self.baseline) as fh:
+            baseline = json.load(fh)
+        self.assertEqual(set(baseline["endpoints"]), {"post-list", "post-detail"})
+        self.assertEqual(baseline["endpoints"]["post-detail"]["status"], 200)
+
+        self.bench("--threshold=100", "--min-delta-ms=1000")
+
+        baseline["endpoints"]["post-list"]["queries"] = 0
+        with open(self.baseline, "w") as fh:
+            json.dump(baseline, fh)
+        with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            self.bench("--threshold=100", "--min-delta-ms=1000")
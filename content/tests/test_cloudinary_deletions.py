@@ -0,0 +1,141 @@
+# content/tests/test_cloudinary_deletions.py
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from authentication.models import User
+from content.models import CloudinaryDeletion, Podcast, Post
+from content.tasks import purge_cloudinary_deletions
+
+
+@patch("helpers._cloudinary.cloudinary_enabled", return_value=True)
+class CloudinaryDeletionTestCase(TestCase):
+    """Test the Cloudinary deletion outbox and its batched purge task"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        Post.objects.bulk_create(
+            [
+                Post(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    author=self.user,
+                    cloudinary_public_id=f"posts/original/post-{i}",
+                )
+                for i in range(3)
+            ]
+        )
+        Podcast.objects.bulk_create(
+            [
+                Podcast(
+                    title="Episode",
+                    slug="episode",
+                    host=self.user,
+                    cloudinary_public_id="podcasts/episode",
+                    cover_image_cloudinary_public_id="podcast_covers/original/episode",
+                )
+            ]
+        )
+
+    def test_queryset_and_cascade_deletes_are_queued(self, _):
+        """Test that bulk and CASCADE deletes fill the outbox"""
+        with patch("content.tasks.purge_cloudinary_deletions.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                Post.objects.filter(slug="post-0").delete()
+                self.user.delete()
+
+        queued = set(CloudinaryDeletion.objects.values_list("resource_type", "public_id"))
+        self.assertEqual(len(queued), 5)
+        self.assertIn(("video", "podcasts/episode"), queued)
+        self.assertIn(("image", "posts/original/post-0"), queued)
+        # Une seule purge planifiée pour toute la suppression en masse
+        apply_async.assert_called_once()
+
+    def test_variant_columns_are_queued_once(self, _):
+        """Test that cover variants are queued and shared public_ids deduplicated"""
+        podcast = Podcast.objects.create(
+            title="Covered",
+            slug="covered",
+            host=self.user,
+            cover_image_cloudinary_public_id="podcast_covers/original/c1",
+            cloudinary_cover_image="podcast_covers/original/c1",
+            cloudinary_cover_image_large="podcast_covers/large/c1l",
+            cloudinary_cover_image_thumbnail="podcast_covers/thumbnails/c1t",
+        )
+        post = Post.objects.create(
+            title="Direct",
+            slug="direct",
+            author=self.user,
+            cloudinary_public_id="posts/original/direct",
+            cloudinary_image="posts/original/direct",
+            cloudinary_image_large="posts/original/direct",
+            cloudinary_image_thumbnail="posts/original/direct",
+        )
+        with patch("content.tasks.purge_cloudinary_deletions.apply_async"):
+            podcast.delete()
+            post.delete()
+
+        self.assertEqual(
+            sorted(CloudinaryDeletion.objects.values_list("public_id", flat=True)),
+            [
+                "podcast_covers/large/c1l",
+                "podcast_covers/original/c1",
+                "podcast_covers/thumbnails/c1t",
+                "posts/original/direct",
+            ],
+        )
+
+    def test_broker_outage_does_not_fail_the_delete(self, _):
+        """Test that an unreachable broker leaves the rows for the periodic purge"""
+        with patch(
+            "content.tasks.purge_cloudinary_deletions.apply_async",
+            side_effect=ConnectionError("broker down"),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                Post.objects.filter(slug="post-0").delete()
+
+        self.assertTrue(
+            CloudinaryDeletion.objects.filter(public_id="posts/original/post-0").exists()
+        )
+        self.assertIsNone(cache.get("content:cloudinary-purge-scheduled"))
+
+    @patch("cloudinary.api.delete_resources")
+    def test_purge_deletes_in_batches_per_resource_type(self, delete_resources, _):
+        """Test that each resource type is deleted with one API call"""
+        delete_resources.side_effect = lambda public_ids, **kwargs: {
+            "deleted": {
+                public_id: "not_found" if public_id.endswith("2") else "deleted"
+                for public_id in public_ids
+            }
+        }
+        with patch("content.tasks.purge_cloudinary_deletions.apply_async"):
+            self.user.delete()
+
+        result = purge_cloudinary_deletions.apply().get()
+
+        self.assertEqual(result, {"status": "success", "deleted": 5, "failed": 0})
+        self.assertEqual(delete_resources.call_count, 2)
+        self.assertEqual(
+            sorted(call.kwargs["resource_type"] for call in delete_resources.call_args_list),
+            ["image", "video"],
+        )
+        self.assertFalse(CloudinaryDeletion.objects.exists())
+
+    @patch("cloudinary.api.delete_resources", side_effect=Exception("rate limited"))
+    def test_api_errors_are_recorded(self, delete_resources, _):
+        """Test that a failing batch keeps its rows and counts the attempt"""
+        with patch("content.tasks.purge_cloudinary_deletions.apply_async"):
+            Post.objects.all().delete()
+
+        with patch.object(purge_cloudinary_deletions, "max_retries", 0):
+            result = purge_cloudinary_deletions.apply().get()
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(
+            list(CloudinaryDeletion.objects.values_list("attempts", flat=True)),
+            [1, 1, 1],
+        )
@@ -0,0 +1,123 @@
+# content/tests/test_cloudinary_uploads.py
+import io
+import tempfile
+from unittest.mock import patch
+
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from authentication.models import User
+from content.models import Post, ProcessingState
+from content.tasks import (
+    acquire_upload_lock,
+    compute_upload_key,
+    schedule_post_image_upload,
+    upload_post_image,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile("image.png", buffer.getvalue(), content_type="image/png")
+
+
+def fake_upload(post, raise_errors=False):
+    post.cloudinary_public_id = "posts/image"
+    Post.objects.filter(pk=post.pk).update(cloudinary_public_id="posts/image")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@patch("helpers._cloudinary.cloudinary_enabled", return_value=True)
+class UploadPostImageTestCase(TestCase):
+    """Test the idempotent Cloudinary upload task for post images"""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        post = Post(title="Post", slug="post", author=author)
+        post.featured_image = make_png()
+        Post.objects.bulk_create([post])
+        self.post = Post.objects.get(slug="post")
+        self.key = compute_upload_key(self.post.featured_image)
+        self.lock = f"post:{self.post.pk}:{self.key}"
+
+    @patch("content.tasks.upload_post_image.delay")
+    def test_scheduling_is_deduplicated(self, delay, enabled):
+        """Test that saving the same file twice enqueues a single upload"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(schedule_post_image_upload(self.post))
+            self.assertFalse(schedule_post_image_upload(self.post))
+
+        delay.assert_called_once_with(self.post.pk, self.key)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.processing_state, ProcessingState.PENDING)
+        self.assertEqual(self.post.image_upload_key, self.key)
+
+    @patch("helpers._cloudinary.CloudinaryImageService.upload_post_image_to_cloudinary")
+    def test_stale_key_is_a_no_op(self, upload, enabled):
+        """Test that an upload for a replaced or already uploaded file is skipped"""
+        Post.objects.filter(pk=self.post.pk).update(image_upload_key=self.key)
+
+        result = upload_post_image.apply(args=(self.post.pk, "replaced")).get()
+
+        self.assertEqual(result["reason"], "up-to-date")
+        upload.assert_not_called()
+
+    @patch(
+        "helpers._cloudinary.CloudinaryImageService.upload_post_image_to_cloudinary",
+        side_effect=fake_upload,
+    )
+    def test_duplicate_and_redelivered_messages(self, upload, enabled):
+        """Test that a duplicate is skipped but a redelivered message resumes"""
+        Post.objects.filter(pk=self.post.pk).update(
+            image_upload_key=self.key, processing_state=ProcessingState.PROCESSING
+        )
+        # Lock held by a worker that crashed while running task "first"
+        self.assertTrue(acquire_upload_lock(self.lock, "first"))
+
+        result = upload_post_image.apply(
+            args=(self.post.pk, self.key), task_id="duplicate"
+        ).get()
+        self.assertEqual(result["reason"], "locked")
+        upload.assert_not_called()
+
+        result = upload_post_image.apply(
+            args=(self.post.pk, self.key), task_id="first"
+        ).get()
+        self.assertEqual(result["status"], "success")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.processing_state, ProcessingState.READY)
+        self.assertTrue(acquire_upload_lock(self.lock, "next"))
+
+    @patch("content.tasks.generate_image_variants.delay")
+    @patch(
+        "helpers._cloudinary.CloudinaryImageService.upload_post_image_to_cloudinary",
+        side_effect=OSError("cloudinary down"),
+    )
+    def test_exhausted_retries_mark_failed(self, upload, variants, enabled):
+        """Test that the upload is retried, then marked failed with a local fallback"""
+        Post.objects.filter(pk=self.post.pk).update(image_upload_key=self.key)
+
+        with self.assertRaises(Retry):
+            upload_post_image.apply(args=(self.post.pk, self.key))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.processing_state, ProcessingState.PENDING)
+
+        result = upload_post_image.apply(
+            args=(self.post.pk, self.key), retries=upload_post_image.max_retries
+        ).get()
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(upload.call_count, 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.processing_state, ProcessingState.FAILED)
+        variants.assert_called_once_with("content.post", [self.post.pk])
+        self.assertTrue(acquire_upload_lock(self.lock))
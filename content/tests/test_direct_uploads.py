@@ -0,0 +1,150 @@
+# content/tests/test_direct_uploads.py
+import json
+import time
+
+import cloudinary
+import cloudinary.utils
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from content.models import CloudinaryDeletion, Podcast, Post
+from helpers._cloudinary.direct_upload import attach_direct_upload
+
+
+class DirectUploadTestCase(TestCase):
+    """Test the signed direct-to-Cloudinary upload flow"""
+
+    def setUp(self):
+        self.previous_config = {
+            key: getattr(cloudinary.config(), key, None)
+            for key in ("cloud_name", "api_key", "api_secret")
+        }
+        cloudinary.config(cloud_name="demo", api_key="key", api_secret="secret")
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        self.podcast = Podcast.objects.create(
+            title="Mon Episode", slug="mon-episode", host=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cloudinary.config(**self.previous_config)
+
+    def _sign(self, target, slug="mon-episode"):
+        return self.client.post(
+            "/api/direct-uploads/", {"target": target, "slug": slug}, format="json"
+        )
+
+    def test_sign_returns_verifiable_parameters(self):
+        """Test that the signed parameters match Cloudinary's signing scheme"""
+        response = self._sign("podcast_cover")
+
+        self.assertEqual(response.status_code, 201)
+        data = response.data
+        self.assertEqual(data["folder"], "podcast_covers/original")
+        self.assertTrue(data["public_id"].startswith("mon-episode-"))
+        self.assertIn("eager", data)
+        signed = {
+            key: data[key]
+            for key in ("timestamp", "folder", "public_id", "overwrite", "eager", "eager_async")
+        }
+        self.assertEqual(
+            data["signature"], cloudinary.utils.api_sign_request(signed, "secret")
+        )
+
+    def test_sign_requires_ownership(self):
+        """Test that only the podcast host can request upload parameters"""
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password"
+        )
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self._sign("podcast_audio").status_code, 404)
+
+    def test_complete_attaches_public_id(self):
+        """Test that a verified client callback attaches the asset"""
+        params = self._sign("podcast_cover").data
+        public_id = f"{params['folder']}/{params['public_id']}"
+        signature = cloudinary.utils.api_sign_request(
+            {"public_id": public_id, "version": "123"}, "secret"
+        )
+
+        response = self.client.post(
+            "/api/direct-uploads/complete/",
+            {"public_id": public_id, "version": "123", "signature": "forged"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            "/api/direct-uploads/complete/",
+            {"public_id": public_id, "version": "123", "signature": signature},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.cover_image_cloudinary_public_id, public_id)
+
+    def test_replaced_assets_are_queued_for_deletion(self):
+        """Test that the previous cover assets go to the deletion outbox once"""
+        Podcast.objects.filter(pk=self.podcast.pk).update(
+            cover_image_cloudinary_public_id="podcast_covers/original/old",
+            cloudinary_cover_image="podcast_covers/original/old",
+            cloudinary_cover_image_large="podcast_covers/large/old",
+            cloudinary_cover_image_thumbnail="podcast_covers/thumbnails/old",
+        )
+        ticket = {"target": "podcast_cover", "pk": self.podcast.pk}
+
+        attach_direct_upload(ticket, "podcast_covers/original/new")
+        attach_direct_upload(ticket, "podcast_covers/original/new")
+
+        self.assertEqual(
+            sorted(CloudinaryDeletion.objects.values_list("resource_type", "public_id")),
+            [
+                ("image", "podcast_covers/large/old"),
+                ("image", "podcast_covers/original/old"),
+                ("image", "podcast_covers/thumbnails/old"),
+            ],
+        )
+
+    def test_notification_attaches_audio(self):
+        """Test that a signed Cloudinary webhook attaches the audio and duration"""
+        params = self._sign("podcast_audio").data
+        public_id = f"{params['folder']}/{params['public_id']}"
+        body = json.dumps(
+            {
+                "notification_type": "upload",
+                "public_id": public_id,
+                "version": 1,
+                "secure_url": "https://res.cloudinary.com/demo/video/upload/a.mp3",
+                "duration": 61.4,
+            }
+        )
+        timestamp = int(time.time())
+        signature = cloudinary.utils.compute_hex_hash(f"{body}{timestamp}secret")
+
+        client = APIClient()
+        response = client.post(
+            "/api/direct-uploads/notify/",
+            body,
+            content_type="application/json",
+            HTTP_X_CLD_TIMESTAMP=str(timestamp),
+            HTTP_X_CLD_SIGNATURE="forged",
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = client.post(
+            "/api/direct-uploads/notify/",
+            body,
+            content_type="application/json",
+            HTTP_X_CLD_TIMESTAMP=str(timestamp),
+            HTTP_X_CLD_SIGNATURE=signature,
+        )
+        self.assertEqual(response.status_code, 204)
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.cloudinary_public_id, public_id)
+        self.assertEqual(self.podcast.duration, 61)
+        self.assertTrue(self.podcast.is_processed)
@@ -0,0 +1,197 @@
+# content/tests/test_engagement.py
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.throttling import ScopedRateThrottle
+
+from authentication.models import User
+from content import engagement
+from content.engagement import MemoryBuffer, compact_events, insert_events
+from content.models import EngagementEvent, EngagementRollup, Post, Video
+from content.tasks import flush_engagement_events
+
+POST, VIDEO = EngagementEvent.Target.POST, EngagementEvent.Target.VIDEO
+VIEW, LIKE = EngagementEvent.Kind.VIEW, EngagementEvent.Kind.LIKE
+
+
+class StubRedisBuffer:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def pop(self, count):
+        batch, self.events = self.events[:count], self.events[count:]
+        return batch
+
+    def requeue(self, events):
+        self.events[:0] = events
+
+
+class EngagementPipelineTestCase(TestCase):
+    """Test buffered engagement event ingestion, insertion and compaction"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        Post.objects.bulk_create(
+            [Post(title="Post", slug="post", author=self.author, is_published=True)]
+        )
+        self.post = Post.objects.get(slug="post")
+
+    def test_requests_only_buffer_events(self):
+        """Test that tracked requests never write and hand off full batches"""
+        buffer = MemoryBuffer(max_size=2, max_age=60)
+        with patch.object(engagement, "_buffer", buffer), patch.object(
+            buffer, "hand_off"
+        ) as hand_off:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get("/api/posts/post/")
+            self.assertFalse(
+                [q for q in queries if not q["sql"].lstrip().startswith("SELECT")]
+            )
+            hand_off.assert_not_called()
+
+            self.client.force_login(self.author)
+            response = self.client.post(
+                "/api/engagement/",
+                {"events": [{"target": "post", "id": self.post.pk, "kind": "like"}]},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+        (batch,), _ = hand_off.call_args
+        self.assertEqual(
+            [event[1:] for event in batch],
+            [[POST, self.post.pk, VIEW], [POST, self.post.pk, LIKE]],
+        )
+
+    def test_invalid_events_are_rejected(self):
+        """Test the collection endpoint validation"""
+        unknown_kind = {"target": "post", "id": 1, "kind": "share"}
+        for payload in ({"events": []}, {"events": [unknown_kind]}):
+            response = self.client.post(
+                "/api/engagement/", payload, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_beacon_cannot_inflate_counters(self):
+        """Test that anonymous likes, repeated likes and unpublished ids are refused"""
+        draft = Post.objects.create(title="Draft", slug="draft", author=self.author)
+        buffer = MemoryBuffer(max_size=100, max_age=60)
+
+        def post(*events):
+            return self.client.post(
+                "/api/engagement/",
+                {
+                    "events": [
+                        {"target": target, "id": pk, "kind": kind}
+                        for target, pk, kind in events
+                    ]
+                },
+                content_type="application/json",
+            )
+
+        with patch.object(engagement, "_buffer", buffer):
+            response = post(("post", self.post.pk, "like"))
+            self.assertIn(response.status_code, (401, 403))
+
+            response = post(
+                ("post", self.post.pk, "view"),
+                ("post", draft.pk, "view"),
+                ("post", 99999, "view"),
+                ("video", self.post.pk, "view"),
+            )
+            self.assertEqual(response.status_code, 202)
+
+            self.client.force_login(self.author)
+            post(("post", self.post.pk, "like"), ("post", self.post.pk, "like"))
+            post(("post", self.post.pk, "like"))
+
+        self.assertEqual(
+            [event[1:] for event in buffer._events],
+            [[POST, self.post.pk, VIEW], [POST, self.post.pk, LIKE]],
+        )
+
+    def test_beacon_is_throttled(self):
+        """Test that the collection endpoint has its own rate limit"""
+        payload = {"events": [{"target": "post", "id": self.post.pk, "kind": "view"}]}
+        rates = {"engagement": "2/minute"}
+        with patch.object(ScopedRateThrottle, "THROTTLE_RATES", rates), patch.object(
+            engagement, "_buffer", MemoryBuffer(100, 60)
+        ):
+            codes = [
+                self.client.post(
+                    "/api/engagement/", payload, content_type="application/json"
+                ).status_code
+                for _ in range(3)
+            ]
+
+        self.assertEqual(codes, [202, 202, 429])
+
+    def test_insert_updates_running_counters(self):
+        """Test bulk insertion and grouped counter increments"""
+        now = time.time()
+        events = [[now, POST, self.post.pk, VIEW]] * 3 + [
+            [now, POST, self.post.pk, LIKE],
+            [now, 9, self.post.pk, VIEW],  # unknown target: dropped
+        ]
+
+        self.assertEqual(insert_events(events), 4)
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.views_count, self.post.likes_count), (3, 1))
+        self.assertEqual(EngagementEvent.objects.count(), 4)
+
+    @override_settings(ENGAGEMENT_BUFFER="redis", ENGAGEMENT_BATCH_SIZE=2)
+    def test_flush_drains_the_shared_buffer_in_batches(self):
+        """Test the Redis flush task, including requeueing on failure"""
+        stub = StubRedisBuffer([[time.time(), POST, self.post.pk, VIEW]] * 5)
+        with patch("content.engagement.get_buffer", return_value=stub):
+            with patch(
+                "content.engagement.insert_events", side_effect=RuntimeError("db down")
+            ):
+                result = flush_engagement_events.apply().get()
+            self.assertEqual(result["status"], "error")
+            self.assertEqual(len(stub.events), 5)
+
+            result = flush_engagement_events.apply().get()
+
+        self.assertEqual(result["inserted"], 5)
+        self.assertEqual(stub.events, [])
+
+    def test_compaction_rolls_up_and_expires_old_events(self):
+        """Test per-item daily rollups and removal of expired raw events"""
+        Video.objects.bulk_create(
+            [
+                Video(
+                    title="Clip",
+                    slug="clip",
+                    video_url="https://example.com/clip",
+                    presenter=self.author,
+                )
+            ]
+        )
+        video = Video.objects.get(slug="clip")
+        yesterday = timezone.now() - timedelta(days=1)
+        old = timezone.now() - timedelta(days=200)
+        insert_events(
+            [[yesterday.timestamp(), VIDEO, video.pk, VIEW]] * 2
+            + [[old.timestamp(), VIDEO, video.pk, VIEW]]
+        )
+
+        result = compact_events(days=2, retention_months=3)
+
+        rollups = {
+            r.date: r.count for r in EngagementRollup.objects.filter(object_id=video.pk)
+        }
+        self.assertEqual(rollups[timezone.localtime(yesterday).date()], 2)
+        self.assertEqual(rollups[timezone.localtime(old).date()], 1)
+        self.assertEqual(EngagementEvent.objects.count(), 2)
+        self.assertEqual(len(result["dropped"]), 1)
@@ -0,0 +1,60 @@
+# content/tests/test_image_analysis.py
+import io
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from authentication.models import User
+from content.models import Podcast
+from content.tasks import analyze_content_image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_png(color, size=(32, 32)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return SimpleUploadedFile("cover.png", buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageAnalysisTaskTestCase(TestCase):
+    """Test the background image analysis task"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        podcast = Podcast(title="Episode", slug="episode", host=self.user)
+        podcast.cover_image = make_png((10, 200, 90))
+        Podcast.objects.bulk_create([podcast])
+        self.podcast = Podcast.objects.get(slug="episode")
+
+    def test_palette_is_stored_and_keyed_by_source(self):
+        """Test that the palette is computed once per image source"""
+        result = analyze_content_image.apply(
+            args=("content.podcast", self.podcast.pk)
+        ).get()
+
+        self.assertEqual(result["status"], "success")
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.accent_color, "#0ac85a")
+        self.assertEqual(self.podcast.palette_source, self.podcast.cover_image.name)
+        self.assertEqual(len(self.podcast.blurhash), 28)
+
+        result = analyze_content_image.apply(
+            args=("content.podcast", self.podcast.pk)
+        ).get()
+        self.assertEqual(result["reason"], "up-to-date")
+
+    def test_backfill_command_fills_missing_blurhash(self):
+        """Test that the backfill command analyses images in batches"""
+        call_command("backfill_image_analysis", "--batch-size", "1", stdout=io.StringIO())
+
+        self.podcast.refresh_from_db()
+        self.assertEqual(len(self.podcast.blurhash), 28)
+        self.assertEqual(self.podcast.accent_color, "#0ac85a")
+        self.assertEqual(self.podcast.palette_source, self.podcast.cover_image.name)
@@ -0,0 +1,57 @@
+# content/tests/test_podcast_audio.py
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from authentication.models import User
+from content.models import Podcast
+
+MEDIA_ROOT = tempfile.mkdtemp()
+AUDIO = b"ID3" + bytes(range(256)) * 40
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_SENDFILE_BACKEND="")
+class PodcastAudioViewTestCase(TestCase):
+    """Test the Range-aware local podcast audio view"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        podcast = Podcast(
+            title="Episode", slug="episode", host=self.user, is_published=False
+        )
+        podcast.audio_file = SimpleUploadedFile("episode.mp3", AUDIO)
+        Podcast.objects.bulk_create([podcast])
+
+    def test_unpublished_audio_is_private(self):
+        """Test that only the host can stream an unpublished episode"""
+        self.assertEqual(self.client.get("/api/podcasts/episode/audio/").status_code, 404)
+
+        self.client.force_login(self.user)
+        response = self.client.get("/api/podcasts/episode/audio/", HTTP_RANGE="bytes=3-12")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Type"], "audio/mpeg")
+        self.assertEqual(b"".join(response.streaming_content), AUDIO[3:13])
+
+    def test_serializer_points_at_the_view(self):
+        """Test that the local fallback URL is the Range-aware view"""
+        Podcast.objects.update(is_published=True)
+
+        detail = self.client.get("/api/podcasts/episode/").json()
+
+        self.assertTrue(detail["audio_url"].endswith("/api/podcasts/episode/audio/"))
+
+    def test_cloudinary_audio_redirects(self):
+        """Test that audio uploaded to Cloudinary is not served locally"""
+        Podcast.objects.update(
+            is_published=True, cloudinary_url="https://res.cloudinary.com/demo/a.mp3"
+        )
+
+        response = self.client.get("/api/podcasts/episode/audio/")
+
+        self.assertRedirects(
+            response, "https://res.cloudinary.com/demo/a.mp3", fetch_redirect_response=False
+        )
@@ -0,0 +1,152 @@
+# content/tests/test_reconcile.py
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from authentication.models import User
+from content.models import CloudinaryDeletion, Podcast, Post
+from helpers._cloudinary.reconcile import reconcile_media
+
+
+class StubLister:
+    """Local stand-in for cloudinary.api.resources with cursor paging"""
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.calls = []
+
+    def __call__(self, resource_type, prefix, max_results, next_cursor=None, **kwargs):
+        self.calls.append(prefix)
+        matching = [
+            asset
+            for asset in self.assets
+            if asset["resource_type"] == resource_type
+            and asset["public_id"].startswith(prefix)
+        ]
+        start = int(next_cursor or 0)
+        page = matching[start : start + max_results]
+        response = {"resources": page}
+        if start + max_results < len(matching):
+            response["next_cursor"] = str(start + max_results)
+        return response
+
+
+def asset(public_id, resource_type="image", age=timedelta(days=2)):
+    created_at = datetime.now(timezone.utc) - age
+    return {
+        "public_id": public_id,
+        "resource_type": resource_type,
+        "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+class ReconcileMediaTestCase(TestCase):
+    """Test the paged Cloudinary/database reconciliation"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        Post.objects.bulk_create(
+            [
+                Post(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    author=self.user,
+                    cloudinary_public_id=f"posts/original/post-{i}",
+                )
+                for i in range(5)
+            ]
+        )
+        Podcast.objects.bulk_create(
+            [
+                Podcast(
+                    title="Episode",
+                    slug="episode",
+                    host=self.user,
+                    cloudinary_public_id="podcasts/episode",
+                    cover_image_cloudinary_public_id="podcast_covers/original/gone",
+                )
+            ]
+        )
+        self.lister = StubLister(
+            [asset(f"posts/original/post-{i}") for i in range(1, 5)]
+            + [
+                asset("posts/original/orphan"),
+                asset("posts/original/uploading", age=timedelta(minutes=5)),
+                asset("podcasts/episode", resource_type="video"),
+                asset("podcasts/old-episode", resource_type="video"),
+            ]
+        )
+
+    def test_diff_reports_orphans_and_missing_rows(self):
+        """Test orphans and missing rows across several listing pages"""
+        entries = list(
+            reconcile_media(lister=self.lister, page_size=2, min_age=timedelta(hours=1))
+        )
+
+        orphans = {e["public_id"]: e["recent"] for e in entries if e["status"] == "orphan"}
+        missing = {e["public_id"] for e in entries if e["status"] == "missing"}
+        self.assertEqual(
+            orphans,
+            {
+                "posts/original/orphan": False,
+                "posts/original/uploading": True,
+                "podcasts/old-episode": False,
+            },
+        )
+        self.assertEqual(missing, {"posts/original/post-0", "podcast_covers/original/gone"})
+        # 6 posts/ assets with pages of 2, one page per other folder
+        self.assertEqual(self.lister.calls.count("posts/"), 3)
+        self.assertEqual(len(self.lister.calls), 5)
+
+    def test_cover_variants_are_referenced(self):
+        """Test that large/thumbnail cover assets count as referenced"""
+        Podcast.objects.create(
+            title="Covered",
+            slug="covered",
+            host=self.user,
+            cover_image_cloudinary_public_id="podcast_covers/original/c1",
+            cloudinary_cover_image="podcast_covers/original/c1",
+            cloudinary_cover_image_large="podcast_covers/large/c1l",
+            cloudinary_cover_image_thumbnail="image/upload/v123/podcast_covers/thumbnails/c1t.jpg",
+        )
+        lister = StubLister(
+            [
+                asset("podcast_covers/original/c1"),
+                asset("podcast_covers/large/c1l"),
+                asset("podcast_covers/thumbnails/c1t"),
+                asset("podcast_covers/large/stale"),
+            ]
+        )
+
+        entries = list(reconcile_media(sources=None, lister=lister))
+
+        orphans = {e["public_id"] for e in entries if e["status"] == "orphan"}
+        self.assertEqual(orphans, {"podcast_covers/large/stale"})
+
+    @patch("content.management.commands.reconcile_cloudinary.cloudinary_enabled")
+    def test_command_enqueues_old_orphans(self, cloudinary_enabled):
+        """Test that the command writes JSON Lines and queues old orphans only"""
+        cloudinary_enabled.return_value = True
+        out = io.StringIO()
+        with patch("cloudinary.api.resources", self.lister), patch(
+            "content.tasks.schedule_cloudinary_purge"
+        ):
+            call_command(
+                "reconcile_cloudinary",
+                "--enqueue-cleanup",
+                stdout=out,
+                stderr=io.StringIO(),
+            )
+
+        entries = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(
+            set(CloudinaryDeletion.objects.values_list("public_id", "resource_type")),
+            {("posts/original/orphan", "image"), ("podcasts/old-episode", "video")},
+        )
@@ -0,0 +1,173 @@
+# content/tests/test_scheduled_publishing.py
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from authentication.models import User
+from content.models import Podcast, Post, Video
+from content.tasks import schedule_publication, send_content_notification
+from helpers.tasks import publish_scheduled_content
+
+
+@override_settings(SITE_URL="https://blog.example.com/")
+class ScheduledPublishingTestCase(TestCase):
+    """Test the bulk scheduled publishing engine and its notifications"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="password"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="password"
+        )
+        now = timezone.now()
+        self.past = now - timedelta(minutes=5)
+        self.future = now + timedelta(minutes=10)
+        Post.objects.bulk_create(
+            [
+                Post(
+                    title="Due",
+                    slug="due",
+                    author=self.author,
+                    published_at=self.past,
+                    is_scheduled=True,
+                ),
+                Post(
+                    title="Later",
+                    slug="later",
+                    author=self.author,
+                    published_at=self.future,
+                    is_scheduled=True,
+                ),
+                Post(title="Draft", slug="draft", author=self.author),
+            ]
+        )
+        Podcast.objects.bulk_create(
+            [
+                Podcast(
+                    title="Ready",
+                    slug="ready",
+                    host=self.author,
+                    is_published=False,
+                    is_processed=True,
+                    published_at=self.past,
+                    is_scheduled=True,
+                ),
+                Podcast(
+                    title="Processing",
+                    slug="processing",
+                    host=self.author,
+                    is_published=False,
+                    published_at=self.past,
+                    is_scheduled=True,
+                ),
+            ]
+        )
+        Video.objects.bulk_create(
+            [
+                Video(
+                    title="Clip",
+                    slug="clip",
+                    video_url="https://example.com/clip",
+                    presenter=self.author,
+                    duration=300,
+                    published_at=self.past,
+                    is_scheduled=True,
+                )
+            ]
+        )
+
+    @patch("helpers.tasks.group")
+    def test_due_content_is_published_once(self, mock_group):
+        """Test that due rows are published in bulk and overlapping runs are no-ops"""
+        with self.captureOnCommitCallbacks(execute=True):
+            result = publish_scheduled_content()
+
+        self.assertEqual(result["published_count"], 3)
+        published = Post.objects.filter(is_published=True)
+        self.assertEqual(list(published.values_list("slug", flat=True)), ["due"])
+        published = Podcast.objects.filter(is_published=True)
+        self.assertEqual(list(published.values_list("slug", flat=True)), ["ready"])
+        self.assertTrue(Video.objects.get(slug="clip").is_published)
+        # One group of notification signatures per content type
+        self.assertEqual(mock_group.call_count, 3)
+        signatures = list(mock_group.call_args_list[0].args[0])
+        due = Post.objects.get(slug="due")
+        self.assertEqual(signatures[0].args, ("post", due.pk, "published"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publish_scheduled_content()["published_count"], 0)
+        self.assertEqual(mock_group.call_count, 3)
+
+    @patch("helpers.tasks.group")
+    def test_withdrawn_content_is_not_republished(self, mock_group):
+        """Test that unpublishing content with a past date does not reschedule it"""
+        post = Post.objects.create(
+            title="Withdrawn",
+            slug="withdrawn",
+            author=self.author,
+            is_published=True,
+            published_at=self.past,
+        )
+        post.is_published = False
+        post.save()
+
+        self.assertFalse(post.is_scheduled)
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_scheduled_content()
+        post.refresh_from_db()
+        self.assertFalse(post.is_published)
+        self.assertNotIn(
+            post.pk, [s.args[1] for s in mock_group.call_args_list[0].args[0]]
+        )
+
+        # Rescheduling it for later makes it due again
+        post.published_at = self.future
+        post.save()
+        self.assertTrue(post.is_scheduled)
+
+    def test_notification_is_sent_to_readers(self):
+        """Test that the rendered email reaches every active user but the author"""
+        video = Video.objects.get(slug="clip")
+        Video.objects.filter(pk=video.pk).update(is_published=True)
+
+        result = send_content_notification.apply(
+            args=["video", video.pk, "featured"]
+        ).get()
+
+        self.assertEqual(result["sent"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ["reader@example.com"])
+        self.assertIn("Clip", message.subject)
+        html = message.alternatives[0][0]
+        self.assertIn("https://blog.example.com/videos", html)
+        self.assertIn("5 min", html)
+
+    def test_unpublished_content_is_not_announced(self):
+        """Test that content unpublished in the meantime sends nothing"""
+        post = Post.objects.get(slug="later")
+
+        result = send_content_notification.apply(args=["post", post.pk]).get()
+
+        self.assertEqual(result["status"], "skipped")
+        self.assertEqual(mail.outbox, [])
+
+    @patch("helpers.tasks.publish_scheduled_content.apply_async")
+    def test_saving_scheduled_content_enqueues_an_eta_task(self, mock_apply_async):
+        """Test that near-term scheduled content gets a single ETA task"""
+        post = Post.objects.get(slug="later")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(schedule_publication(post))
+            self.assertFalse(schedule_publication(post))
+
+        mock_apply_async.assert_called_once_with(eta=self.future)
+
+        post.published_at = timezone.now() + timedelta(days=2)
+        self.assertFalse(schedule_publication(post))
@@ -0,0 +1,34 @@
+# content/tests/test_seed_benchmark.py
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from content.models import Podcast, Post, Video
+
+
+class SeedBenchmarkTestCase(TestCase):
+    """Test the seed_benchmark management command"""
+
+    def test_slugs_fit_the_field(self):
+        """Test that generated slugs are unique and within max_length"""
+        call_command(
+            "seed_benchmark",
+            users=20,
+            posts=200,
+            podcasts=50,
+            videos=50,
+            comments=100,
+            categories=3,
+            tags=10,
+            stdout=StringIO(),
+        )
+
+        for model in (Post, Podcast, Video):
+            max_length = model._meta.get_field("slug").max_length
+            slugs = list(model.objects.values_list("slug", flat=True))
+            with self.subTest(model=model.__name__):
+                self.assertTrue(slugs)
+                self.assertLessEqual(max(map(len, slugs)), max_length)
+                self.assertEqual(len(set(slugs)), len(slugs))
+                self.assertTrue(all(slug.startswith("bench-42-") for slug in slugs))
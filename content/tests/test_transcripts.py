@@ -0,0 +1,118 @@
+# content/tests/test_transcripts.py
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from authentication.models import User
+from content.models import Podcast, TranscriptSegment
+from content.tasks import index_podcast_transcript, transcript_key
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+SRT = """1
+00:00:05,000 --> 00:00:09,000
+Alice: Les requêtes ORM sont paresseuses.
+
+2
+00:00:09,000 --> 00:00:15,000
+Bob: Il faut surveiller le nombre de requetes SQL.
+
+3
+00:00:15,000 --> 00:00:20,000
+Alice: Passons aux migrations.
+"""
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TranscriptSegmentTestCase(TestCase):
+    """Test transcript segmentation and indexed search"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        podcast = Podcast(title="Episode", slug="episode", host=self.user)
+        podcast.transcript_file = SimpleUploadedFile("episode.srt", SRT.encode())
+        draft = Podcast(
+            title="Draft",
+            slug="draft",
+            host=self.user,
+            is_published=False,
+            transcript="<p>[00:00:01] Les migrations en brouillon</p>",
+        )
+        Podcast.objects.bulk_create([podcast, draft])
+        self.podcast = Podcast.objects.get(slug="episode")
+        self.draft = Podcast.objects.get(slug="draft")
+        for item in (self.podcast, self.draft):
+            key = transcript_key(item)
+            Podcast.objects.filter(pk=item.pk).update(transcript_key=key)
+            index_podcast_transcript.apply(args=[item.pk, key])
+
+    def test_segments_are_created(self):
+        """Test that the SRT file is split into ordered, timed segments"""
+        segments = list(self.podcast.transcript_segments.order_by("position"))
+
+        self.assertEqual(len(segments), 3)
+        self.assertEqual(segments[1].speaker, "Bob")
+        self.assertEqual((segments[1].start, segments[1].end), (9.0, 15.0))
+
+    def test_outdated_task_is_skipped(self):
+        """Test that a task scheduled for an older transcript does nothing"""
+        result = index_podcast_transcript.apply(args=[self.podcast.pk, "stale"]).get()
+
+        self.assertEqual(result["status"], "skipped")
+        self.assertEqual(self.podcast.transcript_segments.count(), 3)
+
+    def test_search_ignores_accents(self):
+        """Test that the full-text index matches with or without diacritics"""
+        matches = TranscriptSegment.objects.search("requêtes").filter(
+            podcast=self.podcast
+        )
+
+        self.assertEqual(sorted(matches.values_list("position", flat=True)), [0, 1])
+
+    def test_reindexing_keeps_the_index_in_sync(self):
+        """Test that replaced segments are no longer found"""
+        Podcast.objects.filter(pk=self.podcast.pk).update(
+            transcript_file="", transcript="<p>[00:00:01] Tout autre sujet</p>"
+        )
+        self.podcast.refresh_from_db()
+        key = transcript_key(self.podcast)
+        Podcast.objects.filter(pk=self.podcast.pk).update(transcript_key=key)
+
+        index_podcast_transcript.apply(args=[self.podcast.pk, key])
+
+        self.assertFalse(TranscriptSegment.objects.search("migrations").filter(
+            podcast=self.podcast
+        ).exists())
+        self.assertTrue(TranscriptSegment.objects.search("sujet").exists())
+
+    def test_episode_transcript_endpoint(self):
+        """Test the per-episode segments endpoint and its q filter"""
+        response = self.client.get("/api/podcasts/episode/transcript/")
+        self.assertEqual(response.json()["count"], 3)
+
+        response = self.client.get("/api/podcasts/episode/transcript/?q=migrations")
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "position": 2,
+                    "start": 15.0,
+                    "end": 20.0,
+                    "speaker": "Alice",
+                    "text": "Passons aux migrations.",
+                }
+            ],
+        )
+
+    def test_catalogue_search_endpoint(self):
+        """Test that catalogue search only returns published episodes"""
+        self.assertEqual(self.client.get("/api/transcripts/search/").status_code, 400)
+
+        response = self.client.get("/api/transcripts/search/?q=migrations")
+
+        results = response.json()["results"]
+        self.assertEqual([r["podcast_slug"] for r in results], ["episode"])
+        self.assertEqual(results[0]["start"], 15.0)
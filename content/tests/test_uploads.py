@@ -0,0 +1,198 @@
+# content/tests/test_uploads.py
+import io
+import tempfile
+import wave
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from content.models import Podcast, PodcastUploadSession, ProcessingState
+from content.tasks import finalize_podcast_upload
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_wav(seconds=1, sample_rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x80" * sample_rate * seconds)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PODCAST_UPLOAD_CHUNK_SIZE=4)
+class PodcastResumableUploadTestCase(TestCase):
+    """Test the chunked, resumable podcast audio upload endpoints"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        self.podcast = Podcast.objects.create(
+            title="Episode", slug="episode", host=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _create_session(self, size):
+        response = self.client.post(
+            "/api/podcast-uploads/",
+            {"podcast": "episode", "filename": "episode.mp3", "size": size},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def _patch(self, session_id, offset, body):
+        return self.client.generic(
+            "PATCH",
+            f"/api/podcast-uploads/{session_id}/",
+            body,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunks_are_appended_and_resumed(self):
+        """Test that chunks are appended and the offset can be resumed"""
+        session_id = self._create_session(10)
+
+        response = self._patch(session_id, 0, b"abcdef")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], "6")
+
+        # Un client qui reprend avec un offset périmé reçoit l'offset du serveur
+        response = self._patch(session_id, 0, b"abcdef")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], "6")
+
+        response = self.client.head(f"/api/podcast-uploads/{session_id}/")
+        self.assertEqual(response["Upload-Offset"], "6")
+
+        response = self._patch(session_id, 6, b"ghij")
+        self.assertEqual(response.status_code, 204)
+
+        session = PodcastUploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.offset, 10)
+        self.assertEqual(session.temp_path.read_bytes(), b"abcdefghij")
+
+    def test_oversized_chunk_is_rejected(self):
+        """Test that data beyond the declared size is discarded"""
+        session_id = self._create_session(4)
+
+        response = self._patch(session_id, 0, b"abcdef")
+
+        self.assertEqual(response.status_code, 413)
+        session = PodcastUploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.temp_path.stat().st_size, 0)
+
+    def test_finalize_requires_complete_file(self):
+        """Test that finalize queues the Cloudinary upload once all bytes are in"""
+        audio = make_wav(seconds=2)
+        session_id = self._create_session(len(audio))
+        self._patch(session_id, 0, audio[:100])
+
+        response = self.client.post(f"/api/podcast-uploads/{session_id}/finalize/")
+        self.assertEqual(response.status_code, 409)
+
+        self._patch(session_id, 100, audio[100:])
+        with patch("content.tasks.finalize_podcast_upload.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"/api/podcast-uploads/{session_id}/finalize/"
+                )
+
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(session_id)
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.processing_state, ProcessingState.PENDING)
+        self.assertEqual(self.podcast.duration, 2)
+        self.assertEqual(self.podcast.audio_format, "wav")
+
+    def test_finalize_rejects_invalid_audio(self):
+        """Test that a complete upload which is not audio is rejected"""
+        session_id = self._create_session(4)
+        self._patch(session_id, 0, b"abcd")
+
+        response = self.client.post(f"/api/podcast-uploads/{session_id}/finalize/")
+
+        self.assertEqual(response.status_code, 422)
+        session = PodcastUploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.status, PodcastUploadSession.Status.FAILED)
+        self.assertFalse(session.temp_path.exists())
+
+    def test_other_users_podcast_is_rejected(self):
+        """Test that a session cannot be opened for someone else's podcast"""
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password"
+        )
+        self.client.force_authenticate(other)
+
+        response = self.client.post(
+            "/api/podcast-uploads/",
+            {"podcast": "episode", "filename": "episode.mp3", "size": 10},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@patch("content.tasks.compute_podcast_waveform.delay")
+class FinalizePodcastUploadTestCase(TestCase):
+    """Test that a fully received upload is never lost"""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        self.podcast = Podcast.objects.create(title="Episode", slug="episode", host=user)
+        self.audio = make_wav()
+        self.session = PodcastUploadSession.objects.create(
+            podcast=self.podcast,
+            owner=user,
+            filename="episode.wav",
+            size=len(self.audio),
+            offset=len(self.audio),
+            status=PodcastUploadSession.Status.FINALIZING,
+        )
+        self.session.temp_path.parent.mkdir(parents=True, exist_ok=True)
+        self.session.temp_path.write_bytes(self.audio)
+
+    def assert_attached_locally(self):
+        self.podcast.refresh_from_db()
+        self.assertTrue(self.podcast.audio_file.name.startswith("temp_podcasts/"))
+        with self.podcast.audio_file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.audio)
+        self.assertFalse(self.session.temp_path.exists())
+
+    @patch("helpers._cloudinary.cloudinary_enabled", return_value=False)
+    def test_without_cloudinary_file_is_kept_locally(self, cloudinary_enabled, waveform):
+        """Test that the assembled file becomes the podcast audio without Cloudinary"""
+        result = finalize_podcast_upload.apply(args=[str(self.session.pk)]).get()
+
+        self.assertEqual(result["status"], "success")
+        self.assert_attached_locally()
+        self.assertEqual(self.podcast.processing_state, ProcessingState.READY)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, PodcastUploadSession.Status.COMPLETE)
+        waveform.assert_called_once_with(self.podcast.pk)
+
+    @patch("helpers._cloudinary.cloudinary_enabled", return_value=True)
+    @patch("cloudinary.uploader.upload_large", side_effect=ConnectionError("down"))
+    def test_final_failure_falls_back_to_local_file(
+        self, upload_large, cloudinary_enabled, waveform
+    ):
+        """Test that the last failed attempt still attaches the local file"""
+        result = finalize_podcast_upload.apply(
+            args=[str(self.session.pk)], retries=finalize_podcast_upload.max_retries
+        ).get()
+
+        self.assertEqual(result["status"], "error")
+        self.assert_attached_locally()
+        self.assertEqual(self.podcast.processing_state, ProcessingState.FAILED)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, PodcastUploadSession.Status.FAILED)
@@ -0,0 +1,87 @@
+# content/tests/test_waveform.py
+import io
+import math
+import struct
+import tempfile
+import wave
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from content.models import Podcast
+from content.tasks import compute_podcast_waveform
+from helpers.waveform import decode_peaks
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_wav(seconds=2, sample_rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(
+            b"".join(
+                struct.pack("<h", int(16000 * math.sin(i / 5)))
+                for i in range(sample_rate * seconds)
+            )
+        )
+    return SimpleUploadedFile("episode.wav", buffer.getvalue(), content_type="audio/wav")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PodcastWaveformTestCase(TestCase):
+    """Test waveform precomputation and the endpoint serving it"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        podcast = Podcast(
+            title="Episode", slug="episode", host=self.user, is_published=True
+        )
+        podcast.audio_file = make_wav()
+        Podcast.objects.bulk_create([podcast])
+        self.podcast = Podcast.objects.get(slug="episode")
+        self.client = APIClient()
+
+    def test_waveform_is_computed_once_per_audio_file(self):
+        """Test that the task stores the blob and skips unchanged audio"""
+        result = compute_podcast_waveform.apply(args=(self.podcast.pk,)).get()
+
+        self.assertEqual(result["status"], "success")
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.waveform_source, self.podcast.audio_file.name)
+        sample_rate, levels = decode_peaks(self.podcast.waveform.read())
+        self.assertEqual(sample_rate, 8000)
+        self.assertEqual(len(levels), 3)
+
+        result = compute_podcast_waveform.apply(args=(self.podcast.pk,)).get()
+        self.assertEqual(result["reason"], "up-to-date")
+
+    def test_endpoint_serves_cacheable_blob(self):
+        """Test the binary endpoint, its ETag and the detail serializer link"""
+        response = self.client.get("/api/podcasts/episode/waveform/")
+        self.assertEqual(response.status_code, 404)
+
+        compute_podcast_waveform.apply(args=(self.podcast.pk,))
+        response = self.client.get(
+            "/api/podcasts/episode/waveform/", HTTP_ACCEPT="application/octet-stream"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        blob = b"".join(response.streaming_content)
+        self.assertLess(len(blob), 20 * 1024)
+        self.assertEqual(len(decode_peaks(blob)[1]), 3)
+
+        response = self.client.get(
+            "/api/podcasts/episode/waveform/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        detail = self.client.get("/api/podcasts/episode/").json()
+        self.assertTrue(detail["waveform_url"].endswith("/api/podcasts/episode/waveform/"))
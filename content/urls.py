@@ -6,9 +6,16 @@ from .views import (
     TagViewSet,
     PostViewSet,
     PodcastViewSet,
+    PodcastUploadViewSet,
     VideoViewSet,
     CommentViewSet,
     PodcastTagsView,
+    TranscriptSearchView,
+    StatsView,
+    EngagementEventsView,
+    DirectUploadSignView,
+    DirectUploadCompleteView,
+    CloudinaryNotificationView,
 )
 
 router = DefaultRouter()
@@ -16,6 +23,9 @@ router.register(r"categories", CategoryViewSet)
 router.register(r"tags", TagViewSet)
 router.register(r"posts", PostViewSet)
 router.register(r"podcasts", PodcastViewSet, basename="podcast")
+router.register(
+    r"podcast-uploads", PodcastUploadViewSet, basename="podcast-upload"
+)
 router.register(r"videos", VideoViewSet)
 router.register(r"comments", CommentViewSet)
 
@@ -25,5 +35,22 @@ from . import views
 urlpatterns = [
     path("", include(router.urls)),
     path("podcasts/tags/", PodcastTagsView.as_view(), name="podcast-tags"),
+    path("podcasts/<slug:slug>/audio/", views.podcast_audio, name="podcast-audio"),
+    path(
+        "transcripts/search/", TranscriptSearchView.as_view(), name="transcript-search"
+    ),
+    path("stats/", StatsView.as_view(), name="stats"),
+    path("engagement/", EngagementEventsView.as_view(), name="engagement-events"),
     path("test-celery/", views.test_celery, name="test-celery"),
+    path("direct-uploads/", DirectUploadSignView.as_view(), name="direct-upload-sign"),
+    path(
+        "direct-uploads/complete/",
+        DirectUploadCompleteView.as_view(),
+        name="direct-upload-complete",
+    ),
+    path(
+        "direct-uploads/notify/",
+        CloudinaryNotificationView.as_view(),
+        name="direct-upload-notify",
+    ),
 ]
@@ -1,12 +1,58 @@
 # content/views.py
-from rest_framework import viewsets, mixins, filters, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+import mimetypes
+import os
+
+from rest_framework import generics, viewsets, mixins, filters, status
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from authentication.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+)
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Category, Tag, UserProfile, Post, Comment, Podcast, Video
+from .models import (
+    Category,
+    Tag,
+    UserProfile,
+    Post,
+    Comment,
+    EngagementEvent,
+    Podcast,
+    PodcastUploadSession,
+    TranscriptSegment,
+    Video,
+    ProcessingState,
+)
+from .analytics import REPORT_PERIODS, period_report, rollup_report
+from .engagement import published_targets, record_event
+from helpers.audio import InvalidAudioError, probe_audio
+from helpers.ranged_file import ranged_file_response
+from helpers._cloudinary.direct_upload import (
+    DirectUploadError,
+    attach_direct_upload,
+    get_direct_upload_ticket,
+    sign_direct_upload,
+    verify_notification,
+    verify_upload_response,
+)
 from .serializers import (
     UserSerializer,
     UserProfileSerializer,
@@ -18,6 +64,12 @@ from .serializers import (
     PodcastListSerializer,
     PodcastDetailSerializer,
     PodcastUploadSerializer,
+    PodcastUploadSessionSerializer,
+    DirectUploadSignSerializer,
+    DirectUploadCompleteSerializer,
+    EngagementEventSerializer,
+    TranscriptSegmentSerializer,
+    TranscriptSearchResultSerializer,
     VideoListSerializer,
     VideoDetailSerializer,
 )
@@ -78,11 +130,28 @@ class PostViewSet(viewsets.ReadOnlyModelViewSet):
             return PostDetailSerializer
         return PostListSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        post = self.get_object()
+        record_event(EngagementEvent.Target.POST, post.pk, EngagementEvent.Kind.VIEW)
+        return Response(self.get_serializer(post).data)
+
     # perform_create est utilisé pour associer l'auteur du post à l'utilisateur connecté
     def perqform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
+class BinaryRenderer(BaseRenderer):
+    """Accepte ``Accept: application/octet-stream`` ; les erreurs restent en JSON"""
+
+    media_type = "application/octet-stream"
+    format = "bin"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data)
+
+
 class PodcastViewSet(viewsets.ModelViewSet):
     filter_backends = [
         DjangoFilterBackend,
@@ -137,6 +206,492 @@ class PodcastViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
 
+    def create(self, request, *args, **kwargs):
+        """Retourne 202 lorsque les médias sont envoyés à Cloudinary en arrière-plan"""
+        response = super().create(request, *args, **kwargs)
+        return self._accepted_if_processing(response)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        return self._accepted_if_processing(response)
+
+    @action(
+        detail=True, methods=["get"], renderer_classes=[JSONRenderer, BinaryRenderer]
+    )
+    def waveform(self, request, slug=None):
+        """
+        Pics de la forme d'onde (blob binaire int8, voir helpers.waveform) :
+        quelques Ko au lieu du fichier audio complet
+        """
+        podcast = self.get_object()
+        if not podcast.waveform:
+            return Response(
+                {"detail": "Forme d'onde pas encore disponible."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        # Le nom du fichier contient l'empreinte du contenu
+        etag = f'"{podcast.waveform.name.rsplit("-", 1)[-1].split(".")[0]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return HttpResponseNotModified(headers={"ETag": etag})
+        response = FileResponse(
+            podcast.waveform.open("rb"), content_type="application/octet-stream"
+        )
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, max-age=86400"
+        return response
+
+    @action(detail=True, methods=["get"])
+    def transcript(self, request, slug=None):
+        """
+        Segments horodatés de la transcription ; ``?q=`` ne retourne que les
+        segments correspondants (recherche indexée)
+        """
+        podcast = self.get_object()
+        segments = podcast.transcript_segments.all()
+        query = request.query_params.get("q", "").strip()
+        if query:
+            segments = segments.search(query)
+        page = self.paginate_queryset(segments.order_by("position"))
+        serializer = TranscriptSegmentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def _accepted_if_processing(self, response):
+        if response.data.get("processing_state") in (
+            ProcessingState.PENDING,
+            ProcessingState.PROCESSING,
+        ):
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+class TranscriptSearchView(generics.ListAPIView):
+    """
+    Recherche plein texte dans les transcriptions de tous les podcasts
+    publiés : ``GET /transcripts/search/?q=...``. Chaque résultat indique
+    l'épisode et l'instant où le passage commence.
+    """
+
+    serializer_class = TranscriptSearchResultSerializer
+    permission_classes = [AllowAny]
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get("q", "").strip():
+            return Response(
+                {"detail": "Le paramètre q est requis."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return (
+            TranscriptSegment.objects.search(self.request.query_params["q"])
+            .filter(podcast__is_published=True)
+            .select_related("podcast")
+            .order_by("-podcast__published_at", "podcast_id", "position")
+        )
+
+
+class PodcastUploadViewSet(
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """
+    Upload reprenable de l'audio d'un podcast, inspiré du protocole tus :
+
+    - ``POST /podcast-uploads/`` déclare la taille totale et ouvre une session ;
+    - ``HEAD|GET /podcast-uploads/<id>/`` renvoie l'offset déjà reçu ;
+    - ``PATCH /podcast-uploads/<id>/`` ajoute un morceau à partir de
+      l'en-tête ``Upload-Offset`` ;
+    - ``POST /podcast-uploads/<id>/finalize/`` envoie le fichier vers Cloudinary
+      en arrière-plan.
+
+    Le corps des PATCH est recopié sur disque par blocs, sans jamais être
+    chargé entièrement en mémoire.
+    """
+
+    serializer_class = PodcastUploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get", "head", "post", "patch", "options"]
+
+    def get_queryset(self):
+        return PodcastUploadSession.objects.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        session = serializer.save(owner=self.request.user)
+        session.temp_path.parent.mkdir(parents=True, exist_ok=True)
+        session.temp_path.touch()
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        session_id = response.data["id"]
+        response["Location"] = request.build_absolute_uri(f"{session_id}/")
+        response["Upload-Offset"] = "0"
+        response["Upload-Length"] = str(response.data["size"])
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        response = Response(self.get_serializer(session).data)
+        return self._with_upload_headers(response, session)
+
+    def partial_update(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status != PodcastUploadSession.Status.UPLOADING:
+            return Response(
+                {"detail": "Cette session n'accepte plus de données."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            client_offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "En-tête Upload-Offset manquant ou invalide."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        lock_key = f"content:upload-session:{session.pk}"
+        if not cache.add(lock_key, 1, settings.CONTENT_UPLOAD_LOCK_TIMEOUT):
+            return Response(
+                {"detail": "Un autre morceau est en cours d'écriture."},
+                status=status.HTTP_423_LOCKED,
+            )
+
+        try:
+            # La taille du fichier partiel fait foi : un PATCH interrompu
+            # a pu écrire plus d'octets que l'offset enregistré en base
+            path = session.temp_path
+            offset = path.stat().st_size if path.exists() else 0
+            if client_offset != offset:
+                response = Response(
+                    {"detail": "Upload-Offset ne correspond pas à l'offset du serveur."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+                return self._with_upload_headers(response, session, offset)
+
+            new_offset = self._append_body(request, session, offset)
+            if new_offset is None:
+                response = Response(
+                    {"detail": "Les données reçues dépassent la taille déclarée."},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+                return self._with_upload_headers(response, session, offset)
+            offset = new_offset
+            PodcastUploadSession.objects.filter(pk=session.pk).update(offset=offset)
+        finally:
+            cache.delete(lock_key)
+
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        return self._with_upload_headers(response, session, offset)
+
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        from .tasks import finalize_podcast_upload
+
+        session = self.get_object()
+        if session.status != PodcastUploadSession.Status.UPLOADING:
+            return Response(
+                {"detail": "Cette session a déjà été finalisée."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        path = session.temp_path
+        offset = path.stat().st_size if path.exists() else 0
+        if offset != session.size:
+            response = Response(
+                {"detail": "Le fichier n'a pas été entièrement reçu."},
+                status=status.HTTP_409_CONFLICT,
+            )
+            return self._with_upload_headers(response, session, offset)
+
+        try:
+            info = probe_audio(path)
+        except InvalidAudioError as e:
+            PodcastUploadSession.objects.filter(pk=session.pk).update(
+                offset=offset, status=PodcastUploadSession.Status.FAILED
+            )
+            path.unlink(missing_ok=True)
+            return Response(
+                {"detail": f"Fichier audio invalide : {e}"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        PodcastUploadSession.objects.filter(pk=session.pk).update(
+            offset=offset, status=PodcastUploadSession.Status.FINALIZING
+        )
+        podcast = session.podcast
+        podcast.apply_audio_info(info)
+        Podcast.objects.filter(pk=session.podcast_id).update(
+            processing_state=ProcessingState.PENDING,
+            duration=podcast.duration,
+            audio_format=podcast.audio_format,
+            audio_bitrate=podcast.audio_bitrate,
+            audio_sample_rate=podcast.audio_sample_rate,
+            audio_channels=podcast.audio_channels,
+            audio_size=podcast.audio_size,
+        )
+        transaction.on_commit(lambda: finalize_podcast_upload.delay(str(session.pk)))
+
+        session.refresh_from_db()
+        response = Response(
+            self.get_serializer(session).data, status=status.HTTP_202_ACCEPTED
+        )
+        return self._with_upload_headers(response, session)
+
+    def _append_body(self, request, session, offset):
+        """
+        Recopie le corps de la requête à la fin du fichier partiel, par blocs.
+        Retourne le nouvel offset, ou ``None`` si le corps dépasse la taille
+        déclarée (le fichier est alors ramené à son offset initial).
+        """
+        chunk_size = settings.PODCAST_UPLOAD_CHUNK_SIZE
+        remaining = session.size - offset
+        stream = request._request
+        with open(session.temp_path, "ab") as destination:
+            while remaining > 0:
+                chunk = stream.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                destination.write(chunk)
+                remaining -= len(chunk)
+            if stream.read(1):
+                destination.truncate(offset)
+                return None
+            return destination.tell()
+
+    def _with_upload_headers(self, response, session, offset=None):
+        response["Upload-Offset"] = str(session.offset if offset is None else offset)
+        response["Upload-Length"] = str(session.size)
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+@require_safe
+def podcast_audio(request, slug):
+    """
+    Sert l'audio d'un podcast stocké localement (repli quand l'upload vers
+    Cloudinary a échoué) avec prise en charge des requêtes ``Range`` : le
+    lecteur ne télécharge que les octets nécessaires pour se positionner.
+    """
+    podcast = get_object_or_404(Podcast, slug=slug)
+    if not podcast.is_published and podcast.host_id != request.user.pk:
+        raise Http404
+    # Une écoute par lecture depuis le début, pas une par requête Range
+    range_header = request.headers.get("Range", "bytes=0-").replace(" ", "")
+    if (
+        podcast.is_published
+        and request.method == "GET"
+        and range_header.startswith("bytes=0-")
+    ):
+        record_event(
+            EngagementEvent.Target.PODCAST, podcast.pk, EngagementEvent.Kind.PLAY
+        )
+    if podcast.cloudinary_url:
+        return HttpResponseRedirect(podcast.cloudinary_url)
+    if not podcast.audio_file:
+        raise Http404
+    try:
+        path = podcast.audio_file.path
+    except NotImplementedError:
+        # Stockage distant (S3...) : il gère lui-même les requêtes Range
+        return HttpResponseRedirect(podcast.audio_file.url)
+    if not os.path.exists(path):
+        raise Http404
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return ranged_file_response(request, path, content_type)
+
+
+def schedule_direct_upload_analysis(ticket):
+    """
+    Calcule en arrière-plan la palette des images et la forme d'onde de
+    l'audio envoyés directement
+    """
+    from .tasks import compute_podcast_waveform, schedule_image_analysis
+
+    if ticket["target"] in ("post_image", "podcast_cover"):
+        schedule_image_analysis(ticket["model"], ticket["pk"])
+    elif ticket["target"] == "podcast_audio":
+        transaction.on_commit(lambda: compute_podcast_waveform.delay(ticket["pk"]))
+
+
+class EngagementEventsView(APIView):
+    """
+    Collecte d'événements d'audience côté client (vues, écoutes, j'aime),
+    par lots : ``{"events": [{"target": "post", "id": 1, "kind": "like"}]}``.
+    Rien n'est écrit en base pendant la requête (voir ``content.engagement``).
+
+    Les vues et écoutes sont anonymes ; un j'aime exige d'être connecté et
+    n'est compté qu'une fois par utilisateur et par contenu. Les événements
+    visant un contenu inexistant ou non publié sont ignorés.
+    """
+
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "engagement"
+    MAX_EVENTS = 50
+
+    def post(self, request):
+        events = request.data.get("events") if isinstance(request.data, dict) else None
+        if not isinstance(events, list) or not 0 < len(events) <= self.MAX_EVENTS:
+            return Response(
+                {"detail": f"events : de 1 à {self.MAX_EVENTS} événements attendus."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = EngagementEventSerializer(data=events, many=True)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data
+        likes = [e for e in events if e[2] == EngagementEvent.Kind.LIKE]
+        if likes and not request.user.is_authenticated:
+            self.permission_denied(
+                request, message="Connectez-vous pour aimer un contenu."
+            )
+
+        published = published_targets((target, pk) for target, pk, _ in events)
+        for target, object_id, kind in events:
+            if (target, object_id) not in published:
+                continue
+            if kind == EngagementEvent.Kind.LIKE and not cache.add(
+                f"engagement:like:{request.user.pk}:{target}:{object_id}",
+                "1",
+                timeout=settings.ENGAGEMENT_LIKE_TTL,
+            ):
+                continue
+            record_event(target, object_id, kind)
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class StatsView(APIView):
+    """
+    Statistiques agrégées pour l'administration, lues dans les agrégats
+    quotidiens : ``?period=week|month`` ou ``?start=AAAA-MM-JJ&end=AAAA-MM-JJ``
+    """
+
+    permission_classes = [IsAdminUser]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        params = request.query_params
+        if "start" in params or "end" in params:
+            start = parse_date(params.get("start", ""))
+            end = parse_date(params.get("end", ""))
+            if not start or not end or start > end:
+                return Response(
+                    {"detail": "start et end doivent être des dates AAAA-MM-JJ."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if (end - start).days >= self.MAX_DAYS:
+                return Response(
+                    {"detail": f"Période limitée à {self.MAX_DAYS} jours."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return Response(rollup_report(start, end))
+
+        period = params.get("period", "week")
+        if period not in REPORT_PERIODS:
+            return Response(
+                {"detail": f"Période inconnue : {period}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(period_report(period))
+
+
+class DirectUploadSignView(APIView):
+    """
+    Émet des paramètres d'upload signés pour envoyer une image ou un fichier
+    audio directement à Cloudinary, sans transiter par le serveur.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = DirectUploadSignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data["target"]
+        slug = serializer.validated_data["slug"]
+
+        if target == "post_image":
+            instance = get_object_or_404(Post, slug=slug, author=request.user)
+        else:
+            instance = get_object_or_404(Podcast, slug=slug, host=request.user)
+
+        params = sign_direct_upload(instance, target, user_id=request.user.pk)
+        return Response(params, status=status.HTTP_201_CREATED)
+
+
+class DirectUploadCompleteView(APIView):
+    """
+    Rappel du client une fois l'upload terminé : la réponse de Cloudinary
+    (public_id, version, signature) est vérifiée puis rattachée à l'objet.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = DirectUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        ticket = get_direct_upload_ticket(data["public_id"])
+        if ticket is None or ticket["user_id"] != request.user.pk:
+            return Response(
+                {"detail": "Aucun upload en attente pour ce public_id."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            verify_upload_response(data["public_id"], data["version"], data["signature"])
+            attach_direct_upload(
+                ticket, data["public_id"], data["version"], data["secure_url"]
+            )
+        except DirectUploadError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        schedule_direct_upload_analysis(ticket)
+
+        return Response({"public_id": data["public_id"], "target": ticket["target"]})
+
+
+class CloudinaryNotificationView(APIView):
+    """
+    Webhook ``notification_url`` de Cloudinary. La signature des en-têtes
+    ``X-Cld-Timestamp``/``X-Cld-Signature`` remplace l'authentification.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        body = request.body.decode("utf-8")
+        try:
+            verify_notification(
+                body,
+                request.headers.get("X-Cld-Timestamp"),
+                request.headers.get("X-Cld-Signature"),
+            )
+        except DirectUploadError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+        payload = request.data
+        if payload.get("notification_type") != "upload":
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        ticket = get_direct_upload_ticket(payload.get("public_id", ""))
+        if ticket is None:
+            # Upload non émis par l'API (ou ticket expiré) : rien à rattacher
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        try:
+            attach_direct_upload(
+                ticket,
+                payload["public_id"],
+                payload.get("version"),
+                payload.get("secure_url", ""),
+                payload.get("duration"),
+            )
+        except DirectUploadError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_410_GONE)
+        schedule_direct_upload_analysis(ticket)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class VideoViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Video.objects.filter(is_published=True).order_by("-published_at")
@@ -150,6 +705,11 @@ class VideoViewSet(viewsets.ReadOnlyModelViewSet):
             return VideoDetailSerializer
         return VideoListSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        video = self.get_object()
+        record_event(EngagementEvent.Target.VIDEO, video.pk, EngagementEvent.Kind.VIEW)
+        return Response(self.get_serializer(video).data)
+
 
 class CommentViewSet(
     mixins.CreateModelMixin,
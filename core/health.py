@@ -0,0 +1,281 @@
+"""
+Sondes de santé de Modern Blog Platform
+
+Les vues ``/health/live`` et ``/health/ready`` (répartiteur de charge,
+Kubernetes...) ne lisent que le dernier instantané calculé par un thread
+d'arrière-plan propre à chaque processus : une sonde du répartiteur n'accède
+jamais elle-même à la base, au cache ni au broker, et répond en quelques
+microsecondes même quand l'un d'eux est lent.
+
+Le thread exécute les sondes toutes les ``HEALTH_PROBE_INTERVAL`` secondes :
+aller-retour base de données et cache (en millisecondes), profondeur des
+files Celery, occupation disque, joignabilité de Cloudinary, CPU et mémoire
+(si psutil est installé). Un instantané plus vieux que ``HEALTH_MAX_AGE``
+secondes est périmé (sonde bloquée, thread arrêté) : le processus n'est
+alors plus « prêt ». Seules les sondes de ``HEALTH_CRITICAL_PROBES`` en
+erreur rendent le processus indisponible ; les autres le signalent dégradé.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+OK, WARNING, ERROR = "ok", "warning", "error"
+
+# psutil mesure le CPU depuis son appel précédent dans le processus
+_cpu_primed = False
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def probe_database():
+    """Aller-retour ``SELECT 1`` sur la connexion du thread courant"""
+    from django.db import connection
+
+    # Connexion persistante entre deux passages, rouverte si elle a expiré
+    connection.close_if_unusable_or_obsolete()
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except Exception:
+        connection.close()
+        raise
+    return {"status": OK, "latency_ms": _elapsed_ms(start)}
+
+
+def probe_cache():
+    """Écriture puis relecture d'une clé propre au processus"""
+    from django.core.cache import cache
+
+    key = f"health:{os.getpid()}"
+    value = uuid.uuid4().hex
+    start = time.perf_counter()
+    cache.set(key, value, timeout=60)
+    found = cache.get(key)
+    result = {"status": OK, "latency_ms": _elapsed_ms(start)}
+    if found != value:
+        result.update(status=ERROR, error="Cache read back a different value")
+    return result
+
+
+def broker_queues():
+    """Files Celery utilisées : file par défaut et files des routes"""
+    queues = {getattr(settings, "CELERY_TASK_DEFAULT_QUEUE", "celery")}
+    for route in getattr(settings, "CELERY_TASK_ROUTES", {}).values():
+        if isinstance(route, dict) and route.get("queue"):
+            queues.add(route["queue"])
+    return sorted(queues)
+
+
+def probe_broker():
+    """Nombre de messages en attente dans chaque file Celery"""
+    from core.celery import app
+
+    start = time.perf_counter()
+    depths = {}
+    with app.connection_for_read(
+        connect_timeout=settings.HEALTH_PROBE_TIMEOUT
+    ) as conn:
+        conn.ensure_connection(max_retries=0)
+        channel = conn.default_channel
+        for queue in broker_queues():
+            try:
+                depths[queue] = channel.queue_declare(
+                    queue=queue, passive=True
+                ).message_count
+            except conn.channel_errors:
+                # File jamais déclarée : aucun message
+                depths[queue] = 0
+    total = sum(depths.values())
+    return {
+        "status": WARNING if total > settings.HEALTH_QUEUE_DEPTH_WARNING else OK,
+        "latency_ms": _elapsed_ms(start),
+        "queues": depths,
+        "total": total,
+    }
+
+
+def probe_disk():
+    """Occupation du disque des médias"""
+    path = settings.MEDIA_ROOT
+    usage = shutil.disk_usage(path if os.path.isdir(path) else settings.BASE_DIR)
+    percent = round(usage.used / usage.total * 100, 2)
+    return {
+        "status": WARNING if percent >= settings.HEALTH_DISK_WARNING_PERCENT else OK,
+        "usage_percent": percent,
+        "free_gb": round(usage.free / 1024**3, 2),
+    }
+
+
+def probe_cloudinary():
+    """Joignabilité du CDN Cloudinary (toute réponse HTTP suffit)"""
+    import requests
+
+    cloud_name = getattr(settings, "CLOUDINARY_CLOUD_NAME", None)
+    if not cloud_name:
+        return {"status": OK, "configured": False}
+    start = time.perf_counter()
+    response = requests.head(
+        f"https://res.cloudinary.com/{cloud_name}/",
+        timeout=settings.HEALTH_PROBE_TIMEOUT,
+        allow_redirects=False,
+    )
+    return {
+        "status": ERROR if response.status_code >= 500 else OK,
+        "latency_ms": _elapsed_ms(start),
+        "http_status": response.status_code,
+    }
+
+
+def probe_system():
+    """
+    CPU et mémoire, sans attente : le CPU est mesuré depuis l'appel précédent
+    (inconnu au premier appel du processus)
+    """
+    import psutil
+
+    global _cpu_primed
+    cpu = psutil.cpu_percent(interval=None)
+    primed, _cpu_primed = _cpu_primed, True
+    memory = psutil.virtual_memory().percent
+    status = OK
+    if (primed and cpu > settings.HEALTH_CPU_WARNING_PERCENT) or (
+        memory > settings.HEALTH_MEMORY_WARNING_PERCENT
+    ):
+        status = WARNING
+    return {
+        "status": status,
+        "cpu_percent": cpu if primed else None,
+        "memory_percent": memory,
+    }
+
+
+PROBES = {
+    "database": probe_database,
+    "cache": probe_cache,
+    "broker": probe_broker,
+    "disk": probe_disk,
+    "cloudinary": probe_cloudinary,
+    "system": probe_system,
+}
+
+
+def run_probes(names=None):
+    """
+    Exécute les sondes demandées (toutes par défaut) ; une sonde qui lève une
+    exception est en erreur.
+
+    Returns:
+        dict: Résultat de chaque sonde
+    """
+    results = {}
+    for name in names or PROBES:
+        try:
+            results[name] = PROBES[name]()
+        except ImportError as e:
+            results[name] = {"status": WARNING, "error": f"Unavailable: {e}"}
+        except Exception as e:
+            results[name] = {"status": ERROR, "error": str(e)}
+    return results
+
+
+class HealthMonitor:
+    """Boucle de sondes d'arrière-plan et dernier instantané du processus"""
+
+    def __init__(self, probes=None):
+        self.probes = probes
+        # (time.monotonic() du dernier passage, instantané), remplacé d'un bloc
+        self._state = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        checks = run_probes(self.probes)
+        snapshot = {"checked_at": time.time(), "checks": checks}
+        self._state = (time.monotonic(), snapshot)
+        failing = [name for name, check in checks.items() if check["status"] == ERROR]
+        if failing:
+            logger.warning(f"Health probes failing: {failing}")
+        return snapshot
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Health probe loop error: {e}")
+            time.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    def ensure_started(self):
+        """Démarre la boucle, une fois par processus (y compris après un fork)"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Instantané hérité du processus parent : il ne nous concerne pas
+                self._state = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, name="health-probes", daemon=True
+            )
+            self._thread.start()
+
+    def readiness(self):
+        """
+        État de disponibilité d'après le dernier instantané.
+
+        Returns:
+            tuple: ``(prêt, corps de la réponse)``
+        """
+        state = self._state
+        if state is None:
+            return False, {"status": "starting", "checks": {}}
+
+        checked, snapshot = state
+        age = round(time.monotonic() - checked, 3)
+        critical = set(settings.HEALTH_CRITICAL_PROBES)
+        checks = snapshot["checks"]
+        failing = sorted(
+            name
+            for name, check in checks.items()
+            if name in critical and check["status"] == ERROR
+        )
+        degraded = sorted(
+            name
+            for name, check in checks.items()
+            if name not in failing and check["status"] != OK
+        )
+
+        if age > settings.HEALTH_MAX_AGE:
+            status = "stale"
+        elif failing:
+            status = "unavailable"
+        elif degraded:
+            status = "degraded"
+        else:
+            status = "ok"
+        body = {
+            "status": status,
+            "age_seconds": age,
+            "failing": failing,
+            "degraded": degraded,
+            "checks": checks,
+        }
+        return status in ("ok", "degraded"), body
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,339 @@
+"""
+Métriques Prometheus pour Modern Blog Platform
+
+Ce module contient un registre de métriques minimaliste (compteurs et
+histogrammes) alimenté par ``core.middleware.MetricsMiddleware`` et exposé
+au format texte Prometheus par la vue ``/metrics``.
+
+Les compteurs sont de simples dictionnaires par processus, sans verrou :
+sous le GIL, une incrémentation perdue lors d'une course entre threads est
+acceptable pour de la télémétrie. Pour gunicorn (plusieurs processus), chaque
+worker écrit périodiquement un instantané JSON dans ``METRICS_MULTIPROC_DIR``
+et la vue ``/metrics`` agrège les instantanés de tous les workers.
+"""
+
+import atexit
+import json
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Bornes des histogrammes (secondes pour la latence, octets pour la taille)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRIC_HELP = {
+    "django_http_requests_total": ("counter", "Nombre de requêtes HTTP traitées"),
+    "django_http_request_duration_seconds": (
+        "histogram",
+        "Latence des requêtes HTTP par vue",
+    ),
+    "django_http_response_size_bytes": (
+        "histogram",
+        "Taille des réponses HTTP par vue",
+    ),
+    "django_http_db_queries": (
+        "histogram",
+        "Nombre de requêtes SQL exécutées par requête HTTP",
+    ),
+    "django_http_db_query_duration_seconds_total": (
+        "counter",
+        "Temps cumulé passé dans la base de données",
+    ),
+    "django_http_cache_hits_total": ("counter", "Lectures de cache réussies"),
+    "django_http_cache_misses_total": ("counter", "Lectures de cache manquées"),
+}
+
+# Statistiques de la requête en cours (requêtes SQL, accès au cache)
+current_request_stats = ContextVar("current_request_stats", default=None)
+
+
+class RequestStats:
+    """Accumulateur des statistiques d'une seule requête HTTP"""
+
+    __slots__ = ("db_queries", "db_time", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """Wrapper ``connection.execute_wrapper`` qui chronomètre chaque requête SQL"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques propre au processus courant.
+
+    Les clés sont des tuples ``(nom, labels)`` où ``labels`` est un tuple
+    de paires ``(clé, valeur)`` dans un ordre fixe, ce qui évite toute allocation de
+    dictionnaire sur le chemin critique.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            # [bornes, comptes par intervalle (+Inf inclus), somme, total]
+            histogram = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+            self.histograms[key] = histogram
+        histogram[1][bisect_left(buckets, value)] += 1
+        histogram[2] += value
+        histogram[3] += 1
+
+    def snapshot(self):
+        """Retourne un instantané sérialisable en JSON du registre"""
+        return {
+            "counters": [
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in list(self.counters.items())
+            ],
+            "histograms": [
+                [name, [list(pair) for pair in labels], list(h[0]), list(h[1]), h[2], h[3]]
+                for (name, labels), h in list(self.histograms.items())
+            ],
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    # ------------------------------------------------------------------
+    # Mode multiprocessus (gunicorn)
+    # ------------------------------------------------------------------
+
+    def snapshot_path(self, pid=None):
+        return os.path.join(
+            settings.METRICS_MULTIPROC_DIR, f"metrics_{pid or os.getpid()}.json"
+        )
+
+    def flush(self):
+        """Écrit l'instantané du processus de manière atomique dans le dossier partagé"""
+        directory = getattr(settings, "METRICS_MULTIPROC_DIR", "")
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = self.snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """Écrit l'instantané au plus une fois par ``METRICS_FLUSH_INTERVAL`` secondes"""
+        if not getattr(settings, "METRICS_MULTIPROC_DIR", ""):
+            return
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5.0)
+        if time.monotonic() - self._last_flush >= interval:
+            try:
+                self.flush()
+            except OSError:
+                # Les métriques ne doivent jamais faire échouer une requête
+                pass
+
+    def collect(self):
+        """
+        Retourne l'instantané à exposer : celui du processus courant,
+        fusionné avec ceux des autres workers en mode multiprocessus.
+        """
+        snapshots = [self.snapshot()]
+        directory = getattr(settings, "METRICS_MULTIPROC_DIR", "")
+        if directory and os.path.isdir(directory):
+            own_file = os.path.basename(self.snapshot_path())
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or entry.name == own_file:
+                        continue
+                    try:
+                        with open(entry.path) as fh:
+                            snapshots.append(json.load(fh))
+                    except (OSError, ValueError):
+                        continue
+        return merge_snapshots(snapshots)
+
+
+def merge_snapshots(snapshots):
+    """Additionne compteurs et histogrammes de plusieurs instantanés"""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, counts, total, count in snapshot.get(
+            "histograms", []
+        ):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = [list(buckets), list(counts), total, count]
+            elif merged[0] == list(buckets):
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total
+                merged[3] += count
+    return {"counters": counters, "histograms": histograms}
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(collected):
+    """Formate un instantané fusionné au format d'exposition texte Prometheus"""
+    by_name = {}
+    for (name, labels), value in collected["counters"].items():
+        by_name.setdefault(name, []).append(("counter", labels, value))
+    for (name, labels), value in collected["histograms"].items():
+        by_name.setdefault(name, []).append(("histogram", labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        metric_type, help_text = METRIC_HELP.get(
+            name, (by_name[name][0][0], name.replace("_", " "))
+        )
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for kind, labels, value in sorted(by_name[name], key=lambda item: item[1]):
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            buckets, counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(labels, [("le", _format_value(float(bound)))])
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            le = _format_labels(labels, [("le", "+Inf")])
+            lines.append(f"{name}_bucket{le} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def record_request(view, method, status, duration, size, stats):
+    """Enregistre les métriques d'une requête terminée"""
+    labels = (("method", method), ("view", view))
+    registry.inc(
+        "django_http_requests_total", labels + (("status", str(status)),)
+    )
+    registry.observe(
+        "django_http_request_duration_seconds", labels, duration, LATENCY_BUCKETS
+    )
+    if size is not None:
+        registry.observe("django_http_response_size_bytes", labels, size, SIZE_BUCKETS)
+    registry.observe(
+        "django_http_db_queries", labels, stats.db_queries, QUERY_COUNT_BUCKETS
+    )
+    if stats.db_time:
+        registry.inc(
+            "django_http_db_query_duration_seconds_total", labels, stats.db_time
+        )
+    if stats.cache_hits:
+        registry.inc("django_http_cache_hits_total", labels, stats.cache_hits)
+    if stats.cache_misses:
+        registry.inc("django_http_cache_misses_total", labels, stats.cache_misses)
+    registry.maybe_flush()
+
+
+# ----------------------------------------------------------------------
+# Instrumentation du cache
+# ----------------------------------------------------------------------
+
+_MISSING = object()
+
+
+def _instrument_get(original):
+    def get(self, key, default=None, version=None):
+        value = original(self, key, _MISSING, version)
+        stats = current_request_stats.get()
+        if value is _MISSING:
+            if stats is not None:
+                stats.cache_misses += 1
+            return default
+        if stats is not None:
+            stats.cache_hits += 1
+        return value
+
+    get._metrics_instrumented = True
+    return get
+
+
+def _instrument_get_many(original):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = original(self, keys, version)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+    get_many._metrics_instrumented = True
+    return get_many
+
+
+def instrument_cache_backends():
+    """
+    Enveloppe ``get``/``get_many`` des backends de cache configurés pour
+    compter les succès et échecs de lecture de la requête en cours.
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.base import BaseCache
+
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        get = backend_class.get
+        if not getattr(get, "_metrics_instrumented", False):
+            backend_class.get = _instrument_get(get)
+        # BaseCache.get_many appelle déjà get() pour chaque clé
+        get_many = backend_class.get_many
+        if get_many is BaseCache.get_many:
+            continue
+        if not getattr(get_many, "_metrics_instrumented", False):
+            backend_class.get_many = _instrument_get_many(get_many)
+
+
+registry = MetricsRegistry()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        registry.flush()
+    except Exception:
+        pass
@@ -0,0 +1,50 @@
+"""
+Middlewares du projet Modern Blog Platform
+"""
+
+import time
+
+from django.db import connection
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête (latence, requêtes SQL, cache, taille, statut)
+    et alimente le registre ``core.metrics`` exposé sur ``/metrics``.
+
+    Doit être placé en tête de ``MIDDLEWARE`` pour mesurer toute la pile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_cache_backends()
+
+    def __call__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.current_request_stats.reset(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        # Le nom de vue (et non le chemin) borne la cardinalité des labels
+        view = match.view_name if match and match.view_name else "<unresolved>"
+        if view == "metrics":
+            return response
+
+        if response.streaming:
+            size = response.get("Content-Length")
+            size = int(size) if size else None
+        else:
+            size = len(response.content)
+
+        metrics.record_request(
+            view, request.method, response.status_code, duration, size, stats
+        )
+        return response
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
+from celery.schedules import crontab
 from dotenv import load_dotenv
 import cloudinary
 
@@ -78,6 +79,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",  # Doit rester en premier (mesure toute la pile)
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -121,6 +123,10 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_THROTTLE_RATES": {
+        # Collecte d'événements d'audience (/api/engagement/), par client
+        "engagement": os.getenv("ENGAGEMENT_THROTTLE_RATE", "60/minute"),
+    },
 }
 
 # Simple JWT Configuration
@@ -193,6 +199,8 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Filtres utilisés par les gabarits d'emails sans {% load %}
+            "builtins": ["content.templatetags.content_filters"],
         },
     },
 ]
@@ -221,6 +229,26 @@ else:
     }
 
 
+# Cache
+# Un cache partagé (Redis) est nécessaire en production : il porte les verrous
+# de déduplication des tâches Celery. En local, le cache mémoire suffit.
+CACHE_URL = os.getenv("CACHE_URL", "")
+
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -270,6 +298,12 @@ WHITENOISE_MAX_AGE = 31536000  # 1 year in seconds
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Délégation de l'envoi des fichiers audio locaux au proxy inverse :
+# "x-accel-redirect" (nginx, location interne MEDIA_SENDFILE_PREFIX pointant
+# sur MEDIA_ROOT), "x-sendfile" (Apache/lighttpd) ou "" (servi par Django)
+MEDIA_SENDFILE_BACKEND = os.getenv("MEDIA_SENDFILE_BACKEND", "")
+MEDIA_SENDFILE_PREFIX = os.getenv("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -296,6 +330,16 @@ cloudinary.config(
     secure=True,
 )
 
+# Upload direct vers Cloudinary : durée de validité des paramètres signés
+# (secondes) et URL du webhook de notification (optionnelle)
+CLOUDINARY_DIRECT_UPLOAD_TTL = int(os.getenv("CLOUDINARY_DIRECT_UPLOAD_TTL", "900"))
+CLOUDINARY_NOTIFICATION_URL = os.getenv("CLOUDINARY_NOTIFICATION_URL", "")
+
+# Suppression différée des ressources Cloudinary : délai de regroupement des
+# suppressions (secondes) et nombre de tentatives avant abandon
+CLOUDINARY_DELETION_DELAY = 10
+CLOUDINARY_DELETION_MAX_ATTEMPTS = 5
+
 # Authentication settings
 SITE_ID = int(os.getenv("SITE_ID", "1"))
 AUTHENTICATION_BACKENDS = (
@@ -482,6 +526,63 @@ CELERY_ENABLE_UTC = True
 
 # Celery Beat Settings
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    # Fichiers temporaires abandonnés, anciens logs et sessions expirées
+    "cleanup-temp-files": {
+        "task": "helpers.tasks.cleanup_temp_files",
+        "schedule": 60 * 60 * 24,
+    },
+    # Sauvegarde quotidienne de la base (BACKUP_KEEP dernières conservées)
+    "backup-database": {
+        "task": "helpers.tasks.backup_database",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    # Maintenance ciblée de la base, d'après ses statistiques
+    "optimize-database": {
+        "task": "helpers.tasks.optimize_database",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    # Rattrapage des suppressions Cloudinary en échec ou non planifiées
+    "purge-cloudinary-deletions": {
+        "task": "content.tasks.purge_cloudinary_deletions",
+        "schedule": 60 * 15,
+    },
+    # Filet de sécurité des publications programmées (voir aussi les tâches
+    # ETA planifiées à l'enregistrement, content.tasks.schedule_publication)
+    "publish-scheduled-content": {
+        "task": "helpers.tasks.publish_scheduled_content",
+        "schedule": 60 * 5,
+    },
+    # Agrégats statistiques quotidiens (jour courant et veille)
+    "rollup-daily-stats": {
+        "task": "helpers.tasks.rollup_daily_stats",
+        "schedule": 60 * 60,
+    },
+    "generate-analytics-report": {
+        "task": "helpers.tasks.generate_analytics_report",
+        "schedule": crontab(hour=6, minute=0, day_of_week=1),
+        "kwargs": {"period": "week"},
+    },
+    "generate-monthly-analytics-report": {
+        "task": "helpers.tasks.generate_analytics_report",
+        "schedule": crontab(hour=6, minute=0, day_of_month=1),
+        "kwargs": {"period": "month"},
+    },
+    # Insertion par lots des événements d'audience mis en file dans Redis
+    "flush-engagement-events": {
+        "task": "content.tasks.flush_engagement_events",
+        "schedule": 10,
+    },
+    "compact-engagement-events": {
+        "task": "content.tasks.compact_engagement_events",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    # Diff hebdomadaire Cloudinary/base, sans suppression automatique
+    "reconcile-cloudinary-media": {
+        "task": "content.tasks.reconcile_cloudinary_media",
+        "schedule": 60 * 60 * 24 * 7,
+    },
+}
 
 # Task Routing
 CELERY_TASK_ROUTES = {
@@ -510,6 +611,117 @@ CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_TASK_DEFAULT_RETRY_DELAY = 60
 CELERY_TASK_MAX_RETRIES = 3
 
+# Durée de vie du verrou de déduplication des uploads Cloudinary (secondes)
+CONTENT_UPLOAD_LOCK_TIMEOUT = int(os.getenv("CONTENT_UPLOAD_LOCK_TIMEOUT", "3600"))
+
+# Nombre de processus de rendu des variantes d'images locales (défaut : nombre
+# de CPU). Pool billiard, utilisable aussi depuis les workers Celery prefork.
+IMAGE_VARIANTS_WORKERS = int(os.getenv("IMAGE_VARIANTS_WORKERS", "0")) or None
+
+# Uploads audio reprenables (par morceaux) : taille maximale d'un épisode et
+# taille des blocs recopiés sur disque à chaque lecture du corps de requête
+PODCAST_UPLOAD_MAX_SIZE = int(os.getenv("PODCAST_UPLOAD_MAX_SIZE", str(2 * 1024**3)))
+PODCAST_UPLOAD_CHUNK_SIZE = int(os.getenv("PODCAST_UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+# Décodeur optionnel pour la forme d'onde des formats autres que WAV
+# (vide : ffmpeg trouvé dans le PATH, s'il existe)
+WAVEFORM_FFMPEG = os.getenv("WAVEFORM_FFMPEG", "")
+
+# Publication programmée : échéance maximale d'une tâche ETA (au-delà, le
+# broker Redis pourrait la redistribuer après visibility_timeout) ; les
+# contenus plus lointains sont publiés par la tâche beat
+SCHEDULED_PUBLISH_ETA_HORIZON = int(os.getenv("SCHEDULED_PUBLISH_ETA_HORIZON", "3000"))
+
+# Événements d'audience (content.engagement) : tampon Redis partagé quand le
+# cache est Redis, sinon tampon mémoire par processus (développement)
+ENGAGEMENT_BUFFER = os.getenv(
+    "ENGAGEMENT_BUFFER",
+    "redis" if CACHE_URL.startswith(("redis://", "rediss://")) else "memory",
+)
+ENGAGEMENT_REDIS_URL = os.getenv("ENGAGEMENT_REDIS_URL", CACHE_URL)
+# Taille des lots insérés par content.tasks.flush_engagement_events
+ENGAGEMENT_BATCH_SIZE = int(os.getenv("ENGAGEMENT_BATCH_SIZE", "5000"))
+# Tampon mémoire : remis à Celery dès qu'il atteint cette taille ou cet âge (s)
+ENGAGEMENT_MEMORY_BUFFER_SIZE = int(os.getenv("ENGAGEMENT_MEMORY_BUFFER_SIZE", "500"))
+ENGAGEMENT_MEMORY_BUFFER_AGE = float(os.getenv("ENGAGEMENT_MEMORY_BUFFER_AGE", "10"))
+# Durée (s) pendant laquelle un nouveau j'aime du même utilisateur sur le
+# même contenu est ignoré
+ENGAGEMENT_LIKE_TTL = int(os.getenv("ENGAGEMENT_LIKE_TTL", str(30 * 24 * 3600)))
+# Mois d'événements bruts conservés avant suppression (les agrégats restent)
+ENGAGEMENT_EVENT_RETENTION_MONTHS = int(
+    os.getenv("ENGAGEMENT_EVENT_RETENTION_MONTHS", "3")
+)
+
+# Nettoyage (helpers.janitor) : âge maximal des uploads temporaires et des
+# logs (secondes), quota optionnel de temp_podcasts/ (octets, 0 = aucun) au-delà
+# duquel les fichiers les moins récemment utilisés sont supprimés
+JANITOR_TEMP_MAX_AGE = int(os.getenv("JANITOR_TEMP_MAX_AGE", str(24 * 3600)))
+JANITOR_TEMP_QUOTA_BYTES = int(os.getenv("JANITOR_TEMP_QUOTA_BYTES", "0"))
+JANITOR_LOG_MAX_AGE = int(os.getenv("JANITOR_LOG_MAX_AGE", str(7 * 24 * 3600)))
+JANITOR_WORKERS = int(os.getenv("JANITOR_WORKERS", "8"))
+# Sessions expirées supprimées par requête SQL
+JANITOR_SESSION_CHUNK_SIZE = int(os.getenv("JANITOR_SESSION_CHUNK_SIZE", "1000"))
+
+# Sauvegardes (helpers.backups) : stockage privé, distinct du stockage des
+# médias servi publiquement (même forme qu'une entrée de STORAGES ; par défaut
+# BASE_DIR/backups), dossier dans ce stockage, compression "gzip" ou "zstd"
+# (paquet zstandard à installer), niveau (0 : niveau par défaut du codec),
+# nombre de sauvegardes conservées, pages SQLite copiées par étape de l'API de
+# sauvegarde en ligne, durée du verrou anti-chevauchement
+BACKUP_STORAGE = {
+    "BACKEND": os.getenv(
+        "BACKUP_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"
+    ),
+    "OPTIONS": {
+        "location": os.getenv("BACKUP_STORAGE_ROOT", str(BASE_DIR)),
+        "file_permissions_mode": 0o600,
+        "directory_permissions_mode": 0o700,
+    },
+}
+BACKUP_LOCATION = os.getenv("BACKUP_LOCATION", "backups")
+BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "gzip")
+BACKUP_COMPRESSION_LEVEL = int(os.getenv("BACKUP_COMPRESSION_LEVEL", "0"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_SQLITE_PAGES = int(os.getenv("BACKUP_SQLITE_PAGES", "1024"))
+BACKUP_LOCK_TIMEOUT = int(os.getenv("BACKUP_LOCK_TIMEOUT", str(6 * 3600)))
+
+# Maintenance de la base (helpers.maintenance) : durée maximale d'un passage
+# (secondes), part de lignes mortes déclenchant un VACUUM, part estimée d'un
+# index B-tree gaspillée déclenchant un REINDEX CONCURRENTLY, attente maximale
+# d'un verrou (secondes) avant d'abandonner une opération
+DB_MAINTENANCE_BUDGET = int(os.getenv("DB_MAINTENANCE_BUDGET", "900"))
+DB_MAINTENANCE_DEAD_RATIO = float(os.getenv("DB_MAINTENANCE_DEAD_RATIO", "0.2"))
+DB_MAINTENANCE_INDEX_BLOAT = float(os.getenv("DB_MAINTENANCE_INDEX_BLOAT", "0.3"))
+DB_MAINTENANCE_LOCK_TIMEOUT = float(os.getenv("DB_MAINTENANCE_LOCK_TIMEOUT", "5"))
+
+# Sondes de santé (core.health, vues /health/live et /health/ready) : période
+# de la boucle d'arrière-plan et âge maximal d'un instantané (secondes), délai
+# des sondes réseau, sondes dont l'échec rend le processus indisponible, seuils
+# d'alerte (messages en attente, pourcentages disque, CPU et mémoire)
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+HEALTH_CRITICAL_PROBES = os.getenv("HEALTH_CRITICAL_PROBES", "database,cache").split(",")
+HEALTH_QUEUE_DEPTH_WARNING = int(os.getenv("HEALTH_QUEUE_DEPTH_WARNING", "1000"))
+HEALTH_DISK_WARNING_PERCENT = float(os.getenv("HEALTH_DISK_WARNING_PERCENT", "90"))
+HEALTH_CPU_WARNING_PERCENT = float(os.getenv("HEALTH_CPU_WARNING_PERCENT", "80"))
+HEALTH_MEMORY_WARNING_PERCENT = float(os.getenv("HEALTH_MEMORY_WARNING_PERCENT", "85"))
+
+# Emails d'authentification (authentication.mailer) : file Redis partagée
+# quand le cache est Redis, sinon envoi direct (développement) ; délai avant
+# vidange de la file (secondes) et taille des lots envoyés par connexion SMTP
+EMAIL_QUEUE = os.getenv(
+    "EMAIL_QUEUE",
+    "redis" if CACHE_URL.startswith(("redis://", "rediss://")) else "direct",
+)
+EMAIL_QUEUE_REDIS_URL = os.getenv("EMAIL_QUEUE_REDIS_URL", CACHE_URL)
+EMAIL_QUEUE_DELAY = int(os.getenv("EMAIL_QUEUE_DELAY", "2"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+
+# Nom et URL publique du site, utilisés dans les emails de notification
+SITE_NAME = os.getenv("SITE_NAME", "Modern Blog Platform")
+SITE_URL = os.getenv("SITE_URL", "http://localhost:3000")
+
 # Development Settings
 if DEBUG:
     CELERY_TASK_ALWAYS_EAGER = False
@@ -524,6 +736,19 @@ FLOWER_BASIC_AUTH = os.getenv("FLOWER_BASIC_AUTH", "admin:password")
 FLOWER_PORT = int(os.getenv("FLOWER_PORT", "5555"))
 FLOWER_URL_PREFIX = os.getenv("FLOWER_URL_PREFIX", "")
 
+# ============================================================================
+# METRICS CONFIGURATION (Prometheus)
+# ============================================================================
+
+# Dossier partagé par les workers gunicorn pour agréger les métriques
+# (laisser vide pour un seul processus, ex. runserver)
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+# Fréquence maximale d'écriture de l'instantané de chaque worker (secondes)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# Jeton exigé par /metrics (Authorization: Bearer <token>) ; sans jeton,
+# /metrics n'est servi qu'en mode DEBUG
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # ============================================================================
 # LOGGING CONFIGURATION FOR CELERY
 # ============================================================================
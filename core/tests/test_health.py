@@ -0,0 +1,144 @@
+# core/tests/test_health.py
+import time
+from unittest.mock import patch
+
+from django.test import Client, TestCase, override_settings
+
+from authentication.models import User
+from core import health
+from core.health import HealthMonitor, broker_queues, run_probes
+
+
+class ProbesTestCase(TestCase):
+    """Test the individual probes"""
+
+    def test_database_and_cache_round_trips_are_measured(self):
+        """Test that latencies are real numbers, not labels"""
+        checks = run_probes(["database", "cache", "disk"])
+
+        self.assertEqual(checks["database"]["status"], "ok")
+        self.assertIsInstance(checks["database"]["latency_ms"], float)
+        self.assertEqual(checks["cache"]["status"], "ok")
+        self.assertIsInstance(checks["cache"]["latency_ms"], float)
+        self.assertIn("usage_percent", checks["disk"])
+
+    def test_failing_probe_is_reported(self):
+        """Test that an exception becomes an error result"""
+        with patch.dict(health.PROBES, {"cache": lambda: 1 / 0}):
+            checks = run_probes(["cache"])
+
+        self.assertEqual(checks["cache"]["status"], "error")
+        self.assertIn("division by zero", checks["cache"]["error"])
+
+    @override_settings(CLOUDINARY_CLOUD_NAME="")
+    def test_unconfigured_cloudinary_is_not_contacted(self):
+        """Test that no request is made without a cloud name"""
+        with patch("requests.head") as head:
+            checks = run_probes(["cloudinary"])
+
+        head.assert_not_called()
+        self.assertEqual(checks["cloudinary"], {"status": "ok", "configured": False})
+
+    def test_broker_queues_follow_routes(self):
+        """Test that the default queue and every routed queue are watched"""
+        self.assertEqual(broker_queues(), ["auth", "celery", "content", "helpers"])
+
+
+@override_settings(METRICS_TOKEN="secret")
+@patch.object(HealthMonitor, "ensure_started")
+class HealthEndpointsTestCase(TestCase):
+    """Test /health/live and /health/ready"""
+
+    def setUp(self):
+        # Send the metrics token by default so the probe details are returned
+        self.client = Client(HTTP_AUTHORIZATION="Bearer secret")
+        self.monitor = HealthMonitor(["database", "cache", "disk"])
+        patcher = patch.object(health, "monitor", self.monitor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_live_never_probes(self, ensure_started):
+        """Test that liveness answers without any dependency"""
+        with patch.object(health, "run_probes") as probes:
+            response = self.client.get("/health/live")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "alive"})
+        probes.assert_not_called()
+        ensure_started.assert_called_once()
+
+    def test_ready_serves_the_snapshot(self, ensure_started):
+        """Test that readiness reads the last snapshot without querying"""
+        response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "starting")
+
+        self.monitor.run_once()
+        with self.assertNumQueries(0):
+            response = self.client.get("/health/ready")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(set(body["checks"]), {"database", "cache", "disk"})
+
+    def test_critical_failure_and_degradation(self, ensure_started):
+        """Test that only critical probes make the process unavailable"""
+        failing = {"status": "error", "error": "down"}
+        with patch.dict(health.PROBES, {"disk": lambda: failing}):
+            self.monitor.run_once()
+        response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["degraded"], ["disk"])
+
+        with patch.dict(health.PROBES, {"database": lambda: failing}):
+            self.monitor.run_once()
+        response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["failing"], ["database"])
+
+    def test_anonymous_callers_get_the_summary_only(self, ensure_started):
+        """Test that probe details need the metrics token or a staff user"""
+        self.monitor.run_once()
+
+        response = Client().get("/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"status", "age_seconds", "failing"})
+
+        staff = User.objects.create_user(
+            username="staff", email="staff@example.com", password="password", is_staff=True
+        )
+        client = Client()
+        client.force_login(staff)
+        self.assertIn("checks", client.get("/health/ready").json())
+
+    @override_settings(HEALTH_MAX_AGE=5)
+    def test_stale_snapshot_is_not_ready(self, ensure_started):
+        """Test that a snapshot older than the freshness window fails"""
+        self.monitor.run_once()
+        checked, snapshot = self.monitor._state
+        self.monitor._state = (checked - 6, snapshot)
+
+        response = self.client.get("/health/ready")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "stale")
+
+
+class HealthMonitorThreadTestCase(TestCase):
+    """Test the background probe loop"""
+
+    @override_settings(HEALTH_PROBE_INTERVAL=0.01)
+    def test_loop_starts_once(self):
+        """Test that the loop is started once per process and fills the snapshot"""
+        monitor = HealthMonitor(["disk"])
+
+        monitor.ensure_started()
+        thread = monitor._thread
+        monitor.ensure_started()
+
+        self.assertIs(monitor._thread, thread)
+        deadline = time.monotonic() + 5
+        while monitor._state is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(monitor.readiness()[0])
@@ -0,0 +1,116 @@
+# core/tests/test_metrics.py
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core import metrics
+from core.metrics import MetricsRegistry, RequestStats, merge_snapshots
+
+
+class MetricsRegistryTestCase(TestCase):
+    """Test the in-process metrics registry and Prometheus rendering"""
+
+    def test_counter_and_histogram_rendering(self):
+        """Test that counters and cumulative histogram buckets are rendered"""
+        registry = MetricsRegistry()
+        labels = (("method", "GET"), ("view", "post-list"))
+        registry.inc("django_http_requests_total", labels + (("status", "200"),))
+        registry.observe("django_http_request_duration_seconds", labels, 0.02, (0.01, 0.05))
+        registry.observe("django_http_request_duration_seconds", labels, 0.2, (0.01, 0.05))
+
+        output = metrics.render_prometheus(merge_snapshots([registry.snapshot()]))
+
+        self.assertIn("# TYPE django_http_requests_total counter", output)
+        self.assertIn(
+            'django_http_requests_total{method="GET",view="post-list",status="200"} 1',
+            output,
+        )
+        self.assertIn(
+            'django_http_request_duration_seconds_bucket{method="GET",view="post-list",le="0.01"} 0',
+            output,
+        )
+        self.assertIn(
+            'django_http_request_duration_seconds_bucket{method="GET",view="post-list",le="0.05"} 1',
+            output,
+        )
+        self.assertIn(
+            'django_http_request_duration_seconds_bucket{method="GET",view="post-list",le="+Inf"} 2',
+            output,
+        )
+        self.assertIn(
+            'django_http_request_duration_seconds_count{method="GET",view="post-list"} 2',
+            output,
+        )
+
+    def test_multiprocess_snapshots_are_merged(self):
+        """Test that snapshots written by other workers are aggregated"""
+        labels = (("method", "GET"), ("view", "post-list"))
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_MULTIPROC_DIR=directory
+        ):
+            other = MetricsRegistry()
+            other.inc("django_http_requests_total", labels, 3)
+            with open(os.path.join(directory, "metrics_999999.json"), "w") as fh:
+                json.dump(other.snapshot(), fh)
+
+            registry = MetricsRegistry()
+            registry.inc("django_http_requests_total", labels, 2)
+            collected = registry.collect()
+
+        self.assertEqual(
+            collected["counters"][("django_http_requests_total", labels)], 5
+        )
+
+    def test_cache_hits_and_misses_are_counted(self):
+        """Test that instrumented cache reads update the current request stats"""
+        metrics.instrument_cache_backends()
+        stats = RequestStats()
+        token = metrics.current_request_stats.set(stats)
+        try:
+            cache.set("metrics-test-key", "value")
+            self.assertEqual(cache.get("metrics-test-key"), "value")
+            self.assertIsNone(cache.get("metrics-missing-key"))
+            self.assertEqual(cache.get("metrics-missing-key", "fallback"), "fallback")
+        finally:
+            metrics.current_request_stats.reset(token)
+
+        self.assertEqual(stats.cache_hits, 1)
+        self.assertEqual(stats.cache_misses, 2)
+
+
+class MetricsEndpointTestCase(TestCase):
+    """Test the /metrics endpoint and the instrumentation middleware"""
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_exposes_view_metrics(self):
+        """Test that a request is recorded under its resolved view name"""
+        self.client.get("/api/categories/")
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn('view="category-list"', body)
+        self.assertIn("django_http_db_queries_bucket", body)
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_requires_token(self):
+        """Test that the endpoint is protected when METRICS_TOKEN is set"""
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_endpoint_without_token_is_debug_only(self):
+        """Test that an unset METRICS_TOKEN only opens the endpoint in DEBUG"""
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
@@ -21,6 +21,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic.base import RedirectView
 
+from .views import health_live, health_ready, metrics_view
+
 urlpatterns = [
     path(
         "", RedirectView.as_view(url="/api/", permanent=False), name="index"
@@ -30,6 +32,9 @@ urlpatterns = [
     path("api/auth/", include("authentication.urls")),  # Authentication URLs
     path("api-auth/", include("rest_framework.urls")),
     path("ckeditor5/", include("django_ckeditor_5.urls")),  # CKEditor5 URLs
+    path("metrics", metrics_view, name="metrics"),  # Prometheus
+    path("health/live", health_live, name="health-live"),
+    path("health/ready", health_ready, name="health-ready"),
 ]
 # + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
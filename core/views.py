@@ -0,0 +1,66 @@
+"""
+Vues techniques du projet (observabilité)
+"""
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from . import health, metrics
+
+
+def _has_metrics_token(request):
+    """
+    Vérifie l'en-tête ``Authorization: Bearer <METRICS_TOKEN>``. Sans jeton
+    configuré, l'accès n'est accordé qu'en mode ``DEBUG``.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        return settings.DEBUG
+    provided = request.headers.get("Authorization", "")
+    return constant_time_compare(provided, f"Bearer {token}")
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expose les métriques au format texte Prometheus.
+    Un en-tête ``Authorization: Bearer <METRICS_TOKEN>`` est exigé, sauf en
+    mode ``DEBUG`` quand aucun jeton n'est défini.
+    """
+    if not _has_metrics_token(request):
+        return HttpResponseForbidden()
+
+    body = metrics.render_prometheus(metrics.registry.collect())
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@require_GET
+def health_live(request):
+    """
+    Vivacité : répond tant que le processus traite des requêtes, sans
+    consulter aucune dépendance.
+    """
+    health.monitor.ensure_started()
+    return JsonResponse({"status": "alive"})
+
+
+# Champs de /health/ready visibles sans authentification ; le détail des
+# sondes (files d'attente, disque, erreurs) est réservé au staff et au jeton
+# des métriques
+PUBLIC_READINESS_FIELDS = ("status", "age_seconds", "failing")
+
+
+@require_GET
+def health_ready(request):
+    """
+    Disponibilité : 200 si le dernier instantané des sondes est récent et
+    qu'aucune sonde critique n'échoue, 503 sinon. Ne fait que lire
+    l'instantané calculé en arrière-plan.
+    """
+    health.monitor.ensure_started()
+    ready, body = health.monitor.readiness()
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        body = {key: body[key] for key in PUBLIC_READINESS_FIELDS if key in body}
+    return JsonResponse(body, status=200 if ready else 503)
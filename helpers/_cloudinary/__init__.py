@@ -1,9 +1,10 @@
-from .config import cloudinary_init
+from .config import cloudinary_enabled, cloudinary_init
 from .services import get_cloudinary_image_object, get_cloudinary_video_object
 from .audio_service import CloudinaryAudioService
 from .image_service import CloudinaryImageService
 
 __all__ = [
+    "cloudinary_enabled",
     "cloudinary_init",
     "get_cloudinary_image_object",
     "get_cloudinary_video_object",
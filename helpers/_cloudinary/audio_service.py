@@ -5,11 +5,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Taille des morceaux envoyés par upload_large (mémoire bornée côté worker)
+UPLOAD_LARGE_CHUNK_SIZE = 20 * 1024 * 1024
+
 
 class CloudinaryAudioService:
     @staticmethod
-    def upload_podcast_to_cloudinary(podcast_instance):
-        """Upload le fichier audio d'un podcast vers Cloudinary"""
+    def upload_podcast_to_cloudinary(podcast_instance, raise_errors=False):
+        """
+        Upload le fichier audio d'un podcast vers Cloudinary.
+
+        Les champs sont persistés avec un ``update()`` sur le queryset afin de
+        ne pas redéclencher les signaux ``post_save``. Le public_id est stable,
+        un nouvel essai écrase donc simplement l'upload précédent.
+        """
         if not podcast_instance.audio_file:
             return False
 
@@ -24,26 +33,75 @@ class CloudinaryAudioService:
             )
 
             # Sauvegarder les informations Cloudinary
-            podcast_instance.cloudinary_url = upload_result["secure_url"]
-            podcast_instance.cloudinary_public_id = upload_result["public_id"]
-            podcast_instance.is_processed = True
+            updates = {
+                "cloudinary_url": upload_result["secure_url"],
+                "cloudinary_public_id": upload_result["public_id"],
+                "is_processed": True,
+            }
 
             # Si duration n'est pas définie, utiliser celle de Cloudinary
             if not podcast_instance.duration and "duration" in upload_result:
-                podcast_instance.duration = int(upload_result["duration"])
-
-            podcast_instance.save()
+                updates["duration"] = int(upload_result["duration"])
 
             # Supprimer le fichier local temporaire
-            if default_storage.exists(podcast_instance.audio_file.name):
-                default_storage.delete(podcast_instance.audio_file.name)
-                podcast_instance.audio_file = None
-                podcast_instance.save()
+            audio_name = podcast_instance.audio_file.name
+            if default_storage.exists(audio_name):
+                default_storage.delete(audio_name)
+                updates["audio_file"] = None
+
+            type(podcast_instance).objects.filter(pk=podcast_instance.pk).update(
+                **updates
+            )
+            for field, value in updates.items():
+                setattr(podcast_instance, field, value)
 
             return True
 
         except Exception as e:
             logger.error(f"Erreur lors de l'upload vers Cloudinary: {str(e)}")
+            if raise_errors:
+                raise
+            return False
+
+    @staticmethod
+    def upload_large_podcast_to_cloudinary(
+        podcast_instance, file_path, chunk_size=UPLOAD_LARGE_CHUNK_SIZE, raise_errors=False
+    ):
+        """
+        Upload un fichier audio local par morceaux (``upload_large``).
+
+        Seul un morceau de ``chunk_size`` octets est en mémoire à un instant
+        donné, quelle que soit la taille de l'épisode.
+        """
+        try:
+            upload_result = cloudinary.uploader.upload_large(
+                str(file_path),
+                resource_type="video",  # Utiliser 'video' pour les fichiers audio
+                folder="podcasts/",
+                public_id=f"podcast_{podcast_instance.id}_{podcast_instance.slug}",
+                overwrite=True,
+                chunk_size=chunk_size,
+            )
+
+            updates = {
+                "cloudinary_url": upload_result["secure_url"],
+                "cloudinary_public_id": upload_result["public_id"],
+                "is_processed": True,
+            }
+            if not podcast_instance.duration and "duration" in upload_result:
+                updates["duration"] = int(upload_result["duration"])
+
+            type(podcast_instance).objects.filter(pk=podcast_instance.pk).update(
+                **updates
+            )
+            for field, value in updates.items():
+                setattr(podcast_instance, field, value)
+            return True
+
+        except Exception as e:
+            logger.error(f"Erreur lors de l'upload par morceaux vers Cloudinary: {str(e)}")
+            if raise_errors:
+                raise
             return False
 
     @staticmethod
@@ -12,6 +12,15 @@ def get_cloudinary_config():
     }
 
 
+def cloudinary_enabled():
+    """Indique si les identifiants Cloudinary sont configurés"""
+    return bool(
+        settings.CLOUDINARY_CLOUD_NAME
+        and settings.CLOUDINARY_PUBLIC_API_KEY
+        and settings.CLOUDINARY_SECRET_API_KEY
+    )
+
+
 def cloudinary_init():
     """Initialize Cloudinary configuration"""
     try:
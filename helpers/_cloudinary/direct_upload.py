@@ -0,0 +1,198 @@
+"""
+Upload direct navigateur → Cloudinary.
+
+Le serveur ne reçoit plus les octets des médias : il signe des paramètres
+d'upload à courte durée de vie, le client envoie le fichier directement à
+Cloudinary, puis le ``public_id`` obtenu est rattaché au modèle soit par le
+rappel du client (réponse signée par Cloudinary), soit par la notification
+webhook de Cloudinary.
+"""
+
+import logging
+import time
+
+import cloudinary
+import cloudinary.utils
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from helpers.images import generate_public_id
+
+logger = logging.getLogger(__name__)
+
+# Cibles d'upload : dossier Cloudinary, transformations générées à l'upload
+# (eager) et champs du modèle recevant le public_id
+DIRECT_UPLOAD_TARGETS = {
+    "post_image": {
+        "model": "content.Post",
+        "resource_type": "image",
+        "folder": "posts/original",
+        "eager": [
+            {"width": 1200, "crop": "limit", "quality": "auto"},
+            {"width": 400, "height": 300, "crop": "fill", "quality": "auto"},
+        ],
+        "fields": [
+            "cloudinary_public_id",
+            "cloudinary_image",
+            "cloudinary_image_large",
+            "cloudinary_image_thumbnail",
+        ],
+    },
+    "podcast_cover": {
+        "model": "content.Podcast",
+        "resource_type": "image",
+        "folder": "podcast_covers/original",
+        "eager": [
+            {"width": 800, "crop": "limit", "quality": "auto"},
+            {"width": 400, "height": 400, "crop": "fill", "quality": "auto"},
+        ],
+        "fields": [
+            "cover_image_cloudinary_public_id",
+            "cloudinary_cover_image",
+            "cloudinary_cover_image_large",
+            "cloudinary_cover_image_thumbnail",
+        ],
+    },
+    "podcast_audio": {
+        "model": "content.Podcast",
+        # Cloudinary range les fichiers audio dans le type 'video'
+        "resource_type": "video",
+        "folder": "podcasts",
+        "eager": [],
+        "fields": ["cloudinary_public_id"],
+    },
+}
+
+TICKET_CACHE_PREFIX = "cloudinary:direct-upload:"
+
+
+class DirectUploadError(Exception):
+    """Rappel ou notification d'upload direct invalide"""
+
+
+def _ticket_key(public_id):
+    return f"{TICKET_CACHE_PREFIX}{public_id}"
+
+
+def sign_direct_upload(instance, target, user_id=None):
+    """
+    Retourne les paramètres signés permettant au client d'envoyer un fichier
+    directement à Cloudinary pour ``instance``.
+
+    Un ticket (cible, objet, utilisateur) est conservé en cache pendant
+    ``CLOUDINARY_DIRECT_UPLOAD_TTL`` secondes ; passé ce délai, le rappel de
+    fin d'upload est refusé.
+    """
+    spec = DIRECT_UPLOAD_TARGETS[target]
+    config = cloudinary.config()
+    ttl = settings.CLOUDINARY_DIRECT_UPLOAD_TTL
+    timestamp = int(time.time())
+
+    params = {
+        "timestamp": timestamp,
+        "folder": spec["folder"],
+        "public_id": generate_public_id(instance),
+        "overwrite": "false",
+    }
+    if spec["eager"]:
+        params["eager"] = cloudinary.utils.build_eager(spec["eager"])
+        params["eager_async"] = "true"
+    notification_url = getattr(settings, "CLOUDINARY_NOTIFICATION_URL", "")
+    if notification_url:
+        params["notification_url"] = notification_url
+
+    signature = cloudinary.utils.api_sign_request(params, config.api_secret)
+
+    full_public_id = f"{spec['folder']}/{params['public_id']}"
+    cache.set(
+        _ticket_key(full_public_id),
+        {
+            "target": target,
+            "model": spec["model"],
+            "pk": instance.pk,
+            "user_id": user_id,
+        },
+        ttl,
+    )
+
+    return {
+        "upload_url": cloudinary.utils.cloudinary_api_url(
+            "upload", resource_type=spec["resource_type"]
+        ),
+        "api_key": config.api_key,
+        "signature": signature,
+        "expires_at": timestamp + ttl,
+        "resource_type": spec["resource_type"],
+        **params,
+    }
+
+
+def get_direct_upload_ticket(public_id):
+    """Retourne le ticket émis pour ``public_id`` ou ``None`` s'il a expiré"""
+    return cache.get(_ticket_key(public_id))
+
+
+def verify_upload_response(public_id, version, signature):
+    """Vérifie la signature d'une réponse d'upload transmise par le client"""
+    if not cloudinary.utils.verify_api_response_signature(
+        public_id, version, signature
+    ):
+        raise DirectUploadError("Signature de la réponse Cloudinary invalide.")
+
+
+def verify_notification(body, timestamp, signature):
+    """Vérifie la signature d'une notification webhook Cloudinary"""
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        raise DirectUploadError("En-tête X-Cld-Timestamp invalide.")
+    if not signature or not cloudinary.utils.verify_notification_signature(
+        body, timestamp, signature, valid_for=settings.CLOUDINARY_DIRECT_UPLOAD_TTL
+    ):
+        raise DirectUploadError("Signature de la notification Cloudinary invalide.")
+
+
+def attach_direct_upload(ticket, public_id, version=None, secure_url="", duration=None):
+    """
+    Rattache le ``public_id`` uploadé à l'objet décrit par le ticket.
+
+    L'opération est idempotente : le rappel du client et la notification
+    webhook peuvent arriver tous les deux, dans n'importe quel ordre. Les
+    ressources remplacées sont mises dans la file de suppression Cloudinary.
+    """
+    from content.tasks import enqueue_cloudinary_deletions
+
+    spec = DIRECT_UPLOAD_TARGETS[ticket["target"]]
+    model = apps.get_model(spec["model"])
+
+    updates = {field: public_id for field in spec["fields"]}
+    updates["processing_state"] = "ready"  # ProcessingState.READY
+    if ticket["target"] == "podcast_audio":
+        updates["cloudinary_url"] = secure_url or cloudinary.utils.cloudinary_url(
+            public_id, resource_type="video", version=version, secure=True
+        )[0]
+        updates["is_processed"] = True
+        if duration:
+            updates["duration"] = int(float(duration))
+
+    with transaction.atomic():
+        previous = (
+            model.objects.select_for_update()
+            .filter(pk=ticket["pk"])
+            .values_list(*spec["fields"])
+            .first()
+        )
+        if previous is None:
+            raise DirectUploadError("L'objet associé à cet upload n'existe plus.")
+        updated = model.objects.filter(pk=ticket["pk"]).update(**updates)
+        # Un CloudinaryField renvoie une CloudinaryResource, pas une chaîne
+        replaced = {getattr(value, "public_id", value) for value in previous}
+        enqueue_cloudinary_deletions(
+            (old_id, spec["resource_type"])
+            for old_id in replaced
+            if old_id and old_id != public_id
+        )
+    logger.info(f"Upload direct {public_id} rattaché à {spec['model']} #{ticket['pk']}")
+    return updated
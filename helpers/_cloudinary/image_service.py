@@ -10,8 +10,15 @@ logger = logging.getLogger(__name__)
 
 class CloudinaryImageService:
     @staticmethod
-    def upload_post_image_to_cloudinary(post_instance, image_field="featured_image"):
-        """Upload l'image d'un post vers Cloudinary avec différentes versions"""
+    def upload_post_image_to_cloudinary(
+        post_instance, image_field="featured_image", raise_errors=False
+    ):
+        """
+        Upload l'image d'un post vers Cloudinary avec différentes versions.
+
+        Les champs sont persistés avec un ``update()`` sur le queryset afin de
+        ne pas redéclencher les signaux ``post_save``.
+        """
         if not hasattr(post_instance, image_field) or not getattr(
             post_instance, image_field
         ):
@@ -32,31 +39,33 @@ class CloudinaryImageService:
                 overwrite=True,
             )
 
-            # Sauvegarder l'ID public pour référence
-            post_instance.cloudinary_public_id = upload_result["public_id"]
-
-            # Assigner les URL Cloudinary aux différents champs
-            post_instance.cloudinary_image = upload_result["public_id"]
-
-            # Créer les transformations pour l'image large et thumbnail
-            # (Cloudinary le fait automatiquement grâce aux transformations définies dans le modèle)
-            post_instance.cloudinary_image_large = upload_result["public_id"]
-            post_instance.cloudinary_image_thumbnail = upload_result["public_id"]
-
-            # Sauvegarder les modifications dans la base de données
-            post_instance.save()
+            # Les transformations large et thumbnail sont définies dans le modèle,
+            # les trois champs pointent donc vers le même public_id
+            updates = {
+                "cloudinary_public_id": upload_result["public_id"],
+                "cloudinary_image": upload_result["public_id"],
+                "cloudinary_image_large": upload_result["public_id"],
+                "cloudinary_image_thumbnail": upload_result["public_id"],
+            }
 
             # Supprimer l'image locale temporaire si elle existe encore
-            if default_storage.exists(image_path):
-                default_storage.delete(image_path)
+            if default_storage.exists(image_file.name):
+                default_storage.delete(image_file.name)
+                updates[image_field] = None
                 logger.info(f"Fichier local supprimé : {image_path}")
 
+            type(post_instance).objects.filter(pk=post_instance.pk).update(**updates)
+            for field, value in updates.items():
+                setattr(post_instance, field, value)
+
             return True
 
         except Exception as e:
             logger.error(
                 f"Erreur lors de l'upload de l'image vers Cloudinary: {str(e)}"
             )
+            if raise_errors:
+                raise
             return False
 
     @staticmethod
@@ -102,7 +111,7 @@ class CloudinaryImageService:
 
     @staticmethod
     def upload_podcast_cover_image_to_cloudinary(
-        podcast_instance, image_field="cover_image"
+        podcast_instance, image_field="cover_image", raise_errors=False
     ):
         """Upload l'image de couverture d'un podcast vers Cloudinary avec différentes versions"""
         if not hasattr(podcast_instance, image_field) or not getattr(
@@ -165,14 +174,12 @@ class CloudinaryImageService:
                 "public_id"
             ]
 
-            # Enregistrer les modifications
-            podcast_instance.save(
-                update_fields=[
-                    "cover_image_cloudinary_public_id",
-                    "cloudinary_cover_image",
-                    "cloudinary_cover_image_large",
-                    "cloudinary_cover_image_thumbnail",
-                ]
+            # Enregistrer les modifications sans redéclencher post_save
+            type(podcast_instance).objects.filter(pk=podcast_instance.pk).update(
+                cover_image_cloudinary_public_id=podcast_instance.cover_image_cloudinary_public_id,
+                cloudinary_cover_image=podcast_instance.cloudinary_cover_image,
+                cloudinary_cover_image_large=podcast_instance.cloudinary_cover_image_large,
+                cloudinary_cover_image_thumbnail=podcast_instance.cloudinary_cover_image_thumbnail,
             )
 
             return True
@@ -181,4 +188,6 @@ class CloudinaryImageService:
             logger.error(
                 f"Erreur lors de l'upload de l'image de couverture vers Cloudinary: {str(e)}"
             )
+            if raise_errors:
+                raise
             return False
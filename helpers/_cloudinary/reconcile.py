@@ -0,0 +1,218 @@
+"""
+Rapprochement entre les ressources Cloudinary et la base de données.
+
+Pour chaque dossier, les public_id référencés en base (par toutes les colonnes
+qui peuvent pointer dans ce dossier) sont chargés sous forme
+d'un tableau NumPy trié d'empreintes 64 bits (8 octets par ressource, quelle
+que soit la longueur du public_id), puis le listing de l'API Admin est
+parcouru page par page et comparé au tableau avec ``searchsorted``. Seule une
+page du listing est en mémoire à la fois.
+
+Le diff produit deux types d'entrées :
+
+- ``orphan`` : ressource présente sur Cloudinary sans objet en base ;
+- ``missing`` : objet en base dont la ressource n'existe plus sur Cloudinary.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.apps import apps
+from django.db.models import Q
+
+# Dossier Cloudinary -> (resource_type, modèle, champs pouvant contenir un
+# public_id du dossier). Les couvertures de podcast sont uploadées en trois
+# ressources distinctes (original, large, thumbnail) : chaque colonne compte.
+POST_IMAGE_FIELDS = (
+    "cloudinary_public_id",
+    "cloudinary_image",
+    "cloudinary_image_large",
+    "cloudinary_image_thumbnail",
+)
+PODCAST_COVER_FIELDS = (
+    "cover_image_cloudinary_public_id",
+    "cloudinary_cover_image",
+    "cloudinary_cover_image_large",
+    "cloudinary_cover_image_thumbnail",
+)
+RECONCILE_SOURCES = {
+    "posts/": ("image", "content.Post", POST_IMAGE_FIELDS),
+    "podcast_covers/": ("image", "content.Podcast", PODCAST_COVER_FIELDS),
+    # Cloudinary range les fichiers audio dans le type 'video'
+    "podcasts/": ("video", "content.Podcast", ("cloudinary_public_id",)),
+}
+
+# Maximum autorisé par l'API Admin pour une page de listing
+LISTING_PAGE_SIZE = 500
+
+
+def id_hash(public_id):
+    """Empreinte 64 bits d'un public_id"""
+    return int.from_bytes(
+        hashlib.blake2b(public_id.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def _hash_array(public_ids):
+    return np.fromiter((id_hash(pid) for pid in public_ids), dtype=np.uint64)
+
+
+def _public_id(value):
+    """public_id d'une valeur de colonne (texte ou ``CloudinaryResource``)"""
+    return getattr(value, "public_id", value) or ""
+
+
+def iter_referenced_ids(model_label, fields, prefix):
+    """
+    Parcourt en flux les ``(pk, public_id)`` du dossier ``prefix``.
+
+    Un ``CloudinaryField`` peut stocker ``image/upload/v<version>/<public_id>``
+    : le filtre SQL est large et le préfixe est vérifié après lecture. Un même
+    public_id présent dans plusieurs colonnes d'une ligne n'est produit qu'une
+    fois.
+    """
+    model = apps.get_model(model_label)
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__contains": prefix})
+    rows = model.objects.filter(condition).values_list("pk", *fields)
+    for pk, *values in rows.iterator(chunk_size=5000):
+        public_ids = {_public_id(value) for value in values}
+        for public_id in sorted(public_ids):
+            if public_id.startswith(prefix):
+                yield pk, public_id
+
+
+def load_reference_ids(model_label, fields, prefix):
+    """Tableau trié et dédoublonné des empreintes des public_id en base"""
+    return np.unique(
+        _hash_array(pid for _, pid in iter_referenced_ids(model_label, fields, prefix))
+    )
+
+
+def iter_resource_pages(prefix, resource_type, lister=None, page_size=LISTING_PAGE_SIZE):
+    """
+    Parcourt le listing de l'API Admin pour un dossier, page par page.
+
+    ``lister`` reçoit les mêmes arguments que ``cloudinary.api.resources`` et
+    doit retourner ``{"resources": [...], "next_cursor": ...}`` ; il permet de
+    remplacer l'API par un bouchon local.
+    """
+    if lister is None:
+        import cloudinary.api
+
+        lister = cloudinary.api.resources
+
+    cursor = None
+    while True:
+        params = {
+            "type": "upload",
+            "resource_type": resource_type,
+            "prefix": prefix,
+            "max_results": page_size,
+        }
+        if cursor:
+            params["next_cursor"] = cursor
+        response = lister(**params)
+        resources = response.get("resources", [])
+        if resources:
+            yield resources
+        cursor = response.get("next_cursor")
+        if not cursor:
+            return
+
+
+def _parse_created_at(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def reconcile_media(sources=None, lister=None, page_size=LISTING_PAGE_SIZE, min_age=None):
+    """
+    Compare Cloudinary et la base et génère les entrées du diff.
+
+    Args:
+        sources (dict): Sous-ensemble de ``RECONCILE_SOURCES``
+        lister (callable): Remplaçant de ``cloudinary.api.resources``
+        page_size (int): Taille des pages du listing
+        min_age (timedelta): Les orphelins plus récents sont marqués
+            ``recent`` (upload direct pas encore rattaché, par exemple)
+
+    Yields:
+        dict: ``status``, ``folder``, ``resource_type``, ``public_id`` et,
+        selon le cas, ``created_at``/``recent`` ou ``model``/``pk``
+    """
+    sources = sources or RECONCILE_SOURCES
+    cutoff = datetime.now(timezone.utc) - (min_age or timedelta(0))
+
+    for prefix, (resource_type, model_label, fields) in sources.items():
+        reference = load_reference_ids(model_label, fields, prefix)
+        seen = np.zeros(len(reference), dtype=bool)
+
+        for resources in iter_resource_pages(prefix, resource_type, lister, page_size):
+            hashes = _hash_array(r["public_id"] for r in resources)
+            positions = np.searchsorted(reference, hashes)
+            in_range = positions < len(reference)
+            found = np.zeros(len(hashes), dtype=bool)
+            found[in_range] = reference[positions[in_range]] == hashes[in_range]
+            seen[positions[found]] = True
+
+            for resource in (resources[i] for i in np.flatnonzero(~found)):
+                created_at = _parse_created_at(resource.get("created_at"))
+                yield {
+                    "status": "orphan",
+                    "folder": prefix,
+                    "resource_type": resource_type,
+                    "public_id": resource["public_id"],
+                    "created_at": resource.get("created_at"),
+                    "recent": bool(created_at and created_at > cutoff),
+                }
+
+        if seen.all():
+            continue
+        # Second passage en base, en flux, pour retrouver les objets manquants
+        missing = reference[~seen]
+        for pk, public_id in iter_referenced_ids(model_label, fields, prefix):
+            value = np.uint64(id_hash(public_id))
+            position = np.searchsorted(missing, value)
+            if position < len(missing) and missing[position] == value:
+                yield {
+                    "status": "missing",
+                    "folder": prefix,
+                    "resource_type": resource_type,
+                    "public_id": public_id,
+                    "model": model_label.lower(),
+                    "pk": pk,
+                }
+
+
+def write_reconciliation_report(entries, stream, cleanup=None, batch_size=1000):
+    """
+    Écrit le diff en JSON Lines dans ``stream`` et retourne un résumé.
+
+    ``cleanup`` reçoit des lots de ``(public_id, resource_type)`` pour les
+    orphelins qui ne sont pas récents.
+    """
+    summary = {"orphan": 0, "missing": 0, "recent": 0, "queued": 0}
+    batch = []
+    for entry in entries:
+        stream.write(json.dumps(entry) + "\n")
+        summary[entry["status"]] += 1
+        if entry["status"] != "orphan":
+            continue
+        if entry["recent"]:
+            summary["recent"] += 1
+        elif cleanup is not None:
+            batch.append((entry["public_id"], entry["resource_type"]))
+            if len(batch) >= batch_size:
+                summary["queued"] += cleanup(batch)
+                batch = []
+    if batch:
+        summary["queued"] += cleanup(batch)
+    return summary
@@ -0,0 +1,512 @@
+"""
+Pure-Python audio header probe.
+
+Reads only the container headers (and, for MP3 without a VBR header and
+Ogg, the last few KB of the file) through ``seek()``, so probing a 500 MB
+episode costs a handful of small reads instead of a full decode.
+
+Supported containers: MP3 (Xing/Info, VBRI, CBR frame scan), WAV, Ogg
+(Vorbis and Opus), M4A/MP4 and WebM/Matroska.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+
+HEAD_SIZE = 64 * 1024
+OGG_TAIL_SIZE = 64 * 1024
+
+
+class InvalidAudioError(ValueError):
+    """Raised when a file is not a supported or well-formed audio file"""
+
+
+@dataclass
+class AudioInfo:
+    format: str
+    duration: float
+    bitrate: int
+    sample_rate: int
+    channels: int
+    size: int
+
+
+def probe_audio(source):
+    """
+    Probe an audio file and return an :class:`AudioInfo`.
+
+    Args:
+        source: a filesystem path or a seekable binary file object (e.g. a
+            Django ``File``/``UploadedFile``). File objects are rewound to
+            their initial position afterwards.
+
+    Raises:
+        InvalidAudioError: if the format is unknown or the headers are invalid
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            return _probe_checked(fh)
+
+    position = source.tell()
+    try:
+        source.seek(0)
+        return _probe_checked(source)
+    finally:
+        source.seek(position)
+
+
+def _probe_checked(fh):
+    # Truncated or crafted headers surface as unpacking/indexing errors deep
+    # in the parsers: report them as invalid audio like any other bad header
+    try:
+        return _probe(fh)
+    except (struct.error, IndexError, ZeroDivisionError, OverflowError) as e:
+        raise InvalidAudioError(f"Malformed audio header: {e}") from e
+
+
+def _file_size(fh):
+    fh.seek(0, os.SEEK_END)
+    size = fh.tell()
+    fh.seek(0)
+    return size
+
+
+def _probe(fh):
+    size = _file_size(fh)
+    head = fh.read(16)
+    if len(head) < 12:
+        raise InvalidAudioError("File is too short to be audio")
+
+    if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        info = _probe_wav(fh, size)
+    elif head[:4] == b"OggS":
+        info = _probe_ogg(fh, size)
+    elif head[4:8] == b"ftyp":
+        info = _probe_mp4(fh, size)
+    elif head[:4] == b"\x1a\x45\xdf\xa3":
+        info = _probe_matroska(fh, size)
+    elif head[:3] == b"ID3" or (head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        info = _probe_mp3(fh, size)
+    else:
+        raise InvalidAudioError("Unsupported audio format")
+
+    if info.duration <= 0 or info.sample_rate <= 0 or info.channels <= 0:
+        raise InvalidAudioError(f"Invalid {info.format} stream parameters")
+    if not info.bitrate:
+        info.bitrate = int(size * 8 / info.duration)
+    return info
+
+
+# ----------------------------------------------------------------------
+# MP3
+# ----------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    # (version is MPEG1, layer) -> kbps by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _parse_mp3_header(data, offset):
+    """Return frame parameters for the header at ``offset`` or ``None``"""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "samples": samples,
+        "length": length,
+    }
+
+
+def _probe_mp3(fh, size):
+    fh.seek(0)
+    start = 0
+    header = fh.read(10)
+    if header[:3] == b"ID3":
+        # Syncsafe tag size, plus an optional 10-byte footer
+        tag_size = (
+            (header[6] & 0x7F) << 21
+            | (header[7] & 0x7F) << 14
+            | (header[8] & 0x7F) << 7
+            | (header[9] & 0x7F)
+        )
+        start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    fh.seek(start)
+    data = fh.read(HEAD_SIZE)
+
+    # First header whose successor is also a valid header (avoids false syncs)
+    frame = None
+    offset = 0
+    while offset < len(data) - 4:
+        offset = data.find(b"\xff", offset)
+        if offset < 0:
+            break
+        frame = _parse_mp3_header(data, offset)
+        if frame:
+            following = offset + frame["length"]
+            if following + 4 > len(data) or _parse_mp3_header(data, following):
+                break
+        frame = None
+        offset += 1
+    if frame is None:
+        raise InvalidAudioError("No MPEG audio frame found")
+
+    audio_start = start + offset
+    audio_end = size
+    fh.seek(max(size - 128, 0))
+    if fh.read(3) == b"TAG":
+        audio_end -= 128
+
+    # Xing/Info header sits right after the side information
+    if frame["mpeg1"]:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = offset + 4 + side_info
+    total_frames = None
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 0x01:
+            total_frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+    elif data[offset + 36:offset + 40] == b"VBRI":
+        total_frames = struct.unpack(">I", data[offset + 50:offset + 54])[0]
+
+    if total_frames:
+        duration = total_frames * frame["samples"] / frame["sample_rate"]
+        bitrate = int((audio_end - audio_start) * 8 / duration) if duration else 0
+    else:
+        # Constant bitrate: the stream length gives the duration
+        bitrate = frame["bitrate"]
+        duration = (audio_end - audio_start) * 8 / bitrate
+
+    return AudioInfo(
+        "mp3", duration, bitrate, frame["sample_rate"], frame["channels"], size
+    )
+
+
+# ----------------------------------------------------------------------
+# WAV
+# ----------------------------------------------------------------------
+
+
+def _probe_wav(fh, size):
+    offset = 12
+    fmt = None
+    data_size = None
+    while offset + 8 <= size:
+        fh.seek(offset)
+        chunk = fh.read(8)
+        if len(chunk) < 8:
+            break
+        chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        payload = offset + 8
+        # Chunks are word-aligned; the next one always starts further on
+        offset = payload + chunk_size + (chunk_size & 1)
+        if chunk_id == b"fmt ":
+            if chunk_size < 16:
+                raise InvalidAudioError("WAV fmt chunk is too short")
+            fmt = fh.read(16)
+        elif chunk_id == b"data":
+            # RF64/streamed files may report 0 or 0xFFFFFFFF: use the file size
+            data_size = chunk_size
+            if chunk_size in (0, 0xFFFFFFFF) or payload + chunk_size > size:
+                data_size = size - payload
+            if fmt:
+                break
+
+    if fmt is None or len(fmt) < 16 or data_size is None:
+        raise InvalidAudioError("WAV file without fmt or data chunk")
+
+    _, channels, sample_rate, byte_rate = struct.unpack("<HHII", fmt[:12])
+    if not byte_rate:
+        raise InvalidAudioError("Invalid WAV byte rate")
+    return AudioInfo(
+        "wav", data_size / byte_rate, byte_rate * 8, sample_rate, channels, size
+    )
+
+
+# ----------------------------------------------------------------------
+# Ogg (Vorbis, Opus)
+# ----------------------------------------------------------------------
+
+
+def _probe_ogg(fh, size):
+    fh.seek(0)
+    page = fh.read(HEAD_SIZE)
+    if len(page) < 27:
+        raise InvalidAudioError("Truncated Ogg page header")
+    segments = page[26]
+    packet = page[27 + segments:27 + segments + 64]
+
+    if packet.startswith(b"\x01vorbis"):
+        codec = "vorbis"
+        channels = packet[11]
+        sample_rate, _, nominal = struct.unpack("<IiI", packet[12:24])
+        granule_rate, pre_skip = sample_rate, 0
+        bitrate = nominal if 0 < nominal < 0x80000000 else 0
+    elif packet.startswith(b"OpusHead"):
+        codec = "opus"
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        sample_rate = struct.unpack("<I", packet[12:16])[0] or 48000
+        # Opus granule positions always count 48 kHz samples
+        granule_rate = 48000
+        bitrate = 0
+    else:
+        raise InvalidAudioError("Unsupported Ogg codec")
+
+    fh.seek(max(size - OGG_TAIL_SIZE, 0))
+    tail = fh.read(OGG_TAIL_SIZE)
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail):
+        raise InvalidAudioError("No final Ogg page found")
+    granule = struct.unpack("<q", tail[last + 6:last + 14])[0]
+
+    duration = (granule - pre_skip) / granule_rate
+    return AudioInfo(codec, duration, bitrate, sample_rate, channels, size)
+
+
+# ----------------------------------------------------------------------
+# MP4 / M4A
+# ----------------------------------------------------------------------
+
+
+def _iter_boxes(fh, start, end):
+    """Yield ``(type, payload_start, payload_end)`` for the boxes in a range"""
+    offset = start
+    while offset + 8 <= end:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        box_size, box_type = struct.unpack(">I4s", header)
+        payload = offset + 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", fh.read(8))[0]
+            payload += 8
+        elif box_size == 0:
+            box_size = end - offset
+        if box_size < payload - offset:
+            return
+        yield box_type, payload, min(offset + box_size, end)
+        offset += box_size
+
+
+def _find_box(fh, start, end, path):
+    for box_type, payload, box_end in _iter_boxes(fh, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload, box_end
+            found = _find_box(fh, payload, box_end, path[1:])
+            if found:
+                return found
+    return None
+
+
+def _probe_mp4(fh, size):
+    moov = _find_box(fh, 0, size, [b"moov"])
+    if moov is None:
+        raise InvalidAudioError("MP4 file without moov box")
+
+    mvhd = _find_box(fh, *moov, [b"mvhd"])
+    if mvhd is None:
+        raise InvalidAudioError("MP4 file without mvhd box")
+    fh.seek(mvhd[0])
+    version_flags = fh.read(4)
+    if len(version_flags) < 4:
+        raise InvalidAudioError("Truncated MP4 mvhd box")
+    version = version_flags[0]
+    if version == 1:
+        fh.seek(16, os.SEEK_CUR)
+        timescale, duration = struct.unpack(">IQ", fh.read(12))
+    else:
+        fh.seek(8, os.SEEK_CUR)
+        timescale, duration = struct.unpack(">II", fh.read(8))
+    if not timescale:
+        raise InvalidAudioError("Invalid MP4 timescale")
+
+    sample_rate = channels = 0
+    for box_type, payload, box_end in _iter_boxes(fh, *moov):
+        if box_type != b"trak":
+            continue
+        stsd = _find_box(fh, payload, box_end, [b"mdia", b"minf", b"stbl", b"stsd"])
+        if stsd is None:
+            continue
+        # Full box header + entry count, then the first sample entry
+        fh.seek(stsd[0] + 8)
+        entry = fh.read(36)
+        if len(entry) == 36 and entry[4:8] in (b"mp4a", b"alac", b"Opus", b"fLaC", b"ac-3"):
+            channels = struct.unpack(">H", entry[24:26])[0]
+            sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+            break
+
+    return AudioInfo("m4a", duration / timescale, 0, sample_rate, channels, size)
+
+
+# ----------------------------------------------------------------------
+# WebM / Matroska
+# ----------------------------------------------------------------------
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TRACKS = 0x1654AE6B
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_AUDIO = 0xE1
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_SAMPLING_FREQUENCY = 0xB5
+_EBML_CHANNELS = 0x9F
+_EBML_UNKNOWN_SIZE = -1
+
+
+def _read_vint(fh, keep_marker):
+    first = fh.read(1)
+    if not first:
+        return None, 0
+    value = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not value & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise InvalidAudioError("Invalid EBML variable-length integer")
+    if not keep_marker:
+        value &= mask - 1
+    all_ones = value == mask - 1
+    for byte in fh.read(length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if not keep_marker and all_ones:
+        return _EBML_UNKNOWN_SIZE, length
+    return value, length
+
+
+def _iter_elements(fh, start, end):
+    offset = start
+    while end is None or offset < end:
+        fh.seek(offset)
+        element_id, id_length = _read_vint(fh, keep_marker=True)
+        if element_id is None:
+            return
+        element_size, size_length = _read_vint(fh, keep_marker=False)
+        if element_size is None:
+            return
+        payload = offset + id_length + size_length
+        yield element_id, payload, element_size
+        if element_size == _EBML_UNKNOWN_SIZE:
+            return
+        offset = payload + element_size
+
+
+def _read_ebml_number(fh, payload, length, is_float=False):
+    if not 0 < length <= 8:
+        raise InvalidAudioError("Invalid EBML number size")
+    fh.seek(payload)
+    data = fh.read(length)
+    if is_float:
+        return struct.unpack(">f" if length == 4 else ">d", data)[0]
+    return int.from_bytes(data, "big")
+
+
+def _probe_matroska(fh, size):
+    timecode_scale = 1_000_000
+    duration = None
+    sample_rate = channels = 0
+
+    segment = None
+    for element_id, payload, element_size in _iter_elements(fh, 0, size):
+        if element_id == _EBML_SEGMENT:
+            segment = payload, element_size
+            break
+    if segment is None:
+        raise InvalidAudioError("Matroska file without segment")
+
+    payload, segment_size = segment
+    segment_end = size if segment_size == _EBML_UNKNOWN_SIZE else payload + segment_size
+    for element_id, child, child_size in _iter_elements(fh, payload, segment_end):
+        if element_id == _EBML_CLUSTER or child_size == _EBML_UNKNOWN_SIZE:
+            # Media data starts: every header we need has been read
+            break
+        if element_id == _EBML_INFO:
+            for info_id, value, value_size in _iter_elements(fh, child, child + child_size):
+                if info_id == _EBML_TIMECODE_SCALE:
+                    timecode_scale = _read_ebml_number(fh, value, value_size)
+                elif info_id == _EBML_DURATION:
+                    duration = _read_ebml_number(fh, value, value_size, is_float=True)
+        elif element_id == _EBML_TRACKS and not sample_rate:
+            for entry_id, entry, entry_size in _iter_elements(fh, child, child + child_size):
+                if entry_id != _EBML_TRACK_ENTRY:
+                    continue
+                for track_id, value, value_size in _iter_elements(fh, entry, entry + entry_size):
+                    if track_id != _EBML_AUDIO:
+                        continue
+                    for audio_id, field, field_size in _iter_elements(
+                        fh, value, value + value_size
+                    ):
+                        if audio_id == _EBML_SAMPLING_FREQUENCY:
+                            sample_rate = int(
+                                _read_ebml_number(fh, field, field_size, is_float=True)
+                            )
+                        elif audio_id == _EBML_CHANNELS:
+                            channels = _read_ebml_number(fh, field, field_size)
+                    channels = channels or 1
+                if sample_rate:
+                    break
+
+    if duration is None:
+        raise InvalidAudioError("Matroska file without duration")
+    return AudioInfo(
+        "webm", duration * timecode_scale / 1e9, 0, sample_rate, channels, size
+    )
+
+
+def validate_audio_file(value):
+    """
+    Model field validator rejecting files that are not probeable audio.
+
+    Files already saved to storage are not probed again.
+    """
+    if not value or getattr(value, "_committed", False):
+        return
+    try:
+        probe_audio(value)
+    except InvalidAudioError as e:
+        raise ValidationError(f"Fichier audio invalide : {e}")
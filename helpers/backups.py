@@ -0,0 +1,337 @@
+"""
+Streaming database backups.
+
+A dump source yields the database in chunks: ``pg_dump -Fc`` read from its
+stdout pipe, or a copy made with the SQLite online backup API a few pages at
+a time (safe while the site keeps writing). Each chunk is compressed (zstd
+when the optional ``zstandard`` package is installed, gzip otherwise) and
+hashed on the fly into a local spool file, which is then saved to the
+storage in chunks. Neither the dump nor ``pg_dump``'s log is ever held in
+memory: stderr goes to a temporary file and only its tail is reported.
+
+Next to each backup ``<name>`` the storage holds ``<name>.sha256``
+(``sha256sum -c`` format) and ``manifest.json`` lists the backups kept.
+
+Backups hold password hashes and tokens: they go to a dedicated storage
+(``BACKUP_STORAGE``, a private directory outside MEDIA_ROOT by default),
+never to the public media storage.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_NAME = "manifest.json"
+# Bytes of pg_dump's stderr quoted in the error of a failed dump
+STDERR_TAIL = 4096
+EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_storage():
+    """Storage configured by ``BACKUP_STORAGE`` (shaped like a ``STORAGES`` entry)"""
+    config = settings.BACKUP_STORAGE
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+@dataclass
+class BackupInfo:
+    name: str
+    vendor: str
+    created_at: str
+    compression: str
+    size: int  # compressed bytes
+    raw_size: int
+    sha256: str
+    seconds: float
+
+
+class _HashingWriter:
+    """File wrapper that hashes and counts what the compressor writes"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def resolve_compression(codec):
+    """``zstd`` when available, ``gzip`` otherwise"""
+    if codec == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.warning("zstandard not installed, compressing backups with gzip")
+            return "gzip"
+    elif codec != "gzip":
+        raise BackupError(f"Unsupported backup compression: {codec}")
+    return codec
+
+
+def _compressor(codec, fileobj, level=None):
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level or 3, threads=-1).stream_writer(
+            fileobj, closefd=False
+        )
+    return gzip.GzipFile(
+        fileobj=fileobj, mode="wb", compresslevel=level or 6, mtime=0
+    )
+
+
+def pg_dump_command(settings_dict):
+    """``pg_dump`` arguments and environment for a Django database alias"""
+    command = ["pg_dump", "--format=custom", "--compress=0", "--no-password"]
+    if settings_dict.get("HOST"):
+        command.append(f"--host={settings_dict['HOST']}")
+    if settings_dict.get("PORT"):
+        command.append(f"--port={settings_dict['PORT']}")
+    if settings_dict.get("USER"):
+        command.append(f"--username={settings_dict['USER']}")
+    command.append(f"--dbname={settings_dict['NAME']}")
+
+    env = os.environ.copy()
+    if settings_dict.get("PASSWORD"):
+        env["PGPASSWORD"] = settings_dict["PASSWORD"]
+    return command, env
+
+
+def stream_process(command, env=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the stdout of ``command`` in chunks. stderr is spooled to a
+    temporary file; a non-zero exit raises ``BackupError`` with its tail.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=stderr, env=env
+        )
+        try:
+            while True:
+                chunk = process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            # Also reached when the consumer gives up: pg_dump gets SIGPIPE
+            process.stdout.close()
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        if process.returncode:
+            stderr.seek(max(0, stderr.tell() - STDERR_TAIL))
+            tail = stderr.read().decode(errors="replace").strip()
+            raise BackupError(f"{command[0]} exited with {process.returncode}: {tail}")
+
+
+def stream_sqlite(db_connection, pages=1024, chunk_size=CHUNK_SIZE):
+    """
+    Yield a consistent copy of a SQLite database in chunks, taken with the
+    online backup API ``pages`` pages at a time into a temporary file.
+    """
+    if db_connection.in_atomic_block:
+        # The backup would wait forever for the connection's own write lock
+        raise BackupError("SQLite backups cannot run inside a transaction")
+    db_connection.ensure_connection()
+    source = db_connection.connection
+    temp_dir = getattr(settings, "FILE_UPLOAD_TEMP_DIR", None)
+    handle, path = tempfile.mkstemp(suffix=".sqlite3", dir=temp_dir)
+    os.close(handle)
+    try:
+        import sqlite3
+
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+def dump_source(db_connection=None):
+    """
+    Dump stream of the database.
+
+    Returns:
+        tuple: ``(vendor, extension, chunk iterator)``
+    """
+    db_connection = db_connection or connection
+    if db_connection.vendor == "postgresql":
+        command, env = pg_dump_command(db_connection.settings_dict)
+        return "postgres", "dump", stream_process(command, env)
+    if db_connection.vendor == "sqlite":
+        pages = getattr(settings, "BACKUP_SQLITE_PAGES", 1024)
+        return "sqlite", "sqlite3", stream_sqlite(db_connection, pages)
+    raise BackupError(f"Unsupported database engine: {db_connection.vendor}")
+
+
+def write_backup(chunks, storage, name, codec, level=None):
+    """
+    Compress ``chunks`` into a local spool file, then save it as ``name``.
+
+    Returns:
+        tuple: ``(compressed size, raw size, sha256)``
+    """
+    temp_dir = getattr(settings, "FILE_UPLOAD_TEMP_DIR", None)
+    with tempfile.TemporaryFile(dir=temp_dir) as spool:
+        writer = _HashingWriter(spool)
+        raw_size = 0
+        with _compressor(codec, writer, level) as compressor:
+            for chunk in chunks:
+                raw_size += len(chunk)
+                compressor.write(chunk)
+        spool.seek(0)
+        saved = storage.save(name, File(spool, name=os.path.basename(name)))
+    if saved != name:
+        raise BackupError(f"Backup saved under an unexpected name: {saved}")
+    return writer.size, raw_size, writer.sha256.hexdigest()
+
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def list_backups(storage, location):
+    """Backup names in ``location``, newest first"""
+    try:
+        files = storage.listdir(location)[1]
+    except FileNotFoundError:
+        return []
+    names = [
+        f"{location}/{name}"
+        for name in files
+        if name.startswith("backup_") and not name.endswith(".sha256")
+    ]
+    # backup_<YYYYmmdd_HHMMSS>_<vendor>...: the name sorts by date
+    return sorted(names, reverse=True)
+
+
+def read_manifest(storage, location):
+    name = f"{location}/{MANIFEST_NAME}"
+    if not storage.exists(name):
+        return []
+    with storage.open(name) as fh:
+        return json.load(fh)["backups"]
+
+
+def prune_backups(storage, location, keep, added=None):
+    """
+    Delete all but the ``keep`` newest backups with their checksum files,
+    and rewrite the manifest (with the ``added`` entry, if any).
+
+    Returns:
+        list: Names of the deleted backups
+    """
+    names = list_backups(storage, location)
+    removed = []
+    for name in names[keep:]:
+        for path in (name, f"{name}.sha256"):
+            try:
+                storage.delete(path)
+            except OSError as e:
+                logger.warning(f"Could not remove old backup {path}: {e}")
+        removed.append(name)
+
+    kept = set(names[:keep])
+    entries = read_manifest(storage, location)
+    if added:
+        entries = [e for e in entries if e["name"] != added["name"]] + [added]
+    entries = [e for e in entries if e["name"] in kept]
+    entries.sort(key=lambda e: e["name"], reverse=True)
+    payload = {"updated_at": timezone.now().isoformat(), "backups": entries}
+    _replace(
+        storage,
+        f"{location}/{MANIFEST_NAME}",
+        json.dumps(payload, indent=2).encode(),
+    )
+    return removed
+
+
+def create_backup(storage, location="backups", codec="gzip", keep=7, level=None):
+    """
+    Dump the default database into ``storage``, record it in the manifest
+    and apply the retention.
+
+    Returns:
+        tuple: ``(BackupInfo, names of the deleted backups)``
+    """
+    started = time.monotonic()
+    codec = resolve_compression(codec)
+    created_at = timezone.now()
+    vendor, extension, chunks = dump_source()
+    name = (
+        f"{location}/backup_{created_at:%Y%m%d_%H%M%S}_{vendor}"
+        f".{extension}.{EXTENSIONS[codec]}"
+    )
+
+    try:
+        size, raw_size, sha256 = write_backup(chunks, storage, name, codec, level)
+    except Exception:
+        if storage.exists(name):
+            storage.delete(name)
+        raise
+    _replace(
+        storage, f"{name}.sha256", f"{sha256}  {os.path.basename(name)}\n".encode()
+    )
+
+    info = BackupInfo(
+        name=name,
+        vendor=vendor,
+        created_at=created_at.isoformat(),
+        compression=codec,
+        size=size,
+        raw_size=raw_size,
+        sha256=sha256,
+        seconds=round(time.monotonic() - started, 3),
+    )
+    return info, prune_backups(storage, location, keep, added=asdict(info))
+
+
+def verify_backup(storage, name):
+    """Whether the stored backup still matches its checksum file"""
+    with storage.open(f"{name}.sha256") as fh:
+        expected = fh.read().decode().split()[0]
+    digest = hashlib.sha256()
+    with storage.open(name) as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest() == expected
@@ -1,17 +1,210 @@
-import requests
+"""
+Streaming HTTP downloader.
+
+Responses are streamed to ``<name>.part`` next to the destination and moved
+into place with an atomic rename once complete (and verified, when a
+checksum is given), so readers never see a half-written file. An existing
+``.part`` file is resumed with an HTTP ``Range`` request, and so is a
+response cut off mid-stream: the bytes already received stay in the ``.part``
+file and the next attempt continues from there. All downloads share
+one pooled ``requests.Session`` so connections are kept alive between calls.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def download_to_local(url:str, out_path:Path, parent_mkdir:bool=True):
-    if not isinstance(out_path, Path):
-        raise ValueError(f"{out_path} must be a valid pathlib.Path object")
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 64 * 1024
+POOL_SIZE = 16
+TIMEOUT = (5, 30)  # connect, read
+
+# Errors worth another attempt; ChunkedEncodingError is what ``iter_content``
+# raises when the connection drops before the body is complete
+RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """Download failed or the downloaded file did not match its checksum"""
+
+
+def get_session():
+    """Shared session: keep-alive pool and retries on connection/5xx errors"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_SIZE,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=Retry(
+                        total=3,
+                        backoff_factor=0.5,
+                        status_forcelist=(502, 503, 504),
+                        allowed_methods=("GET",),
+                    ),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _hash_file(path, algorithm):
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest
+
+
+def _part_size(part_path):
+    return part_path.stat().st_size if part_path.exists() else 0
+
+
+def _fetch(url, part_path, algorithm, timeout):
+    """
+    Stream ``url`` into ``part_path``, resuming from its current size.
+
+    Returns:
+        hashlib object over the whole file, or None without a checksum
+    """
+    offset = _part_size(part_path)
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with get_session().get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if offset and response.status_code == 416:
+            # The partial file already holds the whole resource
+            return _hash_file(part_path, algorithm) if algorithm else None
+        response.raise_for_status()
+
+        resumed = offset and response.status_code == 206
+        if resumed and not response.headers.get("Content-Range", "").startswith(
+            f"bytes {offset}-"
+        ):
+            raise DownloadError(f"Unexpected Content-Range for {url}")
+        if resumed and algorithm:
+            digest = _hash_file(part_path, algorithm)
+        else:
+            digest = hashlib.new(algorithm) if algorithm else None
+
+        # A 200 response to a Range request means the server sent everything
+        with open(part_path, "ab" if resumed else "wb") as fh:
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    fh.write(chunk)
+                    if digest:
+                        digest.update(chunk)
+            finally:
+                # Keep what arrived before a dropped connection for the resume
+                fh.flush()
+                os.fsync(fh.fileno())
+    return digest
+
+
+def download(
+    url,
+    out_path,
+    checksum=None,
+    algorithm="sha256",
+    resume=True,
+    attempts=3,
+    timeout=TIMEOUT,
+    parent_mkdir=True,
+):
+    """
+    Download ``url`` to ``out_path`` atomically.
+
+    Args:
+        url (str): Source URL
+        out_path (Path): Destination file
+        checksum (str): Expected hex digest; the file is discarded on mismatch
+        algorithm (str): hashlib algorithm for ``checksum``
+        resume (bool): Continue an existing ``.part`` file with a Range request
+        attempts (int): Consecutive tries without progress, each resuming
+            where the previous one stopped
+        timeout (tuple): ``(connect, read)`` timeouts in seconds
+        parent_mkdir (bool): Create missing parent directories
+
+    Returns:
+        Path: ``out_path``
+
+    Raises:
+        DownloadError: On HTTP errors or checksum mismatch
+    """
+    out_path = Path(out_path)
     if parent_mkdir:
         out_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = out_path.with_name(out_path.name + ".part")
+    if not resume and part_path.exists():
+        part_path.unlink()
+
+    failures = 0
+    while True:
+        offset = _part_size(part_path)
+        try:
+            digest = _fetch(url, part_path, algorithm if checksum else None, timeout)
+            break
+        except RETRYABLE_ERRORS as e:
+            # An attempt that received more bytes does not count as a failure
+            failures = 0 if _part_size(part_path) > offset else failures + 1
+            if failures >= attempts:
+                raise DownloadError(f"Failed to download {url}: {e}") from e
+        except requests.RequestException as e:
+            raise DownloadError(f"Failed to download {url}: {e}") from e
+
+    if checksum and digest.hexdigest() != checksum.lower():
+        part_path.unlink(missing_ok=True)
+        raise DownloadError(f"Checksum mismatch for {url}")
+
+    os.replace(part_path, out_path)
+    return out_path
+
+
+def download_many(jobs, max_workers=8, **kwargs):
+    """
+    Download several files concurrently on a bounded thread pool.
+
+    Args:
+        jobs (iterable): ``(url, out_path)`` tuples
+        max_workers (int): Concurrent downloads (at most ``POOL_SIZE`` reuse
+            pooled connections)
+        **kwargs: Passed to ``download``
+
+    Returns:
+        list: ``out_path`` or the raised exception, in job order
+    """
+
+    def run(job):
+        url, out_path = job
+        try:
+            return download(url, out_path, **kwargs)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, jobs))
+
+
+def download_to_local(url: str, out_path: Path, parent_mkdir: bool = True, checksum=None):
+    if not isinstance(out_path, Path):
+        raise ValueError(f"{out_path} must be a valid pathlib.Path object")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        # Write the file out in binary mode to prevent any newline conversions
-        out_path.write_bytes(response.content)
+        download(url, out_path, checksum=checksum, parent_mkdir=parent_mkdir)
         return True
-    except requests.RequestException as e:
-        print(f'Failed to download {url}: {e}')
-        return False
\ No newline at end of file
+    except DownloadError as e:
+        print(e)
+        return False
@@ -0,0 +1,230 @@
+"""
+Local image variant pipeline.
+
+Used when images are not served by Cloudinary: every uploaded image is
+downscaled once into a few display sizes, each encoded as WebP and JPEG, and
+written to ``default_storage`` under a content-hash name (so variants can be
+cached forever by browsers and CDNs).
+
+Rendering is CPU bound and runs in a ``billiard`` process pool (Celery's
+fork of ``multiprocessing``), which unlike ``ProcessPoolExecutor`` may be
+started from the daemonic children of Celery's prefork pool. JPEG sources
+are decoded at reduced scale with ``Image.draft`` and other sources are
+shrunk with ``Image.reduce`` before the final high-quality resize.
+"""
+
+import hashlib
+import io
+import logging
+import os
+
+from billiard.pool import Pool
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> (width, height, crop). With crop=False the image is only
+# bounded by the box; with crop=True it is centre-cropped to fill it.
+VARIANT_PROFILES = {
+    "content.post": {
+        "large": (1200, 1200, False),
+        "thumbnail": (400, 300, True),
+    },
+    "content.podcast": {
+        "large": (800, 800, False),
+        "thumbnail": (400, 400, True),
+    },
+    "content.video": {
+        "large": (1280, 720, False),
+        "thumbnail": (400, 225, True),
+    },
+    "authentication.user": {
+        "avatar": (256, 256, True),
+        "thumbnail": (64, 64, True),
+    },
+}
+
+# Image field holding the uploaded source, per model
+VARIANT_SOURCE_FIELDS = {
+    "content.post": "featured_image",
+    "content.podcast": "cover_image",
+    "content.video": "thumbnail",
+    "authentication.user": "avatar",
+}
+
+FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+VARIANTS_DIR = "variants"
+
+
+def _downscale(image, width, height, crop):
+    """Resize ``image`` to the target box, shrinking cheaply first"""
+    if crop:
+        scale = max(width / image.width, height / image.height)
+    else:
+        scale = min(width / image.width, height / image.height)
+    if scale >= 1:
+        return ImageOps.fit(image, (width, height)) if crop else image.copy()
+
+    # Integer box reduction first, then a single Lanczos pass
+    factor = int(1 / scale) // 2
+    if factor >= 2:
+        image = image.reduce(factor)
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def render_variants(data, profile):
+    """
+    Render every variant of ``profile`` for one source image.
+
+    Runs in a worker process: takes and returns plain bytes so nothing but
+    the encoded images crosses the process boundary.
+
+    Returns:
+        list: ``(variant, format_key, encoded_bytes)`` tuples
+    """
+    image = Image.open(io.BytesIO(data))
+    largest = max(max(width, height) for width, height, _ in profile.values())
+    # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale
+    image.draft("RGB", (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    rendered = []
+    for variant, (width, height, crop) in profile.items():
+        resized = _downscale(image, width, height, crop)
+        for format_key, pil_format, options in FORMATS:
+            frame = resized
+            if pil_format == "JPEG" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            buffer = io.BytesIO()
+            frame.save(buffer, pil_format, **options)
+            rendered.append((variant, format_key, buffer.getvalue()))
+    return rendered
+
+
+def store_variants(source_name, rendered):
+    """
+    Write rendered variants to ``default_storage`` under content-hash names.
+
+    Returns:
+        dict: ``{"source": name, variant: {format_key: storage_name}}``
+    """
+    stem = os.path.splitext(os.path.basename(source_name))[0][:50]
+    variants = {"source": source_name}
+    for variant, format_key, data in rendered:
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        extension = "jpg" if format_key == "jpeg" else format_key
+        name = f"{VARIANTS_DIR}/{digest[:2]}/{stem}-{variant}-{digest}.{extension}"
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(data))
+        variants.setdefault(variant, {})[format_key] = name
+    return variants
+
+
+def render_all(jobs, max_workers=None):
+    """
+    Render the variants of several images, in a process pool when there is
+    more than one image and more than one worker.
+
+    Args:
+        jobs (list): ``(source_name, source_bytes, profile)`` tuples
+        max_workers (int): Process pool size (defaults to the CPU count)
+
+    Returns:
+        list: ``render_variants`` output, or the exception raised, per job
+    """
+    processes = min(len(jobs), max_workers or os.cpu_count() or 1)
+    outcomes = []
+    if processes <= 1:
+        for _, data, profile in jobs:
+            try:
+                outcomes.append(render_variants(data, profile))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    with Pool(processes=processes) as pool:
+        pending = [
+            pool.apply_async(render_variants, (data, profile))
+            for _, data, profile in jobs
+        ]
+        for result in pending:
+            try:
+                outcomes.append(result.get())
+            except Exception as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def generate_variants(jobs, max_workers=None):
+    """
+    Render and store variants for several images.
+
+    Args:
+        jobs (list): ``(source_name, source_bytes, profile)`` tuples
+        max_workers (int): Process pool size (``IMAGE_VARIANTS_WORKERS``)
+
+    Returns:
+        list: One variants dict (see ``store_variants``) or ``None`` per job
+    """
+    if not jobs:
+        return []
+    max_workers = max_workers or getattr(settings, "IMAGE_VARIANTS_WORKERS", None)
+    outcomes = render_all(jobs, max_workers)
+
+    results = []
+    for (source_name, _, _), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Could not render variants for {source_name}: {outcome}")
+            results.append(None)
+        else:
+            results.append(store_variants(source_name, outcome))
+    return results
+
+
+def variant_urls(variants, names, format_key="webp"):
+    """
+    Map variant names to storage URLs.
+
+    Args:
+        variants (dict): Stored variants dict
+        names (iterable): Variant names to resolve
+        format_key (str): ``webp`` or ``jpeg``
+
+    Returns:
+        dict: ``{variant: url}`` for the variants that exist
+    """
+    urls = {}
+    for name in names:
+        stored = (variants or {}).get(name, {}).get(format_key)
+        if stored:
+            urls[name] = default_storage.url(stored)
+    return urls
+
+
+def schedule_image_variants(instance):
+    """
+    Queue variant generation for ``instance`` after the transaction commits,
+    unless variants already exist for its current source file.
+    """
+    from .tasks import generate_image_variants
+
+    label = instance._meta.label_lower
+    field_file = getattr(instance, VARIANT_SOURCE_FIELDS[label])
+    if not field_file or (instance.image_variants or {}).get("source") == field_file.name:
+        return False
+    transaction.on_commit(lambda: generate_image_variants.delay(label, [instance.pk]))
+    return True
@@ -5,13 +5,95 @@ import cloudinary.uploader
 import cloudinary.api
 from PIL import Image
 import io
+import numpy as np
 import requests
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 
 
+# Local memo in front of the RemoteImage table (source URL -> public_id)
+_public_id_memo = {}
+PUBLIC_ID_MEMO_SIZE = 10000
+
+SRCSET_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Longest side of the downsampled image used for colour analysis
+PALETTE_SAMPLE_SIZE = 64
+
+
+def _transformation(width, height, quality):
+    return {"width": width, "height": height, "crop": "fill", "quality": quality}
+
+
 class ImageProcessor:
     """Image processing utilities for content optimization"""
 
+    @staticmethod
+    def get_public_id(image_url, transformations=()):
+        """
+        Return the Cloudinary public_id for an external image URL.
+
+        The source image is uploaded at most once: the mapping is kept in the
+        ``RemoteImage`` table (and memoized in-process). On first upload every
+        requested size is generated as an eager transformation in the same
+        request, so later URLs can be built locally without network calls.
+
+        Args:
+            image_url (str): Source image URL
+            transformations (iterable): Transformations to generate eagerly
+
+        Returns:
+            str: Cloudinary public_id
+        """
+        from .models import RemoteImage
+
+        public_id = _public_id_memo.get(image_url)
+        if public_id:
+            return public_id
+
+        url_hash = RemoteImage.hash_url(image_url)
+        remote = RemoteImage.objects.filter(url_hash=url_hash).first()
+        if remote is None:
+            result = cloudinary.uploader.upload(
+                image_url,
+                folder="remote",
+                public_id=url_hash[:32],
+                overwrite=False,
+                eager=list(transformations) or None,
+            )
+            remote, _ = RemoteImage.objects.get_or_create(
+                url_hash=url_hash,
+                defaults={"source_url": image_url, "public_id": result["public_id"]},
+            )
+
+        if len(_public_id_memo) >= PUBLIC_ID_MEMO_SIZE:
+            _public_id_memo.clear()
+        _public_id_memo[image_url] = remote.public_id
+        return remote.public_id
+
+    @staticmethod
+    def build_url(public_id, width, height, quality):
+        """Build a transformed delivery URL locally (no network call)"""
+        return cloudinary.CloudinaryImage(public_id).build_url(
+            **_transformation(width, height, quality), secure=True
+        )
+
+    @staticmethod
+    def _build_urls(image_url, sizes):
+        """
+        Build URLs for several ``(width, height, quality)`` sizes with at most
+        one upload of the source image.
+        """
+        transformations = [_transformation(*size) for size in sizes]
+        if "cloudinary.com" in image_url:
+            # Already a Cloudinary URL, apply transformations
+            return [
+                cloudinary.CloudinaryImage(image_url).build_url(**transformation)
+                for transformation in transformations
+            ]
+        public_id = ImageProcessor.get_public_id(image_url, transformations)
+        return [ImageProcessor.build_url(public_id, *size) for size in sizes]
+
     @staticmethod
     def optimize_image_for_web(image_url, width=800, height=600, quality=85):
         """
@@ -27,31 +109,7 @@ class ImageProcessor:
             str: Optimized image URL
         """
         try:
-            if "cloudinary.com" in image_url:
-                # Already a Cloudinary URL, apply transformations
-                transformed_url = cloudinary.CloudinaryImage(image_url).build_url(
-                    width=width,
-                    height=height,
-                    crop="fill",
-                    quality=quality,
-                    format="auto",
-                    fetch_format="auto",
-                )
-                return transformed_url
-            else:
-                # External URL, upload to Cloudinary and optimize
-                result = cloudinary.uploader.upload(
-                    image_url,
-                    transformation={
-                        "width": width,
-                        "height": height,
-                        "crop": "fill",
-                        "quality": quality,
-                        "format": "auto",
-                        "fetch_format": "auto",
-                    },
-                )
-                return result.get("secure_url", image_url)
+            return ImageProcessor._build_urls(image_url, [(width, height, quality)])[0]
         except Exception as e:
             print(f"Error optimizing image: {e}")
             return image_url
@@ -71,20 +129,17 @@ class ImageProcessor:
         if sizes is None:
             sizes = [(150, 150), (300, 300), (600, 400), (1200, 800)]
 
-        thumbnails = {}
-
-        for width, height in sizes:
-            size_key = f"{width}x{height}"
-            try:
-                thumbnail_url = ImageProcessor.optimize_image_for_web(
-                    image_url, width, height, quality=90
-                )
-                thumbnails[size_key] = thumbnail_url
-            except Exception as e:
-                print(f"Error generating thumbnail {size_key}: {e}")
-                thumbnails[size_key] = image_url
+        try:
+            urls = ImageProcessor._build_urls(
+                image_url, [(width, height, 90) for width, height in sizes]
+            )
+        except Exception as e:
+            print(f"Error generating thumbnails: {e}")
+            urls = [image_url] * len(sizes)
 
-        return thumbnails
+        return {
+            f"{width}x{height}": url for (width, height), url in zip(sizes, urls)
+        }
 
     @staticmethod
     def extract_dominant_colors(image_url, num_colors=5):
@@ -100,23 +155,12 @@ class ImageProcessor:
         """
         try:
             response = requests.get(image_url, timeout=10)
-            image = Image.open(io.BytesIO(response.content))
-
-            # Convert to RGB if necessary
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            # Resize for faster processing
-            image.thumbnail((150, 150))
-
-            # Get color palette
-            colors = image.getcolors(maxcolors=256 * 256 * 256)
-            if colors:
-                # Sort by frequency and get top colors
-                colors.sort(reverse=True)
-                dominant_colors = [color[1] for color in colors[:num_colors]]
-                return dominant_colors
-
+            response.raise_for_status()
+            image = load_image(io.BytesIO(response.content))
+            return [
+                tuple(int(color[i : i + 2], 16) for i in (1, 3, 5))
+                for color in extract_palette(image, num_colors)
+            ]
         except Exception as e:
             print(f"Error extracting colors from image: {e}")
 
@@ -127,6 +171,8 @@ class ImageProcessor:
         """
         Generate responsive srcset for different screen sizes
 
+        The result is cached, keyed by source URL and breakpoints.
+
         Args:
             image_url (str): Source image URL
             breakpoints (list): List of widths for responsive images
@@ -134,21 +180,188 @@ class ImageProcessor:
         Returns:
             str: srcset string for HTML img element
         """
+        from .models import RemoteImage
+
         if breakpoints is None:
             breakpoints = [320, 480, 768, 1024, 1366, 1920]
 
-        srcset_parts = []
+        cache_key = "images:srcset:{}:{}".format(
+            RemoteImage.hash_url(image_url), ",".join(map(str, breakpoints))
+        )
+        srcset = cache.get(cache_key)
+        if srcset is not None:
+            return srcset
+
+        try:
+            urls = ImageProcessor._build_urls(
+                image_url,
+                [(width, int(width * 0.75), 85) for width in breakpoints],
+            )
+        except Exception as e:
+            print(f"Error generating responsive images: {e}")
+            return ""
+
+        srcset = ", ".join(
+            f"{url} {width}w" for url, width in zip(urls, breakpoints)
+        )
+        cache.set(cache_key, srcset, SRCSET_CACHE_TIMEOUT)
+        return srcset
+
+
+def load_image(source, max_size=PALETTE_SAMPLE_SIZE):
+    """
+    Open an image as a small RGB Pillow image for analysis.
+
+    JPEG decoding is downscaled with ``Image.draft`` so large photos are never
+    decoded at full resolution.
+
+    Args:
+        source: path or binary file object
+        max_size (int): Longest side of the returned image
+    """
+    image = Image.open(source)
+    image.draft("RGB", (max_size, max_size))
+    image = image.convert("RGB")
+    image.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+    return image
+
+
+def extract_palette(image, num_colors=5):
+    """
+    Quantize an image with median cut over its pixel array.
+
+    The box holding the widest colour range (weighted by pixel count) is split
+    across its widest channel until ``num_colors`` boxes exist; each box
+    contributes its mean colour. Splitting at the middle of the range rather
+    than at the pixel median keeps a minority colour from being averaged into
+    its neighbour.
+
+    Args:
+        image: Pillow image (downsample it first, see ``load_image``)
+        num_colors (int): Number of colors to extract
+
+    Returns:
+        list: Hex colors (``#rrggbb``) sorted by pixel population
+    """
+    pixels = np.asarray(image.convert("RGB"), dtype=np.uint8).reshape(-1, 3)
+    if not len(pixels):
+        return []
+
+    boxes = [pixels]
+    while len(boxes) < num_colors:
+        ranges = [np.ptp(box, axis=0) for box in boxes]
+        scores = [int(r.max()) * len(box) for r, box in zip(ranges, boxes)]
+        index = int(np.argmax(scores))
+        if scores[index] == 0:
+            break
+        box = boxes.pop(index)
+        channel = int(np.argmax(ranges[index]))
+        values = box[:, channel].astype(np.int16)
+        low = values <= (int(values.min()) + int(values.max())) // 2
+        boxes.extend([box[low], box[~low]])
+
+    boxes.sort(key=len, reverse=True)
+    colors = np.rint([box.mean(axis=0) for box in boxes]).astype(np.uint8)
+    return ["#{:02x}{:02x}{:02x}".format(*color) for color in colors]
+
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+# BlurHash is computed on a fixed-size sample so images can be stacked
+BLURHASH_SAMPLE_SIZE = 32
+
+
+def _base83(value, length):
+    return "".join(
+        _BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length)
+    )
 
-        for width in breakpoints:
-            try:
-                responsive_url = ImageProcessor.optimize_image_for_web(
-                    image_url, width=width, height=int(width * 0.75), quality=85
-                )
-                srcset_parts.append(f"{responsive_url} {width}w")
-            except Exception as e:
-                print(f"Error generating responsive image for {width}w: {e}")
 
-        return ", ".join(srcset_parts)
+def _srgb_to_linear(values):
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _blurhash_string(factors, components_x, components_y):
+    """Encode one ``(components_y, components_x, 3)`` factor array"""
+    dc = factors[0, 0]
+    ac = factors.reshape(-1, 3)[1:]
+
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+
+    r, g, b = (_linear_to_srgb(value) for value in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+
+    if len(ac):
+        scaled = ac / maximum
+        quantised = np.clip(
+            np.floor(np.sign(scaled) * np.sqrt(np.abs(scaled)) * 9 + 9.5), 0, 18
+        ).astype(int)
+        for r, g, b in quantised:
+            result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def encode_blurhash_batch(images, components_x=4, components_y=3):
+    """
+    Compute BlurHash strings for many images at once.
+
+    Every image is sampled at ``BLURHASH_SAMPLE_SIZE`` pixels square and the
+    DCT factors of the whole batch are computed with a single ``einsum``.
+
+    Args:
+        images (list): Pillow images
+        components_x (int): Horizontal components (1-9)
+        components_y (int): Vertical components (1-9)
+
+    Returns:
+        list: BlurHash strings, in input order
+    """
+    if not images:
+        return []
+    size = BLURHASH_SAMPLE_SIZE
+    pixels = np.stack(
+        [
+            np.asarray(
+                image.convert("RGB").resize((size, size), Image.Resampling.BILINEAR),
+                dtype=np.float64,
+            )
+            for image in images
+        ]
+    )
+    linear = _srgb_to_linear(pixels)
+
+    positions = (np.arange(size) + 0.0) / size
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), positions))
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), positions))
+    factors = np.einsum("jy,ix,nyxc->njic", basis_y, basis_x, linear) / (size * size)
+    normalisation = np.full((components_y, components_x), 2.0)
+    normalisation[0, 0] = 1.0
+    factors *= normalisation[None, :, :, None]
+
+    return [
+        _blurhash_string(image_factors, components_x, components_y)
+        for image_factors in factors
+    ]
+
+
+def encode_blurhash(image, components_x=4, components_y=3):
+    """Compute the BlurHash string of a single Pillow image"""
+    return encode_blurhash_batch([image], components_x, components_y)[0]
 
 
 def generate_public_id(instance, *args, **kwargs):
@@ -0,0 +1,305 @@
+"""
+Disk janitor for temporary uploads, logs and other expendable files.
+
+Each ``Target`` is a directory, either local or inside a Django storage
+backend. A run scans it once, selects files that are older than
+``max_age`` and, if the remaining files still exceed ``quota`` bytes,
+evicts the least recently used ones. Selected files are deleted
+concurrently on a bounded thread pool.
+
+Local directories (including ``FileSystemStorage``) are walked with
+``os.scandir``, so each file costs a single ``stat`` call. Other backends
+(S3, GCS...) go through ``listdir``/``size``/``get_modified_time``, with the
+per-file metadata calls spread over the same thread pool.
+
+Files whose name is in the target's ``protect()`` set are never deleted but
+still count towards the quota.
+"""
+
+import fnmatch
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db import models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+
+
+@dataclass
+class FileEntry:
+    name: str  # storage name, or absolute path for local targets
+    size: int
+    last_used: float  # epoch seconds
+
+
+@dataclass
+class Target:
+    label: str
+    path: str
+    storage: Optional[Storage] = None  # None: ``path`` is a local directory
+    max_age: Optional[float] = None  # seconds
+    quota: Optional[int] = None  # bytes
+    pattern: str = "*"
+    protect: Optional[Callable[[], set]] = None
+
+
+@dataclass
+class TargetReport:
+    label: str
+    scanned: int = 0
+    scanned_bytes: int = 0
+    deleted: int = 0
+    bytes_freed: int = 0
+    evicted: int = 0  # deleted for the quota rather than for age
+    errors: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self):
+        seconds = max(self.seconds, 1e-6)
+        return {
+            "label": self.label,
+            "scanned": self.scanned,
+            "scanned_bytes": self.scanned_bytes,
+            "deleted": self.deleted,
+            "evicted": self.evicted,
+            "bytes_freed": self.bytes_freed,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "files_per_second": round(self.scanned / seconds, 1),
+            "deleted_per_second": round(self.deleted / seconds, 1),
+        }
+
+
+def scan_directory(root, pattern="*"):
+    """Yield ``FileEntry`` for every file under ``root``, one stat per file"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and fnmatch.fnmatch(
+                            entry.name, pattern
+                        ):
+                            stat = entry.stat(follow_symlinks=False)
+                            yield FileEntry(
+                                entry.path,
+                                stat.st_size,
+                                max(stat.st_atime, stat.st_mtime),
+                            )
+                    except FileNotFoundError:
+                        # Removed concurrently (e.g. an upload being finalized)
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def _local_root(storage, path):
+    """Local directory behind a storage path, or ``None`` for other backends"""
+    if isinstance(storage, FileSystemStorage):
+        return storage.path(path)
+    return None
+
+
+def scan_storage(storage, path, pattern="*", pool=None):
+    """
+    List the files under ``path`` in ``storage`` as ``FileEntry`` with
+    storage names.
+    """
+    root = _local_root(storage, path)
+    if root is not None:
+        base = storage.path("")
+        for entry in scan_directory(root, pattern):
+            entry.name = os.path.relpath(entry.name, base).replace(os.sep, "/")
+            yield entry
+        return
+
+    names = []
+    stack = [path.rstrip("/")]
+    while stack:
+        directory = stack.pop()
+        try:
+            dirs, files = storage.listdir(directory)
+        except FileNotFoundError:
+            continue
+        stack.extend(f"{directory}/{d}" for d in dirs)
+        names.extend(
+            f"{directory}/{name}" for name in files if fnmatch.fnmatch(name, pattern)
+        )
+
+    def stat(name):
+        try:
+            modified = storage.get_modified_time(name).timestamp()
+            try:
+                accessed = storage.get_accessed_time(name).timestamp()
+            except (NotImplementedError, AttributeError):
+                accessed = modified
+            return FileEntry(name, storage.size(name), max(accessed, modified))
+        except FileNotFoundError:
+            return None
+
+    for entry in (pool.map(stat, names) if pool else map(stat, names)):
+        if entry is not None:
+            yield entry
+
+
+def select_victims(entries, now, max_age=None, quota=None, protected=frozenset()):
+    """
+    Pick the files to delete: every unprotected file older than ``max_age``,
+    then the least recently used ones until the rest fits in ``quota``.
+
+    Returns:
+        tuple: ``(expired, evicted)`` lists of ``FileEntry``
+    """
+    expired, kept = [], []
+    for entry in entries:
+        if (
+            max_age is not None
+            and entry.name not in protected
+            and now - entry.last_used > max_age
+        ):
+            expired.append(entry)
+        else:
+            kept.append(entry)
+
+    evicted = []
+    if quota is not None:
+        total = sum(entry.size for entry in kept)
+        for entry in sorted(kept, key=lambda e: e.last_used):
+            if total <= quota:
+                break
+            if entry.name in protected:
+                continue
+            evicted.append(entry)
+            total -= entry.size
+    return expired, evicted
+
+
+def referenced_files(prefix):
+    """
+    Names stored in any ``FileField`` whose ``upload_to`` lives under
+    ``prefix``: those files belong to live rows and must be kept.
+    """
+    names = set()
+    for model in apps.get_models():
+        for model_field in model._meta.get_fields():
+            if not isinstance(model_field, models.FileField):
+                continue
+            upload_to = model_field.upload_to
+            if not isinstance(upload_to, str) or not upload_to.startswith(prefix):
+                continue
+            names.update(
+                model._default_manager.exclude(**{model_field.name: ""})
+                .exclude(**{f"{model_field.name}__isnull": True})
+                .values_list(model_field.name, flat=True)
+                .iterator()
+            )
+    return names
+
+
+def clean_target(target, pool, now=None):
+    """Scan one target and delete what ``select_victims`` picks"""
+    report = TargetReport(target.label)
+    started = time.monotonic()
+    now = now or time.time()
+
+    if target.storage is None:
+        entries = list(scan_directory(target.path, target.pattern))
+        delete = os.unlink
+    else:
+        entries = list(scan_storage(target.storage, target.path, target.pattern, pool))
+        delete = target.storage.delete
+    report.scanned = len(entries)
+    report.scanned_bytes = sum(entry.size for entry in entries)
+
+    protected = target.protect() if target.protect else frozenset()
+    expired, evicted = select_victims(
+        entries, now, target.max_age, target.quota, protected
+    )
+
+    def remove(entry):
+        try:
+            delete(entry.name)
+            return entry.size
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning(f"Could not remove {entry.name}: {e}")
+            return None
+
+    victims = expired + evicted
+    for index, freed in enumerate(pool.map(remove, victims)):
+        if freed is None:
+            report.errors += 1
+            continue
+        report.deleted += 1
+        report.bytes_freed += freed
+        if index >= len(expired):
+            report.evicted += 1
+
+    report.seconds = time.monotonic() - started
+    return report
+
+
+def clear_expired_sessions(chunk_size=1000):
+    """
+    Delete expired database sessions in chunks of ``chunk_size`` rows, so no
+    single statement locks the whole table. Other session engines fall back
+    to their own ``clear_expired``.
+
+    Returns:
+        int: Sessions deleted (``None`` when the engine does not tell)
+    """
+    from importlib import import_module
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    engine = import_module(settings.SESSION_ENGINE)
+    store = engine.SessionStore
+    if not hasattr(store, "get_model_class"):
+        store.clear_expired()
+        return None
+
+    model = store.get_model_class()
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            model.objects.filter(expire_date__lt=now).values_list("pk", flat=True)[
+                :chunk_size
+            ]
+        )
+        if not keys:
+            return deleted
+        deleted += model.objects.filter(pk__in=keys).delete()[0]
+
+
+def run_janitor(targets, workers=DEFAULT_WORKERS):
+    """
+    Clean every target on a shared thread pool.
+
+    Returns:
+        list: ``TargetReport.as_dict()`` per target
+    """
+    reports = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for target in targets:
+            report = clean_target(target, pool)
+            logger.info(
+                f"Janitor {target.label}: {report.deleted}/{report.scanned} files "
+                f"removed, {report.bytes_freed} bytes freed in {report.seconds:.2f}s"
+            )
+            reports.append(report.as_dict())
+    return reports
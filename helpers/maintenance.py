@@ -0,0 +1,344 @@
+"""
+Statistics-driven database maintenance.
+
+PostgreSQL: ``pg_stat_user_tables`` gives each table's dead-tuple ratio and
+the rows modified since the last analyze; only tables above the thresholds
+are vacuumed (``VACUUM (ANALYZE)``) or analyzed. B-tree bloat is estimated
+from the index size against the size its rows should take (``reltuples``
+and the column widths in ``pg_stats``); bloated indexes are rebuilt with
+``REINDEX INDEX CONCURRENTLY``, which does not block reads or writes.
+Nothing takes a lock that stops the API, and nothing runs on the whole
+database.
+
+SQLite: free pages are returned with ``PRAGMA incremental_vacuum`` in small
+steps (the database is switched to ``auto_vacuum = INCREMENTAL`` once, which
+needs one full ``VACUUM``), then ``PRAGMA optimize`` refreshes statistics.
+
+Work is done most-needed first and stops once the time budget is spent; the
+remaining candidates are reported as skipped.
+"""
+
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass, field
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# B-tree page layout, used by the bloat estimate
+PAGE_HEADER = 24
+BTREE_SPECIAL = 16
+INDEX_TUPLE_OVERHEAD = 8 + 4  # IndexTupleData + line pointer
+BTREE_FILLFACTOR = 0.9
+
+TABLE_STATS_SQL = """
+    SELECT s.schemaname, s.relname, s.n_live_tup, s.n_dead_tup,
+           s.n_mod_since_analyze
+    FROM pg_stat_user_tables s
+    JOIN pg_class c ON c.oid = s.relid
+    WHERE c.relkind = 'r'
+"""
+
+INDEX_STATS_SQL = """
+    SELECT s.schemaname, s.relname, s.indexrelname,
+           pg_relation_size(s.indexrelid) AS size, c.relpages, c.reltuples,
+           am.amname, 0 = ANY(i.indkey) AS has_expression,
+           (
+               SELECT SUM(st.avg_width)
+               FROM pg_attribute a
+               JOIN pg_stats st ON st.schemaname = s.schemaname
+                   AND st.tablename = s.relname AND st.attname = a.attname
+               WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+           ) AS key_width
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    JOIN pg_class c ON c.oid = s.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE c.relkind = 'i' AND i.indisvalid AND i.indisready
+"""
+
+# Leftovers of an interrupted REINDEX CONCURRENTLY
+INVALID_REINDEX_SQL = """
+    SELECT n.nspname, c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE NOT i.indisvalid AND c.relname ~ '_ccnew[0-9]*$'
+"""
+
+
+@dataclass
+class Thresholds:
+    dead_ratio: float = 0.2  # dead / (live + dead) tuples
+    min_dead_tuples: int = 1000
+    analyze_ratio: float = 0.1  # rows modified since analyze / live tuples
+    index_bloat: float = 0.3  # share of the index that is wasted
+    min_index_bytes: int = 8 * 1024 * 1024
+    free_page_ratio: float = 0.1  # SQLite free pages / page count
+
+
+@dataclass
+class Action:
+    action: str
+    target: str
+    reason: str
+    status: str = "pending"  # done, partial, failed, skipped
+    seconds: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class MaintenanceReport:
+    vendor: str
+    budget: float
+    started_at: float = field(default_factory=time.time)
+    seconds: float = 0.0
+    actions: list = field(default_factory=list)
+
+    def as_dict(self):
+        counts = {}
+        for action in self.actions:
+            counts[action.status] = counts.get(action.status, 0) + 1
+        return {
+            "vendor": self.vendor,
+            "budget": self.budget,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 3),
+            "counts": counts,
+            "actions": [asdict(action) for action in self.actions],
+        }
+
+
+def _quote(*names):
+    return ".".join(connection.ops.quote_name(name) for name in names)
+
+
+def select_tables(rows, thresholds):
+    """
+    Tables to vacuum or analyze, most dead tuples first.
+
+    Args:
+        rows: ``(schema, table, live, dead, modified since analyze)`` tuples
+
+    Returns:
+        list: ``Action``
+    """
+    vacuum, analyze = [], []
+    for schema, table, live, dead, modified in rows:
+        live, dead, modified = live or 0, dead or 0, modified or 0
+        ratio = dead / (live + dead) if live + dead else 0.0
+        if dead >= thresholds.min_dead_tuples and ratio >= thresholds.dead_ratio:
+            vacuum.append(
+                (
+                    dead,
+                    Action("vacuum", f"{schema}.{table}", f"{ratio:.0%} dead tuples"),
+                )
+            )
+        elif live and modified / live >= thresholds.analyze_ratio:
+            analyze.append(
+                (
+                    modified,
+                    Action(
+                        "analyze",
+                        f"{schema}.{table}",
+                        f"{modified / live:.0%} rows modified since analyze",
+                    ),
+                )
+            )
+    vacuum.sort(key=lambda item: item[0], reverse=True)
+    analyze.sort(key=lambda item: item[0], reverse=True)
+    return [action for _, action in vacuum + analyze]
+
+
+def estimate_index_bloat(relpages, reltuples, key_width, block_size=8192):
+    """
+    Share of a B-tree index that is wasted, from the pages it should take to
+    hold ``reltuples`` entries of ``key_width`` bytes at the default
+    fillfactor. Returns 0 when the statistics are missing.
+    """
+    if not relpages or not reltuples or reltuples < 0 or key_width is None:
+        return 0.0
+    # Each key is aligned on 8 bytes; nullable columns add a bitmap we ignore
+    entry = INDEX_TUPLE_OVERHEAD + math.ceil(key_width / 8) * 8
+    usable = (block_size - PAGE_HEADER - BTREE_SPECIAL) * BTREE_FILLFACTOR
+    # +1 page for the metapage
+    expected = math.ceil(reltuples * entry / usable) + 1
+    return max(0.0, 1 - expected / relpages)
+
+
+def select_indexes(rows, thresholds, block_size=8192):
+    """
+    Bloated B-tree indexes to rebuild, most wasted bytes first.
+
+    Returns:
+        list: ``Action``
+    """
+    candidates = []
+    for schema, _, index, size, relpages, reltuples, method, expression, width in rows:
+        # Expression columns have no width in pg_stats: no reliable estimate
+        if method != "btree" or expression or size < thresholds.min_index_bytes:
+            continue
+        bloat = estimate_index_bloat(relpages, reltuples, width, block_size)
+        if bloat >= thresholds.index_bloat:
+            candidates.append(
+                (
+                    bloat * size,
+                    Action(
+                        "reindex",
+                        f"{schema}.{index}",
+                        f"~{bloat:.0%} of {size // (1024 * 1024)} MiB bloated",
+                    ),
+                )
+            )
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    return [action for _, action in candidates]
+
+
+def _run(report, action, deadline, statements):
+    if time.monotonic() >= deadline:
+        action.status = "skipped"
+        report.actions.append(action)
+        return
+    started = time.monotonic()
+    try:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+                if cursor.description:
+                    cursor.fetchall()
+        action.status = "done"
+    except Exception as e:
+        action.status = "failed"
+        action.error = str(e)
+        logger.warning(f"Maintenance {action.action} {action.target} failed: {e}")
+    action.seconds = round(time.monotonic() - started, 3)
+    report.actions.append(action)
+    logger.info(
+        f"Maintenance {action.action} {action.target} ({action.reason}): "
+        f"{action.status} in {action.seconds:.1f}s"
+    )
+
+
+def _maintain_postgresql(report, deadline, thresholds, lock_timeout):
+    with connection.cursor() as cursor:
+        # Give up on a lock rather than queue the API behind us
+        cursor.execute(f"SET lock_timeout = {int(lock_timeout * 1000)}")
+        cursor.execute("SELECT current_setting('block_size')::int")
+        block_size = cursor.fetchone()[0]
+        cursor.execute(INVALID_REINDEX_SQL)
+        leftovers = cursor.fetchall()
+        cursor.execute(TABLE_STATS_SQL)
+        tables = cursor.fetchall()
+        cursor.execute(INDEX_STATS_SQL)
+        indexes = cursor.fetchall()
+
+    try:
+        for schema, index in leftovers:
+            _run(
+                report,
+                Action("drop", f"{schema}.{index}", "invalid REINDEX leftover"),
+                deadline,
+                [f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(schema, index)}"],
+            )
+
+        for action in select_tables(tables, thresholds):
+            schema, table = action.target.split(".", 1)
+            statement = "VACUUM (ANALYZE)" if action.action == "vacuum" else "ANALYZE"
+            _run(report, action, deadline, [f"{statement} {_quote(schema, table)}"])
+
+        concurrently = connection.pg_version >= 120000
+        for action in select_indexes(indexes, thresholds, block_size):
+            if not concurrently:
+                # A plain REINDEX would lock the table: leave it to an operator
+                action.status = "skipped"
+                action.error = "REINDEX CONCURRENTLY needs PostgreSQL 12"
+                report.actions.append(action)
+                continue
+            schema, index = action.target.split(".", 1)
+            _run(
+                report,
+                action,
+                deadline,
+                [f"REINDEX INDEX CONCURRENTLY {_quote(schema, index)}"],
+            )
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET lock_timeout")
+
+
+def _pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def _maintain_sqlite(report, deadline, thresholds, step_pages):
+    page_count, free_pages = _pragma("page_count"), _pragma("freelist_count")
+    ratio = free_pages / page_count if page_count else 0.0
+
+    if ratio >= thresholds.free_page_ratio and free_pages:
+        reason = f"{free_pages} free pages ({ratio:.0%})"
+        if _pragma("auto_vacuum") != 2:
+            # One full VACUUM is needed to switch to incremental mode
+            _run(
+                report,
+                Action("vacuum", "database", f"{reason}, enable auto_vacuum"),
+                deadline,
+                ["PRAGMA auto_vacuum = INCREMENTAL", "VACUUM"],
+            )
+        elif time.monotonic() >= deadline:
+            report.actions.append(
+                Action("incremental_vacuum", "database", reason, status="skipped")
+            )
+        else:
+            action = Action("incremental_vacuum", "database", reason)
+            started = time.monotonic()
+            try:
+                while free_pages and time.monotonic() < deadline:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"PRAGMA incremental_vacuum({int(step_pages)})")
+                        cursor.fetchall()
+                    free_pages = _pragma("freelist_count")
+                # Out of budget: the next run picks up where this one stopped
+                action.status = "done" if not free_pages else "partial"
+            except Exception as e:
+                action.status = "failed"
+                action.error = str(e)
+                logger.warning(f"Maintenance incremental vacuum failed: {e}")
+            action.seconds = round(time.monotonic() - started, 3)
+            report.actions.append(action)
+
+    _run(
+        report,
+        Action("optimize", "database", "refresh statistics"),
+        deadline,
+        ["PRAGMA optimize"],
+    )
+
+
+def run_maintenance(budget=600, thresholds=None, lock_timeout=5, step_pages=256):
+    """
+    Run the maintenance the statistics call for, within ``budget`` seconds
+    (an operation already started is not interrupted).
+
+    Returns:
+        MaintenanceReport
+    """
+    thresholds = thresholds or Thresholds()
+    report = MaintenanceReport(connection.vendor, budget)
+    started = time.monotonic()
+    deadline = started + budget
+
+    if connection.in_atomic_block:
+        raise RuntimeError("Database maintenance cannot run inside a transaction")
+    if connection.vendor == "postgresql":
+        _maintain_postgresql(report, deadline, thresholds, lock_timeout)
+    elif connection.vendor == "sqlite":
+        _maintain_sqlite(report, deadline, thresholds, step_pages)
+    else:
+        logger.info(f"No maintenance for database engine {connection.vendor}")
+
+    report.seconds = time.monotonic() - started
+    return report
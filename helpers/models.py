@@ -0,0 +1,23 @@
+import hashlib
+
+from django.db import models
+
+
+class RemoteImage(models.Model):
+    """
+    Persistent mapping from an external image URL to the Cloudinary asset
+    it was uploaded as, so each source image is uploaded only once.
+    """
+
+    # SHA-256 of the source URL: URLs can exceed any indexable length
+    url_hash = models.CharField(max_length=64, unique=True)
+    source_url = models.TextField()
+    public_id = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.public_id
+
+    @staticmethod
+    def hash_url(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
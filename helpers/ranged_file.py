@@ -0,0 +1,203 @@
+"""
+Byte-range file responses (RFC 9110 section 14).
+
+``ranged_file_response`` serves a local file with ``Accept-Ranges``, single
+and multipart ``Range`` requests, ``If-Range``, ``If-None-Match`` and a
+strong ETag derived from the file's size and modification time, so media
+players can seek without downloading the file from the start.
+
+When a reverse proxy serves the files itself (``MEDIA_SENDFILE_BACKEND``),
+the response only carries an ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``
+(Apache, lighttpd) header and the proxy handles ranges; otherwise full
+responses go through ``FileResponse`` so WSGI servers can use sendfile(2).
+"""
+
+import os
+import re
+import uuid
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+# More ranges than this are answered with the whole file (RFC 9110 14.2)
+MAX_RANGES = 16
+
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+class RangeNotSatisfiable(Exception):
+    """No requested range overlaps the file"""
+
+
+def file_etag(stat):
+    """Strong ETag from size and modification time"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range`` header into sorted, merged ``(start, end)`` pairs
+    (inclusive).
+
+    Returns:
+        list: Ranges to serve, or ``None`` to ignore the header and send the
+        whole file (malformed header, other unit, too many ranges)
+
+    Raises:
+        RangeNotSatisfiable: If the header is valid but no range overlaps
+    """
+    unit, _, specs = (header or "").partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        match = _RANGE_SPEC.match(spec)
+        if not match or match.groups() == ("", ""):
+            return None
+        first, last = match.groups()
+        if first == "":
+            # Suffix range: the last N bytes
+            if int(last) == 0:
+                continue
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+        ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _read_ranges(path, ranges, parts=None):
+    """Yield file bytes for each range, with optional multipart framing"""
+    with open(path, "rb") as fh:
+        for index, (start, end) in enumerate(ranges):
+            if parts:
+                yield parts[index]
+            fh.seek(start)
+            remaining = end - start + 1
+            while remaining:
+                chunk = fh.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+        if parts:
+            yield parts[-1]
+
+
+def _offload(response, path):
+    """Hand the file over to the reverse proxy, if configured"""
+    backend = getattr(settings, "MEDIA_SENDFILE_BACKEND", "")
+    if backend == "x-accel-redirect":
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        response["X-Accel-Redirect"] = settings.MEDIA_SENDFILE_PREFIX + relative
+    elif backend == "x-sendfile":
+        response["X-Sendfile"] = os.fspath(path)
+    else:
+        return False
+    return True
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    # A date validator only matches if it is exactly the modification time
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def ranged_file_response(request, path, content_type, filename=None):
+    """
+    Serve ``path`` honouring conditional and ``Range`` headers.
+
+    Args:
+        request: Django request (GET or HEAD)
+        path (str): Local file path
+        content_type (str): MIME type of the file
+        filename (str): Optional download name for ``Content-Disposition``
+
+    Returns:
+        HttpResponse: 200, 206, 304 or 416
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+    }
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match == "*":
+        return HttpResponse(status=304, headers=headers)
+
+    offload = HttpResponse(content_type=content_type, headers=headers)
+    if _offload(offload, path):
+        # The proxy evaluates Range/If-Range itself
+        return offload
+
+    ranges = None
+    if request.headers.get("Range") and _if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_range_header(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return HttpResponse(status=416, headers=headers)
+
+    if not ranges:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if len(ranges) == 1:
+        (start, end), = ranges
+        response = StreamingHttpResponse(
+            _read_ranges(path, ranges), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        boundary = uuid.uuid4().hex
+        parts = [
+            (
+                f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode()
+            for start, end in ranges
+        ] + [f"\r\n--{boundary}--\r\n".encode()]
+        length = sum(len(part) for part in parts) + sum(
+            end - start + 1 for start, end in ranges
+        )
+        response = StreamingHttpResponse(
+            _read_ranges(path, ranges, parts),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response["Content-Length"] = str(length)
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,35 @@
+"""
+Redis list used as a shared work queue: any process appends JSON items, and
+a single consumer pops them in batches.
+"""
+
+import json
+
+
+class RedisListQueue:
+    """Redis list of JSON items, popped in atomic batches (LRANGE + LTRIM)"""
+
+    def __init__(self, url, key):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def push(self, items):
+        if items:
+            self.client.rpush(self.key, *[json.dumps(item) for item in items])
+
+    def pop(self, count):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self.key, 0, count - 1)
+        pipe.ltrim(self.key, count, -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def size(self):
+        return self.client.llen(self.key)
+
+    def requeue(self, items):
+        # Back at the head of the list, in their original order
+        if items:
+            self.client.lpush(self.key, *[json.dumps(item) for item in items[::-1]])
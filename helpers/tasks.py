@@ -1,72 +1,86 @@
 # helpers/tasks.py
-from celery import shared_task
-from django.core.management import call_command
+from celery import group, shared_task
 from django.conf import settings
 from django.utils import timezone
 from django.core.files.storage import default_storage
-from django.db import connection
+from django.db import connection, transaction
 from datetime import timedelta
 import os
 import logging
-import shutil
-import subprocess
 
 logger = logging.getLogger(__name__)
 
 
+def _upload_protected_files():
+    """Temp files still owned by a podcast or by an upload being finalized"""
+    from content.models import PodcastUploadSession
+    from helpers.janitor import referenced_files
+
+    protected = referenced_files("temp_podcasts/")
+    finalizing = PodcastUploadSession.objects.filter(
+        status=PodcastUploadSession.Status.FINALIZING
+    ).values_list("pk", flat=True)
+    protected.update(f"temp_podcasts/uploads/{pk}.part" for pk in finalizing)
+    return protected
+
+
+def _log_dir():
+    return getattr(settings, "LOG_DIR", None) or os.path.join(settings.BASE_DIR, "logs")
+
+
+def janitor_targets():
+    """Directories cleaned by ``cleanup_temp_files``"""
+    from helpers.janitor import Target
+
+    log_dir = _log_dir()
+    return [
+        Target(
+            "temp_podcasts",
+            "temp_podcasts",
+            storage=default_storage,
+            max_age=settings.JANITOR_TEMP_MAX_AGE,
+            quota=settings.JANITOR_TEMP_QUOTA_BYTES or None,
+            protect=_upload_protected_files,
+        ),
+        Target(
+            "logs",
+            str(log_dir),
+            max_age=settings.JANITOR_LOG_MAX_AGE,
+            pattern="*.log*",
+        ),
+    ]
+
+
 @shared_task
 def cleanup_temp_files():
     """
-    Clean up temporary files and uploads
+    Clean up abandoned temporary uploads, old log files and expired sessions.
+
+    Files referenced by a model (podcast audio is stored under
+    ``temp_podcasts/`` until it reaches Cloudinary) are never removed.
     """
     try:
-        cleaned_files = 0
-        cleaned_size = 0
-
-        # Clean up temporary podcast uploads
-        temp_podcast_dir = os.path.join(settings.MEDIA_ROOT, "temp_podcasts")
-        if os.path.exists(temp_podcast_dir):
-            for filename in os.listdir(temp_podcast_dir):
-                file_path = os.path.join(temp_podcast_dir, filename)
-                file_age = timezone.now().timestamp() - os.path.getctime(file_path)
-
-                # Remove files older than 24 hours
-                if file_age > 86400:  # 24 hours in seconds
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        os.remove(file_path)
-                        cleaned_files += 1
-                        cleaned_size += file_size
-                    except OSError as e:
-                        logger.warning(f"Could not remove temp file {file_path}: {e}")
-
-        # Clean up Django sessions older than 7 days
-        call_command("clearsessions")
-
-        # Clean up old log files if they exist
-        log_dir = getattr(settings, "LOG_DIR", None)
-        if log_dir and os.path.exists(log_dir):
-            cutoff_time = timezone.now().timestamp() - (7 * 86400)  # 7 days
-            for log_file in os.listdir(log_dir):
-                if log_file.endswith(".log"):
-                    log_path = os.path.join(log_dir, log_file)
-                    if os.path.getctime(log_path) < cutoff_time:
-                        try:
-                            file_size = os.path.getsize(log_path)
-                            os.remove(log_path)
-                            cleaned_files += 1
-                            cleaned_size += file_size
-                        except OSError as e:
-                            logger.warning(f"Could not remove log file {log_path}: {e}")
+        from helpers.janitor import clear_expired_sessions, run_janitor
+
+        started = timezone.now()
+        reports = run_janitor(janitor_targets(), workers=settings.JANITOR_WORKERS)
+        sessions = clear_expired_sessions(settings.JANITOR_SESSION_CHUNK_SIZE)
 
+        cleaned_files = sum(report["deleted"] for report in reports)
+        cleaned_size = sum(report["bytes_freed"] for report in reports)
+        seconds = (timezone.now() - started).total_seconds()
         logger.info(
-            f"Cleanup completed: {cleaned_files} files removed, {cleaned_size} bytes freed"
+            f"Cleanup completed: {cleaned_files} files removed, {cleaned_size} bytes "
+            f"freed, {sessions} sessions cleared in {seconds:.2f}s"
         )
 
         return {
             "status": "success",
             "files_cleaned": cleaned_files,
             "bytes_freed": cleaned_size,
+            "sessions_cleared": sessions,
+            "seconds": round(seconds, 3),
+            "targets": reports,
         }
 
     except Exception as exc:
@@ -77,109 +91,81 @@ def cleanup_temp_files():
 @shared_task
 def backup_database():
     """
-    Create a database backup
+    Stream a compressed backup of the database into the private backup
+    storage, with its checksum, then keep only the BACKUP_KEEP most recent ones
     """
-    try:
-        backup_dir = os.path.join(settings.BASE_DIR, "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-
-        timestamp = timezone.now().strftime("%Y%m%d_%H%M%S")
-
-        # Check database backend
-        db_engine = settings.DATABASES["default"]["ENGINE"]
-
-        if "postgresql" in db_engine:
-            # PostgreSQL backup
-            backup_file = os.path.join(backup_dir, f"backup_postgres_{timestamp}.sql")
-            db_config = settings.DATABASES["default"]
-
-            pg_dump_cmd = [
-                "pg_dump",
-                f"--host={db_config.get('HOST', 'localhost')}",
-                f"--port={db_config.get('PORT', '5432')}",
-                f"--username={db_config['USER']}",
-                f"--dbname={db_config['NAME']}",
-                "--no-password",
-                "--verbose",
-                "--file",
-                backup_file,
-            ]
-
-            env = os.environ.copy()
-            env["PGPASSWORD"] = db_config["PASSWORD"]
-
-            result = subprocess.run(
-                pg_dump_cmd, env=env, capture_output=True, text=True
-            )
-
-            if result.returncode == 0:
-                backup_size = os.path.getsize(backup_file)
-                logger.info(
-                    f"PostgreSQL backup created: {backup_file} ({backup_size} bytes)"
-                )
-            else:
-                logger.error(f"PostgreSQL backup failed: {result.stderr}")
-                raise Exception(f"PostgreSQL backup failed: {result.stderr}")
-
-        elif "sqlite" in db_engine:
-            # SQLite backup
-            db_path = settings.DATABASES["default"]["NAME"]
-            backup_file = os.path.join(backup_dir, f"backup_sqlite_{timestamp}.db")
+    from django.core.cache import cache
 
-            shutil.copy2(db_path, backup_file)
-            backup_size = os.path.getsize(backup_file)
-            logger.info(f"SQLite backup created: {backup_file} ({backup_size} bytes)")
+    from helpers.backups import backup_storage, create_backup
 
-        else:
-            raise ValueError(f"Unsupported database engine: {db_engine}")
-
-        # Clean up old backups (keep only last 7)
-        backup_files = [f for f in os.listdir(backup_dir) if f.startswith("backup_")]
-        backup_files.sort(reverse=True)
-
-        for old_backup in backup_files[7:]:  # Keep only 7 most recent
-            old_backup_path = os.path.join(backup_dir, old_backup)
-            try:
-                os.remove(old_backup_path)
-                logger.info(f"Removed old backup: {old_backup}")
-            except OSError as e:
-                logger.warning(f"Could not remove old backup {old_backup}: {e}")
+    lock = "helpers:backup-database"
+    if not cache.add(lock, "1", timeout=settings.BACKUP_LOCK_TIMEOUT):
+        logger.info("Database backup already running, skipped")
+        return {"status": "skipped"}
+    try:
+        info, removed = create_backup(
+            backup_storage(),
+            location=settings.BACKUP_LOCATION,
+            codec=settings.BACKUP_COMPRESSION,
+            keep=settings.BACKUP_KEEP,
+            level=settings.BACKUP_COMPRESSION_LEVEL or None,
+        )
+        logger.info(
+            f"Database backup created: {info.name} ({info.size} bytes, "
+            f"{info.raw_size} uncompressed, {info.seconds:.1f}s)"
+        )
+        for name in removed:
+            logger.info(f"Removed old backup: {name}")
 
         return {
             "status": "success",
-            "backup_file": backup_file,
-            "backup_size": backup_size,
+            "backup_file": info.name,
+            "backup_size": info.size,
+            "raw_size": info.raw_size,
+            "sha256": info.sha256,
+            "compression": info.compression,
+            "seconds": info.seconds,
+            "removed": removed,
         }
 
     except Exception as exc:
         logger.error(f"Error creating database backup: {str(exc)}")
         raise
+    finally:
+        cache.delete(lock)
 
 
 @shared_task
-def optimize_database():
+def optimize_database(budget=None):
     """
-    Optimize database performance
+    Vacuum, analyze and reindex only what the database statistics call for,
+    within ``budget`` seconds, and append the run's report to
+    maintenance.log
     """
-    try:
-        with connection.cursor() as cursor:
-            db_engine = settings.DATABASES["default"]["ENGINE"]
-
-            if "postgresql" in db_engine:
-                # PostgreSQL optimization
-                cursor.execute("VACUUM ANALYZE;")
-                cursor.execute(
-                    "REINDEX DATABASE %s;" % settings.DATABASES["default"]["NAME"]
-                )
-                logger.info("PostgreSQL database optimized (VACUUM ANALYZE + REINDEX)")
+    import json
 
-            elif "sqlite" in db_engine:
-                # SQLite optimization
-                cursor.execute("VACUUM;")
-                cursor.execute("PRAGMA optimize;")
-                logger.info("SQLite database optimized (VACUUM + PRAGMA optimize)")
+    from helpers.maintenance import Thresholds, run_maintenance
 
-        return {"status": "success", "database_optimized": True}
+    try:
+        report = run_maintenance(
+            budget=budget or settings.DB_MAINTENANCE_BUDGET,
+            thresholds=Thresholds(
+                dead_ratio=settings.DB_MAINTENANCE_DEAD_RATIO,
+                index_bloat=settings.DB_MAINTENANCE_INDEX_BLOAT,
+            ),
+            lock_timeout=settings.DB_MAINTENANCE_LOCK_TIMEOUT,
+        ).as_dict()
+
+        log_dir = _log_dir()
+        os.makedirs(log_dir, exist_ok=True)
+        with open(os.path.join(log_dir, "maintenance.log"), "a") as fh:
+            fh.write(json.dumps(report) + "\n")
+
+        logger.info(
+            f"Database maintenance ({report['vendor']}): {report['counts']} "
+            f"in {report['seconds']:.1f}s"
+        )
+        return {"status": "success", "report": report}
 
     except Exception as exc:
         logger.error(f"Error optimizing database: {str(exc)}")
@@ -187,57 +173,39 @@ def optimize_database():
 
 
 @shared_task
-def generate_analytics_report():
+def rollup_daily_stats(days=2):
+    """
+    Refresh the daily rollups (content.DailyRollup) of the last ``days``
+    days, today included. Each source table is read in a single
+    conditional-aggregation query; earlier days are left untouched.
+    """
+    from content.analytics import update_rollups
+
+    today = timezone.localdate()
+    count = update_rollups([today - timedelta(days=i) for i in range(days)])
+    return {"status": "success", "rollups": count, "date": today.isoformat()}
+
+
+@shared_task
+def generate_analytics_report(period="week"):
     """
-    Generate weekly analytics report
+    Generate the weekly or monthly analytics report from the daily rollups
     """
     try:
-        from content.models import Post, Podcast, Video, Comment
-        from authentication.models import User
-
-        # Get date range (last week)
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=7)
-
-        # Collect analytics data
-        analytics = {
-            "period": {"start": start_date.isoformat(), "end": end_date.isoformat()},
-            "content": {
-                "new_posts": Post.objects.filter(
-                    created_at__range=[start_date, end_date]
-                ).count(),
-                "new_podcasts": Podcast.objects.filter(
-                    created_at__range=[start_date, end_date]
-                ).count(),
-                "new_videos": Video.objects.filter(
-                    created_at__range=[start_date, end_date]
-                ).count(),
-                "new_comments": Comment.objects.filter(
-                    created_at__range=[start_date, end_date]
-                ).count(),
-            },
-            "users": {
-                "new_registrations": User.objects.filter(
-                    date_joined__range=[start_date, end_date]
-                ).count(),
-                "total_users": User.objects.count(),
-            },
-            "engagement": {
-                "total_posts": Post.objects.filter(is_published=True).count(),
-                "total_podcasts": Podcast.objects.filter(is_published=True).count(),
-                "total_videos": Video.objects.filter(is_published=True).count(),
-                "total_comments": Comment.objects.count(),
-            },
-        }
+        from content.analytics import period_report, update_rollups
+
+        # Bring today's figures up to date before reading
+        update_rollups([timezone.localdate()])
+        analytics = period_report(period)
+        totals = analytics["totals"]
 
-        # Log analytics summary
         logger.info(
-            f"Weekly analytics: {analytics['content']['new_posts']} new posts, "
-            f"{analytics['content']['new_podcasts']} new podcasts, "
-            f"{analytics['users']['new_registrations']} new users"
+            f"{period.capitalize()} analytics: "
+            f"{totals.get('post', {}).get('new', 0)} new posts, "
+            f"{totals.get('podcast', {}).get('new', 0)} new podcasts, "
+            f"{totals.get('user', {}).get('registrations', 0)} new users"
         )
 
-        # In production, you'd save this to a file or send it via email
         return {"status": "success", "analytics": analytics}
 
     except Exception as exc:
@@ -248,84 +216,26 @@ def generate_analytics_report():
 @shared_task
 def check_system_health():
     """
-    Perform system health checks
+    Perform system health checks, with measured round-trip times (see
+    core.health for the probes)
     """
     try:
-        health_status = {"timestamp": timezone.now().isoformat(), "checks": {}}
+        from core.health import ERROR, run_probes
 
-        # Database connectivity check
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                health_status["checks"]["database"] = {
-                    "status": "healthy",
-                    "response_time": "fast",
-                }
-        except Exception as e:
-            health_status["checks"]["database"] = {
-                "status": "unhealthy",
-                "error": str(e),
-            }
-
-        # Redis connectivity check (Celery broker)
-        try:
-            from django.core.cache import cache
-
-            cache.set("health_check", "ok", 10)
-            redis_test = cache.get("health_check")
-            if redis_test == "ok":
-                health_status["checks"]["redis"] = {"status": "healthy"}
-            else:
-                health_status["checks"]["redis"] = {
-                    "status": "unhealthy",
-                    "error": "Cache test failed",
-                }
-        except Exception as e:
-            health_status["checks"]["redis"] = {"status": "unhealthy", "error": str(e)}
-
-        # Disk space check
-        try:
-            disk_usage = shutil.disk_usage(settings.BASE_DIR)
-            free_gb = disk_usage.free / (1024**3)
-            total_gb = disk_usage.total / (1024**3)
-            usage_percent = (disk_usage.used / disk_usage.total) * 100
-
-            health_status["checks"]["disk_space"] = {
-                "status": "healthy" if usage_percent < 90 else "warning",
-                "free_gb": round(free_gb, 2),
-                "total_gb": round(total_gb, 2),
-                "usage_percent": round(usage_percent, 2),
-            }
-        except Exception as e:
-            health_status["checks"]["disk_space"] = {
-                "status": "unhealthy",
-                "error": str(e),
-            }
+        checks = run_probes()
+        health_status = {"timestamp": timezone.now().isoformat(), "checks": checks}
 
         # Media directory check
-        try:
-            media_dir = settings.MEDIA_ROOT
-            if os.path.exists(media_dir) and os.access(media_dir, os.W_OK):
-                health_status["checks"]["media_storage"] = {
-                    "status": "healthy",
-                    "writable": True,
-                }
-            else:
-                health_status["checks"]["media_storage"] = {
-                    "status": "unhealthy",
-                    "writable": False,
-                }
-        except Exception as e:
-            health_status["checks"]["media_storage"] = {
-                "status": "unhealthy",
-                "error": str(e),
-            }
+        media_dir = settings.MEDIA_ROOT
+        writable = os.path.exists(media_dir) and os.access(media_dir, os.W_OK)
+        checks["media_storage"] = {
+            "status": "ok" if writable else ERROR,
+            "writable": writable,
+        }
 
         # Overall health assessment
         unhealthy_checks = [
-            name
-            for name, check in health_status["checks"].items()
-            if check["status"] == "unhealthy"
+            name for name, check in checks.items() if check["status"] == ERROR
         ]
 
         overall_status = "unhealthy" if unhealthy_checks else "healthy"
@@ -343,88 +253,14 @@ def check_system_health():
         raise
 
 
-@shared_task
-def process_scheduled_content():
-    """
-    Publish scheduled content that should now be live
-    """
-    try:
-        from content.models import Post, Podcast, Video
-
-        now = timezone.now()
-        published_count = 0
-
-        # Check for posts scheduled to be published
-        scheduled_posts = Post.objects.filter(published_at__lte=now, is_published=False)
-
-        for post in scheduled_posts:
-            post.is_published = True
-            post.save(update_fields=["is_published"])
-            published_count += 1
-
-            # Trigger content notification
-            from content.tasks import send_content_notification
-
-            send_content_notification.delay(
-                content_type="post", content_id=post.id, notification_type="published"
-            )
-
-        # Check for podcasts scheduled to be published
-        scheduled_podcasts = Podcast.objects.filter(
-            published_at__lte=now,
-            is_published=False,
-            is_processed=True,  # Only publish if audio is processed
-        )
-
-        for podcast in scheduled_podcasts:
-            podcast.is_published = True
-            podcast.save(update_fields=["is_published"])
-            published_count += 1
-
-            # Trigger content notification
-            from content.tasks import send_content_notification
-
-            send_content_notification.delay(
-                content_type="podcast",
-                content_id=podcast.id,
-                notification_type="published",
-            )
-
-        # Check for videos scheduled to be published
-        scheduled_videos = Video.objects.filter(
-            published_at__lte=now, is_published=False
-        )
-
-        for video in scheduled_videos:
-            video.is_published = True
-            video.save(update_fields=["is_published"])
-            published_count += 1
-
-            # Trigger content notification
-            from content.tasks import send_content_notification
-
-            send_content_notification.delay(
-                content_type="video", content_id=video.id, notification_type="published"
-            )
-
-        logger.info(f"Published {published_count} scheduled content items")
-
-        return {"status": "success", "published_count": published_count}
-
-    except Exception as exc:
-        logger.error(f"Error processing scheduled content: {str(exc)}")
-        raise
-
-
 @shared_task
 def monitor_system_health():
     """
-    Monitor system health metrics and alert if issues detected
+    Monitor system health metrics and alert if issues detected. Nothing
+    blocks: CPU usage is measured since the previous run in this worker.
     """
     try:
-        import psutil
-        import os
-        from django.db import connection
+        from core.health import ERROR, WARNING, run_probes
 
         health_status = {
             "timestamp": timezone.now().isoformat(),
@@ -432,46 +268,45 @@ def monitor_system_health():
             "metrics": {},
             "alerts": [],
         }
+        checks = run_probes(["system", "disk", "database", "cache", "broker"])
 
-        # Check CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
-        health_status["metrics"]["cpu_percent"] = cpu_percent
-        if cpu_percent > 80:
-            health_status["alerts"].append(f"High CPU usage: {cpu_percent}%")
-            health_status["status"] = "warning"
-
-        # Check memory usage
-        memory = psutil.virtual_memory()
-        health_status["metrics"]["memory_percent"] = memory.percent
-        if memory.percent > 85:
-            health_status["alerts"].append(f"High memory usage: {memory.percent}%")
-            health_status["status"] = "warning"
-
-        # Check disk usage
-        disk = psutil.disk_usage("/")
-        health_status["metrics"]["disk_percent"] = (disk.used / disk.total) * 100
-        if (disk.used / disk.total) * 100 > 90:
-            health_status["alerts"].append("Low disk space")
-            health_status["status"] = "critical"
+        system = checks["system"]
+        if "error" in system:
+            # psutil not installed
+            logger.warning(f"System metrics unavailable: {system['error']}")
+        else:
+            health_status["metrics"]["cpu_percent"] = system["cpu_percent"]
+            health_status["metrics"]["memory_percent"] = system["memory_percent"]
+            if system["status"] == WARNING:
+                health_status["alerts"].append(
+                    f"High CPU or memory usage: {system['cpu_percent']}% CPU, "
+                    f"{system['memory_percent']}% memory"
+                )
+                health_status["status"] = "warning"
 
-        # Check database connection
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            health_status["metrics"]["database"] = "connected"
-        except Exception as db_exc:
-            health_status["alerts"].append(f"Database connection error: {str(db_exc)}")
+        disk = checks["disk"]
+        health_status["metrics"]["disk_percent"] = disk.get("usage_percent")
+        if disk["status"] != "ok":
+            health_status["alerts"].append("Low disk space")
             health_status["status"] = "critical"
 
-        # Check Redis connection
-        try:
-            from django.core.cache import cache
-
-            cache.set("health_check", "ok", timeout=10)
-            health_status["metrics"]["redis"] = "connected"
-        except Exception as redis_exc:
-            health_status["alerts"].append(f"Redis connection error: {str(redis_exc)}")
-            health_status["status"] = "warning"
+        for name in ("database", "cache", "broker"):
+            check = checks[name]
+            health_status["metrics"][f"{name}_latency_ms"] = check.get("latency_ms")
+            if check["status"] == ERROR:
+                health_status["alerts"].append(
+                    f"{name.capitalize()} connection error: {check.get('error')}"
+                )
+                if name == "database":
+                    health_status["status"] = "critical"
+                elif health_status["status"] == "healthy":
+                    health_status["status"] = "warning"
+        if "total" in checks["broker"]:
+            health_status["metrics"]["queued_tasks"] = checks["broker"]["total"]
+            if checks["broker"]["status"] == WARNING:
+                health_status["alerts"].append(
+                    f"Task backlog: {checks['broker']['total']} queued"
+                )
 
         logger.info(f"System health check completed: {health_status['status']}")
 
@@ -481,87 +316,160 @@ def monitor_system_health():
 
         return health_status
 
-    except ImportError:
-        logger.warning("psutil not installed, skipping system metrics")
-        return {"status": "partial", "message": "System metrics unavailable"}
     except Exception as exc:
         logger.error(f"Error checking system health: {str(exc)}")
         raise
 
 
-@shared_task
-def publish_scheduled_content():
-    """
-    Publish content that is scheduled for release
-    """
-    try:
-        from content.models import Post, Podcast, Video
+# Content types published by the scheduler: (notification type, model label,
+# extra filters). Podcasts wait for their audio to be processed.
+SCHEDULED_CONTENT = (
+    ("post", "content.Post", {}),
+    ("podcast", "content.Podcast", {"is_processed": True}),
+    ("video", "content.Video", {}),
+)
+SCHEDULED_PUBLISH_BATCH_SIZE = 500
 
-        current_time = timezone.now()
-        published_count = 0
 
-        # Publish scheduled posts
-        scheduled_posts = Post.objects.filter(
-            status="scheduled", scheduled_publish_date__lte=current_time
-        )
-
-        for post in scheduled_posts:
-            post.status = "published"
-            post.published_date = current_time
-            post.save(update_fields=["status", "published_date"])
-            published_count += 1
+def publish_due_content(model, now, batch_size=SCHEDULED_PUBLISH_BATCH_SIZE, **filters):
+    """
+    Flip ``is_published`` on every due row of ``model`` and return their ids.
 
-            # Trigger content notification
-            from content.tasks import send_content_notification
+    Only rows flagged ``is_scheduled`` are due: content withdrawn after
+    publication keeps its past ``published_at`` but is never republished.
 
-            send_content_notification.delay(
-                content_type="post", content_id=post.id, notification_type="published"
+    Each batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and
+    published with a single ``UPDATE`` in the same transaction, so concurrent
+    runs never claim the same row. Backends without row locks (SQLite)
+    serialize writers, which gives the same guarantee. ``update()`` does not
+    send ``post_save``, so no media processing is re-triggered.
+    """
+    published = []
+    due = model.objects.filter(
+        is_scheduled=True, is_published=False, published_at__lte=now, **filters
+    )
+    while True:
+        with transaction.atomic():
+            ids = list(
+                due.select_for_update(skip_locked=True)
+                .order_by("published_at", "pk")
+                .values_list("pk", flat=True)[:batch_size]
             )
+            if ids:
+                model.objects.filter(pk__in=ids).update(
+                    is_published=True, is_scheduled=False
+                )
+        published.extend(ids)
+        if len(ids) < batch_size:
+            return published
 
-        # Publish scheduled podcasts
-        scheduled_podcasts = Podcast.objects.filter(
-            status="scheduled", scheduled_publish_date__lte=current_time
-        )
 
-        for podcast in scheduled_podcasts:
-            podcast.status = "published"
-            podcast.published_date = current_time
-            podcast.save(update_fields=["status", "published_date"])
-            published_count += 1
+def notify_published_content(content_type, ids):
+    """Send one notification task per published item, as a Celery group"""
+    from content.tasks import send_content_notification
+
+    if ids:
+        group(
+            send_content_notification.s(content_type, content_id, "published")
+            for content_id in ids
+        ).apply_async()
+
 
-            from content.tasks import send_content_notification
+@shared_task
+def publish_scheduled_content():
+    """
+    Publish content whose ``published_at`` has passed, then notify readers.
 
-            send_content_notification.delay(
-                content_type="podcast",
-                content_id=podcast.id,
-                notification_type="published",
+    Runs from beat as a safety net and as an ETA task enqueued when scheduled
+    content is saved (``content.tasks.schedule_publication``). Overlapping
+    runs are safe: every row is claimed exactly once.
+    """
+    from django.apps import apps
+
+    now = timezone.now()
+    published = {}
+    for content_type, label, filters in SCHEDULED_CONTENT:
+        ids = publish_due_content(apps.get_model(label), now, **filters)
+        if ids:
+            published[content_type] = ids
+            # Notifications go out once the UPDATE is durable
+            transaction.on_commit(
+                lambda content_type=content_type, ids=ids: notify_published_content(
+                    content_type, ids
+                )
             )
 
-        # Publish scheduled videos
-        scheduled_videos = Video.objects.filter(
-            status="scheduled", scheduled_publish_date__lte=current_time
-        )
+    published_count = sum(len(ids) for ids in published.values())
+    if published_count:
+        logger.info(f"Published {published_count} scheduled content items")
+    return {
+        "status": "success",
+        "published_count": published_count,
+        "published": published,
+        "timestamp": now.isoformat(),
+    }
 
-        for video in scheduled_videos:
-            video.status = "published"
-            video.published_date = current_time
-            video.save(update_fields=["status", "published_date"])
-            published_count += 1
 
-            from content.tasks import send_content_notification
+@shared_task
+def generate_image_variants(model_label, object_ids):
+    """
+    Generate local WebP/JPEG display variants for the images of the given
+    objects, rendering them in a process pool
+    """
+    from django.apps import apps
+    from .image_variants import VARIANT_PROFILES, VARIANT_SOURCE_FIELDS, generate_variants
+
+    model = apps.get_model(model_label)
+    field_name = VARIANT_SOURCE_FIELDS[model_label]
+    profile = VARIANT_PROFILES[model_label]
+
+    jobs = []
+    object_pks = []
+    for obj in model.objects.filter(pk__in=object_ids).only(
+        "pk", field_name, "image_variants"
+    ):
+        field_file = getattr(obj, field_name)
+        if not field_file or obj.image_variants.get("source") == field_file.name:
+            continue
+        try:
+            with field_file.open("rb") as fh:
+                jobs.append((field_file.name, fh.read(), profile))
+        except OSError as e:
+            logger.warning(f"Could not read {field_file.name}: {e}")
+            continue
+        object_pks.append(obj.pk)
 
-            send_content_notification.delay(
-                content_type="video", content_id=video.id, notification_type="published"
-            )
+    generated = 0
+    for pk, variants in zip(object_pks, generate_variants(jobs)):
+        if variants:
+            model.objects.filter(pk=pk).update(image_variants=variants)
+            generated += 1
 
-        logger.info(f"Published {published_count} scheduled content items")
+    return {"status": "success", "model": model_label, "generated": generated}
 
-        return {
-            "status": "success",
-            "published_count": published_count,
-            "timestamp": current_time.isoformat(),
-        }
 
-    except Exception as exc:
-        logger.error(f"Error publishing scheduled content: {str(exc)}")
-        raise
+@shared_task
+def backfill_image_variants(model_label, batch_size=32):
+    """
+    Generate missing variants for every image of a model, one process-pool
+    batch at a time so only ``batch_size`` source images are held in memory
+    """
+    from django.apps import apps
+    from .image_variants import VARIANT_SOURCE_FIELDS
+
+    model = apps.get_model(model_label)
+    field_name = VARIANT_SOURCE_FIELDS[model_label]
+    object_ids = list(
+        model.objects.exclude(**{field_name: ""})
+        .exclude(**{f"{field_name}__isnull": True})
+        .filter(image_variants={})
+        .values_list("pk", flat=True)
+        .order_by("pk")
+    )
+
+    generated = 0
+    for start in range(0, len(object_ids), batch_size):
+        result = generate_image_variants(model_label, object_ids[start : start + batch_size])
+        generated += result["generated"]
+
+    return {"status": "success", "model": model_label, "generated": generated}
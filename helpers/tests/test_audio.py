@@ -0,0 +1,209 @@
+# helpers/tests/test_audio.py
+import io
+import struct
+import wave
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from helpers.audio import InvalidAudioError, probe_audio, validate_audio_file
+
+
+def make_wav(seconds=2, sample_rate=8000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * channels * sample_rate * seconds)
+    return buffer.getvalue()
+
+
+def make_mp3(frames=100, xing=False):
+    # MPEG1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames
+    header = b"\xff\xfb\x90\x00"
+    frame = header + b"\x00" * 413
+    first = frame
+    if xing:
+        tag = b"Xing" + struct.pack(">II", 0x01, frames)
+        first = header + b"\x00" * 32 + tag + b"\x00" * (413 - 32 - len(tag))
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    return id3 + first + frame * (frames - 1)
+
+
+def make_ogg_opus(seconds=3, pre_skip=312):
+    def page(granule, packet):
+        return (
+            b"OggS\x00\x02"
+            + struct.pack("<qIII", granule, 1, 0, 0)
+            + bytes([1, len(packet)])
+            + packet
+        )
+
+    head = b"OpusHead\x01\x02" + struct.pack("<HIhB", pre_skip, 48000, 0, 0)
+    return page(0, head) + b"\x00" * 5000 + page(seconds * 48000 + pre_skip, b"\x00")
+
+
+def box(box_type, payload):
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def make_m4a(seconds=5, sample_rate=44100, channels=2):
+    mvhd = box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, seconds * 1000))
+    entry = (
+        struct.pack(">I", 36)
+        + b"mp4a"
+        + b"\x00" * 16
+        + struct.pack(">HH", channels, 16)
+        + b"\x00" * 4
+        + struct.pack(">I", sample_rate << 16)
+    )
+    stsd = box(b"stsd", b"\x00" * 4 + struct.pack(">I", 1) + entry)
+    trak = box(b"trak", box(b"mdia", box(b"minf", box(b"stbl", stsd))))
+    return box(b"ftyp", b"M4A \x00\x00\x00\x00") + box(b"mdat", b"\x00" * 1000) + box(
+        b"moov", mvhd + trak
+    )
+
+
+def ebml(element_id, payload):
+    size = len(payload)
+    return element_id + bytes([0x01]) + size.to_bytes(7, "big") + payload
+
+
+def make_webm(seconds=4.5, sample_rate=48000, channels=2):
+    info = ebml(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big")) + ebml(
+        b"\x44\x89", struct.pack(">d", seconds * 1000)
+    )
+    audio = ebml(b"\xb5", struct.pack(">d", sample_rate)) + ebml(b"\x9f", bytes([channels]))
+    tracks = ebml(b"\xae", ebml(b"\xe1", audio))
+    segment = (
+        ebml(b"\x15\x49\xa9\x66", info)
+        + ebml(b"\x16\x54\xae\x6b", tracks)
+        + ebml(b"\x1f\x43\xb6\x75", b"\x00" * 100)
+    )
+    return ebml(b"\x1a\x45\xdf\xa3", b"\x42\x82\x84webm") + ebml(
+        b"\x18\x53\x80\x67", segment
+    )
+
+
+class ProbeAudioTestCase(SimpleTestCase):
+    """Test the pure-Python audio header probe"""
+
+    def test_wav(self):
+        """Test WAV duration, rate and channels from the fmt/data chunks"""
+        info = probe_audio(io.BytesIO(make_wav(seconds=2, sample_rate=8000)))
+        self.assertEqual(info.format, "wav")
+        self.assertAlmostEqual(info.duration, 2.0)
+        self.assertEqual((info.sample_rate, info.channels), (8000, 1))
+        self.assertEqual(info.bitrate, 128000)
+
+    def test_mp3_cbr(self):
+        """Test that CBR MP3 duration is derived from the stream length"""
+        info = probe_audio(io.BytesIO(make_mp3(frames=100)))
+        self.assertEqual(info.format, "mp3")
+        self.assertEqual((info.sample_rate, info.channels), (44100, 2))
+        self.assertEqual(info.bitrate, 128000)
+        self.assertAlmostEqual(info.duration, 100 * 417 * 8 / 128000, places=3)
+
+    def test_mp3_xing(self):
+        """Test that the Xing frame count is used when present"""
+        info = probe_audio(io.BytesIO(make_mp3(frames=1000, xing=True)))
+        self.assertAlmostEqual(info.duration, 1000 * 1152 / 44100, places=3)
+
+    def test_ogg_opus(self):
+        """Test Opus duration from the last granule position minus pre-skip"""
+        info = probe_audio(io.BytesIO(make_ogg_opus(seconds=3)))
+        self.assertEqual(info.format, "opus")
+        self.assertAlmostEqual(info.duration, 3.0)
+        self.assertEqual((info.sample_rate, info.channels), (48000, 2))
+
+    def test_m4a(self):
+        """Test M4A duration from mvhd and audio parameters from stsd"""
+        info = probe_audio(io.BytesIO(make_m4a(seconds=5)))
+        self.assertEqual(info.format, "m4a")
+        self.assertAlmostEqual(info.duration, 5.0)
+        self.assertEqual((info.sample_rate, info.channels), (44100, 2))
+
+    def test_webm(self):
+        """Test WebM duration and audio track parameters"""
+        info = probe_audio(io.BytesIO(make_webm(seconds=4.5)))
+        self.assertEqual(info.format, "webm")
+        self.assertAlmostEqual(info.duration, 4.5)
+        self.assertEqual((info.sample_rate, info.channels), (48000, 2))
+
+    def test_invalid_file_is_rejected(self):
+        """Test that non-audio content raises and fails validation"""
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(b"<html>not audio at all</html>"))
+        with self.assertRaises(ValidationError):
+            validate_audio_file(SimpleUploadedFile("episode.mp3", b"not audio at all"))
+
+    def test_file_position_is_restored(self):
+        """Test that probing an uploaded file leaves its position unchanged"""
+        upload = SimpleUploadedFile("episode.wav", make_wav())
+        upload.seek(10)
+        probe_audio(upload)
+        self.assertEqual(upload.tell(), 10)
+
+
+class MalformedAudioTestCase(SimpleTestCase):
+    """Test that truncated and crafted headers are rejected cleanly"""
+
+    def assertRejectedOrProbed(self, data):
+        try:
+            probe_audio(io.BytesIO(data))
+        except InvalidAudioError:
+            pass
+
+    def test_truncated_headers(self):
+        """Test that every prefix of a valid file probes or raises InvalidAudioError"""
+        samples = {
+            "wav": make_wav(seconds=1),
+            "mp3": make_mp3(frames=3, xing=True),
+            "ogg": make_ogg_opus(),
+            "m4a": make_m4a(),
+            "webm": make_webm(),
+        }
+        for name, data in samples.items():
+            for length in range(12, min(len(data), 400)):
+                with self.subTest(format=name, length=length):
+                    self.assertRejectedOrProbed(data[:length])
+
+    def test_short_wav_fmt_chunk(self):
+        """Test that a fmt chunk under 16 bytes cannot rewind the chunk scan"""
+        data = b"RIFF" + struct.pack("<I", 16) + b"WAVEfmt " + struct.pack("<I", 0)
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(data + b"\x00" * 4))
+
+    def test_truncated_ogg_page(self):
+        """Test that an Ogg capture pattern without a page header is rejected"""
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(b"OggS\x00\x02" + b"\x00" * 10))
+
+    def test_truncated_mp3_xing_header(self):
+        """Test that a Xing tag cut short is rejected"""
+        data = make_mp3(frames=1, xing=True)
+        cut = data.index(b"Xing") + 6
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(data[:cut]))
+
+    def test_empty_mp4_mvhd_box(self):
+        """Test that an mvhd box without payload is rejected"""
+        data = box(b"ftyp", b"M4A \x00\x00\x00\x00") + box(b"moov", box(b"mvhd", b""))
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(data))
+
+    def test_oversized_matroska_number(self):
+        """Test that an EBML number wider than 8 bytes is rejected"""
+        info = ebml(b"\x44\x89", b"\x00" * 12)
+        data = ebml(b"\x1a\x45\xdf\xa3", b"\x42\x82\x84webm") + ebml(
+            b"\x18\x53\x80\x67", ebml(b"\x15\x49\xa9\x66", info)
+        )
+        with self.assertRaises(InvalidAudioError):
+            probe_audio(io.BytesIO(data))
+
+    def test_malformed_upload_fails_validation(self):
+        """Test that the model validator turns a crafted header into a ValidationError"""
+        with self.assertRaises(ValidationError):
+            validate_audio_file(SimpleUploadedFile("episode.ogg", b"OggS" + b"\x00" * 10))
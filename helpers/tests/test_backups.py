@@ -0,0 +1,138 @@
+# helpers/tests/test_backups.py
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.storage import InMemoryStorage
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from authentication.models import User
+from helpers.tasks import backup_database
+from helpers.backups import (
+    BackupError,
+    backup_storage,
+    create_backup,
+    prune_backups,
+    stream_process,
+    verify_backup,
+)
+
+
+class StreamProcessTestCase(SimpleTestCase):
+    """Test streaming a dump command's output"""
+
+    def test_stdout_is_streamed_in_chunks(self):
+        """Test that stdout arrives in bounded chunks"""
+        command = [sys.executable, "-c", "import sys; sys.stdout.write('x' * 5000)"]
+
+        chunks = list(stream_process(command, chunk_size=1024))
+
+        self.assertEqual(b"".join(chunks), b"x" * 5000)
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+
+    def test_failure_reports_stderr_tail(self):
+        """Test that a failed dump raises with the end of its log"""
+        script = (
+            "import sys; sys.stderr.write('noise\\n' * 5000 + 'fatal: no such db');"
+            " sys.exit(2)"
+        )
+
+        with self.assertRaises(BackupError) as error:
+            list(stream_process([sys.executable, "-c", script]))
+
+        message = str(error.exception)
+        self.assertIn("exited with 2", message)
+        self.assertIn("fatal: no such db", message)
+        self.assertLess(len(message), 5000)
+
+
+class CreateBackupTestCase(TransactionTestCase):
+    """Test SQLite backups written to a storage"""
+
+    def setUp(self):
+        self.storage = InMemoryStorage()
+
+    def test_sqlite_backup_is_restorable(self):
+        """Test that the compressed copy opens and matches its checksum"""
+        User.objects.create_user(
+            username="reader", email="reader@example.com", password="password"
+        )
+
+        info, removed = create_backup(self.storage, codec="gzip")
+
+        self.assertEqual(removed, [])
+        self.assertTrue(info.name.endswith(".sqlite3.gz"))
+        with self.storage.open(info.name) as fh:
+            data = fh.read()
+        self.assertEqual(hashlib.sha256(data).hexdigest(), info.sha256)
+        self.assertEqual(len(data), info.size)
+        self.assertTrue(verify_backup(self.storage, info.name))
+
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, "wb") as fh:
+            fh.write(gzip.decompress(data))
+        try:
+            db = sqlite3.connect(path)
+            usernames = db.execute("SELECT username FROM authentication_user")
+            self.assertEqual([row[0] for row in usernames], ["reader"])
+            db.close()
+        finally:
+            os.unlink(path)
+
+        with self.storage.open("backups/manifest.json") as fh:
+            manifest = json.load(fh)
+        self.assertEqual([e["name"] for e in manifest["backups"]], [info.name])
+
+    def test_retention_keeps_newest(self):
+        """Test that older backups and their checksums are pruned"""
+        for day in range(1, 5):
+            name = f"backups/backup_2024010{day}_020000_sqlite.sqlite3.gz"
+            self.storage.save(name, ContentFile(b"dump"))
+            self.storage.save(f"{name}.sha256", ContentFile(b"0  x\n"))
+
+        removed = prune_backups(self.storage, "backups", keep=2)
+
+        self.assertEqual(
+            removed,
+            [
+                "backups/backup_20240102_020000_sqlite.sqlite3.gz",
+                "backups/backup_20240101_020000_sqlite.sqlite3.gz",
+            ],
+        )
+        self.assertEqual(
+            sorted(self.storage.listdir("backups")[1]),
+            [
+                "backup_20240103_020000_sqlite.sqlite3.gz",
+                "backup_20240103_020000_sqlite.sqlite3.gz.sha256",
+                "backup_20240104_020000_sqlite.sqlite3.gz",
+                "backup_20240104_020000_sqlite.sqlite3.gz.sha256",
+                "manifest.json",
+            ],
+        )
+
+    def test_task_writes_outside_media_root(self):
+        """Test that the task uses the private backup storage, not the media one"""
+        root = tempfile.mkdtemp()
+        config = {
+            "BACKEND": settings.BACKUP_STORAGE["BACKEND"],
+            "OPTIONS": {**settings.BACKUP_STORAGE["OPTIONS"], "location": root},
+        }
+        self.assertNotIn(
+            os.path.realpath(settings.MEDIA_ROOT),
+            os.path.realpath(backup_storage().location),
+        )
+
+        with override_settings(BACKUP_STORAGE=config, BACKUP_KEEP=1):
+            result = backup_database()
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["compression"], "gzip")
+        path = os.path.join(root, result["backup_file"])
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
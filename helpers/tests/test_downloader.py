@@ -0,0 +1,149 @@
+# helpers/tests/test_downloader.py
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from helpers.downloader import (
+    CHUNK_SIZE,
+    DownloadError,
+    download,
+    download_many,
+    download_to_local,
+)
+
+PAYLOAD = bytes(range(256)) * 400
+# One whole chunk reaches the client before the connection drops
+CUT_AT = CHUNK_SIZE
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve PAYLOAD with single-range support and record request headers
+
+    ``/cut`` announces the whole payload but drops the connection after
+    ``CUT_AT`` bytes unless the request is a Range request.
+    """
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("Range")))
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD) - start))
+        self.end_headers()
+        if self.path == "/cut" and not range_header:
+            self.wfile.write(PAYLOAD[:CUT_AT])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(PAYLOAD[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloaderTestCase(SimpleTestCase):
+    """Test streaming, resumable, verified downloads"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        RangeHandler.requests_seen = []
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def test_download_is_atomic_and_verified(self):
+        """Test that the file appears only once complete and checksummed"""
+        out = self.tmp / "nested" / "file.bin"
+        checksum = hashlib.sha256(PAYLOAD).hexdigest()
+
+        download(f"{self.base_url}/file", out, checksum=checksum)
+
+        self.assertEqual(out.read_bytes(), PAYLOAD)
+        self.assertFalse(out.with_name("file.bin.part").exists())
+
+    def test_partial_file_is_resumed(self):
+        """Test that an existing .part file is continued with a Range request"""
+        out = self.tmp / "file.bin"
+        out.with_name("file.bin.part").write_bytes(PAYLOAD[:1000])
+
+        download(
+            f"{self.base_url}/file", out, checksum=hashlib.sha256(PAYLOAD).hexdigest()
+        )
+
+        self.assertEqual(RangeHandler.requests_seen, [("/file", "bytes=1000-")])
+        self.assertEqual(out.read_bytes(), PAYLOAD)
+
+    def test_connection_dropped_mid_stream_is_resumed(self):
+        """Test that a body cut off mid-stream is continued from where it stopped"""
+        out = self.tmp / "file.bin"
+
+        download(
+            f"{self.base_url}/cut", out, checksum=hashlib.sha256(PAYLOAD).hexdigest()
+        )
+
+        self.assertEqual(
+            RangeHandler.requests_seen, [("/cut", None), ("/cut", f"bytes={CUT_AT}-")]
+        )
+        self.assertEqual(out.read_bytes(), PAYLOAD)
+
+    def test_checksum_mismatch_discards_file(self):
+        """Test that a corrupt download is never moved into place"""
+        out = self.tmp / "file.bin"
+
+        with self.assertRaises(DownloadError):
+            download(f"{self.base_url}/file", out, checksum="0" * 64)
+
+        self.assertFalse(out.exists())
+        self.assertFalse(out.with_name("file.bin.part").exists())
+
+    def test_download_many_reports_each_result(self):
+        """Test the concurrent batch API keeps job order and isolates failures"""
+        jobs = [
+            (f"{self.base_url}/a", self.tmp / "a.bin"),
+            (f"{self.base_url}/missing", self.tmp / "b.bin"),
+            (f"{self.base_url}/c", self.tmp / "c.bin"),
+        ]
+
+        results = download_many(jobs, max_workers=2)
+
+        self.assertEqual(results[0], self.tmp / "a.bin")
+        self.assertIsInstance(results[1], DownloadError)
+        self.assertEqual((self.tmp / "c.bin").read_bytes(), PAYLOAD)
+
+    def test_download_to_local_keeps_its_contract(self):
+        """Test the boolean helper used by existing callers"""
+        self.assertTrue(download_to_local(f"{self.base_url}/file", self.tmp / "f.bin"))
+        self.assertFalse(download_to_local(f"{self.base_url}/missing", self.tmp / "m.bin"))
+        with self.assertRaises(ValueError):
+            download_to_local(f"{self.base_url}/file", str(self.tmp / "f.bin"))
@@ -0,0 +1,109 @@
+# helpers/tests/test_image_variants.py
+import io
+import tempfile
+
+import billiard
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from authentication.models import User
+from helpers import image_variants
+from helpers.image_variants import (
+    VARIANT_PROFILES,
+    generate_variants,
+    render_all,
+    render_variants,
+)
+from helpers.tasks import generate_image_variants
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_jpeg(size=(2400, 1600), color=(30, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def render_in_daemon(queue, jobs):
+    """Render jobs from a daemonic process, like a Celery prefork child"""
+    pools = []
+
+    class CountingPool(image_variants.Pool):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get("processes"))
+            super().__init__(*args, **kwargs)
+
+    image_variants.Pool = CountingPool
+    outcomes = render_all(jobs, max_workers=2)
+    queue.put((pools, [len(outcome) for outcome in outcomes]))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageVariantsTestCase(TestCase):
+    """Test the local WebP/JPEG variant pipeline"""
+
+    def test_render_variants_sizes_and_formats(self):
+        """Test that every variant is rendered in both formats at the right size"""
+        rendered = render_variants(make_jpeg(), VARIANT_PROFILES["content.post"])
+
+        self.assertEqual(len(rendered), 4)
+        sizes = {}
+        for variant, format_key, data in rendered:
+            image = Image.open(io.BytesIO(data))
+            self.assertEqual(image.format, "WEBP" if format_key == "webp" else "JPEG")
+            sizes[variant] = image.size
+        self.assertEqual(sizes["large"], (1200, 800))
+        self.assertEqual(sizes["thumbnail"], (400, 300))
+
+    def test_variants_use_content_hash_names(self):
+        """Test that identical renders are stored once under the same name"""
+        jobs = [
+            ("posts/a.jpg", make_jpeg(), VARIANT_PROFILES["content.post"]),
+            ("posts/b.jpg", make_jpeg(), VARIANT_PROFILES["content.post"]),
+        ]
+
+        first, second = generate_variants(jobs, max_workers=2)
+
+        self.assertEqual(first["source"], "posts/a.jpg")
+        self.assertTrue(first["large"]["webp"].endswith(".webp"))
+        self.assertTrue(default_storage.exists(first["thumbnail"]["jpeg"]))
+        self.assertEqual(
+            first["large"]["webp"].rsplit("-", 1)[1],
+            second["large"]["webp"].rsplit("-", 1)[1],
+        )
+
+    def test_task_updates_avatar_urls(self):
+        """Test that the task stores variants and avatar_urls prefers them"""
+        user = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        User.objects.filter(pk=user.pk).update(avatar="avatars/me.jpg")
+        default_storage.save("avatars/me.jpg", SimpleUploadedFile("me.jpg", make_jpeg()))
+
+        result = generate_image_variants("authentication.user", [user.pk])
+
+        self.assertEqual(result["generated"], 1)
+        user.refresh_from_db()
+        self.assertIn("avatar", user.image_variants)
+        self.assertTrue(user.avatar_urls["avatar"].endswith(".webp"))
+        self.assertEqual(
+            generate_image_variants("authentication.user", [user.pk])["generated"], 0
+        )
+
+    def test_pool_runs_under_a_daemonic_parent(self):
+        """Test that the process pool is used from a daemonic worker process"""
+        profile = VARIANT_PROFILES["authentication.user"]
+        jobs = [("a.jpg", make_jpeg((600, 400)), profile)] * 3
+        queue = billiard.Queue()
+        worker = billiard.Process(target=render_in_daemon, args=(queue, jobs))
+        worker.daemon = True
+
+        worker.start()
+        pools, counts = queue.get(timeout=60)
+        worker.join(timeout=10)
+
+        self.assertEqual(pools, [2])
+        self.assertEqual(counts, [4, 4, 4])
@@ -0,0 +1,122 @@
+# helpers/tests/test_images.py
+import io
+from unittest.mock import patch
+
+import cloudinary
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+
+from helpers import images
+from helpers.images import (
+    ImageProcessor,
+    encode_blurhash,
+    encode_blurhash_batch,
+    extract_palette,
+    load_image,
+)
+from helpers.models import RemoteImage
+
+SOURCE_URL = "https://example.com/photo.jpg"
+
+
+class ImageProcessorTestCase(TestCase):
+    """Test that external images are uploaded once and URLs are built locally"""
+
+    def setUp(self):
+        cloudinary.config(cloud_name="demo")
+        images._public_id_memo.clear()
+        cache.clear()
+        patcher = patch(
+            "helpers.images.cloudinary.uploader.upload",
+            return_value={"public_id": "remote/abc"},
+        )
+        self.upload = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_thumbnails_use_a_single_eager_upload(self):
+        """Test that all thumbnail sizes come from one upload"""
+        thumbnails = ImageProcessor.generate_thumbnails(SOURCE_URL)
+
+        self.upload.assert_called_once()
+        self.assertEqual(len(self.upload.call_args.kwargs["eager"]), 4)
+        self.assertEqual(len(thumbnails), 4)
+        self.assertIn("w_150", thumbnails["150x150"])
+        self.assertIn("remote/abc", thumbnails["1200x800"])
+        self.assertEqual(RemoteImage.objects.get().public_id, "remote/abc")
+
+    def test_mapping_is_persistent(self):
+        """Test that a known source URL is never uploaded again"""
+        ImageProcessor.generate_thumbnails(SOURCE_URL)
+        images._public_id_memo.clear()
+
+        url = ImageProcessor.optimize_image_for_web(SOURCE_URL, 640, 480)
+
+        self.upload.assert_called_once()
+        self.assertIn("w_640", url)
+
+    def test_srcset_is_cached(self):
+        """Test that srcset strings are built once and then served from cache"""
+        first = ImageProcessor.generate_responsive_srcset(SOURCE_URL)
+        with patch.object(ImageProcessor, "_build_urls") as build_urls:
+            second = ImageProcessor.generate_responsive_srcset(SOURCE_URL)
+
+        build_urls.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(first.count("w,"), 5)
+        self.upload.assert_called_once()
+
+
+class PaletteTestCase(SimpleTestCase):
+    """Test the median-cut palette extraction"""
+
+    def test_palette_is_sorted_by_population(self):
+        """Test that the dominant colour comes first"""
+        image = Image.new("RGB", (40, 40), (200, 30, 30))
+        image.paste((20, 40, 220), (0, 0, 40, 10))
+
+        palette = extract_palette(image, num_colors=2)
+
+        self.assertEqual(palette, ["#c81e1e", "#1428dc"])
+
+    def test_single_colour_image(self):
+        """Test that a flat image yields a single colour"""
+        image = Image.new("RGB", (10, 10), (255, 255, 255))
+        self.assertEqual(extract_palette(image, num_colors=5), ["#ffffff"])
+
+    def test_load_image_downsamples(self):
+        """Test that images are reduced before analysis"""
+        buffer = io.BytesIO()
+        Image.new("RGB", (1600, 800), (0, 128, 0)).save(buffer, "JPEG")
+        buffer.seek(0)
+
+        image = load_image(buffer)
+
+        self.assertLessEqual(max(image.size), 64)
+        self.assertEqual(image.mode, "RGB")
+
+
+class BlurHashTestCase(SimpleTestCase):
+    """Test the vectorised BlurHash encoder"""
+
+    def test_matches_reference_encoding(self):
+        """Test hashes against values produced by the reference implementation"""
+        flat = Image.new("RGB", (32, 32), (255, 255, 255))
+        split = Image.new("RGB", (40, 40), (200, 30, 30))
+        split.paste((20, 40, 220), (0, 0, 40, 20))
+
+        self.assertEqual(encode_blurhash(flat), "L9TSUA~qfQ~q~qoffQoffQfQfQfQ")
+        self.assertEqual(encode_blurhash(split), "L^G;#vo3fQo36;a~fQa~WsfRfQfR")
+
+    def test_batch_matches_single_images(self):
+        """Test that batch encoding gives the same hash as one image at a time"""
+        batch = [
+            Image.new("RGB", (20, 10), (0, 0, 0)),
+            Image.new("RGB", (64, 48), (10, 200, 90)),
+            Image.new("L", (16, 16), 128),
+        ]
+
+        self.assertEqual(
+            encode_blurhash_batch(batch), [encode_blurhash(image) for image in batch]
+        )
+        self.assertEqual(encode_blurhash_batch([]), [])
@@ -0,0 +1,177 @@
+# helpers/tests/test_janitor.py
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from authentication.models import User
+from content.models import Podcast
+from helpers.janitor import (
+    FileEntry,
+    Target,
+    clean_target,
+    clear_expired_sessions,
+    scan_directory,
+    select_victims,
+)
+from helpers.tasks import cleanup_temp_files
+
+DAY = 86400
+
+
+def touch(path, size, age):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+class SelectVictimsTestCase(SimpleTestCase):
+    """Test age expiry and LRU quota eviction"""
+
+    def test_age_then_quota(self):
+        """Test that expired files go first, then the least recently used"""
+        now = 10 * DAY
+        entries = [
+            FileEntry("old", 10, now - 3 * DAY),
+            FileEntry("lru", 40, now - 2 * 3600),
+            FileEntry("kept", 40, now - 3600),
+            FileEntry("protected", 40, now - 5 * 3600),
+            FileEntry("fresh", 40, now - 60),
+        ]
+
+        expired, evicted = select_victims(
+            entries, now, max_age=DAY, quota=100, protected={"protected"}
+        )
+
+        self.assertEqual([e.name for e in expired], ["old"])
+        self.assertEqual([e.name for e in evicted], ["lru", "kept"])
+
+
+class JanitorTestCase(SimpleTestCase):
+    """Test scanning and deleting through local and remote storages"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_scan_directory_recurses_and_filters(self):
+        """Test that nested files are listed with one entry per match"""
+        touch(os.path.join(self.root, "a.log"), 5, 0)
+        touch(os.path.join(self.root, "nested", "b.log.1"), 7, 0)
+        touch(os.path.join(self.root, "nested", "keep.txt"), 1, 0)
+
+        entries = sorted(scan_directory(self.root, "*.log*"), key=lambda e: e.name)
+
+        self.assertEqual(
+            [(os.path.basename(e.name), e.size) for e in entries],
+            [("a.log", 5), ("b.log.1", 7)],
+        )
+
+    def test_local_storage_keeps_protected_files(self):
+        """Test storage names, protection and the throughput report"""
+        storage = FileSystemStorage(location=self.root)
+        touch(os.path.join(self.root, "tmp", "orphan.mp3"), 100, 2 * DAY)
+        touch(os.path.join(self.root, "tmp", "episode.mp3"), 100, 2 * DAY)
+        touch(os.path.join(self.root, "tmp", "recent.mp3"), 100, 60)
+        target = Target(
+            "tmp",
+            "tmp",
+            storage=storage,
+            max_age=DAY,
+            protect=lambda: {"tmp/episode.mp3"},
+        )
+
+        report = clean_target(target, self.pool).as_dict()
+
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.root, "tmp"))),
+            ["episode.mp3", "recent.mp3"],
+        )
+        self.assertEqual((report["scanned"], report["deleted"]), (3, 1))
+        self.assertEqual(report["bytes_freed"], 100)
+        self.assertIn("files_per_second", report)
+
+    def test_remote_storage_quota(self):
+        """Test backends without local paths, with LRU eviction to a quota"""
+        storage = InMemoryStorage()
+        for name in ("a", "b", "c"):
+            storage.save(f"tmp/sub/{name}.bin", ContentFile(b"x" * 10))
+            time.sleep(0.01)
+
+        target = Target("tmp", "tmp", storage=storage, quota=15)
+
+        report = clean_target(target, self.pool)
+
+        self.assertEqual(storage.listdir("tmp/sub")[1], ["c.bin"])
+        self.assertEqual((report.deleted, report.evicted), (2, 2))
+
+
+class ClearSessionsTestCase(TestCase):
+    """Test chunked removal of expired sessions"""
+
+    def test_expired_sessions_are_deleted_in_chunks(self):
+        """Test that each chunk is one SELECT and one DELETE"""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [
+                Session(session_key=f"old{i}", session_data="", expire_date=now)
+                for i in range(5)
+            ]
+            + [
+                Session(
+                    session_key="live",
+                    session_data="",
+                    expire_date=now + timedelta(days=1),
+                )
+            ]
+        )
+
+        with self.assertNumQueries(7):
+            self.assertEqual(clear_expired_sessions(chunk_size=2), 5)
+
+        self.assertEqual(list(Session.objects.values_list("pk", flat=True)), ["live"])
+
+
+class CleanupTempFilesTaskTestCase(TestCase):
+    """Test the periodic cleanup task end to end"""
+
+    def test_podcast_audio_is_never_removed(self):
+        """Test that old temp files referenced by a podcast survive"""
+        media = tempfile.mkdtemp()
+        touch(os.path.join(media, "temp_podcasts", "episode.mp3"), 50, 3 * DAY)
+        touch(os.path.join(media, "temp_podcasts", "uploads", "gone.part"), 50, 3 * DAY)
+        touch(os.path.join(media, "logs", "django.log.1"), 20, 30 * DAY)
+        host = User.objects.create_user(
+            username="host", email="host@example.com", password="password"
+        )
+        Podcast.objects.bulk_create(
+            [
+                Podcast(
+                    title="Episode",
+                    slug="episode",
+                    host=host,
+                    audio_file="temp_podcasts/episode.mp3",
+                )
+            ]
+        )
+
+        with override_settings(MEDIA_ROOT=media, LOG_DIR=os.path.join(media, "logs")):
+            result = cleanup_temp_files()
+
+        audio = os.path.join(media, "temp_podcasts", "episode.mp3")
+        self.assertTrue(os.path.exists(audio))
+        self.assertEqual((result["files_cleaned"], result["bytes_freed"]), (2, 70))
+        self.assertEqual(
+            [target["label"] for target in result["targets"]],
+            ["temp_podcasts", "logs"],
+        )
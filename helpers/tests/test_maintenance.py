@@ -0,0 +1,117 @@
+# helpers/tests/test_maintenance.py
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from helpers.maintenance import (
+    Thresholds,
+    estimate_index_bloat,
+    run_maintenance,
+    select_indexes,
+    select_tables,
+)
+
+MIB = 1024 * 1024
+
+
+class SelectionTestCase(SimpleTestCase):
+    """Test which tables and indexes the statistics single out"""
+
+    def test_tables_over_thresholds(self):
+        """Test that only tables with enough dead or changed rows are picked"""
+        rows = [
+            ("public", "clean", 10000, 100, 50),
+            ("public", "small", 10, 40, 0),
+            ("public", "dead", 10000, 5000, 0),
+            ("public", "deader", 1000, 9000, 0),
+            ("public", "stale", 10000, 0, 2000),
+        ]
+
+        actions = select_tables(rows, Thresholds())
+
+        self.assertEqual(
+            [(a.action, a.target) for a in actions],
+            [
+                ("vacuum", "public.deader"),
+                ("vacuum", "public.dead"),
+                ("analyze", "public.stale"),
+            ],
+        )
+
+    def test_index_bloat_estimate(self):
+        """Test that a compact index has no bloat and a sparse one has"""
+        # 1M 8-byte keys: 20 bytes per entry, ~2.6k pages at 90% fillfactor
+        compact = estimate_index_bloat(2800, 1_000_000, 8)
+        sparse = estimate_index_bloat(10000, 1_000_000, 8)
+
+        self.assertLess(compact, 0.1)
+        self.assertGreater(sparse, 0.7)
+        self.assertEqual(estimate_index_bloat(10000, 0, 8), 0)
+
+    def test_indexes_over_threshold(self):
+        """Test that small, expression and non-B-tree indexes are ignored"""
+        rows = [
+            ("public", "t", "bloated", 80 * MIB, 10000, 1e6, "btree", False, 8),
+            ("public", "t", "tight", 22 * MIB, 2800, 1e6, "btree", False, 8),
+            ("public", "t", "tiny", 1 * MIB, 128, 10, "btree", False, 8),
+            ("public", "t", "expr", 80 * MIB, 10000, 1e6, "btree", True, None),
+            ("public", "t", "gin", 80 * MIB, 10000, 1e6, "gin", False, 8),
+        ]
+
+        actions = select_indexes(rows, Thresholds())
+
+        self.assertEqual([a.target for a in actions], ["public.bloated"])
+
+
+class SQLiteMaintenanceTestCase(TransactionTestCase):
+    """Test incremental vacuum on SQLite"""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE scratch (id INTEGER PRIMARY KEY, data TEXT)")
+            cursor.executemany(
+                "INSERT INTO scratch (data) VALUES (%s)",
+                [("x" * 2000,) for _ in range(500)],
+            )
+            cursor.execute("DELETE FROM scratch")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE scratch")
+
+    def free_pages(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA freelist_count")
+            return cursor.fetchone()[0]
+
+    def test_free_pages_are_reclaimed(self):
+        """Test that free pages are returned and statistics refreshed"""
+        report = run_maintenance(budget=60).as_dict()
+
+        self.assertEqual(
+            [(a["action"], a["status"]) for a in report["actions"]][-1],
+            ("optimize", "done"),
+        )
+        self.assertEqual(self.free_pages(), 0)
+
+        # Incremental mode from now on
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO scratch (data) VALUES (%s)",
+                [("x" * 2000,) for _ in range(500)],
+            )
+            cursor.execute("DELETE FROM scratch")
+        self.assertGreater(self.free_pages(), 0)
+
+        report = run_maintenance(budget=60, step_pages=16).as_dict()
+
+        self.assertEqual(report["actions"][0]["action"], "incremental_vacuum")
+        self.assertEqual(report["actions"][0]["status"], "done")
+        self.assertEqual(self.free_pages(), 0)
+
+    def test_budget_is_respected(self):
+        """Test that nothing starts once the budget is spent"""
+        report = run_maintenance(budget=0)
+
+        self.assertTrue(all(a.status == "skipped" for a in report.actions))
+        self.assertGreater(self.free_pages(), 0)
+        self.assertLess(report.seconds, 1)
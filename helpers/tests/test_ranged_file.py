@@ -0,0 +1,109 @@
+# helpers/tests/test_ranged_file.py
+import tempfile
+from pathlib import Path
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from helpers.ranged_file import (
+    RangeNotSatisfiable,
+    parse_range_header,
+    ranged_file_response,
+)
+
+CONTENT = bytes(range(256)) * 4
+
+
+def body(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class ParseRangeTestCase(SimpleTestCase):
+    """Test Range header parsing"""
+
+    def test_ranges_are_clamped_sorted_and_merged(self):
+        """Test suffix ranges, open ranges, clamping and merging"""
+        self.assertEqual(parse_range_header("bytes=0-99", 1024), [(0, 99)])
+        self.assertEqual(parse_range_header("bytes=-100", 1024), [(924, 1023)])
+        self.assertEqual(parse_range_header("bytes=1000-", 1024), [(1000, 1023)])
+        self.assertEqual(parse_range_header("bytes=1000-5000", 1024), [(1000, 1023)])
+        self.assertEqual(
+            parse_range_header("bytes=500-600, 0-10, 5-20, 601-700", 1024),
+            [(0, 20), (500, 700)],
+        )
+
+    def test_invalid_headers_are_ignored(self):
+        """Test that malformed or foreign-unit headers fall back to a full response"""
+        for header in ("items=0-1", "bytes=", "bytes=abc", "bytes=10-5", "bytes=-"):
+            self.assertIsNone(parse_range_header(header, 1024), header)
+
+    def test_unsatisfiable(self):
+        """Test that ranges entirely past the end are rejected"""
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header("bytes=2000-3000", 1024)
+
+
+class RangedFileResponseTestCase(SimpleTestCase):
+    """Test byte-range file responses"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.path = Path(self.media_root) / "episode.mp3"
+        self.path.write_bytes(CONTENT)
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        request = self.factory.get("/audio/", headers=headers)
+        return ranged_file_response(request, self.path, "audio/mpeg")
+
+    def test_full_response_advertises_ranges(self):
+        """Test the 200 response headers"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(body(response), CONTENT)
+
+    def test_single_range(self):
+        """Test that only the requested bytes are sent"""
+        response = self.get(Range="bytes=100-199")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 100-199/1024")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(body(response), CONTENT[100:200])
+
+    def test_multiple_ranges(self):
+        """Test multipart/byteranges framing and length"""
+        response = self.get(Range="bytes=0-9,-10")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response["Content-Type"].startswith("multipart/byteranges"))
+        payload = body(response)
+        self.assertEqual(len(payload), int(response["Content-Length"]))
+        self.assertIn(b"Content-Range: bytes 0-9/1024\r\n\r\n" + CONTENT[:10], payload)
+        self.assertIn(b"Content-Range: bytes 1014-1023/1024\r\n\r\n" + CONTENT[-10:], payload)
+
+    def test_if_range_and_conditional_requests(self):
+        """Test If-Range, If-None-Match and unsatisfiable ranges"""
+        etag = self.get()["ETag"]
+
+        self.assertEqual(self.get(Range="bytes=0-9", If_Range=etag).status_code, 206)
+        self.assertEqual(self.get(Range="bytes=0-9", If_Range='"stale"').status_code, 200)
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 304)
+        response = self.get(Range="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_proxy_offload(self):
+        """Test that X-Accel-Redirect hands the file to nginx"""
+        with override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_SENDFILE_BACKEND="x-accel-redirect",
+            MEDIA_SENDFILE_PREFIX="/protected-media/",
+        ):
+            response = self.get(Range="bytes=0-9")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/episode.mp3")
+        self.assertEqual(response.content, b"")
@@ -0,0 +1,70 @@
+# helpers/tests/test_transcripts.py
+from django.test import SimpleTestCase
+
+from helpers.transcripts import parse_html, parse_srt, parse_transcript, parse_vtt
+
+SRT = """1
+00:00:01,500 --> 00:00:04,000
+Alice: Bienvenue dans l'épisode.
+
+2
+00:01:02,000 --> 00:01:05,250
+On parle de <i>Django</i> aujourd'hui.
+"""
+
+VTT = """WEBVTT
+
+NOTE generated by the editor
+
+intro
+00:00.000 --> 00:03.000
+<v Bob>Hello &amp; welcome</v>
+
+01:00:00.000 --> 01:00:02.500
+Goodbye
+"""
+
+
+class TranscriptParsingTestCase(SimpleTestCase):
+    """Test transcript parsing into timed segments"""
+
+    def test_srt(self):
+        """Test SubRip cues, speakers and inline tags"""
+        segments = parse_srt(SRT)
+
+        self.assertEqual(len(segments), 2)
+        self.assertEqual((segments[0].start, segments[0].end), (1.5, 4.0))
+        self.assertEqual(segments[0].speaker, "Alice")
+        self.assertEqual(segments[0].text, "Bienvenue dans l'épisode.")
+        self.assertEqual(segments[1].start, 62.0)
+        self.assertEqual(segments[1].text, "On parle de Django aujourd'hui.")
+
+    def test_vtt(self):
+        """Test WebVTT voices, cue identifiers and skipped NOTE blocks"""
+        segments = parse_vtt(VTT)
+
+        self.assertEqual([s.text for s in segments], ["Hello & welcome", "Goodbye"])
+        self.assertEqual(segments[0].speaker, "Bob")
+        self.assertEqual((segments[1].start, segments[1].end), (3600.0, 3602.5))
+
+    def test_html(self):
+        """Test timestamped paragraphs; ends come from the next paragraph"""
+        segments = parse_html(
+            "<p>[00:00:10] Host: Intro</p><p>No timestamp here</p>"
+            "<p>(01:30) Guest: Answer</p>"
+        )
+
+        self.assertEqual(
+            [(s.start, s.end, s.speaker, s.text) for s in segments],
+            [
+                (10.0, 90.0, "Host", "Intro"),
+                (None, None, "", "No timestamp here"),
+                (90.0, None, "Guest", "Answer"),
+            ],
+        )
+
+    def test_format_detection(self):
+        """Test that the format is chosen from the extension or the content"""
+        self.assertEqual(len(parse_transcript("\ufeff" + VTT)), 2)
+        self.assertEqual(len(parse_transcript(SRT, "episode.txt")), 2)
+        self.assertEqual(parse_transcript("<p>Hi</p>", "t.html")[0].text, "Hi")
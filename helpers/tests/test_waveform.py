@@ -0,0 +1,84 @@
+# helpers/tests/test_waveform.py
+import tempfile
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from helpers.waveform import (
+    WaveformError,
+    compute_peaks,
+    compute_waveform,
+    decode_peaks,
+)
+
+
+def write_wav(path, samples, sample_rate=8000, channels=1, sample_width=2):
+    """Write float samples in [-1, 1] as PCM"""
+    scale = 2 ** (8 * sample_width - 1) - 1
+    ints = np.round(np.repeat(samples, channels) * scale).astype("<i4")
+    if sample_width == 2:
+        raw = ints.astype("<i2").tobytes()
+    else:
+        # 24-bit: drop the low byte of each left-aligned little-endian int32
+        raw = (ints << 8).view(np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(raw)
+
+
+class WaveformTestCase(SimpleTestCase):
+    """Test streaming peak extraction and the binary waveform format"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        t = np.arange(8000 * 3) / 8000
+        # Loud first second, quiet afterwards
+        self.samples = np.sin(2 * np.pi * 220 * t) * np.where(t < 1, 0.5, 0.1)
+
+    def test_wav_levels_and_peaks(self):
+        """Test zoom levels, bucket sizes and peak values for a 16-bit WAV"""
+        path = self.tmp / "episode.wav"
+        write_wav(path, self.samples, channels=2)
+
+        sample_rate, levels = decode_peaks(compute_waveform(path))
+
+        self.assertEqual(sample_rate, 8000)
+        self.assertEqual([spb for spb, _ in levels], [96, 24, 6])
+        self.assertEqual([len(peaks) for _, peaks in levels], [250, 1000, 4000])
+        coarse = levels[0][1]
+        self.assertEqual(coarse.dtype, np.int8)
+        self.assertEqual(coarse[0].tolist(), [-63, 63])
+        self.assertEqual(coarse[-1].tolist(), [-13, 13])
+
+    def test_24bit_wav(self):
+        """Test that 24-bit PCM keeps its sign"""
+        path = self.tmp / "episode.wav"
+        write_wav(path, self.samples, sample_width=3)
+
+        _, levels = decode_peaks(compute_waveform(path))
+
+        self.assertEqual(levels[0][1][0].tolist(), [-63, 63])
+
+    def test_block_size_does_not_change_peaks(self):
+        """Test that streaming in uneven blocks gives the same peaks"""
+        whole = compute_peaks([self.samples], len(self.samples), buckets=100)
+        blocks = np.array_split(self.samples, [7, 500, 9001, 20000])
+        streamed = compute_peaks(iter(blocks), len(self.samples), buckets=100)
+
+        for (spb_a, a), (spb_b, b) in zip(whole, streamed):
+            self.assertEqual(spb_a, spb_b)
+            np.testing.assert_array_equal(a, b)
+
+    @patch("helpers.waveform.shutil.which", return_value=None)
+    def test_other_formats_need_ffmpeg(self, _):
+        """Test that non-WAV audio is rejected when no decoder is installed"""
+        path = self.tmp / "episode.mp3"
+        path.write_bytes(b"\xff\xfb\x90\x00" + b"\x00" * 413)
+
+        with self.assertRaises(WaveformError):
+            compute_waveform(path)
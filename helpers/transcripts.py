@@ -0,0 +1,158 @@
+"""
+Transcript parsing.
+
+Turns SubRip (``.srt``), WebVTT (``.vtt``) and the rich-text HTML transcripts
+written in the admin into a list of timed segments. HTML paragraphs may start
+with a ``[hh:mm:ss]`` / ``mm:ss`` timestamp and a ``Speaker:`` prefix; when a
+paragraph has no timestamp its segment has no start time but remains
+searchable.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+_TIMESTAMP = r"(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d{1,3}))?"
+_CUE_TIMING = re.compile(rf"^\s*{_TIMESTAMP}\s*-->\s*{_TIMESTAMP}", re.MULTILINE)
+_LEADING_TIMESTAMP = re.compile(rf"^\s*[\[(]?{_TIMESTAMP}[\])]?\s*[-–—:]?\s*")
+_SPEAKER = re.compile(r"^\s*([A-Z][\w .'-]{0,60}?)\s*:\s+(?=\S)")
+_VOICE = re.compile(r"<v(?:\.[\w.-]+)?\s+([^>]+)>")
+_TAG = re.compile(r"<[^>]+>")
+
+# Block-level elements that delimit HTML transcript paragraphs
+_BLOCK_TAGS = {"p", "li", "div", "h1", "h2", "h3", "h4", "h5", "h6", "br", "tr"}
+
+
+@dataclass
+class Segment:
+    start: float = None
+    end: float = None
+    speaker: str = ""
+    text: str = ""
+
+
+def _seconds(hours, minutes, seconds, fraction):
+    value = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+    if fraction:
+        value += int(fraction.ljust(3, "0")) / 1000
+    return value
+
+
+def _split_speaker(text):
+    match = _SPEAKER.match(text)
+    if match:
+        return match.group(1).strip(), text[match.end():].strip()
+    return "", text.strip()
+
+
+def _parse_cues(content, webvtt):
+    segments = []
+    for block in re.split(r"\n\s*\n", content.replace("\r\n", "\n").replace("\r", "\n")):
+        lines = [line for line in block.split("\n") if line.strip()]
+        if not lines:
+            continue
+        if webvtt and lines[0].split(None, 1)[0] in ("WEBVTT", "NOTE", "STYLE", "REGION"):
+            continue
+        # Optional cue identifier / SRT counter before the timing line
+        timing_index = next(
+            (i for i, line in enumerate(lines[:2]) if _CUE_TIMING.match(line)), None
+        )
+        if timing_index is None:
+            continue
+        groups = _CUE_TIMING.match(lines[timing_index]).groups()
+        raw = " ".join(lines[timing_index + 1:])
+
+        speaker = ""
+        voice = _VOICE.search(raw)
+        if voice:
+            speaker = voice.group(1).strip()
+        text = html.unescape(_TAG.sub("", raw)).strip()
+        if not speaker:
+            speaker, text = _split_speaker(text)
+        if text:
+            segments.append(
+                Segment(_seconds(*groups[:4]), _seconds(*groups[4:]), speaker, text)
+            )
+    return segments
+
+
+def parse_srt(content):
+    """Parse SubRip subtitles into segments"""
+    return _parse_cues(content, webvtt=False)
+
+
+def parse_vtt(content):
+    """Parse WebVTT captions into segments, using ``<v>`` voice tags as speakers"""
+    return _parse_cues(content, webvtt=True)
+
+
+class _ParagraphParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._current = []
+
+    def _flush(self):
+        text = " ".join("".join(self._current).split())
+        if text:
+            self.paragraphs.append(text)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def parse_html(content):
+    """
+    Parse a rich-text transcript: one segment per paragraph. A paragraph's
+    end time is the next timestamped paragraph's start.
+    """
+    parser = _ParagraphParser()
+    parser.feed(content or "")
+    parser.close()
+
+    segments = []
+    for paragraph in parser.paragraphs:
+        start = None
+        match = _LEADING_TIMESTAMP.match(paragraph)
+        if match:
+            start = _seconds(*match.groups())
+            paragraph = paragraph[match.end():]
+        speaker, text = _split_speaker(paragraph)
+        if text:
+            segments.append(Segment(start, None, speaker, text))
+
+    next_start = None
+    for segment in reversed(segments):
+        if segment.start is not None:
+            segment.end, next_start = next_start, segment.start
+    return segments
+
+
+def parse_transcript(content, filename=""):
+    """
+    Parse a transcript, choosing the format from the file extension or,
+    failing that, from the content.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    stripped = content.lstrip("\ufeff \t\r\n")
+    if extension == "vtt" or stripped.startswith("WEBVTT"):
+        return parse_vtt(stripped)
+    if extension == "srt" or (
+        extension not in ("html", "htm") and _CUE_TIMING.search(stripped[:500])
+    ):
+        return parse_srt(stripped)
+    return parse_html(content)
@@ -0,0 +1,237 @@
+"""
+Waveform peak extraction for the podcast player.
+
+Audio is decoded in fixed-size blocks (natively for PCM WAV, through a local
+``ffmpeg`` binary for other formats when one is available) and reduced with
+NumPy to min/max pairs per bucket. The finest level has ``WAVEFORM_BUCKETS``
+buckets; each coarser zoom level merges ``WAVEFORM_ZOOM_FACTOR`` buckets.
+
+The result is packed into a small binary blob::
+
+    header  "<4sBBHI"  magic b"WVPK", version, level count, 0, sample rate
+    levels  "<II"      bucket count, samples per bucket   (coarsest first)
+    data    int8       min, max, min, max, ...            (same level order)
+
+Peaks are scaled to -127..127, so a 4096-bucket waveform with three zoom
+levels weighs about 10 KB whatever the episode length.
+"""
+
+import math
+import shutil
+import struct
+import subprocess
+import wave
+
+import numpy as np
+
+from .audio import InvalidAudioError, probe_audio
+
+WAVEFORM_BUCKETS = 4096
+WAVEFORM_ZOOM_FACTOR = 4
+WAVEFORM_LEVELS = 3
+BLOCK_FRAMES = 64 * 1024
+# Sample rate requested from ffmpeg: peaks do not need more
+DECODE_SAMPLE_RATE = 8000
+
+MAGIC = b"WVPK"
+VERSION = 1
+_HEADER = struct.Struct("<4sBBHI")
+_LEVEL = struct.Struct("<II")
+
+
+class WaveformError(ValueError):
+    """Audio could not be decoded into a waveform"""
+
+
+def _pcm_to_float(raw, sample_width):
+    if sample_width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if sample_width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    if sample_width == 3:
+        # 24-bit: left-align in int32 to keep the sign bit
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(triplets), 4), dtype=np.uint8)
+        padded[:, 1:] = triplets
+        return padded.view("<i4").ravel().astype(np.float32) / 2**31
+    if sample_width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2**31
+    raise WaveformError(f"Unsupported PCM sample width: {sample_width}")
+
+
+def read_wav(path, block_frames=BLOCK_FRAMES):
+    """
+    Open a PCM WAV file for block decoding.
+
+    Returns:
+        tuple: ``(sample_rate, total_frames, blocks)`` where ``blocks`` yields
+        mono float32 arrays in [-1, 1]
+
+    Raises:
+        WaveformError: If the file is not PCM WAV
+    """
+    try:
+        wav = wave.open(str(path), "rb")
+    except (wave.Error, EOFError) as e:
+        raise WaveformError(f"Not a PCM WAV file: {e}") from e
+    channels = wav.getnchannels()
+    sample_width = wav.getsampwidth()
+
+    def blocks():
+        with wav:
+            while True:
+                raw = wav.readframes(block_frames)
+                if not raw:
+                    return
+                samples = _pcm_to_float(raw, sample_width)
+                yield samples.reshape(-1, channels).mean(axis=1)
+
+    return wav.getframerate(), wav.getnframes(), blocks()
+
+
+def read_ffmpeg(path, ffmpeg, duration=None, block_frames=BLOCK_FRAMES):
+    """
+    Decode any format ffmpeg understands into mono 16-bit PCM at
+    ``DECODE_SAMPLE_RATE``, streamed through a pipe.
+
+    Returns:
+        tuple: ``(sample_rate, total_frames, blocks)`` as ``read_wav``
+    """
+    if duration is None:
+        try:
+            duration = probe_audio(path).duration
+        except InvalidAudioError as e:
+            raise WaveformError(str(e)) from e
+    if not duration:
+        raise WaveformError("Unknown audio duration")
+
+    def blocks():
+        command = [
+            ffmpeg,
+            "-v", "error",
+            "-i", str(path),
+            "-f", "s16le",
+            "-ac", "1",
+            "-ar", str(DECODE_SAMPLE_RATE),
+            "pipe:1",
+        ]
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                raw = process.stdout.read(block_frames * 2)
+                if not raw:
+                    break
+                # Drop a trailing odd byte, if any
+                yield _pcm_to_float(raw[: len(raw) // 2 * 2], 2)
+        finally:
+            # Closing the pipe stops ffmpeg if decoding was abandoned
+            process.stdout.close()
+            process.wait()
+        if process.returncode != 0:
+            raise WaveformError(f"ffmpeg exited with status {process.returncode}")
+
+    return DECODE_SAMPLE_RATE, int(duration * DECODE_SAMPLE_RATE), blocks()
+
+
+def compute_peaks(
+    blocks,
+    total_frames,
+    buckets=WAVEFORM_BUCKETS,
+    factor=WAVEFORM_ZOOM_FACTOR,
+    levels=WAVEFORM_LEVELS,
+):
+    """
+    Reduce decoded blocks to min/max peaks at several zoom levels.
+
+    Only one block and the running per-bucket results are held in memory.
+
+    Returns:
+        list: ``(samples_per_bucket, int8 array of shape (n, 2))``, coarsest
+        level first
+    """
+    samples_per_bucket = max(1, math.ceil(total_frames / buckets))
+    mins, maxs = [], []
+    carry = np.empty(0, dtype=np.float32)
+    for block in blocks:
+        samples = np.concatenate((carry, block)) if len(carry) else block
+        usable = len(samples) // samples_per_bucket * samples_per_bucket
+        if usable:
+            frames = samples[:usable].reshape(-1, samples_per_bucket)
+            mins.append(frames.min(axis=1))
+            maxs.append(frames.max(axis=1))
+        carry = samples[usable:]
+    if len(carry):
+        mins.append(carry.min(keepdims=True))
+        maxs.append(carry.max(keepdims=True))
+    if not mins:
+        raise WaveformError("No audio samples decoded")
+
+    peaks = np.stack((np.concatenate(mins), np.concatenate(maxs)), axis=1)
+    result = [(samples_per_bucket, peaks)]
+    for _ in range(levels - 1):
+        spb, finer = result[-1]
+        pad = -len(finer) % factor
+        if pad:
+            # Repeat the last bucket so padding never widens the range
+            finer = np.concatenate((finer, np.repeat(finer[-1:], pad, axis=0)))
+        grouped = finer.reshape(-1, factor, 2)
+        coarser = np.stack(
+            (grouped[:, :, 0].min(axis=1), grouped[:, :, 1].max(axis=1)), axis=1
+        )
+        result.append((spb * factor, coarser))
+
+    return [
+        (spb, np.clip(np.round(level * 127), -127, 127).astype(np.int8))
+        for spb, level in reversed(result)
+    ]
+
+
+def encode_peaks(sample_rate, levels):
+    """Pack peak levels into the binary blob described in the module docstring"""
+    header = _HEADER.pack(MAGIC, VERSION, len(levels), 0, sample_rate)
+    index = b"".join(_LEVEL.pack(len(peaks), spb) for spb, peaks in levels)
+    return header + index + b"".join(peaks.tobytes() for _, peaks in levels)
+
+
+def decode_peaks(blob):
+    """
+    Unpack a waveform blob.
+
+    Returns:
+        tuple: ``(sample_rate, [(samples_per_bucket, int8 array (n, 2))])``
+    """
+    magic, version, count, _, sample_rate = _HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise WaveformError("Not a waveform blob")
+    offset = _HEADER.size + count * _LEVEL.size
+    levels = []
+    for i in range(count):
+        buckets, spb = _LEVEL.unpack_from(blob, _HEADER.size + i * _LEVEL.size)
+        data = np.frombuffer(blob, dtype=np.int8, count=buckets * 2, offset=offset)
+        levels.append((spb, data.reshape(-1, 2)))
+        offset += buckets * 2
+    return sample_rate, levels
+
+
+def compute_waveform(path, duration=None, ffmpeg=None):
+    """
+    Decode an audio file and return its waveform blob.
+
+    Args:
+        path (str): Local audio file
+        duration (float): Known duration, used to size buckets for ffmpeg
+        ffmpeg (str): ffmpeg binary; defaults to the one on ``PATH``
+
+    Raises:
+        WaveformError: If the audio cannot be decoded
+    """
+    try:
+        sample_rate, total_frames, blocks = read_wav(path)
+    except WaveformError:
+        ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise WaveformError("Only PCM WAV can be decoded without ffmpeg")
+        sample_rate, total_frames, blocks = read_ffmpeg(path, ffmpeg, duration)
+    return encode_peaks(sample_rate, compute_peaks(blocks, total_frames))
@@ -1,35 +1,34 @@
 import os
-import requests
+import sys
 from urllib.parse import urlparse
 from pathlib import Path
 
+# Permet l'exécution depuis la racine du projet : python utils/download_images.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers.downloader import DownloadError, download, download_many
+
+
+def image_path(url, folder):
+    """Destination path of an image URL inside ``folder``"""
+    filename = os.path.basename(urlparse(url).path)
+    return Path(folder) / filename
+
+
 def download_image(url, folder):
     """Download an image from URL and save it to the specified folder."""
     if not url:
         return None
-    
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-    
-    # Get filename from URL
-    parsed_url = urlparse(url)
-    filename = os.path.basename(parsed_url.path)
-    
-    # Full path for saving
-    save_path = os.path.join(folder, filename)
-    
-    # Download image
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(1024):
-                f.write(chunk)
-        print(f"Downloaded: {url} -> {save_path}")
-        # Return relative path from media folder
-        return os.path.join(os.path.basename(folder), filename)
-    else:
-        print(f"Failed to download: {url}")
+
+    save_path = image_path(url, folder)
+    try:
+        download(url, save_path)
+    except DownloadError as e:
+        print(e)
         return None
+    print(f"Downloaded: {url} -> {save_path}")
+    # Return relative path from media folder
+    return os.path.join(os.path.basename(folder), save_path.name)
 
 # URLs à télécharger
 images = {
@@ -54,12 +53,18 @@ images = {
 def main():
     # Set media root folder
     media_root = Path('media')
-    
-    # Download all images
-    for folder, urls in images.items():
-        folder_path = media_root / folder
-        for url in urls:
-            download_image(url, folder_path)
+
+    # Download all images concurrently
+    jobs = [
+        (url, image_path(url, media_root / folder))
+        for folder, urls in images.items()
+        for url in urls
+    ]
+    for (url, save_path), result in zip(jobs, download_many(jobs)):
+        if isinstance(result, Exception):
+            print(f"Failed to download: {url} ({result})")
+        else:
+            print(f"Downloaded: {url} -> {save_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()